@@ -341,85 +341,129 @@ def detect_usb_cameras():
         }), 500
 
 
+@camera_bp.route('/streams', methods=['GET'])
+def get_streams_status():
+    """
+    Estado de los streams compartidos: clientes y fps por cámara, y los
+    buses de frames con sus suscriptores (stream, detección, evidencia)
+    """
+    from services.bus_frames import bus_frames
+    from services.difusion_camaras import difusion_camaras
+    return jsonify({
+        "success": True,
+        "data": {
+            **difusion_camaras.resumen(),
+            "buses": bus_frames.resumen()["cameras"]
+        }
+    }), 200
+
+
+@camera_bp.route('/<int:camera_id>/snapshot', methods=['GET'])
+def snapshot_camera(camera_id):
+    """
+    Captura de evidencia: el frame más reciente de la cámara como JPEG
+    
+    Se toma del bus de frames, así que si la cámara ya se está
+    transmitiendo o muestreando no se abre ni se decodifica de nuevo.
+    
+    Args:
+        camera_id: ID de la cámara
+        
+    Returns:
+        Imagen JPEG
+    """
+    import cv2
+    from flask import Response
+    from services.bus_frames import bus_frames
+    
+    try:
+        camera_data = CameraService.get_camera_by_id(camera_id)
+        if not camera_data.get("activa"):
+            return jsonify({
+                "success": False,
+                "error": "La cámara no está activa"
+            }), 400
+        
+        bus = bus_frames.suscribir(camera_data, "evidencia")
+        try:
+            frame, timestamp = bus.ultimo(timeout=5.0)
+        finally:
+            bus_frames.desuscribir(bus, "evidencia")
+        
+        if frame is None:
+            return jsonify({
+                "success": False,
+                "error": "La cámara no entregó ningún frame"
+            }), 504
+        
+        ret, buffer = cv2.imencode('.jpg', frame, [cv2.IMWRITE_JPEG_QUALITY, 90])
+        if not ret:
+            raise RuntimeError("No se pudo codificar el frame")
+        
+        response = Response(buffer.tobytes(), mimetype='image/jpeg')
+        response.headers['X-Frame-Timestamp'] = f"{timestamp:.3f}"
+        return response
+        
+    except ValueError as ve:
+        return jsonify({
+            "success": False,
+            "error": str(ve)
+        }), 404
+    except Exception as e:
+        print(f"❌ Error capturando evidencia de cámara {camera_id}: {str(e)}")
+        print(traceback.format_exc())
+        return jsonify({
+            "success": False,
+            "error": str(e)
+        }), 500
+
+
 @camera_bp.route('/<int:camera_id>/stream', methods=['GET'])
 def stream_camera(camera_id):
     """
     Stream de video de una cámara específica
     
+    Todos los clientes de una misma cámara comparten una sola codificación
+    JPEG (services/difusion_camaras.py) y la captura sale del bus de frames,
+    compartida con la ingesta y las evidencias (services/bus_frames.py)
+    
     Args:
         camera_id: ID de la cámara
+    
+    Query params (opcionales, por defecto según resolution/fps de la cámara):
+        max_width: Ancho máximo del frame enviado (px)
+        fps: Frames por segundo enviados
+        quality: Calidad JPEG (20-95)
         
     Returns:
         Stream de video en formato multipart
     """
     from flask import Response
-    import cv2
+    from services.difusion_camaras import difusion_camaras, perfil_stream
     
-    def generate_frames(camera_data):
+    def generate_frames(camera_data, perfil):
         """Generador de frames para streaming"""
-        camera = None
+        difusor = difusion_camaras.suscribir(camera_data, perfil)
         
         try:
-            camera_type = camera_data.get("type", "USB")
-            
-            if camera_type == "USB":
-                # Obtener el índice de la cámara desde el campo url
-                url = camera_data.get("url", "0")
-                device_index = 0  # Valor por defecto
-                
-                try:
-                    # El índice está guardado como string en el campo url
-                    # Puede ser "0", "1", "2", etc. o un deviceId del navegador
-                    if url.isdigit():
-                        device_index = int(url)
-                    else:
-                        # Si no es un número, intentar extraer el índice del final
-                        # o usar el primer dispositivo disponible
-                        print(f"⚠️ URL '{url}' no es un índice numérico, usando 0")
-                        device_index = 0
-                    
-                    print(f"📹 Abriendo cámara USB con índice: {device_index} (desde url='{url}')")
-                except (ValueError, AttributeError) as e:
-                    print(f"⚠️ Error parseando URL '{url}': {e}, usando índice 0")
-                    device_index = 0
-                
-                camera = cv2.VideoCapture(device_index)
-            else:  # IP Camera
-                url = camera_data.get("url") or camera_data.get("ip")
-                if not url:
-                    return
-                camera = cv2.VideoCapture(url)
-            
-            if not camera.isOpened():
-                print(f"❌ No se pudo abrir la cámara {camera_id}")
-                return
-            
-            print(f"✅ Stream iniciado para cámara {camera_id}")
-            
+            seq = 0
             while True:
-                success, frame = camera.read()
-                if not success:
-                    break
-                
-                # Codificar frame como JPEG
-                ret, buffer = cv2.imencode('.jpg', frame)
-                if not ret:
+                # Si el cliente es lento, el próximo frame es el más reciente
+                # (los intermedios se saltan en lugar de acumularse)
+                seq, frame_bytes = difusor.siguiente(perfil, seq)
+                if frame_bytes is None:
+                    if not difusor.activo:
+                        break
                     continue
                 
-                frame_bytes = buffer.tobytes()
-                
                 # Enviar frame en formato multipart
                 yield (b'--frame\r\n'
                        b'Content-Type: image/jpeg\r\n\r\n' + frame_bytes + b'\r\n')
                 
         except GeneratorExit:
-            print(f"🔌 Cliente desconectado del stream {camera_id}")
-        except Exception as e:
-            print(f"❌ Error en stream de cámara {camera_id}: {str(e)}")
+            pass
         finally:
-            if camera:
-                camera.release()
-                print(f"🔒 Cámara {camera_id} liberada")
+            difusion_camaras.desuscribir(difusor, perfil)
     
     try:
         camera_data = CameraService.get_camera_by_id(camera_id)
@@ -438,8 +482,16 @@ def stream_camera(camera_id):
                 "error": "La cámara no está activa"
             }), 400
         
+        try:
+            perfil = perfil_stream(camera_data, request.args)
+        except ValueError as ve:
+            return jsonify({
+                "success": False,
+                "error": str(ve)
+            }), 400
+        
         return Response(
-            generate_frames(camera_data),
+            generate_frames(camera_data, perfil),
             mimetype='multipart/x-mixed-replace; boundary=frame'
         )
         
@@ -40,7 +40,8 @@ def create_caso():
             try:
                 encodings_result = encodings_generator.process_case_photos(
                     person_name=persona_nombre,
-                    photos=data["photos"]
+                    photos=data["photos"],
+                    caso_id=caso_id
                 )
 
                 if encodings_result["success"]:
@@ -6,13 +6,19 @@ from flask import Blueprint, request, jsonify
 import cv2
 import numpy as np
 import base64
+import os
+import time
 import traceback
 from datetime import datetime
 
 from models.procesador_facefind import ProcesadorFaceFind
+from models.cola_admision import ColaAdmision, RECHAZADO, REEMPLAZADO
+from models.intervalo_captura import AsesorIntervalo, presion_cola
+from models.agenda_alertas import ACTIVO, INACTIVO, SOLO_CRITICAS, es_critica
 from models.frame import Frame
 from services.alerta_service import AlertaService
 from services.camera_service import CameraService
+from services.horario_service import HorarioService
 
 # Crear Blueprint
 detection_bp = Blueprint('detection', __name__)
@@ -20,15 +26,43 @@ detection_bp = Blueprint('detection', __name__)
 # Instancia global del procesador
 detection_service = None
 
+# Cola de admisión delante del motor y actividad por cámara
+# (se conservan al reinicializar el servicio)
+cola_deteccion = None
+asesor_intervalo = None
+
+# Ingesta de cámaras IP en el servidor (CAMERA_INGESTION_ENABLED)
+ingesta_camaras = None
+
 def initialize_detection_service():
-    """Inicializa o reinicializa el servicio de detección"""
-    global detection_service
+    """
+    Inicializa o reinicializa el servicio de detección. Si ya había uno,
+    el nuevo conserva sus ajustes por cámara y estadísticas; para solo
+    recargar encodings usar recargar_galeria().
+    """
+    global detection_service, cola_deteccion, asesor_intervalo
     try:
-        detection_service = ProcesadorFaceFind(
+        from config import Config
+        if cola_deteccion is None:
+            cola_deteccion = ColaAdmision(
+                max_concurrentes=Config.DETECTION_MAX_CONCURRENT,
+                max_cola=Config.DETECTION_QUEUE_SIZE,
+                espera_max_s=Config.DETECTION_QUEUE_TIMEOUT_S
+            )
+        if asesor_intervalo is None:
+            asesor_intervalo = AsesorIntervalo(
+                minimo_s=Config.CAPTURE_INTERVAL_MIN_S,
+                maximo_s=Config.CAPTURE_INTERVAL_MAX_S,
+                match_hold_s=Config.CAPTURE_INTERVAL_MATCH_HOLD_S
+            )
+        nuevo = ProcesadorFaceFind(
             tolerance=0.55,
             max_faces=3,
             enable_parallel=True
         )
+        if detection_service is not None:
+            nuevo.heredar_estado(detection_service)
+        detection_service = nuevo
         print(f"✅ Servicio de detección inicializado con {len(detection_service.known_encodings)} encodings")
         print(f"🎯 Detección: hasta {detection_service.max_faces} rostros por frame")
         print(f"🔄 Deduplicación: activada (sin alertas duplicadas)")
@@ -38,6 +72,38 @@ def initialize_detection_service():
         detection_service = None
         return False
 
+def recargar_galeria():
+    """
+    Recarga solo los encodings del servicio de detección (tras subir o
+    borrar fotos, re-codificar o /reload-encodings). El motor no se
+    reconstruye: los ajustes por cámara, el cribado, el planificador de
+    latencia y las estadísticas del prefiltro se conservan.
+    """
+    if detection_service is None:
+        return initialize_detection_service()
+    try:
+        total = detection_service.reload_gallery()
+        print(f"🔄 Galería recargada con {total} encodings")
+        return True
+    except Exception as e:
+        print(f"⚠️  Error recargando la galería: {e}")
+        return False
+
+def notificar_cambio_estado_caso(caso_id, nuevo_estado):
+    """
+    Saca o vuelve a meter los embeddings de un caso en la galería según su
+    nuevo estado (sin recargar toda la galería)
+    """
+    if detection_service is None or caso_id is None:
+        return None
+    try:
+        resultado = detection_service.on_case_status_changed(caso_id, nuevo_estado)
+        print(f"🔄 Galería: caso {caso_id} → {nuevo_estado} ({resultado['action']})")
+        return resultado
+    except Exception as e:
+        print(f"⚠️ No se pudo actualizar la galería para el caso {caso_id}: {e}")
+        return None
+
 def clean_results_for_json(results):
     """Limpia los resultados para que sean serializables en JSON"""
     def convert_to_json_serializable(obj):
@@ -96,8 +162,263 @@ def clean_results_for_json(results):
         
         clean_results["faces"].append(clean_face)
     
+    # Rostros descartados antes de codificar (muy pequeños o borrosos)
+    if results.get("rejected_faces") is not None:
+        clean_results["rejected_faces"] = {
+            k: int(v) for k, v in results["rejected_faces"].items()
+        }
+    
+    # Decisión del cribado de frames (si la cámara lo usa)
+    if results.get("prescreen") is not None:
+        clean_results["prescreen"] = {
+            k: convert_to_json_serializable(v) for k, v in results["prescreen"].items()
+        }
+    
+    # Presupuesto de latencia y degradaciones aplicadas para cumplirlo
+    if results.get("latency_budget_ms") is not None:
+        clean_results["latency_budget_ms"] = float(results["latency_budget_ms"])
+        clean_results["degradations"] = list(results.get("degradations", []))
+        clean_results["deadline_met"] = bool(results.get("deadline_met", True))
+    
+    # Horario de alertas de la cámara (critical_only: fuera de horario con criticalOverride)
+    if results.get("schedule_mode") is not None:
+        clean_results["schedule_mode"] = results["schedule_mode"]
+    
     return clean_results
 
+def _respuesta_no_admitido(turno):
+    """Respuesta para un request que no obtuvo turno en la cola de detección"""
+    if turno.estado == REEMPLAZADO:
+        return jsonify({
+            "success": False,
+            "superseded": True,
+            "error": "Frame reemplazado por uno más reciente de la misma cámara"
+        }), 409
+    
+    retry_after = turno.retry_after
+    mensaje = ("Servidor de detección saturado, reintentar más tarde" if turno.estado == RECHAZADO
+               else "El frame esperó demasiado en la cola y se descartó")
+    respuesta = jsonify({
+        "success": False,
+        "error": mensaje,
+        "retry_after": retry_after,
+        "next_capture_ms": retry_after * 1000
+    })
+    respuesta.headers["Retry-After"] = str(retry_after)
+    return respuesta, (429 if turno.estado == RECHAZADO else 503)
+
+def peso_camara(camara_id) -> float:
+    """
+    Peso de la cámara en el reparto justo de la cola: su prioridad
+    configurada, aumentada mientras tenga matches recientes
+    """
+    from config import Config
+    try:
+        prioridad = float(detection_service.ajustes_camara(camara_id).get("priority", 1.0))
+    except (TypeError, ValueError):
+        prioridad = 1.0
+    if not prioridad > 0:  # también descarta NaN
+        prioridad = 1.0
+    return prioridad * (1 + Config.DETECTION_MATCH_PRIORITY_BOOST * asesor_intervalo.actividad_matches(camara_id))
+
+def _respuesta_fuera_de_horario(camara_id):
+    """Frame de una cámara fuera de horario: no se detecta, solo se cuenta"""
+    from config import Config
+    HorarioService.agenda().registrar_frame_omitido(camara_id)
+    return jsonify({
+        "success": True,
+        "data": {
+            "timestamp": time.time(),
+            "faces_detected": 0,
+            "faces": [],
+            "schedule_mode": INACTIVO,
+            "alertas_creadas": [],
+            "next_capture_ms": int(Config.CAPTURE_INTERVAL_MAX_S * 1000)
+        }
+    })
+
+def procesar_frame_camara(frame, camara_id, ubicacion='Ubicación desconocida',
+                          latitud=0.0, longitud=0.0, latency_budget_ms=None, inicio=None,
+                          modo_horario=ACTIVO, camara=None):
+    """
+    Pasa un frame por la cola de admisión y el motor de detección y crea
+    las alertas de los matches. Lo usan el endpoint /detect-faces y la
+    ingesta de cámaras IP del servidor.
+    
+    Args:
+        frame: Frame BGR (numpy)
+        camara_id: Cámara de origen
+        ubicacion: Ubicación para los logs
+        latitud / longitud: Coordenadas si la cámara no tiene en la BD
+        latency_budget_ms: Presupuesto de latencia (None = el de la cámara)
+        inicio: Instante en que llegó el frame
+        modo_horario: Modo de la cámara según su horario de alertas; con
+                      critical_only solo los matches críticos crean alerta
+                      y el resto queda en el registro fuera de horario
+        camara: Fila de la cámara si el llamador ya la tiene (la ingesta);
+                si no, se consulta en la BD solo cuando hay que crear una alerta
+    
+    Returns:
+        (turno, results, alertas_creadas); results es None si el frame no
+        obtuvo turno en la cola
+    """
+    # Esperar turno: como máximo DETECTION_MAX_CONCURRENT detecciones a la vez,
+    # repartidas entre cámaras según su peso
+    turno = cola_deteccion.entrar(camara_id, peso=peso_camara(camara_id))
+    if not turno.admitido:
+        return turno, None, []
+    
+    try:
+        # Procesar frame (con los ajustes de detección de la cámara)
+        results = detection_service.process_frame(
+            frame, camara_id, latency_budget_ms=latency_budget_ms, inicio=inicio
+        )
+    finally:
+        cola_deteccion.salir(turno)
+    
+    asesor_intervalo.registrar(camara_id, results)
+    results["schedule_mode"] = modo_horario
+    
+    # 🚨 CREAR ALERTAS AUTOMÁTICAMENTE si hay matches
+    alertas_creadas = []
+    
+    # 📍 Coordenadas de la cámara: se resuelven al crear la primera alerta
+    coordenadas = None
+    
+    print(f"\n{'='*60}")
+    print(f"📊 DETECCIÓN: {results['faces_detected']} rostro(s) detectado(s)")
+    print(f"📷 Cámara ID: {camara_id}")
+    print(f"📍 Ubicación: {ubicacion}")
+    print(f"{'='*60}\n")
+    
+    if results['faces_detected'] > 0:
+        # Crear Frame object una vez
+        frame_obj = Frame(frame, datetime.now(), camara_id)
+        print(f"✅ Frame object creado")
+        
+        # Por cada rostro detectado con match
+        for face in results['faces']:
+            print(f"\n👤 Procesando rostro #{face['face_id']}")
+            print(f"   Match found: {face['match_found']}")
+            print(f"   Best match: {face['best_match_name']}")
+            print(f"   Similitud: {face['similarity_percentage']}%")
+            
+            if face['match_found'] and face.get('caso_id'):
+                caso_id = face['caso_id']  # ✅ Caso ID automático del match
+                print(f"   🔍 Caso ID (automático): {caso_id}")
+                
+                similitud = face['similarity_percentage'] / 100.0
+                if modo_horario == SOLO_CRITICAS and not es_critica(similitud):
+                    # Fuera de horario: registro compacto en lugar de alerta completa
+                    HorarioService.agenda().registrar_match(camara_id, caso_id, similitud)
+                    print(f"   🌙 Fuera de horario: match no crítico registrado sin alerta")
+                    continue
+                
+                if coordenadas is None:
+                    coordenadas = _coordenadas_camara(camara_id, camara, latitud, longitud)
+                
+                try:
+                    print(f"   🚨 Creando alerta con evidencia...")
+                    # ✅ CREAR ALERTA CON EVIDENCIA Y COORDENADAS DE LA CÁMARA
+                    alerta = AlertaService.crearAlerta(
+                        timestamp=datetime.now(),
+                        confidence=face['similarity_percentage'] / 100.0,  # Convertir a 0-1
+                        latitud=coordenadas[0],  # Coordenadas de la cámara
+                        longitud=coordenadas[1],  # Coordenadas de la cámara
+                        camara_id=camara_id,
+                        status='PENDIENTE',
+                        caso_id=caso_id,  # ✅ Usa caso_id del match
+                        frame=frame_obj,
+                        falso_positivo=False
+                    )
+                    
+                    alertas_creadas.append({
+                        "alerta_id": alerta.id,
+                        "caso_id": caso_id,
+                        "persona": face['best_match_name'],
+                        "similitud": face['similarity_percentage'],
+                        "imagen_url": alerta._imagen_url if hasattr(alerta, '_imagen_url') else None
+                    })
+                    
+                    print(f"   ✅ Alerta #{alerta.id} creada exitosamente")
+                    print(f"   📸 URL evidencia: {alerta._imagen_url if hasattr(alerta, '_imagen_url') else 'NO DISPONIBLE'}")
+                    
+                except Exception as alert_error:
+                    print(f"   ❌ Error creando alerta: {alert_error}")
+                    import traceback
+                    traceback.print_exc()
+            elif face['match_found'] and not face.get('caso_id'):
+                print(f"   ⚠️  Match encontrado pero sin caso_id asociado en BD")
+            else:
+                print(f"   ⏭️  Saltando (sin match o similitud baja)")
+    
+    return turno, results, alertas_creadas
+
+def _coordenadas_camara(camara_id, camara, latitud, longitud):
+    """
+    Coordenadas para la alerta: las de la cámara en la BD o, si no tiene,
+    las enviadas en el request (fallback)
+    """
+    if camara is None:
+        try:
+            camara = CameraService.get_camera_by_id(camara_id)
+            if not camara:
+                print(f"⚠️  No se encontró cámara con ID {camara_id}")
+        except Exception as e:
+            print(f"⚠️  Error obteniendo coordenadas de cámara: {e}")
+    
+    camara = camara or {}
+    camara_lat = camara.get('latitud')
+    camara_lng = camara.get('longitud')
+    latitud = camara_lat if camara_lat is not None else latitud
+    longitud = camara_lng if camara_lng is not None else longitud
+    print(f"📍 Coordenadas de cámara #{camara_id}: lat={latitud}, lng={longitud}")
+    return latitud, longitud
+
+def _procesar_frame_ingesta(frame, camara):
+    """
+    Callback de la ingesta: el frame llega como array, sin JPEG ni base64.
+    Devuelve el intervalo sugerido (ms) para el próximo frame de la cámara.
+    """
+    if detection_service is None:
+        raise RuntimeError("Servicio de detección no disponible")
+    
+    from config import Config
+    camara_id = camara["id"]
+    modo_horario = HorarioService.get_camera_mode(camara_id)
+    if modo_horario == INACTIVO:
+        HorarioService.agenda().registrar_frame_omitido(camara_id)
+        return int(Config.CAPTURE_INTERVAL_MAX_S * 1000)
+    
+    turno, results, _ = procesar_frame_camara(
+        frame, camara_id, camara.get("ubicacion") or 'Ubicación desconocida',
+        latitud=camara.get("latitud") or 0.0,
+        longitud=camara.get("longitud") or 0.0,
+        inicio=time.time(),
+        modo_horario=modo_horario,
+        camara=camara
+    )
+    if results is None:
+        return turno.retry_after * 1000 if turno.retry_after else None
+    return asesor_intervalo.recomendar(camara_id, presion_cola(cola_deteccion.resumen()))
+
+def iniciar_ingesta_camaras():
+    """Lanza la ingesta de cámaras IP (una sola vez por proceso)"""
+    global ingesta_camaras
+    from config import Config
+    from services.ingesta_camaras import IngestaCamaras
+    
+    if ingesta_camaras is None:
+        ingesta_camaras = IngestaCamaras(
+            _procesar_frame_ingesta,
+            fps_muestreo=Config.CAMERA_INGESTION_FPS,
+            refresco_s=Config.CAMERA_INGESTION_REFRESH_S,
+            # Fuera de horario (sin criticalOverride) la cámara no se lee
+            en_horario=lambda camara: HorarioService.get_camera_mode(camara["id"]) != INACTIVO
+        )
+    ingesta_camaras.iniciar()
+    return ingesta_camaras
+
 # ============================================================================
 # ENDPOINTS
 # ============================================================================
@@ -109,7 +430,8 @@ def detect_faces():
     
     Request:
         {
-            "image": "base64_encoded_image"
+            "image": "base64_encoded_image",
+            "latency_budget_ms": 300  // Opcional: degrada la detección para cumplirlo
         }
     
     Response:
@@ -118,10 +440,19 @@ def detect_faces():
             "data": {
                 "timestamp": 1234567890.123,
                 "faces_detected": 2,
-                "faces": [...]
+                "faces": [...],
+                "degradations": ["skip_upsample"],  // Solo con presupuesto
+                "next_capture_ms": 2500  // Cuándo mandar el próximo frame de esta cámara
             }
         }
+    
+    Con el servidor saturado:
+        429 + Retry-After: cola llena
+        409: llegó un frame más nuevo de la misma cámara y reemplazó a este
+        503 + Retry-After: el frame esperó demasiado y se descartó
     """
+    # El presupuesto cuenta desde que llega el request (incluye decodificar)
+    inicio_request = time.time()
     try:
         if detection_service is None:
             return jsonify({
@@ -138,6 +469,13 @@ def detect_faces():
                 "error": "No se envió imagen"
             }), 400
         
+        camara_id = data.get('camara_id', 1)  # ID de la cámara
+        
+        # Fuera de horario (sin criticalOverride) no se decodifica ni se detecta
+        modo_horario = HorarioService.get_camera_mode(camara_id)
+        if modo_horario == INACTIVO:
+            return _respuesta_fuera_de_horario(camara_id)
+        
         # Decodificar imagen base64
         image_data = data['image']
         
@@ -160,89 +498,29 @@ def detect_faces():
         
         print(f"✅ Imagen decodificada: {frame.shape}")
         
-        # Procesar frame
-        results = detection_service.process_frame(frame)
+        latency_budget_ms = data.get('latency_budget_ms')
+        if latency_budget_ms is not None:
+            try:
+                latency_budget_ms = float(latency_budget_ms)
+                if latency_budget_ms < 0:
+                    raise ValueError
+            except (TypeError, ValueError):
+                return jsonify({
+                    "success": False,
+                    "error": "latency_budget_ms debe ser un número no negativo"
+                }), 400
         
-        # 🚨 CREAR ALERTAS AUTOMÁTICAMENTE si hay matches
-        alertas_creadas = []
-        camara_id = data.get('camara_id', 1)  # ID de la cámara
         ubicacion = data.get('ubicacion', 'Ubicación desconocida')
-        
-        # 📍 OBTENER COORDENADAS DE LA CÁMARA desde la BD
-        camara_lat = None
-        camara_lng = None
-        try:
-            camara = CameraService.get_camera_by_id(camara_id)
-            if camara:
-                camara_lat = camara.get('latitud')
-                camara_lng = camara.get('longitud')
-                print(f"📍 Coordenadas de cámara #{camara_id}: lat={camara_lat}, lng={camara_lng}")
-            else:
-                print(f"⚠️  No se encontró cámara con ID {camara_id}")
-        except Exception as e:
-            print(f"⚠️  Error obteniendo coordenadas de cámara: {e}")
-        
-        # Usar coordenadas de la cámara, o las enviadas en el request (fallback), o 0.0
-        latitud = camara_lat if camara_lat is not None else data.get('latitud', 0.0)
-        longitud = camara_lng if camara_lng is not None else data.get('longitud', 0.0)
-        
-        print(f"\n{'='*60}")
-        print(f"📊 DETECCIÓN: {results['faces_detected']} rostro(s) detectado(s)")
-        print(f"📷 Cámara ID: {camara_id}")
-        print(f"📍 Ubicación: {ubicacion}")
-        print(f"📍 Coordenadas: lat={latitud}, lng={longitud}")
-        print(f"{'='*60}\n")
-        
-        if results['faces_detected'] > 0:
-            # Crear Frame object una vez
-            frame_obj = Frame(frame, datetime.now(), camara_id)
-            print(f"✅ Frame object creado")
-            
-            # Por cada rostro detectado con match
-            for face in results['faces']:
-                print(f"\n👤 Procesando rostro #{face['face_id']}")
-                print(f"   Match found: {face['match_found']}")
-                print(f"   Best match: {face['best_match_name']}")
-                print(f"   Similitud: {face['similarity_percentage']}%")
-                
-                if face['match_found'] and face.get('caso_id'):
-                    caso_id = face['caso_id']  # ✅ Caso ID automático del match
-                    print(f"   🔍 Caso ID (automático): {caso_id}")
-                    
-                    try:
-                        print(f"   🚨 Creando alerta con evidencia...")
-                        # ✅ CREAR ALERTA CON EVIDENCIA Y COORDENADAS DE LA CÁMARA
-                        alerta = AlertaService.crearAlerta(
-                            timestamp=datetime.now(),
-                            confidence=face['similarity_percentage'] / 100.0,  # Convertir a 0-1
-                            latitud=latitud,  # Coordenadas de la cámara
-                            longitud=longitud,  # Coordenadas de la cámara
-                            camara_id=camara_id,
-                            status='PENDIENTE',
-                            caso_id=caso_id,  # ✅ Usa caso_id del match
-                            frame=frame_obj,
-                            falso_positivo=False
-                        )
-                        
-                        alertas_creadas.append({
-                            "alerta_id": alerta.id,
-                            "caso_id": caso_id,
-                            "persona": face['best_match_name'],
-                            "similitud": face['similarity_percentage'],
-                            "imagen_url": alerta._imagen_url if hasattr(alerta, '_imagen_url') else None
-                        })
-                        
-                        print(f"   ✅ Alerta #{alerta.id} creada exitosamente")
-                        print(f"   📸 URL evidencia: {alerta._imagen_url if hasattr(alerta, '_imagen_url') else 'NO DISPONIBLE'}")
-                        
-                    except Exception as alert_error:
-                        print(f"   ❌ Error creando alerta: {alert_error}")
-                        import traceback
-                        traceback.print_exc()
-                elif face['match_found'] and not face.get('caso_id'):
-                    print(f"   ⚠️  Match encontrado pero sin caso_id asociado en BD")
-                else:
-                    print(f"   ⏭️  Saltando (sin match o similitud baja)")
+        turno, results, alertas_creadas = procesar_frame_camara(
+            frame, camara_id, ubicacion,
+            latitud=data.get('latitud', 0.0),
+            longitud=data.get('longitud', 0.0),
+            latency_budget_ms=latency_budget_ms,
+            inicio=inicio_request,
+            modo_horario=modo_horario
+        )
+        if results is None:
+            return _respuesta_no_admitido(turno)
         
         # Limpiar resultados para JSON
         clean_results = clean_results_for_json(results)
@@ -250,6 +528,11 @@ def detect_faces():
         # Agregar info de alertas creadas
         clean_results['alertas_creadas'] = alertas_creadas
         
+        # Intervalo sugerido según la actividad de la cámara y la carga del servidor
+        clean_results['next_capture_ms'] = asesor_intervalo.recomendar(
+            camara_id, presion_cola(cola_deteccion.resumen())
+        )
+        
         print(f"✅ Procesamiento exitoso: {clean_results['faces_detected']} rostros detectados, {len(alertas_creadas)} alertas creadas")
         
         return jsonify({
@@ -301,7 +584,7 @@ def reload_encodings():
         }
     """
     try:
-        success = initialize_detection_service()
+        success = recargar_galeria()
         
         if success and detection_service:
             return jsonify({
@@ -343,11 +626,65 @@ def detection_status():
         "total_encodings": len(detection_service.known_encodings),
         "max_faces": detection_service.max_faces,
         "parallel_processing_enabled": detection_service.enable_parallel,
-        "deduplication_enabled": True
+        "deduplication_enabled": True,
+        "gallery_compaction": detection_service.compaction_report,
+        "gallery_by_status": detection_service.gallery_stats_by_status(),
+        "match_prefilter": detection_service.prefilter_summary(),
+        "engine": detection_service.engine_info(),
+        "prescreen_by_camera": detection_service.cribado.resumen(),
+        "latency_planner": detection_service.planificador.resumen(),
+        "admission_queue": cola_deteccion.resumen() if cola_deteccion is not None else None,
+        "capture_intervals": (asesor_intervalo.resumen(presion_cola(cola_deteccion.resumen()))
+                              if asesor_intervalo is not None else None),
+        "camera_ingestion": ingesta_camaras.resumen() if ingesta_camaras is not None else None,
+        "alert_schedules": HorarioService.agenda().resumen()
     }
     
     return jsonify(status_data)
 
+@detection_bp.route('/compact-gallery', methods=['POST'])
+def compact_gallery():
+    """
+    Compacta los embeddings casi duplicados de cada caso en la galería cargada
+    
+    Body (opcional):
+    {
+        "radius": 0.3  // Distancia máxima prototipo-original
+    }
+    
+    Response: tamaño original/compactado, shrink_factor y verificación top-1
+    """
+    try:
+        if detection_service is None:
+            return jsonify({
+                "success": False,
+                "error": "Servicio no disponible"
+            }), 503
+        
+        from config import Config
+        data = request.get_json(silent=True) or {}
+        radio = float(data.get("radius", Config.GALLERY_COMPACTION_RADIUS))
+        if radio <= 0.0 or radio >= detection_service.tolerance:
+            return jsonify({
+                "success": False,
+                "error": "radius debe ser mayor que 0 y menor que la tolerancia"
+            }), 400
+        
+        resultado = detection_service.compact_gallery(radio)
+        reporte = {k: v for k, v in resultado.items() if k not in ("indices", "covers")}
+        
+        return jsonify({
+            "success": bool(resultado.get("aplicada")),
+            "data": reporte
+        })
+        
+    except Exception as e:
+        print(f"❌ Error en compact_gallery: {str(e)}")
+        return jsonify({
+            "success": False,
+            "error": str(e)
+        }), 500
+
 @detection_bp.route('/configure-detection', methods=['POST'])
 def configure_detection():
     """
@@ -356,7 +693,9 @@ def configure_detection():
     Body:
     {
         "max_faces": 3,  // Número máximo de rostros a procesar
-        "tolerance": 0.6  // Umbral de similitud (opcional)
+        "tolerance": 0.6,  // Umbral de similitud (opcional)
+        "min_face_size": 24,  // Lado mínimo del rostro en px (opcional)
+        "min_sharpness": 10.0  // Nitidez mínima, varianza del Laplaciano (opcional)
     }
     """
     try:
@@ -399,6 +738,29 @@ def configure_detection():
             detection_service.tolerance = tolerance
             updated_params["tolerance"] = tolerance
         
+        # Actualizar umbrales de rechazo antes de codificar
+        if "min_face_size" in data:
+            min_face_size = int(data["min_face_size"])
+            if min_face_size < 0:
+                return jsonify({
+                    "success": False,
+                    "error": "min_face_size no puede ser negativo"
+                }), 400
+            
+            detection_service.min_face_size = min_face_size
+            updated_params["min_face_size"] = min_face_size
+        
+        if "min_sharpness" in data:
+            min_sharpness = float(data["min_sharpness"])
+            if min_sharpness < 0.0:
+                return jsonify({
+                    "success": False,
+                    "error": "min_sharpness no puede ser negativo"
+                }), 400
+            
+            detection_service.min_sharpness = min_sharpness
+            updated_params["min_sharpness"] = min_sharpness
+        
         return jsonify({
             "success": True,
             "message": "Configuración actualizada",
@@ -412,5 +774,64 @@ def configure_detection():
             "error": str(e)
         }), 500
 
+@detection_bp.route('/cameras/<int:camara_id>/settings', methods=['GET', 'PUT'])
+def camera_detection_settings(camara_id):
+    """
+    Ajustes de detección de una cámara
+    
+    Body (PUT):
+    {
+        "detector": "haar",      // hog, cnn, dnn o haar
+        "prescreen": "motion",   // off, haar, skin, motion o combinados ("motion+skin")
+        "latency_budget_ms": 400, // 0 = sin presupuesto
+        "priority": 2            // peso en la cola de detección (1 = normal)
+    }
+    null en un ajuste vuelve al valor por defecto
+    """
+    try:
+        if detection_service is None:
+            return jsonify({
+                "success": False,
+                "error": "Servicio no disponible"
+            }), 503
+        
+        if request.method == 'PUT':
+            data = request.get_json(silent=True) or {}
+            try:
+                ajustes = detection_service.set_camera_settings(camara_id, data)
+            except ValueError as e:
+                return jsonify({
+                    "success": False,
+                    "error": str(e)
+                }), 400
+        else:
+            ajustes = detection_service.ajustes_camara(camara_id)
+        
+        from models.detectores import detectores_disponibles
+        return jsonify({
+            "success": True,
+            "data": {
+                "camara_id": camara_id,
+                "settings": ajustes,
+                "detectors_available": detectores_disponibles(),
+                "prescreen_stats": detection_service.cribado.resumen(camara_id).get(str(camara_id))
+            }
+        })
+        
+    except Exception as e:
+        print(f"❌ Error en camera_detection_settings: {str(e)}")
+        return jsonify({
+            "success": False,
+            "error": str(e)
+        }), 500
+
 # Inicializar el servicio al cargar el módulo
 initialize_detection_service()
+
+def _iniciar_ingesta_si_corresponde():
+    from config import Config
+    # Con el reloader de Flask (debug) solo el proceso hijo abre las cámaras
+    if Config.CAMERA_INGESTION_ENABLED and (not Config.DEBUG or os.environ.get("WERKZEUG_RUN_MAIN") == "true"):
+        iniciar_ingesta_camaras()
+
+_iniciar_ingesta_si_corresponde()
@@ -1,13 +1,19 @@
 """
 Rutas API para manejo de encodings faciales
 """
-from flask import Blueprint, jsonify
+from flask import Blueprint, jsonify, request
 from services.encodings_storage import (
     upload_encodings_to_cloud,
     download_encodings_from_cloud,
     get_encodings_status,
     sync_encodings
 )
+from services.reencode_service import (
+    iniciar_reencode_en_segundo_plano,
+    estado_reencode,
+    cancelar_reencode
+)
+from models.generador_encodings import GeneradorEncodings
 
 encodings_bp = Blueprint("encodings", __name__)
 
@@ -24,9 +30,15 @@ def upload_encodings():
 
 @encodings_bp.route("/download", methods=["GET"])
 def download_encodings():
-    """Descarga encodings desde Supabase Storage"""
+    """
+    Descarga desde Supabase Storage solo los segmentos que faltan localmente
+    
+    Query params:
+        export_pickle: "true" para escribir además encodings.pickle
+    """
     try:
-        result = download_encodings_from_cloud()
+        export_pickle = request.args.get("export_pickle", "false").lower() == "true"
+        result = download_encodings_from_cloud(export_pickle=export_pickle)
         return jsonify(result), 200 if result["success"] else 500
     except Exception as e:
         return jsonify({"success": False, "error": str(e)}), 500
@@ -34,9 +46,20 @@ def download_encodings():
 
 @encodings_bp.route("/sync", methods=["POST"])
 def sync():
-    """Sincroniza encodings (upload y download)"""
+    """
+    Sincroniza encodings transfiriendo solo los segmentos distintos
+    
+    Body (opcional):
+    {
+        "direction": "both"  // 'upload', 'download' o 'both'
+    }
+    """
     try:
-        result = sync_encodings("both")
+        data = request.get_json(silent=True) or {}
+        direction = data.get("direction", "both")
+        if direction not in ("upload", "download", "both"):
+            return jsonify({"success": False, "error": "direction debe ser upload, download o both"}), 400
+        result = sync_encodings(direction)
         return jsonify(result), 200 if result["success"] else 500
     except Exception as e:
         return jsonify({"success": False, "error": str(e)}), 500
@@ -44,9 +67,71 @@ def sync():
 
 @encodings_bp.route("/status", methods=["GET"])
 def status():
-    """Obtiene estado de encodings (local y nube)"""
+    """
+    Obtiene estado de encodings (local y nube) desde el manifiesto cacheado
+    
+    Query params:
+        refresh: "true" para volver a leer el manifiesto remoto
+    """
     try:
-        result = get_encodings_status()
+        refresh = request.args.get("refresh", "false").lower() == "true"
+        result = get_encodings_status(refresh=refresh)
         return jsonify(result), 200
     except Exception as e:
         return jsonify({"success": False, "error": str(e)}), 500
+
+
+@encodings_bp.route("/reencode", methods=["POST"])
+def start_reencode():
+    """
+    Inicia (o reanuda) el re-encoding masivo de la galería (admin)
+
+    Body (opcional):
+    {
+        "detector": "hog+cnn",
+        "max_lado": 1024,
+        "upsample": 1,
+        "num_jitters": 1,
+        "page_size": 100,
+        "batch_size": 50,
+        "download_workers": 8
+    }
+    """
+    try:
+        data = request.get_json(silent=True) or {}
+        generador = GeneradorEncodings(
+            detector=data.get("detector"),
+            max_lado=data.get("max_lado"),
+            upsample=data.get("upsample"),
+            num_jitters=data.get("num_jitters")
+        )
+        result = iniciar_reencode_en_segundo_plano(
+            generador=generador,
+            page_size=int(data.get("page_size", 100)),
+            batch_size=int(data.get("batch_size", 50)),
+            download_workers=int(data.get("download_workers", 8))
+        )
+        return jsonify(result), 202 if result["success"] else 409
+    except ValueError as ve:
+        return jsonify({"success": False, "error": str(ve)}), 400
+    except Exception as e:
+        return jsonify({"success": False, "error": str(e)}), 500
+
+
+@encodings_bp.route("/reencode/status", methods=["GET"])
+def reencode_status():
+    """Progreso del re-encoding (fotos/s, fallos, versión publicada)"""
+    try:
+        return jsonify(estado_reencode()), 200
+    except Exception as e:
+        return jsonify({"success": False, "error": str(e)}), 500
+
+
+@encodings_bp.route("/reencode/cancel", methods=["POST"])
+def reencode_cancel():
+    """Detiene el re-encoding al terminar la página actual (queda reanudable)"""
+    try:
+        result = cancelar_reencode()
+        return jsonify(result), 200 if result["success"] else 409
+    except Exception as e:
+        return jsonify({"success": False, "error": str(e)}), 500
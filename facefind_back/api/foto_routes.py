@@ -4,9 +4,11 @@ import os
 from datetime import datetime
 from dotenv import load_dotenv
 import base64
+from concurrent.futures import ThreadPoolExecutor
 
 from models.generador_encodings import GeneradorEncodings
 from models.encoding import Encoding
+from services.encoding_cache import obtener_cache_encodings, EncodingCache
 
 load_dotenv()
 foto_bp = Blueprint("foto_bp", __name__)
@@ -20,14 +22,24 @@ print("🔑 Supabase KEY starts with:", SUPABASE_KEY[:10] if SUPABASE_KEY else "
 
 BUCKET_NAME = "fotos-referencia"
 
+# Pool para subir a Storage mientras se genera el encoding en paralelo
+upload_executor = ThreadPoolExecutor(max_workers=3)
+
 
 def upload_photo_to_supabase(file, case_id, tipo):
     """Sube una foto al bucket de Supabase y devuelve la URL pública."""
     try:
         extension = file.filename.split(".")[-1]
+        return upload_bytes_to_supabase(file.read(), extension, case_id, tipo)
+    except Exception as e:
+        return None, str(e)
+
+
+def upload_bytes_to_supabase(file_bytes, extension, case_id, tipo):
+    """Sube bytes ya leídos al bucket de Supabase y devuelve la URL pública."""
+    try:
         filename = f"{case_id}/{tipo}_{int(datetime.now().timestamp())}.{extension}"
 
-        file_bytes = file.read()
         res = supabase.storage.from_(BUCKET_NAME).upload(filename, file_bytes)
         if isinstance(res, dict) and res.get("error"):
             return None, res["error"]["message"]
@@ -38,6 +50,28 @@ def upload_photo_to_supabase(file, case_id, tipo):
         return None, str(e)
 
 
+def registrar_fotos_en_cache(case_id, fotos):
+    """
+    Registra las fotos en la caché por contenido y devuelve las que ya
+    existían en otros casos, para revisión del administrador.
+
+    Args:
+        case_id: ID del caso
+        fotos: Dict {tipo: (foto_id, sha256 de la imagen)}
+    """
+    cache = obtener_cache_encodings()
+    if not cache:
+        return {}
+
+    duplicados = {}
+    for tipo, (foto_id, image_hash) in fotos.items():
+        otros = cache.registrar_foto(image_hash, int(case_id), foto_id)
+        if otros:
+            print(f"⚠️ Foto {tipo} (id={foto_id}) idéntica a fotos de otros casos: {otros}")
+            duplicados[tipo] = otros
+    return duplicados
+
+
 @foto_bp.route("/upload", methods=["POST"])
 def upload_photos():
     try:
@@ -48,43 +82,74 @@ def upload_photos():
         fotos_urls = {}
         generador = GeneradorEncodings()
 
+        # Leer cada archivo una sola vez: los mismos bytes se suben y se codifican
+        fotos_bytes = {}
+        extensiones = {}
         for tipo in ["frontal", "profile1", "profile2"]:
             file = request.files.get(tipo)
             if not file:
                 continue
-
-            # Subir foto a Supabase
-            url, error = upload_photo_to_supabase(file, case_id, tipo)
+            fotos_bytes[tipo] = file.read()
+            extensiones[tipo] = file.filename.split(".")[-1]
+
+        # Subidas a Storage en hilos, encodings en el pool de procesos, todo a la vez
+        upload_futures = {
+            tipo: upload_executor.submit(
+                upload_bytes_to_supabase, file_bytes, extensiones[tipo], case_id, tipo
+            )
+            for tipo, file_bytes in fotos_bytes.items()
+        }
+        resultados_encoding = generador.generar_lote_desde_bytes(fotos_bytes)
+
+        for tipo, future in upload_futures.items():
+            url, error = future.result()
             if error:
                 return jsonify({"error": f"Error subiendo {tipo}: {error}"}), 500
             fotos_urls[tipo] = url
-
-            # Guardar registro FotoReferencia
-            res = supabase.table("FotoReferencia").insert({
-                "caso_id": case_id,
-                "ruta_archivo": url,
-                "created_at": datetime.now().isoformat()
-            }).execute()
-            if not res.data:
-                return jsonify({"error": f"No se pudo registrar FotoReferencia para {tipo}"}), 500
-            foto_id = res.data[0]["id"]
-
-            # Generar encoding y guardar en DB
-            encoding_obj = generador.generar_encodings(url, foto_id)
-            if not encoding_obj:
-                continue
-
-            encoding_dict = encoding_obj.guardar_en_db(supabase)
-            fotos_urls[f"{tipo}_encoding"] = encoding_dict
+            fotos_urls[f"{tipo}_reporte"] = resultados_encoding[tipo][1]
+
+        # Guardar registros FotoReferencia en un solo insert
+        tipos = list(upload_futures.keys())
+        if tipos:
+            ahora = datetime.now().isoformat()
+            res = supabase.table("FotoReferencia").insert([
+                {"caso_id": case_id, "ruta_archivo": fotos_urls[tipo], "created_at": ahora}
+                for tipo in tipos
+            ]).execute()
+            if not res.data or len(res.data) != len(tipos):
+                return jsonify({"error": "No se pudo registrar FotoReferencia para las fotos"}), 500
+            foto_ids = {row["ruta_archivo"]: row["id"] for row in res.data}
+
+            # Marcar fotos idénticas ya registradas en otros casos
+            duplicados = registrar_fotos_en_cache(
+                case_id,
+                {tipo: (foto_ids[fotos_urls[tipo]], EncodingCache.hash_bytes(fotos_bytes[tipo]))
+                 for tipo in tipos}
+            )
+            if duplicados:
+                fotos_urls["duplicados"] = duplicados
+
+            # Guardar encodings (ya generados desde los bytes) en un solo insert
+            encodings_tipos = []
+            for tipo in tipos:
+                encoding_obj = resultados_encoding[tipo][0]
+                if not encoding_obj:
+                    continue
+                encoding_obj.foto_referencia_id = foto_ids[fotos_urls[tipo]]
+                encodings_tipos.append((tipo, encoding_obj))
+
+            encoding_dicts = Encoding.guardar_lote_en_db(supabase, [enc for _, enc in encodings_tipos])
+            for (tipo, _), encoding_dict in zip(encodings_tipos, encoding_dicts):
+                fotos_urls[f"{tipo}_encoding"] = encoding_dict
 
         print("🧪 Debug tipos:", {k: type(v) for k, v in fotos_urls.items()})
 
         # 🔄 Recargar encodings automáticamente después de generar nuevos
         # Importación diferida para evitar ciclos de importación
-        from api.detection_routes import initialize_detection_service
+        from api.detection_routes import recargar_galeria
         
         print("🔄 Recargando encodings en el sistema de detección...")
-        reload_success = initialize_detection_service()
+        reload_success = recargar_galeria()
         if reload_success:
             print("✅ Encodings recargados automáticamente")
         else:
@@ -200,10 +265,20 @@ def replace_foto(foto_id):
             print(f"⚠️ No se pudo eliminar foto antigua del storage: {storage_error}")
             # No es crítico, continuamos
 
-        # 4. Subir nueva foto
+        # 4. Subir nueva foto (el encoding se genera en paralelo desde los mismos bytes)
         print(f"📤 Subiendo nueva foto para caso_id={caso_id}")
         tipo_foto = "updated"  # Puedes inferir el tipo si lo necesitas
-        nueva_url, error = upload_photo_to_supabase(file, caso_id, tipo_foto)
+        file_bytes = file.read()
+        extension = file.filename.split(".")[-1]
+        upload_future = upload_executor.submit(
+            upload_bytes_to_supabase, file_bytes, extension, caso_id, tipo_foto
+        )
+
+        print(f"🧠 Generando nuevos encodings para foto_id={foto_id}")
+        generador = GeneradorEncodings()
+        encoding_obj = generador.generar_desde_bytes(file_bytes, foto_id, origen=f"foto {foto_id}")
+
+        nueva_url, error = upload_future.result()
         
         if error:
             return jsonify({"error": f"Error subiendo nueva foto: {error}"}), 500
@@ -224,19 +299,19 @@ def replace_foto(foto_id):
             return jsonify({"error": "No se pudo actualizar el registro de la foto"}), 500
         
         print(f"✅ Registro actualizado")
+        duplicados = registrar_fotos_en_cache(
+            caso_id, {tipo_foto: (foto_id, EncodingCache.hash_bytes(file_bytes))}
+        )
 
-        # 6. Generar nuevos encodings
-        print(f"🧠 Generando nuevos encodings para foto_id={foto_id}")
-        generador = GeneradorEncodings()
-        encoding_obj = generador.generar_encodings(nueva_url, foto_id)
-        
+        # 6. Verificar el encoding generado desde los bytes subidos
         if not encoding_obj:
             print("⚠️ No se pudo generar encoding para la nueva foto")
             return jsonify({
                 "success": True,
                 "message": "Foto reemplazada pero no se generó encoding",
                 "nueva_url": nueva_url,
-                "foto_id": foto_id
+                "foto_id": foto_id,
+                "reporte_encoding": generador.ultimo_reporte
             }), 200
         
         # Guardar encoding en DB
@@ -244,10 +319,10 @@ def replace_foto(foto_id):
         print(f"✅ Nuevo encoding guardado: {encoding_dict}")
 
         # 7. Recargar encodings en el sistema de detección
-        from api.detection_routes import initialize_detection_service
+        from api.detection_routes import recargar_galeria
         
         print("🔄 Recargando encodings en el sistema de detección...")
-        reload_success = initialize_detection_service()
+        reload_success = recargar_galeria()
         
         if reload_success:
             print("✅ Encodings recargados automáticamente")
@@ -260,6 +335,8 @@ def replace_foto(foto_id):
             "foto_id": foto_id,
             "nueva_url": nueva_url,
             "encoding_generado": bool(encoding_obj),
+            "reporte_encoding": generador.ultimo_reporte,
+            "duplicados": duplicados.get(tipo_foto, []),
             "encodings_reloaded": reload_success
         }), 200
 
@@ -316,9 +393,13 @@ def delete_foto(foto_id):
             .eq("id", foto_id)\
             .execute()
 
+        cache = obtener_cache_encodings()
+        if cache:
+            cache.eliminar_foto(foto_id)
+
         # 5. Recargar encodings
-        from api.detection_routes import initialize_detection_service
-        reload_success = initialize_detection_service()
+        from api.detection_routes import recargar_galeria
+        reload_success = recargar_galeria()
 
         return jsonify({
             "success": True,
@@ -331,3 +412,24 @@ def delete_foto(foto_id):
         print("❌ Error eliminando foto:", e)
         print(traceback.format_exc())
         return jsonify({"error": str(e)}), 500
+
+
+@foto_bp.route("/duplicados", methods=["GET"])
+def get_fotos_duplicadas():
+    """Fotos de referencia idénticas registradas en más de un caso (revisión admin)"""
+    try:
+        cache = obtener_cache_encodings()
+        if not cache:
+            return jsonify({"success": False, "error": "Caché de encodings deshabilitada"}), 503
+
+        duplicados = cache.listar_duplicados()
+        return jsonify({
+            "success": True,
+            "duplicados": duplicados,
+            "total": len(duplicados),
+            "cache": cache.stats()
+        }), 200
+
+    except Exception as e:
+        print("❌ Error obteniendo fotos duplicadas:", e)
+        return jsonify({"error": str(e)}), 500
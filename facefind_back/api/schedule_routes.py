@@ -0,0 +1,221 @@
+"""
+Schedule Routes - Endpoints para horarios de alertas
+Reemplazan el mock en localStorage de scheduleService.js; la detección
+consulta los mismos horarios para no detectar fuera de horario
+"""
+from flask import Blueprint, request, jsonify
+from datetime import datetime
+from services.horario_service import HorarioService
+import traceback
+
+# Crear Blueprint
+schedule_bp = Blueprint('schedules', __name__)
+
+
+def _error(e: Exception, contexto: str):
+    print(f"❌ Error {contexto}: {str(e)}")
+    traceback.print_exc()
+    return jsonify({
+        "success": False,
+        "error": str(e)
+    }), 500
+
+
+# ============================================================================
+# HORARIOS
+# ============================================================================
+
+@schedule_bp.route('/', methods=['GET'])
+def get_schedules():
+    """Lista todos los horarios (el de cameraId null es el global)"""
+    try:
+        return jsonify({
+            "success": True,
+            "data": HorarioService.get_all()
+        }), 200
+    except Exception as e:
+        return _error(e, "obteniendo horarios")
+
+
+@schedule_bp.route('/', methods=['POST'])
+def create_schedule():
+    """
+    Crea un horario
+
+    Body:
+    {
+        "name": "Horario Oficina",
+        "cameraId": 3,             // null = global
+        "days": {"monday": {"enabled": true, "slots": [{"start": "09:00", "end": "17:00"}]}, ...},
+        "exceptions": [{"date": "2025-12-25", "enabled": false, "reason": "Feriado"}],
+        "criticalOverride": true   // alertas críticas también fuera de horario
+    }
+    """
+    try:
+        horario = HorarioService.create(request.get_json(silent=True) or {})
+        return jsonify({
+            "success": True,
+            "data": horario
+        }), 201
+    except (ValueError, KeyError) as ve:
+        return jsonify({
+            "success": False,
+            "error": str(ve)
+        }), 400
+    except Exception as e:
+        return _error(e, "creando horario")
+
+
+@schedule_bp.route('/<int:horario_id>', methods=['PUT'])
+def update_schedule(horario_id):
+    """Actualiza los campos enviados de un horario"""
+    try:
+        horario = HorarioService.update(horario_id, request.get_json(silent=True) or {})
+        return jsonify({
+            "success": True,
+            "data": horario
+        }), 200
+    except (ValueError, KeyError) as ve:
+        return jsonify({
+            "success": False,
+            "error": str(ve)
+        }), 400
+    except Exception as e:
+        return _error(e, f"actualizando horario {horario_id}")
+
+
+@schedule_bp.route('/<int:horario_id>', methods=['DELETE'])
+def delete_schedule(horario_id):
+    try:
+        HorarioService.delete(horario_id)
+        return jsonify({
+            "success": True,
+            "message": "Horario eliminado"
+        }), 200
+    except ValueError as ve:
+        return jsonify({
+            "success": False,
+            "error": str(ve)
+        }), 404
+    except Exception as e:
+        return _error(e, f"eliminando horario {horario_id}")
+
+
+@schedule_bp.route('/<int:horario_id>/exceptions', methods=['POST'])
+def add_exception(horario_id):
+    """
+    Agrega una excepción (reemplaza la de la misma fecha)
+
+    Body: {"date": "2025-12-25", "enabled": false, "reason": "Feriado"}
+    """
+    try:
+        horario = HorarioService.add_exception(horario_id, request.get_json(silent=True) or {})
+        return jsonify({
+            "success": True,
+            "data": horario
+        }), 200
+    except ValueError as ve:
+        return jsonify({
+            "success": False,
+            "error": str(ve)
+        }), 400
+    except Exception as e:
+        return _error(e, f"agregando excepción al horario {horario_id}")
+
+
+@schedule_bp.route('/<int:horario_id>/exceptions/<fecha>', methods=['DELETE'])
+def remove_exception(horario_id, fecha):
+    try:
+        horario = HorarioService.remove_exception(horario_id, fecha)
+        return jsonify({
+            "success": True,
+            "data": horario
+        }), 200
+    except ValueError as ve:
+        return jsonify({
+            "success": False,
+            "error": str(ve)
+        }), 400
+    except Exception as e:
+        return _error(e, f"eliminando excepción del horario {horario_id}")
+
+
+@schedule_bp.route('/cameras/<int:camara_id>/status', methods=['GET'])
+def camera_schedule_status(camara_id):
+    """
+    Modo actual de la cámara: active, critical_only (fuera de horario con
+    criticalOverride) u off_hours
+    """
+    try:
+        modo = HorarioService.get_camera_mode(camara_id)
+        return jsonify({
+            "success": True,
+            "data": {
+                "camara_id": camara_id,
+                "mode": modo,
+                "active": modo == "active"
+            }
+        }), 200
+    except Exception as e:
+        return _error(e, f"consultando horario de cámara {camara_id}")
+
+
+# ============================================================================
+# REGISTRO FUERA DE HORARIO
+# ============================================================================
+
+def _timestamp(valor):
+    return datetime.fromisoformat(valor).timestamp() if valor else None
+
+
+@schedule_bp.route('/off-hours-logs', methods=['GET'])
+def get_off_hours_logs():
+    """
+    Matches ocurridos fuera de horario que no generaron alerta completa
+    Query params: cameraId, startDate, endDate, isCritical
+    """
+    try:
+        critica = request.args.get('isCritical')
+        registros = HorarioService.agenda().registros(
+            camara_id=request.args.get('cameraId') or None,
+            desde=_timestamp(request.args.get('startDate')),
+            hasta=_timestamp(request.args.get('endDate')),
+            critica=None if critica in (None, '') else critica == 'true'
+        )
+        return jsonify({
+            "success": True,
+            "data": registros,
+            "total": len(registros)
+        }), 200
+    except ValueError as ve:
+        return jsonify({
+            "success": False,
+            "error": str(ve)
+        }), 400
+    except Exception as e:
+        return _error(e, "obteniendo registros fuera de horario")
+
+
+@schedule_bp.route('/off-hours-logs/stats', methods=['GET'])
+def get_off_hours_stats():
+    try:
+        return jsonify({
+            "success": True,
+            "data": HorarioService.agenda().estadisticas()
+        }), 200
+    except Exception as e:
+        return _error(e, "obteniendo estadísticas fuera de horario")
+
+
+@schedule_bp.route('/off-hours-logs', methods=['DELETE'])
+def clear_off_hours_logs():
+    """Borra los registros más viejos que `days` días (por defecto 30)"""
+    try:
+        dias = request.args.get('days', default=30, type=int)
+        borrados = HorarioService.agenda().limpiar(datetime.now().timestamp() - dias * 86400)
+        return jsonify({
+            "success": True,
+            "removedCount": borrados
+        }), 200
+    except Exception as e:
+        return _error(e, "limpiando registros fuera de horario")
@@ -20,6 +20,7 @@ from api.alerta_routes import alerta_bp
 from api.notification_routes import notification_bp
 from api.camera_routes import camera_bp
 from api.report_routes import report_bp
+from api.schedule_routes import schedule_bp
 
 
 # Inicializar aplicación Flask
@@ -62,6 +63,7 @@ app.register_blueprint(alerta_bp, url_prefix="/alertas")
 app.register_blueprint(notification_bp, url_prefix="/notifications")
 app.register_blueprint(camera_bp, url_prefix="/cameras")
 app.register_blueprint(report_bp, url_prefix="/reports")
+app.register_blueprint(schedule_bp, url_prefix="/schedules")
 
 
 # ============================================================================
@@ -86,7 +88,8 @@ def index():
             "alertas": "/alertas",
             "notifications": "/notifications",
             "cameras": "/cameras",
-            "reports": "/reports"
+            "reports": "/reports",
+            "schedules": "/schedules"
         }
     })
 
@@ -2,6 +2,7 @@
 Configuración centralizada para FaceFind Backend
 """
 import os
+import json
 from dotenv import load_dotenv
 
 # Cargar variables de entorno
@@ -23,7 +24,87 @@ class Config:
     
     # Face Detection
     ENCODINGS_FILE = os.getenv("ENCODINGS_FILE", "encodings.pickle")
+    ENCODINGS_STORE_DIR = os.getenv("ENCODINGS_STORE_DIR", "encodings_store")
+    ENCODINGS_COMPACT_MIN_SEGMENTS = int(os.getenv("ENCODINGS_COMPACT_MIN_SEGMENTS", "8"))
+    ENCODINGS_SYNC_WORKERS = int(os.getenv("ENCODINGS_SYNC_WORKERS", "8"))
     FACE_TOLERANCE = float(os.getenv("FACE_TOLERANCE", "0.6"))
+
+    # Encodings de fotos de referencia (detector: 'hog', 'cnn' o 'hog+cnn')
+    ENCODING_DETECTOR = os.getenv("ENCODING_DETECTOR", "hog+cnn")
+    ENCODING_MAX_SIDE = int(os.getenv("ENCODING_MAX_SIDE", "1024"))
+    ENCODING_UPSAMPLE = int(os.getenv("ENCODING_UPSAMPLE", "1"))
+    ENCODING_NUM_JITTERS = int(os.getenv("ENCODING_NUM_JITTERS", "1"))
+    ENCODING_WORKERS = int(os.getenv("ENCODING_WORKERS", "0"))  # 0 = automático
+    ENCODING_CACHE_ENABLED = os.getenv("ENCODING_CACHE_ENABLED", "True") == "True"
+    ENCODING_CACHE_PATH = os.getenv("ENCODING_CACHE_PATH", "encoding_cache.sqlite3")
+    ENCODING_CACHE_MAX_ENTRIES = int(os.getenv("ENCODING_CACHE_MAX_ENTRIES", "10000"))
+
+    # Compactación de embeddings casi duplicados por caso (galería de detección)
+    GALLERY_COMPACTION_ENABLED = os.getenv("GALLERY_COMPACTION_ENABLED", "False") == "True"
+    GALLERY_COMPACTION_RADIUS = float(os.getenv("GALLERY_COMPACTION_RADIUS", "0.3"))
+
+    # Prefiltro por caso: centroides → top-M casos → comparación exacta
+    MATCH_PREFILTER_ENABLED = os.getenv("MATCH_PREFILTER_ENABLED", "True") == "True"
+    MATCH_PREFILTER_TOP_M = int(os.getenv("MATCH_PREFILTER_TOP_M", "5"))
+
+    # Backend de detección de rostros: hog, cnn (dlib), dnn (SSD de OpenCV) o haar
+    FACE_DETECTOR_BACKEND = os.getenv("FACE_DETECTOR_BACKEND", "hog")
+    FACE_DETECTOR_UPSAMPLE = int(os.getenv("FACE_DETECTOR_UPSAMPLE", "1"))
+    FACE_DETECTOR_DNN_MODEL = os.getenv("FACE_DETECTOR_DNN_MODEL", "models_data/res10_300x300_ssd_iter_140000.caffemodel")
+    FACE_DETECTOR_DNN_CONFIG = os.getenv("FACE_DETECTOR_DNN_CONFIG", "models_data/deploy.prototxt")
+    FACE_DETECTOR_DNN_CONFIDENCE = float(os.getenv("FACE_DETECTOR_DNN_CONFIDENCE", "0.5"))
+
+    # Rechazo antes de codificar: lado mínimo del rostro (px) y nitidez mínima (varianza del Laplaciano)
+    FACE_MIN_SIZE_PX = int(os.getenv("FACE_MIN_SIZE_PX", "24"))
+    FACE_MIN_SHARPNESS = float(os.getenv("FACE_MIN_SHARPNESS", "10.0"))
+
+    # Presupuesto de latencia por request de detección en ms (0 = sin presupuesto)
+    DETECTION_LATENCY_BUDGET_MS = float(os.getenv("DETECTION_LATENCY_BUDGET_MS", "0"))
+
+    # Cola de admisión de /detection/detect-faces: detecciones simultáneas,
+    # requests en espera y espera máxima (s) antes de descartar el frame
+    DETECTION_MAX_CONCURRENT = int(os.getenv("DETECTION_MAX_CONCURRENT", "2"))
+    DETECTION_QUEUE_SIZE = int(os.getenv("DETECTION_QUEUE_SIZE", "8"))
+    DETECTION_QUEUE_TIMEOUT_S = float(os.getenv("DETECTION_QUEUE_TIMEOUT_S", "10"))
+
+    # Reparto justo de la cola entre cámaras: el peso de una cámara (priority
+    # en sus ajustes) se multiplica por (1 + este valor) mientras tenga matches recientes
+    DETECTION_MATCH_PRIORITY_BOOST = float(os.getenv("DETECTION_MATCH_PRIORITY_BOOST", "2"))
+
+    # Intervalo de captura sugerido a los clientes (s): con actividad, sin actividad
+    # y cuánto se mantiene el mínimo después de un match
+    CAPTURE_INTERVAL_MIN_S = float(os.getenv("CAPTURE_INTERVAL_MIN_S", "1"))
+    CAPTURE_INTERVAL_MAX_S = float(os.getenv("CAPTURE_INTERVAL_MAX_S", "10"))
+    CAPTURE_INTERVAL_MATCH_HOLD_S = float(os.getenv("CAPTURE_INTERVAL_MATCH_HOLD_S", "30"))
+
+    # Ingesta de cámaras IP en el servidor: fps por cámara hacia la detección,
+    # espera máxima entre reconexiones del bus de frames y cada cuánto se relee
+    # la tabla Camara (s)
+    CAMERA_INGESTION_ENABLED = os.getenv("CAMERA_INGESTION_ENABLED", "False") == "True"
+    CAMERA_INGESTION_FPS = float(os.getenv("CAMERA_INGESTION_FPS", "1"))
+    CAMERA_INGESTION_BACKOFF_MAX_S = float(os.getenv("CAMERA_INGESTION_BACKOFF_MAX_S", "60"))
+    CAMERA_INGESTION_REFRESH_S = float(os.getenv("CAMERA_INGESTION_REFRESH_S", "60"))
+
+    # Stream MJPEG de /cameras/<id>/stream: topes de ancho y fps y calidad JPEG
+    # por defecto (se pueden bajar por query params o con resolution/fps de la cámara)
+    STREAM_MAX_WIDTH = int(os.getenv("STREAM_MAX_WIDTH", "1280"))
+    STREAM_MAX_FPS = float(os.getenv("STREAM_MAX_FPS", "15"))
+    STREAM_JPEG_QUALITY = int(os.getenv("STREAM_JPEG_QUALITY", "70"))
+
+    # Cribado barato antes del detector: off, haar, skin, motion (combinables con '+')
+    FRAME_PRESCREEN_MODE = os.getenv("FRAME_PRESCREEN_MODE", "off")
+    FRAME_PRESCREEN_SIDE = int(os.getenv("FRAME_PRESCREEN_SIDE", "160"))
+    FRAME_PRESCREEN_AUDIT_RATE = float(os.getenv("FRAME_PRESCREEN_AUDIT_RATE", "0.05"))
+
+    # Ajustes de detección por cámara (JSON), p.ej. {"3": {"detector": "haar", "prescreen": "motion", "latency_budget_ms": 400, "priority": 2}}
+    CAMERA_DETECTION_SETTINGS = json.loads(os.getenv("CAMERA_DETECTION_SETTINGS", "{}") or "{}")
+
+    # Estados de caso que entran a la galería de detección (el resto no genera alertas)
+    GALLERY_ACTIONABLE_STATUSES = [
+        s.strip().lower()
+        for s in os.getenv("GALLERY_ACTIONABLE_STATUSES", "activo,pendiente,en_progreso").split(",")
+        if s.strip()
+    ]
     
     # Evidencias
     EVIDENCIAS_RETENCION_DIAS = int(os.getenv('EVIDENCIAS_RETENCION_DIAS', 60))
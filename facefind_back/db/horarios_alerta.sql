@@ -0,0 +1,26 @@
+-- Horarios de alertas por cámara (antes solo en localStorage del frontend)
+-- camara_id NULL = horario global para las cámaras sin horario propio
+-- dias: {"monday": {"enabled": true, "slots": [{"start": "09:00", "end": "17:00"}]}, ...}
+-- excepciones: [{"date": "2025-12-25", "enabled": false, "reason": "Feriado"}]
+
+CREATE TABLE IF NOT EXISTS public."HorarioAlerta" (
+  id integer GENERATED ALWAYS AS IDENTITY NOT NULL,
+  nombre character varying NOT NULL,
+  camara_id integer,
+  dias jsonb NOT NULL DEFAULT '{}'::jsonb,
+  excepciones jsonb NOT NULL DEFAULT '[]'::jsonb,
+  critical_override boolean NOT NULL DEFAULT false,
+  created_at timestamp without time zone DEFAULT now(),
+  updated_at timestamp without time zone DEFAULT now(),
+  CONSTRAINT "HorarioAlerta_pkey" PRIMARY KEY (id),
+  CONSTRAINT "HorarioAlerta_camara_id_fkey" FOREIGN KEY (camara_id)
+    REFERENCES public."Camara" (id) ON DELETE CASCADE
+);
+
+-- Un horario propio por cámara como máximo
+CREATE UNIQUE INDEX IF NOT EXISTS "HorarioAlerta_camara_id_key"
+  ON public."HorarioAlerta" (camara_id) WHERE camara_id IS NOT NULL;
+
+-- Un solo horario global (camara_id NULL)
+CREATE UNIQUE INDEX IF NOT EXISTS "HorarioAlerta_global_key"
+  ON public."HorarioAlerta" ((camara_id IS NULL)) WHERE camara_id IS NULL;
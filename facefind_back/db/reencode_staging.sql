@@ -0,0 +1,39 @@
+-- Staging del re-encoding masivo (services/reencode_service.py)
+-- El job escribe los vectores nuevos aquí, no en Embedding: una recarga de
+-- la galería durante el job sigue viendo solo los vectores anteriores.
+-- Al terminar, publicar_reencode los pasa a Embedding en una sola
+-- transacción, así que nunca se lee una mezcla de configuraciones.
+
+CREATE TABLE IF NOT EXISTS public."EmbeddingReencode" (
+  job_id character varying NOT NULL,
+  foto_referencia_id integer NOT NULL,
+  vector bytea NOT NULL,
+  fecha_generacion timestamp without time zone DEFAULT now(),
+  caso_id integer,
+  CONSTRAINT "EmbeddingReencode_pkey" PRIMARY KEY (job_id, foto_referencia_id),
+  CONSTRAINT "EmbeddingReencode_foto_fkey" FOREIGN KEY (foto_referencia_id)
+    REFERENCES public."FotoReferencia" (id) ON DELETE CASCADE
+);
+
+-- Publica los vectores de un job en Embedding (atómico) y limpia su staging
+CREATE OR REPLACE FUNCTION public.publicar_reencode(p_job_id character varying)
+RETURNS integer
+LANGUAGE plpgsql
+AS $$
+DECLARE
+  publicados integer;
+BEGIN
+  INSERT INTO public."Embedding" (foto_referencia_id, vector, fecha_generacion, caso_id)
+  SELECT foto_referencia_id, vector, fecha_generacion, caso_id
+  FROM public."EmbeddingReencode"
+  WHERE job_id = p_job_id
+  ON CONFLICT (foto_referencia_id) DO UPDATE
+    SET vector = EXCLUDED.vector,
+        fecha_generacion = EXCLUDED.fecha_generacion,
+        caso_id = EXCLUDED.caso_id;
+  GET DIAGNOSTICS publicados = ROW_COUNT;
+
+  DELETE FROM public."EmbeddingReencode" WHERE job_id = p_job_id;
+  RETURN publicados;
+END;
+$$;
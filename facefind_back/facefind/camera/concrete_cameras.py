@@ -1,11 +1,21 @@
+import time
+
 import cv2
 from .camera_interface import ICamera
+from .frame_grabber import FrameGrabber
 
 class USBCamera(ICamera):
-    def __init__(self, device_id: int = 0):
+    def __init__(self, device_id: int = 0, grabber: bool = False):
+        """
+        Args:
+            device_id: Índice del dispositivo
+            grabber: Leer en un hilo y que get_frame devuelva siempre el último frame
+        """
         self.stream = None
         self.is_connected = False
         self.device_id = device_id
+        self.grabber = grabber
+        self._grabber = None
         print(f"📹 USBCamera inicializada con device_id: {device_id}")
 
     def connect(self) -> bool:
@@ -17,6 +27,9 @@ class USBCamera(ICamera):
             
             if self.is_connected:
                 print(f"✅ Conectado exitosamente a cámara USB {self.device_id}")
+                if self.grabber:
+                    self._grabber = FrameGrabber(self.stream, f"usb-{self.device_id}")
+                    self._grabber.iniciar()
             else:
                 print(f"❌ No se pudo abrir cámara USB con índice {self.device_id}")
             
@@ -26,21 +39,43 @@ class USBCamera(ICamera):
             return False
 
     def get_frame(self):
+        return self.get_frame_with_timestamp()[0]
+
+    def get_frame_with_timestamp(self):
+        """(frame, timestamp de captura); en modo grabber es el último frame leído"""
         if not self.is_connected:
-            return None
+            return None, None
+        if self._grabber is not None:
+            return self._grabber.ultimo()
         ret, frame = self.stream.read()
-        return frame if ret else None
+        return (frame, time.time()) if ret else (None, None)
+
+    def grabber_stats(self):
+        return self._grabber.stats() if self._grabber is not None else None
 
     def disconnect(self):
-        if self.stream:
+        # En modo grabber libera el stream el grabber, cuando su hilo ya
+        # no está dentro de read()
+        if self._grabber is not None:
+            self._grabber.detener(liberar=True)
+            self._grabber = None
+        elif self.stream:
             self.stream.release()
         self.is_connected = False
 
 class IPCamera(ICamera):
-    def __init__(self, url: str = None):
+    def __init__(self, url: str = None, grabber: bool = False):
+        """
+        Args:
+            url: URL RTSP/HTTP de la cámara
+            grabber: Leer en un hilo y que get_frame devuelva siempre el último
+                     frame (evita procesar frames viejos del buffer del decodificador)
+        """
         self.stream = None
         self.is_connected = False
         self.url = url
+        self.grabber = grabber
+        self._grabber = None
 
     def set_url(self, url: str):
         self.url = url
@@ -56,6 +91,9 @@ class IPCamera(ICamera):
             
             if self.is_connected:
                 print(f"Conectado exitosamente a: {self.url}")
+                if self.grabber:
+                    self._grabber = FrameGrabber(self.stream, "ip")
+                    self._grabber.iniciar()
             else:
                 print(f"No se pudo conectar a: {self.url}")
                 
@@ -65,12 +103,26 @@ class IPCamera(ICamera):
             return False
 
     def get_frame(self):
+        return self.get_frame_with_timestamp()[0]
+
+    def get_frame_with_timestamp(self):
+        """(frame, timestamp de captura); en modo grabber es el último frame leído"""
         if not self.is_connected:
-            return None
+            return None, None
+        if self._grabber is not None:
+            return self._grabber.ultimo()
         ret, frame = self.stream.read()
-        return frame if ret else None
+        return (frame, time.time()) if ret else (None, None)
+
+    def grabber_stats(self):
+        return self._grabber.stats() if self._grabber is not None else None
 
     def disconnect(self):
-        if self.stream:
+        # En modo grabber libera el stream el grabber, cuando su hilo ya
+        # no está dentro de read()
+        if self._grabber is not None:
+            self._grabber.detener(liberar=True)
+            self._grabber = None
+        elif self.stream:
             self.stream.release()
         self.is_connected = False
\ No newline at end of file
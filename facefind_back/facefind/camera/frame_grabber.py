@@ -0,0 +1,144 @@
+import threading
+import time
+from typing import Optional, Tuple
+
+import numpy as np
+
+# Lecturas fallidas seguidas que se consideran stream cortado
+MAX_FALLOS_LECTURA = 5
+
+
+class FrameGrabber:
+    """
+    Lee un cv2.VideoCapture en un hilo y se queda solo con el último frame
+
+    Con RTSP/HTTP, si se lee más lento de lo que la cámara entrega, el buffer
+    del decodificador se llena y cada read() devuelve un frame de hace
+    segundos. El hilo lee sin parar y guarda el más reciente (con su
+    timestamp) en un único lugar; los frames que nadie llegó a pedir se
+    cuentan como descartados.
+
+    El servidor ya no lo usa: el hilo de services/bus_frames.py cumple el
+    mismo papel para el stream, la ingesta y las evidencias. Queda para
+    quien use USBCamera/IPCamera directamente (grabber=True).
+
+    Nunca se libera el stream mientras el hilo puede estar dentro de
+    read(): con detener(liberar=True) lo libera el propio hilo al salir.
+    """
+
+    def __init__(self, stream, nombre: str = "camara"):
+        self.stream = stream
+        self.nombre = nombre
+        self._frame: Optional[np.ndarray] = None
+        self._timestamp: Optional[float] = None
+        self._consumido = True
+        self._condicion = threading.Condition()
+        self._detener = threading.Event()
+        self._hilo: Optional[threading.Thread] = None
+        self._liberar = False
+        self._liberado = False
+        self._terminado = True
+
+        self.frames_read = 0
+        self.dropped_frames = 0
+        self.activo = False
+
+    def iniciar(self):
+        self._detener.clear()
+        self._liberar = False
+        self._liberado = False
+        self._terminado = False
+        self.activo = True
+        self._hilo = threading.Thread(target=self._leer, name=f"grabber-{self.nombre}", daemon=True)
+        self._hilo.start()
+
+    def detener(self, liberar: bool = False, timeout: float = 2.0) -> bool:
+        """
+        Args:
+            liberar: Liberar también el stream. Si el hilo sigue bloqueado
+                     en read() lo libera él cuando termine, nunca antes.
+            timeout: Cuánto esperar a que termine el hilo
+
+        Returns:
+            True si el hilo ya terminó
+        """
+        with self._condicion:
+            self._liberar = liberar
+            liberar_aqui = liberar and self._terminado and not self._liberado
+            self._liberado = self._liberado or liberar_aqui
+        self._detener.set()
+        if liberar_aqui:
+            # El hilo ya salió (o nunca arrancó): nadie más usa el stream
+            self.stream.release()
+
+        hilo = self._hilo
+        if hilo is not None and hilo is not threading.current_thread():
+            hilo.join(timeout=timeout)
+        terminado = hilo is None or not hilo.is_alive()
+        if not terminado:
+            print(f"⚠️  Grabber {self.nombre}: read() sigue bloqueado, el stream se libera al terminar")
+        self._hilo = None
+        self._marcar_inactivo()
+        return terminado
+
+    def _marcar_inactivo(self):
+        with self._condicion:
+            self.activo = False
+            self._condicion.notify_all()
+
+    def _leer(self):
+        try:
+            fallos = 0
+            while not self._detener.is_set():
+                ret, frame = self.stream.read()
+                if not ret or frame is None:
+                    fallos += 1
+                    if fallos >= MAX_FALLOS_LECTURA:
+                        print(f"⚠️  Grabber {self.nombre}: stream cortado")
+                        break
+                    continue
+                fallos = 0
+
+                # read() entrega un array nuevo en cada llamada: quien tenga el
+                # frame anterior lo puede seguir usando sin copiarlo
+                with self._condicion:
+                    if not self._consumido:
+                        self.dropped_frames += 1
+                    self._frame = frame
+                    self._timestamp = time.time()
+                    self._consumido = False
+                    self.frames_read += 1
+                    self._condicion.notify_all()
+        finally:
+            # Si ya se pidió liberar, el stream es de este hilo hasta acá
+            with self._condicion:
+                self._terminado = True
+                liberar = self._liberar and not self._liberado
+                self._liberado = self._liberado or liberar
+            if liberar:
+                self.stream.release()
+            self._marcar_inactivo()
+
+    def ultimo(self, timeout: float = 2.0) -> Tuple[Optional[np.ndarray], Optional[float]]:
+        """
+        Frame más reciente y su timestamp. Solo espera (hasta timeout) si
+        todavía no llegó ningún frame. Con el stream cortado se entrega el
+        último frame pendiente y después (None, None).
+        """
+        with self._condicion:
+            if self._frame is None:
+                self._condicion.wait_for(lambda: self._frame is not None or not self.activo, timeout)
+            if self._frame is None or (not self.activo and self._consumido):
+                return None, None
+            self._consumido = True
+            return self._frame, self._timestamp
+
+    def stats(self) -> dict:
+        with self._condicion:
+            edad = time.time() - self._timestamp if self._timestamp else None
+        return {
+            "active": self.activo,
+            "frames_read": self.frames_read,
+            "dropped_frames": self.dropped_frames,
+            "frame_age_ms": round(edad * 1000, 1) if edad is not None else None
+        }
@@ -1,89 +1,32 @@
+from models.motor_deteccion import MotorDeteccion
+from models.fuentes_galeria import FuentePickle
 import face_recognition
-import numpy as np
-import pickle
-import cv2
-import time
-import os
 
-class ProcesadorFaceFind:
+class ProcesadorFaceFind(MotorDeteccion):
+    """
+    Procesador sobre encodings.pickle; usa el mismo motor que la API
+    (models/motor_deteccion.py) pero conserva la salida de siempre: todos
+    los rostros en orden de detección (sin filtro de calidad), sin
+    deduplicar por nombre, top 3 coincidencias y best_match_name con el más
+    parecido aunque no haya match. Sin cribado ni presupuesto de latencia.
+    """
     def __init__(self, tolerance=0.6, encodings_path='encodings.pickle'):
-        self.tolerance = tolerance
         self.encodings_path = encodings_path
-        self.known_encodings = []
-        self.known_names = []
-        self.load_known_faces()
+        super().__init__(
+            FuentePickle(encodings_path),
+            tolerance=tolerance,
+            max_faces=None,
+            enable_parallel=False,
+            quality_gate=False,
+            deduplicate=False,
+            top_matches=3
+        )
+        self.prescreen = "off"
+        self.latency_budget_ms = 0
 
     def load_known_faces(self):
-        if os.path.exists(self.encodings_path):
-            with open(self.encodings_path, "rb") as file:
-                data = pickle.load(file)
-                self.known_encodings = data.get("encodings", [])
-                self.known_names = data.get("names", [])
-        else:
-            print("⚠️ Archivo de encodings no encontrado.")
+        self.load_gallery()
 
-    def process_frame(self, frame):
-        rgb_frame = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-        locations = face_recognition.face_locations(rgb_frame, model="hog")
-        encodings = face_recognition.face_encodings(rgb_frame, locations)
-
-        faces = []
-        for i, encoding in enumerate(encodings):
-            results = self.compare_with_known_faces(encoding)
-
-            # locations[i] está en formato (top, right, bottom, left)
-            top, right, bottom, left = locations[i]
-            bbox = {
-                "x": int(left),
-                "y": int(top),
-                "width": int(right - left),
-                "height": int(bottom - top)
-            }
-            faces.append({
-                "face_id": i,
-                # mantenemos location con enteros para consistencia
-                "location": (int(top), int(right), int(bottom), int(left)),
-                "bbox": bbox,
-                **results
-            })
-
-        return {
-            "timestamp": time.time(),
-            "faces_detected": len(faces),
-            "faces": faces
-        }
-
-    def compare_with_known_faces(self, encoding):
-        if not self.known_encodings:
-            return {
-                "match_found": False,
-                "best_match_name": "Desconocido",
-                "similarity_percentage": 0,
-                "distance": None,
-                "all_similarities": []
-            }
-
-        distances = face_recognition.face_distance(self.known_encodings, encoding)
-        best_match_index = np.argmin(distances)
-        best_distance = distances[best_match_index]
-        best_name = self.known_names[best_match_index]
-
-        similarities = [
-            {
-                "name": self.known_names[i],
-                "similarity_percentage": round((1 - d) * 100, 2),
-                "distance": round(float(d), 4)
-            } for i, d in enumerate(distances)
-        ]
-
-        return {
-            "match_found": best_distance <= self.tolerance,
-            "best_match_name": best_name,
-            "similarity_percentage": round((1 - best_distance) * 100, 2),
-            "distance": round(float(best_distance), 4),
-            "all_similarities": sorted(similarities, key=lambda x: x["distance"])[:3]
-        }
-    
     def reconocer_rostro(self, image_path, tolerance=0.5):
         """Devuelve el nombre de la persona reconocida o None"""
         image = face_recognition.load_image_file(image_path)
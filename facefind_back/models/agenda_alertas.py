@@ -0,0 +1,312 @@
+"""
+Agenda de alertas: ¿la cámara X está en horario ahora?
+
+Los horarios de alertas (HorarioAlerta) dicen, por cámara o de forma
+global, en qué franjas de cada día se generan alertas. Fuera de horario no
+tiene sentido correr la detección completa.
+
+Cada horario se compila una sola vez a una lista ordenada de intervalos
+en minutos de la semana (lunes 00:00 = 0). Preguntar si una cámara está en
+horario es un bisect sobre esa lista, O(log n), sin recorrer días ni
+franjas en cada frame.
+
+    - Las franjas "start"-"end" incluyen el minuto final (como el editor
+      del frontend); si end < start la franja cruza la medianoche.
+    - Una excepción para una fecha manda sobre todo ese día (alertas
+      activadas o desactivadas).
+    - Con criticalOverride, fuera de horario se sigue detectando pero solo
+      las alertas críticas se crean completas.
+
+Lo que pasa fuera de horario queda en un registro compacto (tuplas en un
+buffer acotado y contadores por cámara) en lugar de alertas completas.
+"""
+import threading
+import time
+from bisect import bisect_right
+from collections import deque
+from datetime import date, datetime
+from typing import Dict, List, Optional, Tuple
+
+DIAS = ("monday", "tuesday", "wednesday", "thursday", "friday", "saturday", "sunday")
+MINUTOS_DIA = 24 * 60
+MINUTOS_SEMANA = 7 * MINUTOS_DIA
+
+# Modos de una cámara en un instante
+ACTIVO = "active"
+SOLO_CRITICAS = "critical_only"
+INACTIVO = "off_hours"
+
+# Similitud desde la que una alerta es crítica (prioridad ALTA en AlertaService)
+SIMILITUD_CRITICA = 0.85
+
+# Reintentos de carga si la tabla de horarios no se puede leer (segundos)
+REINTENTO_INICIAL_S = 5.0
+REINTENTO_MAX_S = 300.0
+
+
+def minutos(hora: str) -> int:
+    """'HH:MM' → minutos desde las 00:00"""
+    try:
+        horas, mins = (int(p) for p in str(hora).split(":"))
+    except ValueError:
+        raise ValueError(f"Hora inválida: '{hora}' (formato HH:MM)")
+    if not (0 <= horas < 24 and 0 <= mins < 60):
+        raise ValueError(f"Hora inválida: '{hora}' (formato HH:MM)")
+    return horas * 60 + mins
+
+
+def es_critica(similitud: float) -> bool:
+    """similitud entre 0 y 1"""
+    return similitud >= SIMILITUD_CRITICA
+
+
+class HorarioCompilado:
+    """
+    Intervalos semanales de un horario listos para búsqueda binaria
+    """
+
+    def __init__(self, horario: Dict):
+        """
+        Args:
+            horario: {id, name, cameraId, days: {monday: {enabled, slots:
+                     [{start, end}]}, ...}, exceptions: [{date, enabled}],
+                     criticalOverride}
+
+        Raises:
+            ValueError: si alguna franja tiene una hora inválida
+        """
+        self.id = horario.get("id")
+        self.nombre = horario.get("name")
+        self.critical_override = bool(horario.get("criticalOverride"))
+        self.excepciones: Dict[str, bool] = {
+            str(e["date"]): bool(e.get("enabled")) for e in horario.get("exceptions") or [] if e.get("date")
+        }
+
+        intervalos: List[Tuple[int, int]] = []
+        dias = horario.get("days") or {}
+        for indice, dia in enumerate(DIAS):
+            config = dias.get(dia) or {}
+            if not config.get("enabled"):
+                continue
+            base = indice * MINUTOS_DIA
+            for franja in config.get("slots") or []:
+                inicio, fin = minutos(franja["start"]), minutos(franja["end"]) + 1
+                if fin <= inicio:
+                    # Cruza la medianoche: sigue en el día siguiente
+                    intervalos.append((base + inicio, base + MINUTOS_DIA))
+                    siguiente = (indice + 1) % 7 * MINUTOS_DIA
+                    intervalos.append((siguiente, siguiente + fin))
+                else:
+                    intervalos.append((base + inicio, base + fin))
+
+        # Unir solapados para que cada minuto caiga en a lo sumo un intervalo
+        self.inicios: List[int] = []
+        self.fines: List[int] = []
+        for inicio, fin in sorted(intervalos):
+            if self.fines and inicio <= self.fines[-1]:
+                self.fines[-1] = max(self.fines[-1], fin)
+            else:
+                self.inicios.append(inicio)
+                self.fines.append(fin)
+
+    def en_horario(self, momento: datetime) -> bool:
+        excepcion = self.excepciones.get(momento.date().isoformat())
+        if excepcion is not None:
+            return excepcion
+        minuto = momento.weekday() * MINUTOS_DIA + momento.hour * 60 + momento.minute
+        i = bisect_right(self.inicios, minuto) - 1
+        return i >= 0 and minuto < self.fines[i]
+
+
+class AgendaAlertas:
+    """
+    Índice de horarios por cámara y registro compacto de lo ocurrido fuera
+    de horario
+    """
+
+    def __init__(self, max_registros: int = 1000):
+        """
+        Args:
+            max_registros: Eventos fuera de horario que se conservan
+        """
+        self._por_camara: Dict[str, HorarioCompilado] = {}
+        self._global: Optional[HorarioCompilado] = None
+        self.cargada = False
+        self._lock = threading.Lock()
+
+        # Carga fallida: hasta cargar bien se reintenta con espera exponencial
+        self._fallos_carga = 0
+        self._proximo_intento = 0.0
+        self._ultimo_error: Optional[str] = None
+
+        # (timestamp, camara_id, caso_id, similitud, critica)
+        self._registros = deque(maxlen=max_registros)
+        self._contadores: Dict[str, Dict] = {}
+
+    # ======================================================
+    # 🗓️ Índice
+    # ======================================================
+    def cargar(self, horarios: List[Dict]):
+        """
+        Recompila el índice. Un horario con cameraId aplica a esa cámara;
+        el que no tiene cameraId es el global para el resto. HorarioService
+        no deja guardar dos para la misma cámara ni dos globales; si igual
+        los hay, se usa el primero y se avisa.
+        """
+        por_camara: Dict[str, HorarioCompilado] = {}
+        global_ = None
+        for horario in horarios:
+            compilado = HorarioCompilado(horario)
+            camara_id = horario.get("cameraId")
+            if camara_id in (None, ""):
+                if global_ is not None:
+                    print(f"⚠️  Horario {compilado.id} ignorado: ya hay un horario global ({global_.id})")
+                    continue
+                global_ = compilado
+            elif str(camara_id) in por_camara:
+                print(f"⚠️  Horario {compilado.id} ignorado: la cámara {camara_id} ya tiene horario")
+            else:
+                por_camara[str(camara_id)] = compilado
+        with self._lock:
+            self._por_camara = por_camara
+            self._global = global_
+            self.cargada = True
+            self._fallos_carga = 0
+            self._proximo_intento = 0.0
+            self._ultimo_error = None
+
+    def debe_cargar(self, ahora: Optional[float] = None) -> bool:
+        """Sin cargar todavía y ya pasó la espera desde el último fallo"""
+        with self._lock:
+            return not self.cargada and (ahora or time.time()) >= self._proximo_intento
+
+    def registrar_fallo_carga(self, error, ahora: Optional[float] = None) -> float:
+        """
+        La tabla no se pudo leer. La agenda sigue sin cargar (todas las
+        cámaras en horario mientras tanto) y se vuelve a intentar después
+        de una espera que se duplica en cada fallo
+
+        Returns:
+            Segundos hasta el próximo intento
+        """
+        with self._lock:
+            espera = min(REINTENTO_INICIAL_S * 2 ** self._fallos_carga, REINTENTO_MAX_S)
+            self._fallos_carga += 1
+            self._proximo_intento = (ahora or time.time()) + espera
+            self._ultimo_error = str(error)
+            return espera
+
+    def horario(self, camara_id) -> Optional[HorarioCompilado]:
+        with self._lock:
+            return self._por_camara.get(str(camara_id), self._global)
+
+    def modo(self, camara_id, momento: Optional[datetime] = None) -> str:
+        """
+        ACTIVO (detección y alertas normales), SOLO_CRITICAS (fuera de
+        horario con criticalOverride) o INACTIVO (no detectar)
+        """
+        horario = self.horario(camara_id)
+        if horario is None or horario.en_horario(momento or datetime.now()):
+            return ACTIVO
+        return SOLO_CRITICAS if horario.critical_override else INACTIVO
+
+    # ======================================================
+    # 📝 Registro fuera de horario
+    # ======================================================
+    def _contador(self, camara_id) -> Dict:
+        # Se llama con el lock tomado
+        return self._contadores.setdefault(str(camara_id), {
+            "skipped_frames": 0, "logged_matches": 0, "last_at": None
+        })
+
+    def registrar_frame_omitido(self, camara_id):
+        """Un frame que no se detectó por estar fuera de horario (solo contador)"""
+        with self._lock:
+            contador = self._contador(camara_id)
+            contador["skipped_frames"] += 1
+            contador["last_at"] = time.time()
+
+    def registrar_match(self, camara_id, caso_id, similitud: float):
+        """Un match fuera de horario que no generó alerta completa"""
+        ahora = time.time()
+        with self._lock:
+            self._registros.append((ahora, camara_id, caso_id, round(similitud, 4), es_critica(similitud)))
+            contador = self._contador(camara_id)
+            contador["logged_matches"] += 1
+            contador["last_at"] = ahora
+
+    def registros(self, camara_id=None, desde: Optional[float] = None, hasta: Optional[float] = None,
+                  critica: Optional[bool] = None) -> List[Dict]:
+        """Eventos fuera de horario (más recientes primero) con filtros opcionales"""
+        with self._lock:
+            registros = list(self._registros)
+        resultado = []
+        for ts, camara, caso_id, similitud, es_crit in reversed(registros):
+            if camara_id is not None and str(camara) != str(camara_id):
+                continue
+            if (desde is not None and ts < desde) or (hasta is not None and ts > hasta):
+                continue
+            if critica is not None and es_crit != critica:
+                continue
+            resultado.append({
+                "id": f"log_{int(ts * 1000)}_{camara}",
+                "timestamp": datetime.fromtimestamp(ts).isoformat(),
+                "cameraId": camara,
+                "casoId": caso_id,
+                "similarity": similitud,
+                "isCritical": es_crit,
+                "reason": "Fuera de horario",
+                "alertMessage": f"Match caso #{caso_id} ({similitud:.0%})"
+            })
+        return resultado
+
+    def limpiar(self, antes_de: float) -> int:
+        """Borra los eventos anteriores a `antes_de` y devuelve cuántos se borraron"""
+        with self._lock:
+            antes = len(self._registros)
+            while self._registros and self._registros[0][0] < antes_de:
+                self._registros.popleft()
+            return antes - len(self._registros)
+
+    def estadisticas(self) -> Dict:
+        """Totales por criticidad, por cámara y por antigüedad"""
+        ahora = time.time()
+        with self._lock:
+            registros = list(self._registros)
+            contadores = {camara: dict(c) for camara, c in self._contadores.items()}
+        criticos = sum(1 for r in registros if r[4])
+        por_camara: Dict[str, int] = {}
+        for r in registros:
+            por_camara[str(r[1])] = por_camara.get(str(r[1]), 0) + 1
+        return {
+            "total": len(registros),
+            "byCritical": {"critical": criticos, "normal": len(registros) - criticos},
+            "byCamera": por_camara,
+            "last24Hours": sum(1 for r in registros if ahora - r[0] <= 86400),
+            "last7Days": sum(1 for r in registros if ahora - r[0] <= 7 * 86400),
+            "last30Days": sum(1 for r in registros if ahora - r[0] <= 30 * 86400),
+            "skippedFramesByCamera": {camara: c["skipped_frames"] for camara, c in contadores.items()}
+        }
+
+    def resumen(self, momento: Optional[datetime] = None) -> Dict:
+        with self._lock:
+            camaras = list(self._por_camara)
+            global_ = self._global
+            contadores = {camara: dict(c) for camara, c in self._contadores.items()}
+        return {
+            "loaded": self.cargada,
+            "load_error": self._ultimo_error,
+            "global_schedule": global_.id if global_ else None,
+            "cameras": {camara: self.modo(camara, momento) for camara in camaras},
+            "off_hours": contadores
+        }
+
+
+def fecha_iso(valor) -> str:
+    """Normaliza una fecha (date o 'YYYY-MM-DD') a 'YYYY-MM-DD'"""
+    if isinstance(valor, date):
+        return valor.isoformat()
+    try:
+        return date.fromisoformat(str(valor)).isoformat()
+    except ValueError:
+        raise ValueError(f"Fecha inválida: '{valor}' (formato YYYY-MM-DD)")
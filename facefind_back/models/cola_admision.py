@@ -0,0 +1,239 @@
+"""
+Control de admisión para los requests de detección
+
+Sin límite, una ráfaga de frames de muchas cámaras corre todas las
+detecciones a la vez: la CPU se satura y todos los requests se vuelven
+lentos. La cola deja correr como máximo max_concurrentes detecciones y
+hace esperar al resto en una cola acotada:
+
+    - Si la cámara ya tiene un frame esperando, el nuevo ocupa su lugar y
+      el viejo se descarta (un frame más reciente vale más que uno viejo).
+    - Si la cola está llena, el request se rechaza enseguida con una
+      estimación de cuándo reintentar (429 + Retry-After).
+    - Un frame que espera más de espera_max_s se descarta por viejo.
+
+Cuando se libera un lugar, el siguiente no es el que llegó primero: cada
+cámara tiene su propia cola (de un frame, por el reemplazo) y se atienden
+con colas justas ponderadas (WFQ). Cada frame recibe una etiqueta de fin
+virtual = max(tiempo virtual, fin de la cámara) + costo / peso, donde el
+costo es el tiempo de detección medio de esa cámara, y se admite la
+etiqueta más chica. Una cámara que manda frames sin parar no puede
+acaparar el motor: recibe su parte según el peso, que sale de la
+prioridad configurada y de sus matches recientes.
+"""
+import math
+import threading
+import time
+from collections import deque
+from typing import Dict, Optional
+
+ADMITIDO = "admitido"
+RECHAZADO = "rechazado"
+REEMPLAZADO = "reemplazado"
+EXPIRADO = "expirado"
+
+# Ventana (s) para la tasa de atención por cámara
+VENTANA_TASA_S = 60.0
+
+
+class Turno:
+    """
+    Lugar de un request en la cola
+    """
+
+    def __init__(self, clave, peso: float = 1.0):
+        self.clave = clave
+        self.peso = peso
+        self.inicio_virtual = 0.0
+        self.fin_virtual = 0.0
+        self.estado: Optional[str] = None
+        self.llegada = time.time()
+        self.inicio: Optional[float] = None
+        self.retry_after: Optional[int] = None
+        self._evento = threading.Event()
+
+    @property
+    def admitido(self) -> bool:
+        return self.estado == ADMITIDO
+
+    @property
+    def espera_ms(self) -> float:
+        fin = self.inicio if self.inicio is not None else time.time()
+        return (fin - self.llegada) * 1000
+
+
+class ColaAdmision:
+    """
+    Colas por cámara con reemplazo y reparto justo ponderado delante del
+    motor de detección
+    """
+
+    def __init__(self, max_concurrentes: int = 2, max_cola: int = 8, espera_max_s: float = 10.0):
+        """
+        Args:
+            max_concurrentes: Detecciones que pueden correr a la vez
+            max_cola: Requests que pueden esperar turno (entre todas las cámaras)
+            espera_max_s: Espera máxima antes de descartar el frame por viejo
+        """
+        self.max_concurrentes = max(1, int(max_concurrentes))
+        self.max_cola = max(0, int(max_cola))
+        self.espera_max_s = espera_max_s
+        self.en_curso = 0
+        self._cola: Dict[str, Turno] = {}  # un frame en espera por cámara
+        self._lock = threading.Lock()
+
+        # Tiempo virtual del reparto justo y etiqueta de fin de cada cámara
+        self._virtual = 0.0
+        self._camaras: Dict[str, Dict] = {}
+
+        self.ms_servicio = None  # media exponencial del tiempo de detección
+        self._esperas = deque(maxlen=200)
+        self.stats = {"admitted": 0, "rejected_full": 0, "superseded": 0, "expired": 0}
+
+    # ======================================================
+    # 🚦 Admisión
+    # ======================================================
+    def entrar(self, clave, peso: float = 1.0) -> Turno:
+        """
+        Espera turno para la cámara `clave`. Devuelve el turno con estado
+        admitido, rechazado (cola llena), reemplazado (llegó un frame más
+        nuevo de la misma cámara) o expirado. Si fue admitido hay que
+        llamar a salir() al terminar.
+
+        Args:
+            clave: Cámara de origen
+            peso: Parte del motor que le toca a la cámara frente a las demás
+        """
+        turno = Turno(str(clave), max(0.01, float(peso)))
+        with self._lock:
+            camara = self._camara(turno.clave)
+            camara["peso"] = turno.peso
+
+            if self.en_curso < self.max_concurrentes and not self._cola:
+                self._etiquetar(turno)
+                self._admitir(turno)
+                return turno
+
+            anterior = self._cola.get(turno.clave)
+            if anterior is not None:
+                # El frame nuevo toma el lugar (y la etiqueta) del viejo
+                turno.inicio_virtual, turno.fin_virtual = anterior.inicio_virtual, anterior.fin_virtual
+                self._cola[turno.clave] = turno
+                self._terminar(anterior, REEMPLAZADO)
+                self.stats["superseded"] += 1
+                camara["superseded"] += 1
+            elif len(self._cola) >= self.max_cola:
+                turno.estado = RECHAZADO
+                turno.retry_after = self._retry_after(len(self._cola))
+                self.stats["rejected_full"] += 1
+                camara["rejected"] += 1
+                return turno
+            else:
+                self._etiquetar(turno)
+                self._cola[turno.clave] = turno
+
+        if not turno._evento.wait(self.espera_max_s):
+            with self._lock:
+                # Pudo ser admitido justo al vencer la espera
+                if turno.estado is None:
+                    del self._cola[turno.clave]
+                    turno.estado = EXPIRADO
+                    turno.retry_after = self._retry_after(len(self._cola))
+                    self.stats["expired"] += 1
+                    self._camaras[turno.clave]["expired"] += 1
+        return turno
+
+    def salir(self, turno: Turno):
+        """Libera el lugar del turno admitido y deja pasar al siguiente"""
+        if not turno.admitido:
+            return
+        ms = (time.time() - turno.inicio) * 1000
+        with self._lock:
+            self.ms_servicio = ms if self.ms_servicio is None else 0.8 * self.ms_servicio + 0.2 * ms
+            camara = self._camaras[turno.clave]
+            camara["servicio_ms"] = ms if camara["servicio_ms"] is None else 0.8 * camara["servicio_ms"] + 0.2 * ms
+            self.en_curso -= 1
+            while self._cola and self.en_curso < self.max_concurrentes:
+                # La etiqueta de fin más chica; a igualdad, el que llegó antes
+                siguiente = min(self._cola.values(), key=lambda t: (t.fin_virtual, t.llegada))
+                del self._cola[siguiente.clave]
+                self._admitir(siguiente)
+
+    def _camara(self, clave: str) -> Dict:
+        # Se llama con el lock tomado
+        return self._camaras.setdefault(clave, {
+            "peso": 1.0, "fin_virtual": 0.0, "servicio_ms": None, "espera_ms": None,
+            "admitidos": deque(maxlen=500), "admitted": 0, "superseded": 0, "rejected": 0, "expired": 0
+        })
+
+    def _etiquetar(self, turno: Turno):
+        # Se llama con el lock tomado
+        camara = self._camaras[turno.clave]
+        costo = camara["servicio_ms"] or self.ms_servicio or 1000.0
+        turno.inicio_virtual = max(self._virtual, camara["fin_virtual"])
+        turno.fin_virtual = turno.inicio_virtual + costo / turno.peso
+        camara["fin_virtual"] = turno.fin_virtual
+
+    def _admitir(self, turno: Turno):
+        # Se llama con el lock tomado
+        self.en_curso += 1
+        turno.inicio = time.time()
+        self._virtual = max(self._virtual, turno.inicio_virtual)
+        self._esperas.append(turno.espera_ms)
+        self.stats["admitted"] += 1
+
+        camara = self._camaras[turno.clave]
+        camara["admitted"] += 1
+        camara["admitidos"].append(turno.inicio)
+        espera = turno.espera_ms
+        camara["espera_ms"] = espera if camara["espera_ms"] is None else 0.8 * camara["espera_ms"] + 0.2 * espera
+        self._terminar(turno, ADMITIDO)
+
+    @staticmethod
+    def _terminar(turno: Turno, estado: str):
+        turno.estado = estado
+        turno._evento.set()
+
+    def _retry_after(self, profundidad: int) -> int:
+        """Segundos estimados hasta que se libere un lugar en la cola"""
+        ms = self.ms_servicio if self.ms_servicio is not None else 1000.0
+        return max(1, math.ceil((profundidad + 1) * ms / self.max_concurrentes / 1000))
+
+    # ======================================================
+    # 📊 Estadísticas
+    # ======================================================
+    def _resumen_camara(self, clave: str, ahora: float) -> Dict:
+        # Se llama con el lock tomado
+        camara = self._camaras[clave]
+        recientes = [t for t in camara["admitidos"] if ahora - t <= VENTANA_TASA_S]
+        tasa = (len(recientes) - 1) / (ahora - recientes[0]) if len(recientes) >= 2 else 0.0
+        esperando = self._cola.get(clave)
+        return {
+            "weight": round(camara["peso"], 3),
+            "rate_per_s": round(tasa, 3),
+            "lag_ms": round(camara["espera_ms"], 2) if camara["espera_ms"] is not None else None,
+            "waiting_ms": round(esperando.espera_ms, 2) if esperando is not None else None,
+            "service_ms": round(camara["servicio_ms"], 2) if camara["servicio_ms"] is not None else None,
+            "admitted": camara["admitted"],
+            "superseded": camara["superseded"],
+            "rejected": camara["rejected"],
+            "expired": camara["expired"]
+        }
+
+    def resumen(self) -> Dict:
+        ahora = time.time()
+        with self._lock:
+            esperas = sorted(self._esperas)
+            resumen = {
+                "max_concurrent": self.max_concurrentes,
+                "max_queue": self.max_cola,
+                "in_flight": self.en_curso,
+                "queue_depth": len(self._cola),
+                "queued_cameras": list(self._cola),
+                "service_ms": round(self.ms_servicio, 2) if self.ms_servicio is not None else None,
+                **self.stats,
+                "cameras": {clave: self._resumen_camara(clave, ahora) for clave in self._camaras}
+            }
+        resumen["wait_ms_avg"] = round(sum(esperas) / len(esperas), 2) if esperas else 0.0
+        resumen["wait_ms_p95"] = round(esperas[math.ceil(0.95 * len(esperas)) - 1], 2) if esperas else 0.0
+        return resumen
@@ -0,0 +1,174 @@
+"""
+Cribado barato de frames antes del detector principal
+
+La mayoría de los frames no tienen rostros y aun así pagan la pirámide HOG
+completa. El cribado mira una versión muy reducida del frame y solo deja
+pasar al detector los que podrían tener un rostro.
+
+Modos (se pueden combinar con '+': pasa si cualquiera encuentra algo):
+    - haar:   cascada Haar permisiva sobre el gris reducido
+    - skin:   proporción de píxeles con color de piel (YCrCb)
+    - motion: diferencia contra el frame anterior de la misma cámara
+
+Para medir cuánto se pierde, una fracción de los frames descartados
+(audit_rate) se pasa igual por el detector completo: si encuentra rostros,
+cuenta como rostro perdido.
+"""
+import os
+import threading
+from typing import Dict, Optional, Tuple
+
+import cv2
+import numpy as np
+
+MODOS_CRIBADO = ("haar", "skin", "motion")
+
+
+def parsear_modo(valor) -> Tuple[str, ...]:
+    """'motion+skin' → ('motion', 'skin'); 'off'/None → ()"""
+    if valor is None or str(valor).lower() in ("", "off", "none"):
+        return ()
+    modos = tuple(m.strip().lower() for m in str(valor).split("+") if m.strip())
+    for modo in modos:
+        if modo not in MODOS_CRIBADO:
+            raise ValueError(f"Cribado '{modo}' no válido. Opciones: off, {', '.join(MODOS_CRIBADO)}")
+    return modos
+
+
+class CribadoFrames:
+    """
+    Cribado por cámara con estadísticas de descarte y de rostros perdidos
+    """
+
+    def __init__(self, lado: int = 160, piel_min: float = 0.01, movimiento_min: float = 0.005):
+        """
+        Args:
+            lado: Ancho del frame reducido que se analiza
+            piel_min: Fracción mínima de píxeles de piel para dejar pasar el frame
+            movimiento_min: Fracción mínima de píxeles cambiados para dejar pasar el frame
+        """
+        self.lado = lado
+        self.piel_min = piel_min
+        self.movimiento_min = movimiento_min
+        self._cascada = None
+        self._anteriores: Dict[str, np.ndarray] = {}
+        self._stats: Dict[str, Dict] = {}
+        self._lock = threading.Lock()
+
+    @property
+    def cascada(self):
+        if self._cascada is None:
+            if not hasattr(cv2, "CascadeClassifier"):
+                raise ValueError("Esta versión de OpenCV no incluye CascadeClassifier")
+            path = os.path.join(cv2.data.haarcascades, "haarcascade_frontalface_default.xml")
+            cascada = cv2.CascadeClassifier(path)
+            if cascada.empty():
+                raise ValueError(f"Cascada Haar no encontrada: {path}")
+            self._cascada = cascada
+        return self._cascada
+
+    def validar(self, valor) -> str:
+        """Normaliza el ajuste de cámara o lanza ValueError"""
+        modos = parsear_modo(valor)
+        if "haar" in modos:
+            self.cascada  # falla aquí si OpenCV no trae cascadas
+        return "+".join(modos) if modos else "off"
+
+    # ======================================================
+    # 🔎 Detectores baratos
+    # ======================================================
+    def _reducir(self, frame: np.ndarray) -> np.ndarray:
+        alto, ancho = frame.shape[:2]
+        if ancho <= self.lado:
+            return frame
+        escala = self.lado / ancho
+        return cv2.resize(frame, (self.lado, max(1, int(alto * escala))), interpolation=cv2.INTER_AREA)
+
+    def _haar(self, gray: np.ndarray) -> bool:
+        # Permisivo a propósito: un falso positivo solo cuesta el detector completo
+        rects = self.cascada.detectMultiScale(gray, scaleFactor=1.15, minNeighbors=2, minSize=(12, 12))
+        return len(rects) > 0
+
+    def _piel(self, pequeno_bgr: np.ndarray) -> bool:
+        ycrcb = cv2.cvtColor(pequeno_bgr, cv2.COLOR_BGR2YCrCb)
+        mascara = cv2.inRange(ycrcb, (0, 133, 77), (255, 173, 127))
+        return cv2.countNonZero(mascara) / mascara.size >= self.piel_min
+
+    def _movimiento(self, gray: np.ndarray, clave: str) -> bool:
+        gray = cv2.GaussianBlur(gray, (5, 5), 0)
+        with self._lock:
+            anterior = self._anteriores.get(clave)
+            self._anteriores[clave] = gray
+        if anterior is None or anterior.shape != gray.shape:
+            return True
+        cambiados = cv2.countNonZero(cv2.threshold(cv2.absdiff(gray, anterior), 25, 255, cv2.THRESH_BINARY)[1])
+        return cambiados / gray.size >= self.movimiento_min
+
+    def hay_candidatos(self, frame: np.ndarray, modo, clave=None) -> bool:
+        """
+        True si el frame podría tener un rostro y debe ir al detector completo
+
+        Args:
+            frame: Frame BGR
+            modo: Modo(s) de cribado, p.ej. 'haar' o 'motion+skin'
+            clave: Cámara de origen (para el modo motion)
+        """
+        modos = parsear_modo(modo)
+        if not modos:
+            return True
+
+        pequeno = self._reducir(frame)
+        gray = cv2.cvtColor(pequeno, cv2.COLOR_BGR2GRAY)
+        clave = str(clave)
+
+        # Todos los modos se evalúan para que motion siempre vea el frame anterior
+        resultados = []
+        for m in modos:
+            if m == "haar":
+                resultados.append(self._haar(gray))
+            elif m == "skin":
+                resultados.append(self._piel(pequeno))
+            else:
+                resultados.append(self._movimiento(gray, clave))
+        return any(resultados)
+
+    # ======================================================
+    # 📊 Estadísticas
+    # ======================================================
+    def registrar(self, clave, paso: bool, auditado: bool = False, rostros_en_auditoria: int = 0):
+        """
+        Args:
+            paso: El frame fue al detector completo por decisión del cribado
+            auditado: Frame descartado que igual se pasó por el detector completo
+            rostros_en_auditoria: Rostros que encontró el detector en la auditoría
+        """
+        with self._lock:
+            stats = self._stats.setdefault(str(clave), {
+                "frames": 0, "passed": 0, "skipped": 0, "audited": 0, "missed": 0
+            })
+            stats["frames"] += 1
+            if paso:
+                stats["passed"] += 1
+            else:
+                stats["skipped"] += 1
+            if auditado:
+                stats["audited"] += 1
+                if rostros_en_auditoria:
+                    stats["missed"] += 1
+
+    def resumen(self, clave: Optional[str] = None) -> Dict:
+        """
+        fallback_rate: fracción de frames que igual fueron al detector completo
+        missed_face_rate: fracción de frames descartados auditados que sí tenían rostro
+        """
+        with self._lock:
+            copia = {k: dict(v) for k, v in self._stats.items()}
+
+        resumen = {}
+        for camara, stats in copia.items():
+            if clave is not None and camara != str(clave):
+                continue
+            stats["fallback_rate"] = round(stats["passed"] / stats["frames"], 4) if stats["frames"] else 0.0
+            stats["missed_face_rate"] = round(stats["missed"] / stats["audited"], 4) if stats["audited"] else None
+            resumen[camara] = stats
+        return resumen
@@ -0,0 +1,199 @@
+"""
+Backends de detección de rostros para el motor de detección
+
+Todos devuelven cajas (top, right, bottom, left) en coordenadas del frame
+recibido, el mismo formato de face_recognition.face_locations, así que se
+pueden pasar directo a face_recognition.face_encodings.
+
+Backends:
+    - hog:  face_recognition HOG (CPU, el de siempre)
+    - cnn:  face_recognition CNN de dlib (preciso, lento sin GPU)
+    - dnn:  detector SSD ResNet-10 de OpenCV (modelo Caffe en disco)
+    - haar: cascada Haar de OpenCV (muy rápido, más falsos positivos)
+"""
+import os
+import threading
+from typing import Dict, List, Optional, Tuple
+
+import cv2
+import face_recognition
+import numpy as np
+
+Caja = Tuple[int, int, int, int]
+
+
+class DetectorNoDisponible(Exception):
+    """Faltan los archivos del modelo o OpenCV no trae el backend"""
+    pass
+
+
+def _caja_desde_xywh(x, y, w, h, alto, ancho) -> Caja:
+    """(x, y, w, h) → (top, right, bottom, left) recortada al frame"""
+    top = max(0, int(y))
+    left = max(0, int(x))
+    bottom = min(alto, int(y + h))
+    right = min(ancho, int(x + w))
+    return (top, right, bottom, left)
+
+
+class DetectorRostros:
+    """
+    Interfaz de los backends de detección
+    """
+    nombre = "base"
+    upsample = 0
+
+    def detectar(self, rgb: np.ndarray, gray: Optional[np.ndarray] = None,
+                 upsample: Optional[int] = None) -> List[Caja]:
+        """
+        Args:
+            rgb: Frame RGB
+            gray: Mismo frame en escala de grises si ya se calculó
+            upsample: Pasadas de upsample para este frame (solo HOG/CNN;
+                      None = las configuradas)
+
+        Returns:
+            Lista de cajas (top, right, bottom, left)
+        """
+        raise NotImplementedError
+
+
+class DetectorHOG(DetectorRostros):
+    nombre = "hog"
+
+    def __init__(self, upsample: int = 1):
+        self.upsample = upsample
+
+    def detectar(self, rgb, gray=None, upsample=None):
+        upsample = self.upsample if upsample is None else upsample
+        return face_recognition.face_locations(rgb, number_of_times_to_upsample=upsample, model="hog")
+
+
+class DetectorCNN(DetectorRostros):
+    nombre = "cnn"
+
+    def __init__(self, upsample: int = 1):
+        self.upsample = upsample
+
+    def detectar(self, rgb, gray=None, upsample=None):
+        upsample = self.upsample if upsample is None else upsample
+        return face_recognition.face_locations(rgb, number_of_times_to_upsample=upsample, model="cnn")
+
+
+class DetectorDNN(DetectorRostros):
+    """
+    SSD de OpenCV (res10_300x300_ssd_iter_140000.caffemodel + deploy.prototxt).
+    Los archivos no se descargan en tiempo de ejecución: deben existir en disco.
+    """
+    nombre = "dnn"
+    TAMANO_ENTRADA = (300, 300)
+    MEDIA_BGR = (104.0, 177.0, 123.0)
+
+    def __init__(self, model_path: str, config_path: str, confianza: float = 0.5):
+        for path in (model_path, config_path):
+            if not os.path.exists(path):
+                raise DetectorNoDisponible(f"Modelo DNN no encontrado: {path}")
+        self.confianza = confianza
+        self.net = cv2.dnn.readNetFromCaffe(config_path, model_path)
+        # cv2.dnn.Net no es thread-safe
+        self._lock = threading.Lock()
+
+    def detectar(self, rgb, gray=None, upsample=None):
+        alto, ancho = rgb.shape[:2]
+        # El modelo se entrenó con BGR: swapRB convierte desde RGB
+        blob = cv2.dnn.blobFromImage(rgb, 1.0, self.TAMANO_ENTRADA, self.MEDIA_BGR, swapRB=True)
+        with self._lock:
+            self.net.setInput(blob)
+            salida = self.net.forward()
+
+        cajas = []
+        for deteccion in salida[0, 0]:
+            if float(deteccion[2]) < self.confianza:
+                continue
+            x1, y1, x2, y2 = deteccion[3:7] * np.array([ancho, alto, ancho, alto])
+            caja = _caja_desde_xywh(x1, y1, x2 - x1, y2 - y1, alto, ancho)
+            if caja[2] > caja[0] and caja[1] > caja[3]:
+                cajas.append(caja)
+        return cajas
+
+
+class DetectorHaar(DetectorRostros):
+    nombre = "haar"
+
+    def __init__(self, cascade_path: Optional[str] = None, scale_factor: float = 1.1,
+                 min_neighbors: int = 5, min_size: int = 24):
+        # OpenCV 5 movió las cascadas a opencv-contrib
+        if not hasattr(cv2, "CascadeClassifier"):
+            raise DetectorNoDisponible("Esta versión de OpenCV no incluye CascadeClassifier")
+        cascade_path = cascade_path or os.path.join(cv2.data.haarcascades, "haarcascade_frontalface_default.xml")
+        self.cascade = cv2.CascadeClassifier(cascade_path)
+        if self.cascade.empty():
+            raise DetectorNoDisponible(f"Cascada Haar no encontrada: {cascade_path}")
+        self.scale_factor = scale_factor
+        self.min_neighbors = min_neighbors
+        self.min_size = (min_size, min_size)
+
+    def detectar(self, rgb, gray=None, upsample=None):
+        if gray is None:
+            gray = cv2.cvtColor(rgb, cv2.COLOR_RGB2GRAY)
+        alto, ancho = gray.shape[:2]
+        rects = self.cascade.detectMultiScale(
+            gray,
+            scaleFactor=self.scale_factor,
+            minNeighbors=self.min_neighbors,
+            minSize=self.min_size
+        )
+        return [_caja_desde_xywh(x, y, w, h, alto, ancho) for (x, y, w, h) in rects]
+
+
+# ======================================================
+# 🏭 Registro de backends
+# ======================================================
+DETECTORES_VALIDOS = ("hog", "cnn", "dnn", "haar")
+
+_instancias: Dict[str, DetectorRostros] = {}
+_instancias_lock = threading.Lock()
+
+
+def crear_detector(nombre: str) -> DetectorRostros:
+    """
+    Devuelve el backend pedido (una instancia compartida por nombre)
+
+    Raises:
+        ValueError: si el nombre no es un backend conocido
+        DetectorNoDisponible: si faltan los archivos del modelo o el soporte de OpenCV
+    """
+    from config import Config
+
+    nombre = (nombre or "hog").lower()
+    if nombre not in DETECTORES_VALIDOS:
+        raise ValueError(f"Detector '{nombre}' no válido. Opciones: {', '.join(DETECTORES_VALIDOS)}")
+
+    with _instancias_lock:
+        if nombre not in _instancias:
+            if nombre == "hog":
+                detector = DetectorHOG(Config.FACE_DETECTOR_UPSAMPLE)
+            elif nombre == "cnn":
+                detector = DetectorCNN(Config.FACE_DETECTOR_UPSAMPLE)
+            elif nombre == "dnn":
+                detector = DetectorDNN(
+                    Config.FACE_DETECTOR_DNN_MODEL,
+                    Config.FACE_DETECTOR_DNN_CONFIG,
+                    Config.FACE_DETECTOR_DNN_CONFIDENCE
+                )
+            else:
+                detector = DetectorHaar()
+            _instancias[nombre] = detector
+        return _instancias[nombre]
+
+
+def detectores_disponibles() -> Dict[str, bool]:
+    """Qué backends se pueden usar en este servidor (p.ej. si está el modelo DNN)"""
+    disponibles = {}
+    for nombre in DETECTORES_VALIDOS:
+        try:
+            crear_detector(nombre)
+            disponibles[nombre] = True
+        except (DetectorNoDisponible, cv2.error):
+            disponibles[nombre] = False
+    return disponibles
@@ -3,7 +3,7 @@ Clase Encoding ajustada
 Representa el vector de características faciales (embedding)
 y permite guardarlo en la BD.
 """
-from typing import Optional, Dict
+from typing import Optional, Dict, List
 import numpy as np
 from datetime import datetime
 import base64
@@ -33,6 +33,10 @@ class Encoding:
     def foto_referencia_id(self) -> Optional[int]:
         return self._foto_referencia_id
 
+    @foto_referencia_id.setter
+    def foto_referencia_id(self, value: Optional[int]):
+        self._foto_referencia_id = value
+
     @property
     def fecha_generacion(self) -> datetime:
         return self._fecha_generacion
@@ -82,25 +86,41 @@ class Encoding:
             fecha_generacion=data.get("fecha_generacion")
         )
     
-    def guardar_en_db(self, supabase_client):
-        vector_b64 = base64.b64encode(self.to_bytes()).decode("utf-8")
-
-        data = {
+    def to_db_row(self) -> Dict:
+        """Fila para la tabla Embedding (vector en base64)"""
+        return {
             "foto_referencia_id": self._foto_referencia_id,
-            "vector": vector_b64,  # <-- ahora es string
+            "vector": base64.b64encode(self.to_bytes()).decode("utf-8"),  # <-- ahora es string
             "fecha_generacion": self._fecha_generacion.isoformat()
         }
 
+    def guardar_en_db(self, supabase_client):
+        data = self.to_db_row()
+
         res = supabase_client.table("Embedding").insert(data).execute()
         if res.data:
             self._id = res.data[0]["id"]
 
-        return {
-            "id": self._id,
-            "foto_referencia_id": self._foto_referencia_id,
-            "vector": vector_b64,
-            "fecha_generacion": self._fecha_generacion.isoformat()
-        }
+        return {"id": self._id, **data}
+
+    @staticmethod
+    def guardar_lote_en_db(supabase_client, encodings: List['Encoding']) -> List[Dict]:
+        """
+        Inserta varios encodings en una sola operación contra la tabla Embedding.
+        Asigna el id generado a cada Encoding.
+        """
+        if not encodings:
+            return []
+
+        rows = [enc.to_db_row() for enc in encodings]
+        res = supabase_client.table("Embedding").insert(rows).execute()
+
+        # Emparejar por foto_referencia_id (columna UNIQUE en Embedding)
+        ids = {row["foto_referencia_id"]: row["id"] for row in (res.data or [])}
+        for enc in encodings:
+            enc._id = ids.get(enc.foto_referencia_id, enc._id)
+
+        return [{"id": enc.id, **row} for enc, row in zip(encodings, rows)]
 
 
 
@@ -0,0 +1,334 @@
+"""
+Fuentes de galería para el motor de detección
+
+Cada fuente sabe de dónde salen los embeddings conocidos (tabla Supabase,
+encodings.pickle, almacén segmentado o snapshot en disco) y los entrega en un
+mismo formato; el motor (models/motor_deteccion.py) no depende de dónde
+vienen.
+
+Formato de galería (dict de listas alineadas):
+    encodings, names, caso_ids, embedding_ids
+    statuses: estado del caso de cada embedding, o None si la fuente no lo conoce
+    matriz: (opcional) matriz N x 128 ya armada, p.ej. el memmap del snapshot
+"""
+import base64
+import binascii
+import hashlib
+import json
+import os
+import pickle
+from typing import Dict, List, Optional
+
+import numpy as np
+
+
+def galeria_vacia(con_estados: bool = False) -> Dict:
+    return {
+        "encodings": [],
+        "names": [],
+        "caso_ids": [],
+        "embedding_ids": [],
+        "statuses": [] if con_estados else None
+    }
+
+
+class FuenteGaleria:
+    """
+    Interfaz de las fuentes de galería
+    """
+    nombre = "base"
+
+    def cargar(self) -> Dict:
+        """Galería completa"""
+        raise NotImplementedError
+
+    def actualizar(self) -> Optional[Dict]:
+        """
+        Embeddings agregados desde la última carga, o None si la fuente no
+        soporta carga incremental (o cambió algo que obliga a recargar todo)
+        """
+        return None
+
+    def cargar_caso(self, caso_id) -> Dict:
+        """Embeddings de un solo caso (para admitirlo sin recargar la galería)"""
+        raise NotImplementedError(f"La fuente '{self.nombre}' no carga casos individuales")
+
+
+# ======================================================
+# 🔗 Tabla Embedding de Supabase
+# ======================================================
+class FuenteSupabase(FuenteGaleria):
+    """
+    Carga encodings desde la tabla Embedding, donde el vector está guardado
+    como BYTEA o Base64, con el nombre de la persona y el estado del caso
+    mediante JOIN con FotoReferencia, Caso y PersonaDesaparecida.
+    """
+    nombre = "supabase"
+
+    EMBEDDING_SELECT = "id, vector, foto_referencia_id, FotoReferencia(caso_id, Caso(status, persona_id, PersonaDesaparecida(nombre_completo)))"
+
+    def __init__(self, supabase):
+        self.supabase = supabase
+
+    def _decode_base64_vector(self, b64_string, id=None):
+        try:
+            if not isinstance(b64_string, str):
+                print(f"⚠️ Vector id={id}: tipo inesperado {type(b64_string)}")
+                return None
+
+            s = b64_string.strip()
+            # 🔧 Corrige padding faltante
+            missing_padding = len(s) % 4
+            if missing_padding:
+                s += "=" * (4 - missing_padding)
+
+            decoded = base64.b64decode(s)
+            return np.frombuffer(decoded, dtype=np.float64)
+
+        except Exception as e:
+            print(f"⚠️ No se pudo decodificar vector id={id}: {e}")
+            return None
+
+    def _parse_embedding_row(self, row):
+        """
+        Extrae (vector, nombre, caso_id, status) de una fila de Embedding con JOIN.
+        vector es None si no se pudo decodificar.
+        """
+        vector_data = row.get("vector")
+
+        # Intentar obtener el nombre de la persona desaparecida, caso_id y estado
+        nombre = None
+        caso_id = None
+        status = None
+        try:
+            foto_ref = row.get("FotoReferencia")
+            if foto_ref and isinstance(foto_ref, dict):
+                caso_id = foto_ref.get("caso_id")  # Obtener caso_id
+                caso = foto_ref.get("Caso")
+                if caso and isinstance(caso, dict):
+                    status = caso.get("status")
+                    persona = caso.get("PersonaDesaparecida")
+                    if persona and isinstance(persona, dict):
+                        nombre = persona.get("nombre_completo")
+        except Exception as e:
+            print(f"⚠️ Error obteniendo datos para embedding {row.get('id')}: {e}")
+
+        # Si no se pudo obtener el nombre, usar ID como fallback
+        if not nombre:
+            nombre = f"Foto_{row.get('foto_referencia_id', row.get('id'))}"
+
+        vector = None
+        try:
+            # Detectar formato del vector
+            if isinstance(vector_data, str):
+                if vector_data.startswith("\\x"):
+                    # Es formato bytea (hex)
+                    vector = np.frombuffer(binascii.unhexlify(vector_data[2:]), dtype=np.float64)
+                else:
+                    # Es formato base64 (raro en tu caso, pero posible)
+                    vector = self._decode_base64_vector(vector_data, id=row.get("id"))
+            elif isinstance(vector_data, (bytes, bytearray)):
+                vector = np.frombuffer(vector_data, dtype=np.float64)
+            elif isinstance(vector_data, list):
+                vector = np.array(vector_data, dtype=np.float64)
+        except Exception as e:
+            print(f"⚠️ No se pudo procesar vector id={row.get('id')}: {e}")
+
+        if vector is not None and len(vector) == 0:
+            vector = None
+        return vector, nombre, caso_id, status
+
+    def _galeria_desde_filas(self, filas: List[Dict]) -> Dict:
+        galeria = galeria_vacia(con_estados=True)
+        for row in filas:
+            vector, nombre, caso_id, status = self._parse_embedding_row(row)
+            if vector is None:
+                continue
+            galeria["encodings"].append(vector)
+            galeria["names"].append(nombre)
+            galeria["caso_ids"].append(caso_id)
+            galeria["embedding_ids"].append(row.get("id"))
+            galeria["statuses"].append(status)
+        return galeria
+
+    def cargar(self) -> Dict:
+        response = self.supabase.table("Embedding")\
+            .select(self.EMBEDDING_SELECT)\
+            .execute()
+
+        if not response.data:
+            print("    No se encontraron encodings en BD")
+            return galeria_vacia(con_estados=True)
+        return self._galeria_desde_filas(response.data)
+
+    def cargar_caso(self, caso_id) -> Dict:
+        response = self.supabase.table("Embedding")\
+            .select(self.EMBEDDING_SELECT.replace("FotoReferencia(", "FotoReferencia!inner("))\
+            .eq("FotoReferencia.caso_id", caso_id)\
+            .execute()
+        return self._galeria_desde_filas(response.data or [])
+
+
+# ======================================================
+# 📦 encodings.pickle legado
+# ======================================================
+class FuentePickle(FuenteGaleria):
+    """
+    Lee el encodings.pickle legado ({"encodings", "names"[, "caso_ids"]})
+    """
+    nombre = "pickle"
+
+    def __init__(self, encodings_path: str = "encodings.pickle"):
+        self.encodings_path = encodings_path
+
+    def cargar(self) -> Dict:
+        galeria = galeria_vacia()
+        if not os.path.exists(self.encodings_path):
+            print("⚠️ Archivo de encodings no encontrado.")
+            return galeria
+
+        with open(self.encodings_path, "rb") as file:
+            data = pickle.load(file)
+        galeria["encodings"] = list(data.get("encodings", []))
+        galeria["names"] = list(data.get("names", []))
+        galeria["caso_ids"] = list(data.get("caso_ids", [None] * len(galeria["encodings"])))
+        galeria["embedding_ids"] = [None] * len(galeria["encodings"])
+        return galeria
+
+
+# ======================================================
+# 🧱 Almacén segmentado (services/encodings_store.py)
+# ======================================================
+class FuenteAlmacenSegmentado(FuenteGaleria):
+    """
+    Lee el almacén segmentado; si está vacío migra antes el encodings.pickle
+    legado. Las actualizaciones traen solo los segmentos nuevos.
+    """
+    nombre = "segmented_store"
+
+    def __init__(self, encodings_path: str = "encodings.pickle", store=None):
+        self.encodings_path = encodings_path
+        self._store = store
+        self._loaded_covers = set()
+
+    @property
+    def store(self):
+        if self._store is None:
+            from services.encodings_store import get_encodings_store
+            self._store = get_encodings_store()
+        return self._store
+
+    def cargar(self) -> Dict:
+        self.store.migrate_from_pickle(self.encodings_path)
+        data = self.store.load_all()
+        self._loaded_covers = set(data["covers"])
+
+        galeria = galeria_vacia()
+        galeria["encodings"] = list(data["encodings"])
+        galeria["names"] = list(data["names"])
+        galeria["caso_ids"] = list(data["caso_ids"])
+        galeria["embedding_ids"] = [None] * len(galeria["encodings"])
+        return galeria
+
+    def actualizar(self) -> Optional[Dict]:
+        manifest, nuevos, requiere_recarga = self.store.load_new(self._loaded_covers)
+        if requiere_recarga:
+            return None
+
+        galeria = galeria_vacia()
+        for segment in nuevos:
+            galeria["encodings"] += list(segment["encodings"])
+            galeria["names"] += list(segment["names"])
+            galeria["caso_ids"] += list(segment["caso_ids"])
+            self._loaded_covers |= set(segment["covers"])
+        galeria["embedding_ids"] = [None] * len(galeria["encodings"])
+
+        if galeria["encodings"]:
+            print(f"➕ {len(galeria['encodings'])} encodings nuevos (versión {manifest['version']})")
+        return galeria
+
+
+# ======================================================
+# 🗺️ Snapshot en disco (memory-mapped)
+# ======================================================
+def _leer_meta_snapshot(path: str) -> Optional[Dict]:
+    try:
+        with open(f"{path}.json", "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def _ruta_matriz(path: str, meta: Dict) -> str:
+    # Snapshots anteriores no guardaban el nombre: la matriz era <path>.npy
+    return os.path.join(os.path.dirname(path), meta["matrix"]) if meta.get("matrix") else f"{path}.npy"
+
+
+def guardar_snapshot(galeria: Dict, path: str) -> Dict:
+    """
+    Escribe la galería como <path>.<hash>.npy (matriz float64) + <path>.json
+    (metadatos que nombran la matriz). El .npy se abre con memmap: varios
+    procesos comparten las mismas páginas y el arranque no deserializa vectores.
+    """
+    matriz = np.ascontiguousarray(np.asarray(galeria["encodings"], dtype=np.float64).reshape(-1, 128))
+    version = hashlib.sha1(matriz.tobytes()).hexdigest()[:12]
+    nombre_matriz = f"{os.path.basename(path)}.{version}.npy"
+    meta = {
+        "matrix": nombre_matriz,
+        "names": list(galeria["names"]),
+        "caso_ids": list(galeria["caso_ids"]),
+        "embedding_ids": list(galeria["embedding_ids"]),
+        "statuses": galeria.get("statuses"),
+        "total": int(len(matriz))
+    }
+    anterior = _leer_meta_snapshot(path)
+    ruta_npy = _ruta_matriz(path, meta)
+
+    # La matriz va con nombre propio y el .json la publica: un solo os.replace
+    # cambia matriz y metadatos a la vez para quien abra el snapshot
+    tmp_npy = f"{ruta_npy}.tmp.npy"
+    np.save(tmp_npy, matriz)
+    os.replace(tmp_npy, ruta_npy)
+
+    tmp_json = f"{path}.json.tmp"
+    with open(tmp_json, "w", encoding="utf-8") as f:
+        json.dump(meta, f, default=str)
+    os.replace(tmp_json, f"{path}.json")
+
+    # Los procesos que ya tienen mapeada la matriz vieja la siguen leyendo
+    if anterior is not None and _ruta_matriz(path, anterior) != ruta_npy:
+        try:
+            os.remove(_ruta_matriz(path, anterior))
+        except OSError:
+            pass
+    return {"path": path, "matrix": ruta_npy, "total": meta["total"], "size": os.path.getsize(ruta_npy)}
+
+
+class FuenteSnapshotMmap(FuenteGaleria):
+    """
+    Abre un snapshot escrito por guardar_snapshot con np.load(mmap_mode="r")
+    """
+    nombre = "mmap_snapshot"
+
+    def __init__(self, path: str):
+        self.path = path
+
+    def cargar(self) -> Dict:
+        if not os.path.exists(f"{self.path}.json"):
+            print(f"⚠️ Snapshot de galería no encontrado: {self.path}")
+            return galeria_vacia()
+
+        with open(f"{self.path}.json", "r", encoding="utf-8") as f:
+            meta = json.load(f)
+        matriz = np.load(_ruta_matriz(self.path, meta), mmap_mode="r")
+        if len(matriz) != meta["total"]:
+            raise ValueError(f"Snapshot inconsistente: {len(matriz)} vectores, {meta['total']} en metadatos")
+
+        galeria = galeria_vacia()
+        galeria["encodings"] = list(matriz)  # vistas de filas, sin copiar
+        galeria["names"] = meta["names"]
+        galeria["caso_ids"] = meta["caso_ids"]
+        galeria["embedding_ids"] = meta["embedding_ids"]
+        galeria["statuses"] = meta.get("statuses")
+        galeria["matriz"] = matriz
+        return galeria
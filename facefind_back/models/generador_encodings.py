@@ -2,17 +2,137 @@ import face_recognition
 import numpy as np
 import cv2
 import requests
+import os
+import time
+import threading
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime
+from typing import Optional, Tuple, Dict
 from models.encoding import Encoding# 👈 importa tu clase Encoding
 
+# Pool de procesos compartido para generar encodings en paralelo (dlib es CPU-bound)
+_pool_encodings = None
+_pool_lock = threading.Lock()
+
+
+def obtener_pool_encodings() -> ProcessPoolExecutor:
+    """Devuelve (creándolo si hace falta) el pool de procesos para encodings"""
+    global _pool_encodings
+    with _pool_lock:
+        if _pool_encodings is None:
+            from config import Config
+            workers = Config.ENCODING_WORKERS or min(3, os.cpu_count() or 1)
+            _pool_encodings = ProcessPoolExecutor(max_workers=workers)
+            print(f"⚙️ Pool de encodings iniciado con {workers} procesos")
+        return _pool_encodings
+
+
+def reiniciar_pool_encodings():
+    """Descarta el pool actual (p.ej. si un proceso hijo murió)"""
+    global _pool_encodings
+    with _pool_lock:
+        if _pool_encodings is not None:
+            _pool_encodings.shutdown(wait=False)
+        _pool_encodings = None
+
+
+def codificar_en_proceso(generador: 'GeneradorEncodings', image_bytes: bytes):
+    """Tarea ejecutada en un proceso hijo: decodifica y genera el encoding"""
+    inicio = time.time()
+    img_array = np.frombuffer(image_bytes, dtype=np.uint8)
+    imagen = cv2.imdecode(img_array, cv2.IMREAD_COLOR)
+    if imagen is None:
+        return None, {"error": "No se pudo decodificar la imagen",
+                      "total_ms": round((time.time() - inicio) * 1000, 2)}
+    return generador.detectar_y_codificar(imagen)
+
+
 class GeneradorEncodings:
     """
     Clase responsable de generar encoding facial a partir de una foto.
     Retorna un objeto Encoding.
+
+    La foto puede llegar como URL (se descarga), como bytes ya en memoria
+    (p.ej. el archivo recién subido) o como arreglo BGR ya decodificado.
+
+    Estrategia de detección (configurable, pensada para servidores sin GPU):
+    - La imagen se reduce para que su lado mayor no supere `max_lado`
+    - 'hog'     → solo HOG
+    - 'cnn'     → solo CNN (preciso pero lento en CPU)
+    - 'hog+cnn' → HOG primero y CNN solo si HOG no encuentra rostro
     """
 
-    def __init__(self):
-        pass
+    DETECTORES_VALIDOS = ("hog", "cnn", "hog+cnn")
+
+    def __init__(self,
+                 detector: Optional[str] = None,
+                 max_lado: Optional[int] = None,
+                 upsample: Optional[int] = None,
+                 num_jitters: Optional[int] = None,
+                 usar_cache: bool = True):
+        """
+        Args:
+            detector: 'hog', 'cnn' o 'hog+cnn' (por defecto Config.ENCODING_DETECTOR)
+            max_lado: Lado máximo en píxeles antes de detectar (0 = sin reducir)
+            upsample: Veces que se sobre-muestrea la imagen al detectar
+            num_jitters: Re-muestreos al generar el encoding (más = preciso y lento)
+            usar_cache: Consultar la caché por contenido (SHA-256) antes de detectar
+        """
+        from config import Config
+
+        self.detector = (detector or Config.ENCODING_DETECTOR).lower()
+        if self.detector not in self.DETECTORES_VALIDOS:
+            raise ValueError(f"Detector inválido: {self.detector}. Use {self.DETECTORES_VALIDOS}")
+
+        self.max_lado = Config.ENCODING_MAX_SIDE if max_lado is None else max_lado
+        self.upsample = Config.ENCODING_UPSAMPLE if upsample is None else upsample
+        self.num_jitters = Config.ENCODING_NUM_JITTERS if num_jitters is None else num_jitters
+        self.usar_cache = usar_cache
+
+        # Reporte de latencia/calidad de la última foto procesada
+        self.ultimo_reporte: Dict = {}
+
+    def settings(self) -> Dict:
+        """Configuración del detector (forma parte de la clave de caché)"""
+        return {
+            "detector": self.detector,
+            "max_lado": self.max_lado,
+            "upsample": self.upsample,
+            "num_jitters": self.num_jitters
+        }
+
+    # ======================================================
+    # 💾 Caché por contenido
+    # ======================================================
+    def _cache(self):
+        if not self.usar_cache:
+            return None
+        try:
+            from services.encoding_cache import obtener_cache_encodings
+            return obtener_cache_encodings()
+        except Exception as e:
+            print(f"⚠️ Caché de encodings no disponible: {e}")
+            return None
+
+    def _desde_cache(self, image_hash: str) -> Optional[Tuple[Optional[Encoding], Dict]]:
+        """(Encoding o None, reporte) si la imagen ya fue procesada con esta configuración"""
+        cache = self._cache()
+        cached = cache.get(image_hash, self.settings()) if cache else None
+        if cached is None:
+            return None
+
+        vector, reporte = cached
+        reporte = {**reporte, "image_hash": image_hash, "cache_hit": True}
+        encoding = None
+        if vector is not None:
+            encoding = Encoding(vector=vector, fecha_generacion=datetime.now())
+        return encoding, reporte
+
+    def _guardar_en_cache(self, image_hash: str, vector: Optional[np.ndarray], reporte: Dict):
+        """Guarda el resultado (incluida la ausencia de rostro) si la detección se completó"""
+        cache = self._cache()
+        if cache and reporte.get("detector_usado"):
+            cache.put(image_hash, self.settings(), vector, reporte)
 
     def generar_encodings(self, url: str, foto_id: int) -> Encoding:
         """
@@ -33,26 +153,78 @@ class GeneradorEncodings:
                 return None
 
             print(f"✅ Imagen descargada, procesando...")
-            
-            img_array = np.asarray(bytearray(response.content), dtype=np.uint8)
+            return self.generar_desde_bytes(response.content, foto_id, origen=url)
+
+        except Exception as e:
+            print(f"❌ Error generando encoding para {url}: {e}")
+            return None
+
+    def generar_desde_bytes(self, image_bytes: bytes, foto_id: Optional[int] = None,
+                            origen: str = "bytes") -> Encoding:
+        """
+        Genera un encoding a partir de los bytes de la imagen (JPG/PNG...).
+        Evita volver a descargar una foto que ya está en memoria.
+
+        Args:
+            image_bytes: Contenido del archivo de imagen
+            foto_id: ID en la tabla FotoReferencia (puede asignarse después)
+            origen: Descripción de la fuente, solo para logs
+
+        Returns:
+            Encoding o None si falla
+        """
+        try:
+            # Caché por contenido: un hit evita decodificar, detectar y codificar
+            from services.encoding_cache import EncodingCache
+            image_hash = EncodingCache.hash_bytes(image_bytes)
+            cached = self._desde_cache(image_hash)
+            if cached is not None:
+                encoding, self.ultimo_reporte = cached
+                print(f"💾 {origen}: encoding obtenido de caché")
+                if encoding is not None:
+                    encoding.foto_referencia_id = foto_id
+                return encoding
+
+            img_array = np.frombuffer(image_bytes, dtype=np.uint8)
             imagen = cv2.imdecode(img_array, cv2.IMREAD_COLOR)
-            
+
             if imagen is None:
-                print(f"⚠️ No se pudo decodificar la imagen: {url}")
+                print(f"⚠️ No se pudo decodificar la imagen: {origen}")
                 return None
-                
-            rgb = cv2.cvtColor(imagen, cv2.COLOR_BGR2RGB)
 
-            # 2️⃣ Detectar rostro
-            ubicaciones = face_recognition.face_locations(rgb, model="cnn")
-            if not ubicaciones:
-                print(f"⚠️ No se detectó rostro en {url}")
-                return None
+            encoding = self.generar_desde_array(imagen, foto_id, origen=origen)
+            self._guardar_en_cache(image_hash, encoding.vector if encoding else None, self.ultimo_reporte)
+            self.ultimo_reporte = {**self.ultimo_reporte, "image_hash": image_hash, "cache_hit": False}
+            return encoding
+
+        except Exception as e:
+            print(f"❌ Error generando encoding para {origen}: {e}")
+            return None
+
+    def generar_desde_array(self, imagen: np.ndarray, foto_id: Optional[int] = None,
+                            origen: str = "array") -> Encoding:
+        """
+        Genera un encoding a partir de una imagen BGR ya decodificada.
+
+        Args:
+            imagen: Imagen BGR de OpenCV
+            foto_id: ID en la tabla FotoReferencia (puede asignarse después)
+            origen: Descripción de la fuente, solo para logs
+
+        Returns:
+            Encoding o None si falla
+        """
+        self.ultimo_reporte = {}
+        try:
+            encoding_array, reporte = self.detectar_y_codificar(imagen)
+            self.ultimo_reporte = reporte
+            print(f"⏱️ {origen}: detector={reporte['detector_usado']} "
+                  f"detección={reporte['deteccion_ms']}ms encoding={reporte['encoding_ms']}ms "
+                  f"escala={reporte['escala']}")
 
-            print(f"✅ Rostro detectado, generando encoding...")
-            
-            # 3️⃣ Generar encoding
-            encoding_array = face_recognition.face_encodings(rgb, ubicaciones)[0]
+            if encoding_array is None:
+                print(f"⚠️ No se detectó rostro en {origen}")
+                return None
 
             # 4️⃣ Retornar un objeto Encoding
             return Encoding(
@@ -62,5 +234,148 @@ class GeneradorEncodings:
             )
 
         except Exception as e:
-            print(f"❌ Error generando encoding para {url}: {e}")
+            print(f"❌ Error generando encoding para {origen}: {e}")
             return None
+
+    def generar_lote_desde_bytes(self, fotos: Dict[str, bytes]) -> Dict[str, Tuple[Optional[Encoding], Dict]]:
+        """
+        Genera los encodings de varias fotos en paralelo usando el pool de procesos.
+        La latencia total es aproximadamente la de la foto más lenta.
+
+        Args:
+            fotos: Dict {clave: bytes de la imagen}, p.ej. {'frontal': ..., 'profile1': ...}
+
+        Returns:
+            Dict {clave: (Encoding o None, reporte)}. Los Encoding no tienen
+            foto_referencia_id: se asigna al registrar la foto en BD.
+        """
+        resultados = {}
+        if not fotos:
+            return resultados
+
+        # Primero la caché: solo las fotos no vistas van al pool
+        from services.encoding_cache import EncodingCache
+        hashes = {clave: EncodingCache.hash_bytes(image_bytes) for clave, image_bytes in fotos.items()}
+        pendientes = {}
+        for clave, image_bytes in fotos.items():
+            cached = self._desde_cache(hashes[clave])
+            if cached is not None:
+                print(f"💾 {clave}: encoding obtenido de caché")
+                resultados[clave] = cached
+            else:
+                pendientes[clave] = image_bytes
+        fotos = pendientes
+        if not fotos:
+            return resultados
+
+        # Una sola foto: no vale la pena el costo de IPC
+        if len(fotos) == 1:
+            clave, image_bytes = next(iter(fotos.items()))
+            encoding = self.generar_desde_bytes(image_bytes, origen=clave)
+            resultados[clave] = (encoding, self.ultimo_reporte)
+            return resultados
+
+        try:
+            pool = obtener_pool_encodings()
+            futures = {clave: pool.submit(codificar_en_proceso, self, image_bytes)
+                       for clave, image_bytes in fotos.items()}
+        except Exception as e:
+            print(f"⚠️ Pool de encodings no disponible ({e}), procesando secuencialmente")
+            reiniciar_pool_encodings()
+            futures = {}
+
+        for clave, image_bytes in fotos.items():
+            future = futures.get(clave)
+            try:
+                if future is None:
+                    raise RuntimeError("sin pool")
+                encoding_array, reporte = future.result()
+            except Exception as e:
+                if future is not None:
+                    print(f"⚠️ Falló el proceso para {clave} ({e}), reintentando en este proceso")
+                encoding = self.generar_desde_bytes(image_bytes, origen=clave)
+                resultados[clave] = (encoding, self.ultimo_reporte)
+                continue
+
+            encoding = None
+            if encoding_array is not None:
+                encoding = Encoding(
+                    vector=np.array(encoding_array, dtype=np.float64),
+                    fecha_generacion=datetime.now()
+                )
+            else:
+                print(f"⚠️ No se detectó rostro en {clave}")
+            self._guardar_en_cache(hashes[clave], encoding_array, reporte)
+            resultados[clave] = (encoding, {**reporte, "image_hash": hashes[clave], "cache_hit": False})
+
+        return resultados
+
+    def detectar_y_codificar(self, imagen: np.ndarray) -> Tuple[Optional[np.ndarray], Dict]:
+        """
+        Aplica la estrategia de detección configurada y genera el encoding
+        del rostro más grande de la foto.
+
+        Args:
+            imagen: Imagen BGR de OpenCV
+
+        Returns:
+            (encoding o None, reporte) donde el reporte incluye detector usado,
+            tiempos en ms, escala aplicada y tamaño del rostro en píxeles
+        """
+        inicio = time.time()
+        alto, ancho = imagen.shape[:2]
+
+        # 1️⃣ Reducir a lado máximo antes de detectar
+        escala = 1.0
+        if self.max_lado and max(alto, ancho) > self.max_lado:
+            escala = self.max_lado / float(max(alto, ancho))
+            imagen = cv2.resize(imagen, (0, 0), fx=escala, fy=escala, interpolation=cv2.INTER_AREA)
+
+        rgb = cv2.cvtColor(imagen, cv2.COLOR_BGR2RGB)
+
+        # 2️⃣ Detectar rostro (HOG primero, CNN como respaldo)
+        t_det = time.time()
+        modelos = ["hog", "cnn"] if self.detector == "hog+cnn" else [self.detector]
+        ubicaciones = []
+        detector_usado = None
+        for modelo in modelos:
+            detector_usado = modelo
+            ubicaciones = face_recognition.face_locations(
+                rgb, number_of_times_to_upsample=self.upsample, model=modelo
+            )
+            if ubicaciones:
+                break
+        deteccion_ms = round((time.time() - t_det) * 1000, 2)
+
+        reporte = {
+            "detector": self.detector,
+            "detector_usado": detector_usado,
+            "fallback_cnn": self.detector == "hog+cnn" and detector_usado == "cnn",
+            "escala": round(escala, 4),
+            "resolucion_original": [int(ancho), int(alto)],
+            "upsample": self.upsample,
+            "num_jitters": self.num_jitters,
+            "rostros_detectados": len(ubicaciones),
+            "rostro_px": 0,
+            "deteccion_ms": deteccion_ms,
+            "encoding_ms": 0.0,
+            "total_ms": 0.0
+        }
+
+        if not ubicaciones:
+            reporte["total_ms"] = round((time.time() - inicio) * 1000, 2)
+            return None, reporte
+
+        # 3️⃣ Generar encoding del rostro más grande
+        ubicacion = max(ubicaciones, key=lambda loc: (loc[2] - loc[0]) * (loc[1] - loc[3]))
+        top, right, bottom, left = ubicacion
+        reporte["rostro_px"] = int(min(bottom - top, right - left) / escala)
+
+        t_enc = time.time()
+        encoding_array = face_recognition.face_encodings(
+            rgb, [ubicacion], num_jitters=self.num_jitters
+        )[0]
+        reporte["encoding_ms"] = round((time.time() - t_enc) * 1000, 2)
+        reporte["total_ms"] = round((time.time() - inicio) * 1000, 2)
+
+        return encoding_array, reporte
@@ -0,0 +1,119 @@
+"""
+Intervalo de captura recomendado por cámara
+
+El cliente que manda frames a /detection/detect-faces no sabe si la escena
+tiene actividad ni cuán cargado está el servidor. Con cada resultado se
+actualiza la actividad reciente de la cámara (medias exponenciales de
+presencia de rostros, movimiento según el cribado y matches) y se
+recomienda el intervalo hasta el próximo frame:
+
+    - Actividad alta → intervalo mínimo; escena quieta → intervalo máximo.
+    - Un match reciente fija el mínimo durante match_hold_s.
+    - La presión de la cola de admisión alarga el intervalo (hasta 3x).
+"""
+import threading
+import time
+from typing import Dict, Optional
+
+ALPHA = 0.3
+
+
+class AsesorIntervalo:
+    """
+    Lleva la actividad reciente de cada cámara y calcula el intervalo sugerido
+    """
+
+    def __init__(self, minimo_s: float = 1.0, maximo_s: float = 10.0, match_hold_s: float = 30.0):
+        """
+        Args:
+            minimo_s: Intervalo para cámaras con actividad
+            maximo_s: Intervalo para cámaras quietas
+            match_hold_s: Segundos que una cámara con match se sigue muestreando al mínimo
+        """
+        self.minimo_s = minimo_s
+        self.maximo_s = max(minimo_s, maximo_s)
+        self.match_hold_s = match_hold_s
+        self._camaras: Dict[str, Dict] = {}
+        self._lock = threading.Lock()
+
+    def registrar(self, camara_id, resultado: Dict):
+        """
+        Actualiza la actividad de la cámara con el resultado de process_frame
+        """
+        rostros = resultado.get("total_faces_detected", 0) > 0
+        hubo_match = any(f.get("match_found") for f in resultado.get("faces", []))
+        cribado = resultado.get("prescreen")
+        # Sin cribado, el movimiento se aproxima con la presencia de rostros
+        movimiento = bool(cribado["candidates"]) if cribado else rostros
+
+        with self._lock:
+            estado = self._camaras.setdefault(str(camara_id), {
+                "faces": 0.0, "motion": 0.0, "matches": 0.0, "last_match": None, "frames": 0
+            })
+            estado["frames"] += 1
+            estado["faces"] = (1 - ALPHA) * estado["faces"] + ALPHA * rostros
+            estado["motion"] = (1 - ALPHA) * estado["motion"] + ALPHA * movimiento
+            estado["matches"] = (1 - ALPHA) * estado["matches"] + ALPHA * hubo_match
+            if hubo_match:
+                estado["last_match"] = time.time()
+
+    def actividad(self, camara_id) -> float:
+        """Actividad reciente de la cámara entre 0 (quieta) y 1"""
+        with self._lock:
+            estado = self._camaras.get(str(camara_id))
+            if estado is None:
+                return 1.0  # cámara nueva: muestrear rápido hasta conocerla
+            if estado["last_match"] and time.time() - estado["last_match"] < self.match_hold_s:
+                return 1.0
+            return max(estado["faces"], estado["matches"], 0.5 * estado["motion"])
+
+    def actividad_matches(self, camara_id) -> float:
+        """Matches recientes de la cámara entre 0 y 1 (1 durante match_hold_s)"""
+        with self._lock:
+            estado = self._camaras.get(str(camara_id))
+            if estado is None:
+                return 0.0
+            if estado["last_match"] and time.time() - estado["last_match"] < self.match_hold_s:
+                return 1.0
+            return estado["matches"]
+
+    def recomendar(self, camara_id, presion: float = 0.0) -> int:
+        """
+        Args:
+            camara_id: Cámara que pide el siguiente frame
+            presion: Ocupación de la cola de admisión entre 0 y 1
+
+        Returns:
+            Intervalo recomendado en ms
+        """
+        actividad = self.actividad(camara_id)
+        intervalo = self.minimo_s + (self.maximo_s - self.minimo_s) * (1 - actividad)
+        intervalo *= 1 + 2 * min(1.0, max(0.0, presion))
+        intervalo = min(self.maximo_s * 3, max(self.minimo_s, intervalo))
+        return int(round(intervalo * 1000))
+
+    def resumen(self, presion: float = 0.0) -> Dict:
+        with self._lock:
+            camaras = list(self._camaras)
+        return {
+            "min_s": self.minimo_s,
+            "max_s": self.maximo_s,
+            "cameras": {
+                camara: {
+                    "activity": round(self.actividad(camara), 3),
+                    "next_capture_ms": self.recomendar(camara, presion)
+                }
+                for camara in camaras
+            }
+        }
+
+
+def presion_cola(resumen_cola: Optional[Dict]) -> float:
+    """Ocupación de la cola de admisión (en curso + en espera) entre 0 y 1"""
+    if not resumen_cola:
+        return 0.0
+    capacidad = resumen_cola["max_concurrent"] + resumen_cola["max_queue"]
+    ocupado = resumen_cola["in_flight"] + resumen_cola["queue_depth"]
+    # Mientras haya lugares de ejecución libres no hay presión
+    exceso = ocupado - resumen_cola["max_concurrent"]
+    return max(0.0, exceso / max(1, capacidad - resumen_cola["max_concurrent"]))
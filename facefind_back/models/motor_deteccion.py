@@ -0,0 +1,998 @@
+"""
+Motor único de detección facial
+
+Pipeline detectar → calidad → codificar → comparar compartido por todos los
+puntos de entrada (models/procesador_facefind.py, facefind/procesador_facefind.py
+y services/face_detection_service.py). La galería sale de una FuenteGaleria
+(models/fuentes_galeria.py), así que cualquier mejora del pipeline aplica a
+todas las fuentes.
+
+Los puntos de entrada legados conservan su salida con las opciones del
+motor (quality_gate, deduplicate, top_matches, unknown_label): el filtro
+de calidad y la deduplicación por nombre solo aplican a la API.
+"""
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Dict, List, Optional, Tuple
+
+import cv2
+import face_recognition
+import numpy as np
+
+from models.fuentes_galeria import FuenteGaleria
+
+# Reintentos de compact_gallery si la galería cambia mientras se compacta
+COMPACTION_MAX_INTENTOS = 3
+
+
+class MotorDeteccion:
+    """
+    Motor de detección y reconocimiento sobre una galería intercambiable
+
+    Características:
+    - Detección opcional sobre el frame reducido (detection_scale)
+    - Priorización por calidad (tamaño + nitidez) ANTES de codificar:
+      solo se calculan los encodings de los max_faces mejores rostros
+    - Procesamiento paralelo de comparaciones
+    - Prefiltro por caso y matriz de galería cacheada
+    - Deduplicación de alertas (sin alertas duplicadas para misma persona)
+    """
+
+    def __init__(self, fuente: FuenteGaleria, tolerance=0.55, max_faces: Optional[int] = 3,
+                 enable_parallel=True, detection_scale: int = 1, model: Optional[str] = None,
+                 quality_gate: bool = True, deduplicate: bool = True, top_matches: int = 3,
+                 unknown_label: Optional[str] = None):
+        """
+        Args:
+            fuente: De dónde se carga la galería
+            tolerance: Umbral de distancia para considerar match
+            max_faces: Rostros a codificar por frame (None = todos)
+            enable_parallel: Comparar varios rostros en paralelo
+            detection_scale: Factor de reducción del frame para detectar
+            model: Detector por defecto (hog, cnn, dnn, haar; por defecto
+                   Config.FACE_DETECTOR_BACKEND). Cada cámara puede usar otro.
+            quality_gate: Descartar rostros pequeños/borrosos y ordenar por
+                          calidad; sin él se codifican en orden de detección
+            deduplicate: Dejar un solo rostro por persona reconocida
+            top_matches: Coincidencias que se devuelven en all_similarities
+            unknown_label: Nombre para best_match_name cuando no hay match
+                           (None = el más parecido aunque no alcance el umbral)
+        """
+        from config import Config
+
+        self.fuente = fuente
+        self.tolerance = tolerance
+        self.max_faces = max_faces
+        self.enable_parallel = enable_parallel
+        self.detection_scale = max(1, int(detection_scale))
+        self.quality_gate = quality_gate
+        self.deduplicate = deduplicate
+        self.top_matches = top_matches
+        self.unknown_label = unknown_label
+
+        # Rostros más pequeños (px) o más borrosos (var. Laplaciano) no se codifican
+        self.min_face_size = Config.FACE_MIN_SIZE_PX
+        self.min_sharpness = Config.FACE_MIN_SHARPNESS
+        self.model, self.detector = self._detector_por_defecto(model or Config.FACE_DETECTOR_BACKEND)
+
+        # Cribado barato de frames vacíos antes del detector
+        from models.cribado_frames import CribadoFrames
+        self.cribado = CribadoFrames(lado=Config.FRAME_PRESCREEN_SIDE)
+        self.prescreen_audit_rate = Config.FRAME_PRESCREEN_AUDIT_RATE
+        try:
+            self.prescreen = self.cribado.validar(Config.FRAME_PRESCREEN_MODE)
+        except ValueError as e:
+            print(f"⚠️ Cribado '{Config.FRAME_PRESCREEN_MODE}' no disponible ({e}), se desactiva")
+            self.prescreen = "off"
+
+        # Presupuesto de latencia por request (0 = sin presupuesto)
+        from models.presupuesto_latencia import PlanificadorLatencia
+        self.planificador = PlanificadorLatencia()
+        self.latency_budget_ms = Config.DETECTION_LATENCY_BUDGET_MS
+
+        # Ajustes por cámara: los de Config más los cambiados en caliente
+        self.camera_settings = self._ajustes_de_config(Config.CAMERA_DETECTION_SETTINGS)
+
+        self.known_encodings = []
+        self.known_names = []
+        self.known_caso_ids = []  # IDs de casos asociados a cada encoding
+        self.known_embedding_ids = []  # ID de Embedding de cada encoding
+        self.compaction_report = None  # Resultado de la última compactación
+        self.case_statuses = {}  # caso_id -> estado (incluye casos fuera de la galería)
+        self._gallery_lock = threading.Lock()
+        self._matriz_cache = (None, None)
+
+        # Prefiltro por caso (centroides) antes de la comparación exacta
+        self.prefilter_enabled = Config.MATCH_PREFILTER_ENABLED
+        self.prefilter_top_m = Config.MATCH_PREFILTER_TOP_M
+        self.prefilter_stats = {"queries": 0, "embeddings_compared": 0, "embeddings_total": 0}
+        self._prefiltro_cache = (None, None)
+
+        # Thread pool para procesamiento paralelo
+        if self.enable_parallel:
+            self.executor = ThreadPoolExecutor(max_workers=3)
+
+        self.reload_gallery()
+
+    # ======================================================
+    # 📥 Carga de la galería
+    # ======================================================
+    @staticmethod
+    def es_estado_accionable(status) -> bool:
+        """Solo los casos en estados accionables entran a la galería"""
+        from config import Config
+        return (status or "").lower() in Config.GALLERY_ACTIONABLE_STATUSES
+
+    def _filtrar_accionables(self, galeria: Dict) -> Tuple[Dict, int]:
+        """
+        Registra el estado de cada caso y quita los embeddings de casos no
+        accionables (solo si la fuente conoce los estados)
+        """
+        statuses = galeria.get("statuses")
+        if statuses is None:
+            return galeria, 0
+
+        conservar = []
+        for i, (caso_id, status) in enumerate(zip(galeria["caso_ids"], statuses)):
+            self._registrar_estado_caso(caso_id, status)
+            if caso_id is None or self.es_estado_accionable(status):
+                conservar.append(i)
+
+        excluidos = len(statuses) - len(conservar)
+        if excluidos:
+            galeria = {
+                clave: [galeria[clave][i] for i in conservar]
+                for clave in ("encodings", "names", "caso_ids", "embedding_ids", "statuses")
+            }
+        return galeria, excluidos
+
+    def load_gallery(self) -> int:
+        """
+        Carga la galería completa desde la fuente.
+        Solo entran los casos en estados accionables (GALLERY_ACTIONABLE_STATUSES).
+        """
+        galeria = self.fuente.cargar()
+        galeria, excluidos = self._filtrar_accionables(galeria)
+
+        with self._gallery_lock:
+            self.known_encodings = list(galeria["encodings"])
+            self.known_names = list(galeria["names"])
+            self.known_caso_ids = list(galeria["caso_ids"])
+            self.known_embedding_ids = list(galeria["embedding_ids"])
+            # Una matriz ya armada por la fuente (memmap) evita copiar la galería
+            if galeria.get("matriz") is not None and not excluidos:
+                self._matriz_cache = (self.known_encodings, galeria["matriz"])
+
+        print(f"✅ {len(self.known_encodings)} encodings cargados ({self.fuente.nombre})"
+              + (f", {excluidos} de casos no accionables excluidos" if excluidos else ""))
+        return len(self.known_encodings)
+
+    def reload_gallery(self) -> int:
+        """
+        Recarga la galería completa (y la compacta si está habilitado) sin
+        tocar los ajustes por cámara ni las estadísticas del motor: así se
+        recarga tras subir fotos o re-codificar sin reconstruir el motor.
+        """
+        from config import Config
+        total = self.load_gallery()
+
+        # Compactar embeddings casi duplicados de cada caso
+        if Config.GALLERY_COMPACTION_ENABLED:
+            self.compact_gallery(Config.GALLERY_COMPACTION_RADIUS)
+            total = len(self.known_encodings)
+        return total
+
+    def heredar_estado(self, anterior: "MotorDeteccion"):
+        """
+        Toma de un motor anterior lo que no sale de la configuración: ajustes
+        de cámara cambiados en caliente, cribado (fondos y estadísticas),
+        EWMA del planificador de latencia y estadísticas del prefiltro
+        """
+        self.camera_settings = anterior.camera_settings
+        self.cribado = anterior.cribado
+        self.planificador = anterior.planificador
+        self.prefilter_stats = anterior.prefilter_stats
+
+    def refresh_gallery(self) -> Dict:
+        """
+        Incorpora solo lo nuevo si la fuente lo soporta; si no, recarga todo
+        """
+        try:
+            nuevos = self.fuente.actualizar()
+            if nuevos is None:
+                self.load_gallery()
+                return {"success": True, "full_reload": True, "added": 0,
+                        "total_encodings": len(self.known_encodings)}
+
+            nuevos, _ = self._filtrar_accionables(nuevos)
+            self._agregar(nuevos)
+            return {"success": True, "full_reload": False, "added": len(nuevos["encodings"]),
+                    "total_encodings": len(self.known_encodings)}
+
+        except Exception as e:
+            print(f"Error actualizando encodings: {e}")
+            return {"success": False, "error": str(e)}
+
+    def _agregar(self, galeria: Dict):
+        """Agrega embeddings a la galería (copy-on-write: los lectores no ven listas a medias)"""
+        with self._gallery_lock:
+            self.known_encodings = self.known_encodings + list(galeria["encodings"])
+            self.known_names = self.known_names + list(galeria["names"])
+            self.known_caso_ids = self.known_caso_ids + list(galeria["caso_ids"])
+            self.known_embedding_ids = self.known_embedding_ids + list(galeria["embedding_ids"])
+
+    def export_snapshot(self, path: str) -> Dict:
+        """Guarda la galería actual como snapshot memory-mapped"""
+        from models.fuentes_galeria import guardar_snapshot
+        with self._gallery_lock:
+            galeria = {
+                "encodings": self.known_encodings,
+                "names": self.known_names,
+                "caso_ids": self.known_caso_ids,
+                "embedding_ids": self.known_embedding_ids,
+                "statuses": [self.case_statuses.get(c) for c in self.known_caso_ids]
+            }
+        return guardar_snapshot(galeria, path)
+
+    # ======================================================
+    # 🔄 Galería según estado del caso
+    # ======================================================
+    def _registrar_estado_caso(self, caso_id, status):
+        if caso_id is not None:
+            self.case_statuses[caso_id] = (status or "desconocido").lower()
+
+    def evict_case(self, caso_id) -> int:
+        """Quita de la galería los embeddings de un caso. Retorna cuántos se quitaron"""
+        with self._gallery_lock:
+            conservar = [i for i, c in enumerate(self.known_caso_ids) if c != caso_id]
+            quitados = len(self.known_caso_ids) - len(conservar)
+            if quitados:
+                self.known_encodings = [self.known_encodings[i] for i in conservar]
+                self.known_names = [self.known_names[i] for i in conservar]
+                self.known_caso_ids = [self.known_caso_ids[i] for i in conservar]
+                self.known_embedding_ids = [self.known_embedding_ids[i] for i in conservar]
+        if quitados:
+            print(f"➖ Caso {caso_id}: {quitados} embeddings fuera de la galería")
+        return quitados
+
+    def admit_case(self, caso_id) -> int:
+        """Carga (o recarga) desde la fuente los embeddings de un caso. Retorna cuántos entraron"""
+        nuevos = self.fuente.cargar_caso(caso_id)
+
+        self.evict_case(caso_id)
+        self._agregar(nuevos)
+        print(f"➕ Caso {caso_id}: {len(nuevos['encodings'])} embeddings en la galería")
+        return len(nuevos["encodings"])
+
+    def on_case_status_changed(self, caso_id, status) -> dict:
+        """
+        Ajusta la galería de forma incremental cuando cambia el estado de un caso:
+        sale si deja de ser accionable, entra si vuelve a serlo
+        """
+        anterior = self.case_statuses.get(caso_id)
+        self._registrar_estado_caso(caso_id, status)
+        accionable = self.es_estado_accionable(status)
+        en_galeria = caso_id in self.known_caso_ids
+
+        if not accionable and en_galeria:
+            return {"action": "evicted", "embeddings": self.evict_case(caso_id)}
+        if accionable and not en_galeria:
+            return {"action": "admitted", "embeddings": self.admit_case(caso_id)}
+        return {"action": "none", "previous_status": anterior}
+
+    def gallery_stats_by_status(self) -> dict:
+        """Casos y embeddings en galería agrupados por estado del caso"""
+        en_galeria = {}
+        for caso_id in self.known_caso_ids:
+            en_galeria[caso_id] = en_galeria.get(caso_id, 0) + 1
+
+        stats = {}
+        for caso_id, status in self.case_statuses.items():
+            entrada = stats.setdefault(status, {
+                "cases": 0,
+                "cases_in_gallery": 0,
+                "embeddings_in_gallery": 0,
+                "actionable": self.es_estado_accionable(status)
+            })
+            entrada["cases"] += 1
+            if caso_id in en_galeria:
+                entrada["cases_in_gallery"] += 1
+                entrada["embeddings_in_gallery"] += en_galeria[caso_id]
+        return stats
+
+    # ======================================================
+    # 🗜️ Compactación de la galería
+    # ======================================================
+    def compact_gallery(self, radio: float = 0.3, guardar_reporte: bool = True) -> dict:
+        """
+        Reemplaza los embeddings casi duplicados de cada caso por prototipos
+        (ver services/gallery_compaction.py). Solo se aplica si la verificación
+        leave-one-out confirma que ninguna decisión top-1 por caso cambia.
+        """
+        from services.gallery_compaction import compactar_galeria, guardar_reporte as _guardar
+
+        # Se compacta una foto de la galería fuera del lock; si mientras tanto
+        # la galería cambió (carga, alta de rostros) los índices ya no valen
+        for intento in range(1, COMPACTION_MAX_INTENTOS + 1):
+            with self._gallery_lock:
+                encodings = self.known_encodings
+                names = self.known_names
+                caso_ids = self.known_caso_ids
+                ids_originales = self.known_embedding_ids
+
+            resultado = compactar_galeria(encodings, caso_ids, radio=radio, tolerance=self.tolerance)
+            if resultado["verificacion"] and not resultado["verificacion"]["ok"]:
+                print("⚠️ Compactación descartada: cambió alguna decisión top-1")
+                resultado["aplicada"] = False
+                return resultado
+
+            indices = resultado["indices"]
+            with self._gallery_lock:
+                resultado["aplicada"] = self.known_encodings is encodings
+                if resultado["aplicada"]:
+                    self.known_encodings = [encodings[i] for i in indices]
+                    self.known_names = [names[i] for i in indices]
+                    self.known_caso_ids = [caso_ids[i] for i in indices]
+                    self.known_embedding_ids = [ids_originales[i] for i in indices]
+            if resultado["aplicada"]:
+                break
+            print(f"🔁 La galería cambió durante la compactación (intento {intento}), se reintenta")
+        else:
+            print("⚠️ Compactación descartada: la galería siguió cambiando")
+            return resultado
+
+        if guardar_reporte:
+            try:
+                _guardar(resultado, ids=ids_originales)
+            except Exception as e:
+                print(f"⚠️ No se pudo guardar el reporte de compactación: {e}")
+
+        self.compaction_report = {k: v for k, v in resultado.items() if k not in ("indices", "covers")}
+        print(f"🗜️ Galería compactada: {resultado['original']} → {resultado['compactada']} "
+              f"embeddings (x{resultado['shrink_factor']})")
+        return resultado
+
+    # ======================================================
+    # 📷 Ajustes por cámara
+    # ======================================================
+    @staticmethod
+    def _detector_por_defecto(nombre: str):
+        """Detector por defecto; si no se puede cargar (p.ej. falta el modelo DNN) se usa HOG"""
+        from models.detectores import crear_detector, DetectorNoDisponible
+        try:
+            return nombre.lower(), crear_detector(nombre)
+        except (DetectorNoDisponible, cv2.error, ValueError) as e:
+            print(f"⚠️ Detector '{nombre}' no disponible ({e}), se usa 'hog'")
+            return "hog", crear_detector("hog")
+
+    def _ajustes_de_config(self, configurados: dict) -> dict:
+        """
+        Ajustes por cámara de Config ya normalizados; los inválidos se
+        descartan con aviso para que no fallen recién al procesar un frame
+        """
+        camera_settings = {}
+        for camara_id, ajustes in (configurados or {}).items():
+            if not isinstance(ajustes, dict):
+                print(f"⚠️ Ajustes de cámara {camara_id} ignorados: se esperaba un objeto")
+                continue
+            validos = {}
+            for clave, valor in ajustes.items():
+                try:
+                    validos[clave] = self._validar_ajuste(clave, valor)
+                except ValueError as e:
+                    print(f"⚠️ Ajuste '{clave}' de la cámara {camara_id} ignorado: {e}")
+            camera_settings[str(camara_id)] = validos
+        return camera_settings
+
+    def _validar_ajuste(self, clave: str, valor):
+        """Normaliza un ajuste de cámara o lanza ValueError"""
+        if clave == "detector":
+            from models.detectores import crear_detector, DetectorNoDisponible
+            try:
+                crear_detector(valor)
+            except (DetectorNoDisponible, cv2.error) as e:
+                raise ValueError(str(e))
+            return str(valor).lower()
+        if clave == "prescreen":
+            return self.cribado.validar(valor)
+        if clave == "latency_budget_ms":
+            try:
+                valor = float(valor)
+            except (TypeError, ValueError):
+                raise ValueError("latency_budget_ms debe ser numérico")
+            if valor < 0:
+                raise ValueError("latency_budget_ms no puede ser negativo")
+            return valor
+        if clave == "priority":
+            try:
+                valor = float(valor)
+            except (TypeError, ValueError):
+                raise ValueError("priority debe ser numérico")
+            if valor <= 0:
+                raise ValueError("priority debe ser mayor que 0")
+            return valor
+        raise ValueError(f"Ajuste de cámara desconocido: '{clave}'")
+
+    def ajustes_camara(self, camara_id=None) -> dict:
+        """Ajustes efectivos de una cámara (valores por defecto + propios)"""
+        ajustes = {
+            "detector": self.model,
+            "prescreen": self.prescreen,
+            "latency_budget_ms": self.latency_budget_ms,
+            "priority": 1.0  # peso de la cámara en la cola de detección
+        }
+        if camara_id is not None:
+            ajustes.update(self.camera_settings.get(str(camara_id), {}))
+        return ajustes
+
+    def set_camera_settings(self, camara_id, ajustes: dict) -> dict:
+        """
+        Cambia ajustes de detección de una cámara (None vuelve al valor por defecto)
+
+        Raises:
+            ValueError: si algún ajuste no es válido
+        """
+        actuales = dict(self.camera_settings.get(str(camara_id), {}))
+        for clave, valor in ajustes.items():
+            if valor is None:
+                actuales.pop(clave, None)
+            else:
+                actuales[clave] = self._validar_ajuste(clave, valor)
+        self.camera_settings[str(camara_id)] = actuales
+        return self.ajustes_camara(camara_id)
+
+    def _detector_para(self, ajustes: dict):
+        from models.detectores import crear_detector
+        if ajustes["detector"] == self.model:
+            return self.detector
+        return crear_detector(ajustes["detector"])
+
+    # ======================================================
+    # 🧠 Procesamiento facial
+    # ======================================================
+    def _nitidez(self, gray: np.ndarray, bbox: dict) -> Optional[float]:
+        """Varianza del Laplaciano del rostro sobre el gris compartido del frame"""
+        height, width = gray.shape[:2]
+        top, left = bbox['y'], bbox['x']
+        bottom, right = top + bbox['height'], left + bbox['width']
+        roi = gray[max(0, top):min(height, bottom), max(0, left):min(width, right)]
+        if roi.size == 0:
+            return None
+        return float(cv2.Laplacian(roi, cv2.CV_64F).var())
+
+    def calculate_quality_score(self, frame: np.ndarray, bbox: dict,
+                                gray: Optional[np.ndarray] = None,
+                                nitidez: Optional[float] = None) -> float:
+        """
+        Calcula score de calidad para priorización
+
+        Factores:
+        - Tamaño del rostro (60%)
+        - Nitidez (40%)
+
+        Args:
+            gray: Frame en gris ya convertido (evita convertir de nuevo)
+            nitidez: Varianza del Laplaciano ya calculada para este rostro
+        """
+        height, width = frame.shape[:2]
+
+        # 1. Score de tamaño
+        face_area = bbox['width'] * bbox['height']
+        frame_area = width * height
+        size_score = min(100, (face_area / frame_area) * 1000)
+
+        # 2. Score de nitidez (Laplacian)
+        if nitidez is None:
+            if gray is None:
+                gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+            nitidez = self._nitidez(gray, bbox)
+        sharpness_score = min(100, nitidez / 10) if nitidez is not None else 50
+
+        # Peso: 60% tamaño, 40% nitidez
+        total_score = (size_score * 0.6) + (sharpness_score * 0.4)
+        return round(total_score, 2)
+
+    def detect_faces(self, frame: np.ndarray, camara_id=None, plan: Optional[Dict] = None,
+                     deadline: Optional[float] = None) -> Tuple[int, List[Dict], Dict]:
+        """
+        Detecta rostros, descarta los muy pequeños o borrosos, los prioriza
+        por calidad y codifica solo los max_faces mejores
+
+        Args:
+            frame: Frame BGR de OpenCV
+            camara_id: Cámara de origen (elige el backend de detección)
+            plan: Degradaciones del PlanificadorLatencia (None = sin presupuesto)
+            deadline: Instante (time.time()) en que vence el presupuesto
+
+        Returns:
+            (total de rostros detectados, rostros elegidos con su encoding,
+             rechazados {"too_small": n, "blurry": n})
+        """
+        detector = self._detector_para(self.ajustes_camara(camara_id))
+
+        # Una sola conversión a gris para detector (Haar) y calidad de todos los rostros
+        rgb_frame = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
+        gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+
+        escala = self.detection_scale * (plan["scale_extra"] if plan else 1)
+        upsample = plan["upsample"] if plan else None
+        max_faces = plan["max_faces"] if plan else self.max_faces
+        skip_quality = plan["skip_quality"] if plan else False
+
+        # Detectar sobre el frame reducido y escalar coordenadas al original
+        inicio_deteccion = time.time()
+        if escala > 1:
+            small_frame = cv2.resize(rgb_frame, (0, 0), fx=1 / escala, fy=1 / escala)
+            small_gray = cv2.resize(gray, (small_frame.shape[1], small_frame.shape[0]))
+            locations = detector.detectar(small_frame, small_gray, upsample=upsample)
+            locations = [tuple(int(v * escala) for v in loc) for loc in locations]
+            mpx = small_frame.shape[0] * small_frame.shape[1] / 1e6
+        else:
+            locations = detector.detectar(rgb_frame, gray, upsample=upsample)
+            mpx = rgb_frame.shape[0] * rgb_frame.shape[1] / 1e6
+        self.planificador.registrar_deteccion(
+            detector.nombre,
+            detector.upsample if upsample is None else upsample,
+            mpx,
+            (time.time() - inicio_deteccion) * 1000,
+            len(locations)
+        )
+
+        rechazados = {"too_small": 0, "blurry": 0}
+        detected_faces = []
+        for i, (top, right, bottom, left) in enumerate(locations):
+            bbox = {
+                "x": int(left),
+                "y": int(top),
+                "width": int(right - left),
+                "height": int(bottom - top)
+            }
+
+            # Rostros que solo darían matches débiles no llegan a face_encodings
+            if self.quality_gate and min(bbox["width"], bbox["height"]) < self.min_face_size:
+                rechazados["too_small"] += 1
+                continue
+            face = {
+                "face_id": i,
+                "location": (int(top), int(right), int(bottom), int(left)),
+                "bbox": bbox
+            }
+            # Sin tiempo para la nitidez se prioriza solo por tamaño
+            if self.quality_gate and not skip_quality:
+                nitidez = self._nitidez(gray, bbox)
+                if nitidez is not None and nitidez < self.min_sharpness:
+                    rechazados["blurry"] += 1
+                    continue
+                face["quality_score"] = self.calculate_quality_score(frame, bbox, nitidez=nitidez)
+            detected_faces.append(face)
+
+        if rechazados["too_small"] or rechazados["blurry"]:
+            print(f"   🚫 Rechazados: {rechazados['too_small']} pequeños, {rechazados['blurry']} borrosos")
+
+        # Priorizar por calidad (mejor calidad primero) y codificar solo esos
+        if not self.quality_gate:
+            pass
+        elif skip_quality:
+            detected_faces.sort(key=lambda x: x['bbox']['width'] * x['bbox']['height'], reverse=True)
+        else:
+            detected_faces.sort(key=lambda x: x['quality_score'], reverse=True)
+        detected_faces = detected_faces[:max_faces]
+
+        # Recortar a los rostros que se alcanzan a codificar antes del deadline
+        if deadline is not None and plan is not None and detected_faces:
+            caben = self.planificador.rostros_que_caben((deadline - time.time()) * 1000)
+            if caben < len(detected_faces):
+                detected_faces = detected_faces[:caben]
+                plan["degradations"].append(f"max_faces_{caben}")
+
+        if detected_faces:
+            inicio_encoding = time.time()
+            encodings = face_recognition.face_encodings(
+                rgb_frame, [face["location"] for face in detected_faces]
+            )
+            self.planificador.registrar_encoding(len(detected_faces), (time.time() - inicio_encoding) * 1000)
+            for face, encoding in zip(detected_faces, encodings):
+                face["encoding"] = encoding
+
+        return len(locations), detected_faces, rechazados
+
+    def process_frame(self, frame, camara_id=None, latency_budget_ms: Optional[float] = None,
+                      inicio: Optional[float] = None):
+        """
+        Procesa un frame de video detectando y reconociendo rostros
+
+        Args:
+            frame: Frame BGR de OpenCV
+            camara_id: Cámara de origen (para sus ajustes de detección)
+            latency_budget_ms: Presupuesto de latencia del request (None = el
+                               de la cámara; 0 = sin presupuesto)
+            inicio: Instante en que llegó el request (cuenta para el presupuesto)
+
+        Returns:
+            Dict con timestamp, rostros detectados y deduplicación automática
+        """
+        start_time = time.time()
+        inicio = inicio or start_time
+        ajustes = self.ajustes_camara(camara_id)
+        presupuesto = ajustes["latency_budget_ms"] if latency_budget_ms is None else latency_budget_ms
+
+        plan = None
+        if presupuesto:
+            detector = self._detector_para(ajustes)
+            plan = self.planificador.planificar(
+                presupuesto,
+                (start_time - inicio) * 1000,
+                frame.shape[0] * frame.shape[1] / 1e6 / self.detection_scale ** 2,
+                detector.nombre,
+                detector.upsample,
+                self.max_faces
+            )
+
+        result = self._procesar(frame, camara_id, ajustes, start_time, plan,
+                                inicio + presupuesto / 1000 if plan else None)
+
+        if plan is not None:
+            transcurrido_ms = (time.time() - inicio) * 1000
+            a_tiempo = transcurrido_ms <= presupuesto
+            result["latency_budget_ms"] = presupuesto
+            result["degradations"] = plan["degradations"]
+            result["deadline_met"] = a_tiempo
+            self.planificador.registrar_request(bool(plan["degradations"]), a_tiempo)
+            if plan["degradations"]:
+                print(f"   🐢 Degradaciones para {presupuesto}ms: {', '.join(plan['degradations'])}")
+        return result
+
+    def _procesar(self, frame, camara_id, ajustes: Dict, start_time: float,
+                  plan: Optional[Dict], deadline: Optional[float]) -> Dict:
+        # Cribado: si no hay nada que parezca un rostro, no se corre el detector
+        cribado = self._cribar(frame, camara_id, ajustes["prescreen"])
+        if cribado is not None and cribado["skipped"]:
+            return self._resultado_sin_rostros(start_time, cribado)
+
+        total_faces_detected, detected_faces, rechazados = self.detect_faces(frame, camara_id, plan, deadline)
+        max_faces_limit = (plan["max_faces"] if plan else self.max_faces)
+        if max_faces_limit is None:
+            max_faces_limit = total_faces_detected
+
+        if cribado is not None:
+            self.cribado.registrar(
+                camara_id,
+                paso=cribado["candidates"],
+                auditado=cribado["audited"],
+                rostros_en_auditoria=total_faces_detected if cribado["audited"] else 0
+            )
+
+        print(f"\n🧠 Detectados {total_faces_detected} rostros totales")
+
+        if total_faces_detected == 0:
+            return self._resultado_sin_rostros(start_time, cribado)
+
+        if not detected_faces:
+            result = self._resultado_sin_rostros(start_time, cribado)
+            result["total_faces_detected"] = total_faces_detected
+            result["rejected_faces"] = rechazados
+            return result
+
+        print(f"   🎯 Procesando los {len(detected_faces)} rostros de mejor calidad")
+
+        # Procesar comparaciones (paralelo o secuencial)
+        if self.enable_parallel and len(detected_faces) > 1:
+            faces = self._process_faces_parallel(detected_faces)
+        else:
+            faces = self._process_faces_sequential(detected_faces)
+
+        # DEDUPLICACIÓN: Eliminar alertas duplicadas para misma persona
+        if self.deduplicate:
+            faces = self._deduplicate_faces(faces)
+
+        processing_time = time.time() - start_time
+
+        result = {
+            "timestamp": time.time(),
+            "total_faces_detected": total_faces_detected,
+            "faces_processed": len(faces),
+            "faces_detected": len(faces),
+            "max_faces_limit": max_faces_limit,
+            "processing_time_ms": round(processing_time * 1000, 2),
+            "rejected_faces": rechazados,
+            "faces": faces
+        }
+        if cribado is not None:
+            result["prescreen"] = cribado
+
+        print(f"⏱️  Procesamiento completado en {result['processing_time_ms']}ms")
+
+        return result
+
+    def _cribar(self, frame: np.ndarray, camara_id, modo: str) -> Optional[Dict]:
+        """
+        Aplica el cribado de la cámara. Una fracción de los frames descartados
+        (FRAME_PRESCREEN_AUDIT_RATE) se audita con el detector completo para
+        medir cuántos rostros se pierden.
+        """
+        if modo == "off":
+            return None
+
+        candidatos = self.cribado.hay_candidatos(frame, modo, camara_id)
+        auditado = not candidatos and random.random() < self.prescreen_audit_rate
+        skipped = not candidatos and not auditado
+        if skipped:
+            self.cribado.registrar(camara_id, paso=False)
+        return {"mode": modo, "candidates": candidatos, "audited": auditado, "skipped": skipped}
+
+    def _resultado_sin_rostros(self, start_time: float, cribado: Optional[Dict] = None) -> Dict:
+        result = {
+            "timestamp": time.time(),
+            "total_faces_detected": 0,
+            "faces_processed": 0,
+            "faces_detected": 0,
+            "max_faces_limit": self.max_faces if self.max_faces is not None else 0,
+            "processing_time_ms": round((time.time() - start_time) * 1000, 2),
+            "faces": []
+        }
+        if cribado is not None:
+            result["prescreen"] = cribado
+        return result
+
+    def _process_faces_sequential(self, detected_faces: list) -> list:
+        """Procesa rostros de forma secuencial"""
+        faces = []
+        for face_data in detected_faces:
+            results = self.compare_with_known_faces(face_data["encoding"])
+
+            # Información de consola
+            face_label = face_data.get('track_id', face_data['face_id'])
+            if results["match_found"]:
+                print(f"✅ Rostro {face_label}: Coincide con {results['best_match_name']} "
+                      f"(Similitud: {results['similarity_percentage']}%, "
+                      f"Distancia: {results['distance']})")
+            else:
+                print(f"❌ Rostro {face_label}: No hay coincidencia (Distancia mínima: {results['distance']})")
+
+            # Mejores coincidencias
+            print(f"   🔎 Top {self.top_matches} coincidencias:")
+            for sim in results["all_similarities"]:
+                print(f"      - {sim['name']}: {sim['similarity_percentage']}% (dist {sim['distance']})")
+
+            face_result = {
+                "face_id": face_data.get('track_id', face_data['face_id']),
+                "location": face_data["location"],
+                "bbox": face_data["bbox"],
+                **results
+            }
+
+            # Agregar información de tracking si existe
+            if 'quality_score' in face_data:
+                face_result['quality_score'] = face_data['quality_score']
+
+            faces.append(face_result)
+
+        return faces
+
+    def _deduplicate_faces(self, faces: list) -> list:
+        """
+        Elimina duplicados: Si 2+ rostros tienen el mismo nombre,
+        solo mantiene el de mejor calidad/similitud
+        """
+        if len(faces) <= 1:
+            return faces
+
+        # Agrupar por nombre
+        name_groups = {}
+        for face in faces:
+            name = face['best_match_name']
+            if name not in name_groups:
+                name_groups[name] = []
+            name_groups[name].append(face)
+
+        # Para cada grupo, mantener solo el mejor
+        deduplicated = []
+        for name, group in name_groups.items():
+            if len(group) == 1:
+                deduplicated.append(group[0])
+            else:
+                # Ordenar por similitud descendente, luego por calidad
+                best_face = max(group, key=lambda f: (
+                    f['similarity_percentage'],
+                    f.get('quality_score', 0)
+                ))
+                deduplicated.append(best_face)
+                print(f"   🔄 Deduplicado: {name} ({len(group)} detecciones → 1 alerta)")
+
+        return deduplicated
+
+    def _process_faces_parallel(self, detected_faces: list) -> list:
+        """
+        Procesa rostros en paralelo usando ThreadPoolExecutor
+        Mejora el rendimiento cuando hay múltiples rostros
+        """
+        print(f"   ⚡ Procesamiento paralelo de {len(detected_faces)} rostros")
+
+        # Enviar tareas al pool
+        future_to_face = {}
+        for face_data in detected_faces:
+            future = self.executor.submit(self.compare_with_known_faces, face_data["encoding"])
+            future_to_face[future] = face_data
+
+        # Recolectar resultados
+        faces = []
+        for future in as_completed(future_to_face):
+            face_data = future_to_face[future]
+            try:
+                results = future.result()
+
+                face_label = face_data.get('track_id', face_data['face_id'])
+                if results["match_found"]:
+                    print(f"✅ Rostro {face_label}: {results['best_match_name']} "
+                          f"({results['similarity_percentage']}%)")
+
+                face_result = {
+                    "face_id": face_data.get('track_id', face_data['face_id']),
+                    "location": face_data["location"],
+                    "bbox": face_data["bbox"],
+                    **results
+                }
+
+                if 'quality_score' in face_data:
+                    face_result['quality_score'] = face_data['quality_score']
+
+                faces.append(face_result)
+
+            except Exception as e:
+                print(f"⚠️ Error procesando rostro {face_data['face_id']}: {e}")
+
+        return faces
+
+    # ======================================================
+    # 🔍 Comparación facial
+    # ======================================================
+    def compare_with_known_faces(self, encoding):
+        """Compara un encoding con todos los conocidos"""
+        # Vista consistente de la galería (puede cambiar por estado de casos)
+        with self._gallery_lock:
+            known_encodings = self.known_encodings
+            known_names = self.known_names
+            known_caso_ids = self.known_caso_ids
+
+        if not known_encodings:
+            print("⚠️ No hay encodings cargados para comparar.")
+            return {
+                "match_found": False,
+                "best_match_name": "Desconocido",
+                "similarity_percentage": 0,
+                "distance": None,
+                "all_similarities": []
+            }
+
+        # Etapa 1: centroides por caso → top-M casos; etapa 2: comparación exacta
+        prefiltro = self._prefiltro_para(known_encodings, known_caso_ids)
+        prefilter_info = None
+        if prefiltro is not None:
+            indices, distances, prefilter_info = prefiltro.buscar(encoding, top_m=self.prefilter_top_m, k=self.top_matches)
+            self._registrar_prefiltro(prefilter_info)
+        else:
+            distances = face_recognition.face_distance(self._matriz_para(known_encodings), encoding)
+            indices = np.arange(len(distances))
+
+        best_pos = np.argmin(distances)
+        best_match_index = indices[best_pos]
+        best_distance = distances[best_pos]
+        best_name = known_names[best_match_index]
+        best_caso_id = known_caso_ids[best_match_index]  # Obtener caso_id del match
+
+        similarities = [
+            {
+                "name": known_names[i],
+                "similarity_percentage": round((1 - d) * 100, 2),
+                "distance": round(float(d), 4),
+                "caso_id": known_caso_ids[i]  # Incluir caso_id en similaridades
+            }
+            for i, d in zip(indices, distances)
+        ]
+
+        match_found = best_distance <= self.tolerance
+        if not match_found and self.unknown_label is not None:
+            best_name = self.unknown_label
+
+        result = {
+            "match_found": match_found,
+            "best_match_name": best_name,
+            "caso_id": best_caso_id,  # ✅ Retornar caso_id automáticamente
+            "similarity_percentage": round((1 - best_distance) * 100, 2),
+            "distance": round(float(best_distance), 4),
+            "all_similarities": sorted(similarities, key=lambda x: x["distance"])[:self.top_matches]
+        }
+        if prefilter_info is not None:
+            result["prefilter"] = prefilter_info
+        return result
+
+    def _matriz_para(self, known_encodings) -> np.ndarray:
+        """
+        Matriz N x 128 de la galería actual; se arma una vez por versión de
+        la galería en vez de convertir la lista en cada comparación
+        """
+        with self._gallery_lock:
+            galeria, matriz = self._matriz_cache
+            if galeria is known_encodings:
+                return matriz
+
+        matriz = np.asarray(known_encodings, dtype=np.float64)
+        with self._gallery_lock:
+            self._matriz_cache = (known_encodings, matriz)
+        return matriz
+
+    # ======================================================
+    # ✂️ Prefiltro por caso
+    # ======================================================
+    def _prefiltro_para(self, known_encodings, known_caso_ids):
+        """
+        Índice de centroides para la galería actual (se reconstruye cuando la
+        galería cambia). None si el prefiltro no aporta (pocos casos).
+        """
+        if not self.prefilter_enabled:
+            return None
+
+        with self._gallery_lock:
+            galeria, prefiltro = self._prefiltro_cache
+            if galeria is known_encodings:
+                return prefiltro
+
+        from models.prefiltro_casos import PrefiltroCasos
+        prefiltro = PrefiltroCasos(self._matriz_para(known_encodings), known_caso_ids)
+        if prefiltro.num_casos <= self.prefilter_top_m:
+            prefiltro = None  # igual se compararía todo
+        with self._gallery_lock:
+            self._prefiltro_cache = (known_encodings, prefiltro)
+        return prefiltro
+
+    def _registrar_prefiltro(self, info: dict):
+        with self._gallery_lock:
+            self.prefilter_stats["queries"] += 1
+            self.prefilter_stats["embeddings_compared"] += info["embeddings_compared"]
+            self.prefilter_stats["embeddings_total"] += info["embeddings_total"]
+
+    def prefilter_summary(self) -> dict:
+        """Fracción de comparaciones evitadas por el prefiltro desde el arranque"""
+        stats = dict(self.prefilter_stats)
+        total = stats["embeddings_total"]
+        stats["pruned_fraction"] = round(1 - stats["embeddings_compared"] / total, 4) if total else 0.0
+        stats["enabled"] = self.prefilter_enabled
+        stats["top_m"] = self.prefilter_top_m
+        return stats
+
+    # ======================================================
+    # 🧩 Agregar nuevos rostros en memoria
+    # ======================================================
+    def add_new_face(self, encoding, name, caso_id=None):
+        self._agregar({
+            "encodings": [encoding],
+            "names": [name],
+            "caso_ids": [caso_id],
+            "embedding_ids": [None]
+        })
+        print(f"🆕 Agregado nuevo rostro: {name} (Caso ID: {caso_id})")
+
+    def set_max_faces(self, max_faces: int):
+        """Ajusta dinámicamente el número máximo de rostros a procesar"""
+        self.max_faces = max_faces
+        print(f"🔧 Máximo de rostros ajustado a: {max_faces}")
+
+    def engine_info(self) -> dict:
+        """Configuración del motor (para /status)"""
+        return {
+            "gallery_source": self.fuente.nombre,
+            "detection_model": self.model,
+            "detection_scale": self.detection_scale,
+            "prescreen": self.prescreen,
+            "min_face_size": self.min_face_size,
+            "min_sharpness": self.min_sharpness,
+            "latency_budget_ms": self.latency_budget_ms,
+            "camera_settings": self.camera_settings
+        }
+
+    def __del__(self):
+        """Limpieza al destruir el objeto"""
+        if hasattr(self, 'executor') and self.enable_parallel:
+            self.executor.shutdown(wait=False)
@@ -0,0 +1,93 @@
+"""
+Prefiltro por caso para la comparación facial
+
+En vez de comparar cada rostro contra todos los embeddings, primero se
+compara contra un centroide por caso_id y se eligen los top-M casos; luego
+se compara exactamente contra los embeddings de esos casos.
+
+Para no cambiar resultados se usa la desigualdad triangular: si la distancia
+al centroide menos el radio del caso (distancia máxima centroide-embedding)
+no supera la k-ésima mejor distancia exacta encontrada, ese caso también se
+evalúa. Así el top-k (mejor match y all_similarities) es el mismo que con la
+búsqueda completa.
+"""
+from typing import Dict, List, Tuple
+
+import face_recognition
+import numpy as np
+
+# Holgura de la cota: all_similarities ordena por distancia redondeada a 4
+# decimales, así que también se evalúan casos que podrían empatar al redondear
+EPSILON = 5e-5
+
+
+class PrefiltroCasos:
+    """
+    Índice de centroides por caso sobre una galería fija
+    """
+
+    def __init__(self, encodings: List[np.ndarray], caso_ids: List):
+        self.matriz = np.asarray(encodings, dtype=np.float64)
+        self.total = len(self.matriz)
+
+        grupos: Dict = {}
+        for i, caso_id in enumerate(caso_ids):
+            grupos.setdefault(caso_id, []).append(i)
+
+        self.grupos = [np.array(indices) for indices in grupos.values()]
+        self.centroides = np.stack([self.matriz[g].mean(axis=0) for g in self.grupos])
+        self.radios = np.array([
+            np.linalg.norm(self.matriz[g] - c, axis=1).max()
+            for g, c in zip(self.grupos, self.centroides)
+        ])
+
+    @property
+    def num_casos(self) -> int:
+        return len(self.grupos)
+
+    def _distancias_grupos(self, mascara: np.ndarray, encoding: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        indices = np.concatenate([self.grupos[g] for g in np.flatnonzero(mascara)])
+        return indices, face_recognition.face_distance(self.matriz[indices], encoding)
+
+    def buscar(self, encoding: np.ndarray, top_m: int = 5, k: int = 3) -> Tuple[np.ndarray, np.ndarray, Dict]:
+        """
+        Devuelve los embeddings evaluados y sus distancias exactas
+
+        Args:
+            encoding: Embedding del rostro detectado
+            top_m: Casos preseleccionados por distancia al centroide
+            k: Cantidad de mejores resultados que deben ser exactos
+
+        Returns:
+            (índices de la galería evaluados, distancias, info del prefiltro)
+        """
+        dist_centroides = np.linalg.norm(self.centroides - encoding, axis=1)
+        orden = np.argsort(dist_centroides, kind="stable")
+
+        evaluados = np.zeros(self.num_casos, dtype=bool)
+        evaluados[orden[:top_m]] = True
+        indices, distancias = self._distancias_grupos(evaluados, encoding)
+
+        # Casos que aún podrían entrar al top-k exacto
+        kth = np.partition(distancias, k - 1)[k - 1] if len(distancias) >= k else np.inf
+        cota_inferior = dist_centroides - self.radios
+        extra = ~evaluados & (cota_inferior <= kth + EPSILON)
+        if extra.any():
+            indices_extra, distancias_extra = self._distancias_grupos(extra, encoding)
+            indices = np.concatenate([indices, indices_extra])
+            distancias = np.concatenate([distancias, distancias_extra])
+            evaluados |= extra
+
+        # Orden de galería para que los empates se resuelvan igual que sin prefiltro
+        orden_galeria = np.argsort(indices, kind="stable")
+        indices, distancias = indices[orden_galeria], distancias[orden_galeria]
+
+        info = {
+            "cases_total": self.num_casos,
+            "cases_shortlisted": int(min(top_m, self.num_casos)),
+            "cases_evaluated": int(evaluados.sum()),
+            "embeddings_compared": int(len(indices)),
+            "embeddings_total": self.total,
+            "pruned_fraction": round(1 - len(indices) / self.total, 4) if self.total else 0.0
+        }
+        return indices, distancias, info
@@ -0,0 +1,159 @@
+"""
+Planificación de la detección según un presupuesto de latencia
+
+Con un presupuesto (ms) por request, se estima cuánto costará cada etapa a
+partir de los tiempos recientes (media exponencial) y se aplican
+degradaciones, en este orden, hasta que la estimación entre en el
+presupuesto:
+
+    1. skip_upsample:   detector sin pasada de upsample (HOG/CNN)
+    2. downscale_xN:    detectar sobre un frame 2x / 4x más chico
+    3. max_faces_N:     codificar menos rostros
+    4. skip_quality:    ordenar por tamaño sin calcular nitidez
+
+Después de detectar se vuelve a mirar el tiempo restante y se recorta la
+cantidad de rostros a codificar si hace falta.
+"""
+import threading
+from typing import Dict, Optional
+
+# ms por megapíxel (en la resolución de detección) por (detector, upsample);
+# valores iniciales aproximados en CPU, se ajustan con cada frame medido
+MS_POR_MPX_INICIAL = {
+    ("hog", 0): 150.0,
+    ("hog", 1): 600.0,
+    ("cnn", 0): 3000.0,
+    ("cnn", 1): 12000.0,
+    ("haar", 0): 40.0,
+    ("dnn", 0): 60.0,
+}
+MS_POR_ROSTRO_ENCODING = 20.0
+MS_POR_ROSTRO_CALIDAD = 0.5
+ALPHA = 0.2
+ESCALAS_EXTRA = (2, 4)
+
+
+class PlanificadorLatencia:
+    """
+    Estima costos por etapa y arma el plan de degradaciones de cada request
+    """
+
+    def __init__(self):
+        self.ms_por_mpx = dict(MS_POR_MPX_INICIAL)
+        self.ms_por_rostro_encoding = MS_POR_ROSTRO_ENCODING
+        self.ms_por_rostro_calidad = MS_POR_ROSTRO_CALIDAD
+        self.rostros_esperados = 1.0
+        self.stats = {"requests": 0, "degraded": 0, "deadline_missed": 0}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _clave(detector: str, upsample: int):
+        # Haar y DNN no usan upsample
+        return (detector, upsample if detector in ("hog", "cnn") else 0)
+
+    def _ms_deteccion(self, detector: str, upsample: int, mpx: float) -> float:
+        clave = self._clave(detector, upsample)
+        base = self.ms_por_mpx.get(clave)
+        if base is None:
+            # Upsample mayor a 1: cada pasada cuadruplica los píxeles
+            base = self.ms_por_mpx.get((detector, 1), 600.0) * (4 ** max(0, upsample - 1))
+        return base * mpx
+
+    def planificar(self, presupuesto_ms: float, gastado_ms: float, mpx: float,
+                   detector: str, upsample: int, max_faces: Optional[int]) -> Dict:
+        """
+        Args:
+            presupuesto_ms: Latencia total permitida para el request
+            gastado_ms: Tiempo ya consumido (decodificación, cola)
+            mpx: Megapíxeles del frame a la escala de detección normal
+            detector / upsample: Backend y pasadas de upsample configurados
+            max_faces: Límite normal de rostros (None = todos)
+
+        Returns:
+            Plan con scale_extra, upsample, max_faces, skip_quality y degradations
+        """
+        plan = {
+            "scale_extra": 1,
+            "upsample": upsample,
+            "max_faces": max_faces,
+            "skip_quality": False,
+            "degradations": []
+        }
+        disponible = presupuesto_ms - gastado_ms
+
+        def estimado():
+            rostros = self.rostros_esperados
+            if plan["max_faces"] is not None:
+                rostros = min(rostros, plan["max_faces"])
+            det = self._ms_deteccion(detector, plan["upsample"], mpx / plan["scale_extra"] ** 2)
+            enc = rostros * self.ms_por_rostro_encoding
+            cal = 0.0 if plan["skip_quality"] else rostros * self.ms_por_rostro_calidad
+            return det + enc + cal
+
+        if estimado() <= disponible:
+            return plan
+
+        if detector in ("hog", "cnn") and plan["upsample"] > 0:
+            plan["upsample"] = 0
+            plan["degradations"].append("skip_upsample")
+            if estimado() <= disponible:
+                return plan
+
+        if detector != "dnn":  # el SSD siempre redimensiona a 300x300
+            for escala in ESCALAS_EXTRA:
+                plan["scale_extra"] = escala
+                if estimado() <= disponible:
+                    break
+            plan["degradations"].append(f"downscale_x{plan['scale_extra']}")
+            if estimado() <= disponible:
+                return plan
+
+        if plan["max_faces"] is None or plan["max_faces"] > 1:
+            plan["max_faces"] = 1
+            plan["degradations"].append("max_faces_1")
+            if estimado() <= disponible:
+                return plan
+
+        plan["skip_quality"] = True
+        plan["degradations"].append("skip_quality")
+        return plan
+
+    def rostros_que_caben(self, restante_ms: float, calidad: bool = False) -> int:
+        """Rostros que se alcanzan a codificar en el tiempo restante (mínimo 1)"""
+        por_rostro = self.ms_por_rostro_encoding + (self.ms_por_rostro_calidad if calidad else 0.0)
+        return max(1, int(restante_ms // por_rostro)) if por_rostro > 0 else 1
+
+    # ======================================================
+    # 📊 Mediciones
+    # ======================================================
+    def registrar_deteccion(self, detector: str, upsample: int, mpx: float, ms: float, rostros: int):
+        if mpx <= 0:
+            return
+        clave = self._clave(detector, upsample)
+        with self._lock:
+            previo = self.ms_por_mpx.get(clave, ms / mpx)
+            self.ms_por_mpx[clave] = (1 - ALPHA) * previo + ALPHA * (ms / mpx)
+            self.rostros_esperados = (1 - ALPHA) * self.rostros_esperados + ALPHA * rostros
+
+    def registrar_encoding(self, rostros: int, ms: float):
+        if rostros <= 0:
+            return
+        with self._lock:
+            self.ms_por_rostro_encoding = (1 - ALPHA) * self.ms_por_rostro_encoding + ALPHA * (ms / rostros)
+
+    def registrar_request(self, degradado: bool, a_tiempo: bool):
+        with self._lock:
+            self.stats["requests"] += 1
+            if degradado:
+                self.stats["degraded"] += 1
+            if not a_tiempo:
+                self.stats["deadline_missed"] += 1
+
+    def resumen(self) -> Dict:
+        with self._lock:
+            return {
+                **self.stats,
+                "ms_per_mpx": {f"{d}/up{u}": round(v, 1) for (d, u), v in self.ms_por_mpx.items()},
+                "ms_per_face_encoding": round(self.ms_por_rostro_encoding, 2),
+                "expected_faces": round(self.rostros_esperados, 2)
+            }
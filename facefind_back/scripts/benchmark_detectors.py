@@ -0,0 +1,199 @@
+"""
+Benchmark de backends de detección de rostros
+Uso:
+    python scripts/benchmark_detectors.py <carpeta_imagenes> [--backends hog,haar,dnn]
+                                          [--annotations anotaciones.json]
+                                          [--reference cnn] [--max-side 1280]
+                                          [--prescreen haar,skin]
+
+Para cada backend reporta tiempo por imagen (media y p95), rostros
+encontrados y recall. El recall se mide contra las anotaciones si se pasan
+({"imagen.jpg": [[top, right, bottom, left], ...]}); si no, contra las cajas
+del backend de referencia (por defecto cnn, el más preciso).
+Una caja cuenta como encontrada si algún rostro detectado la cubre con IoU >= --iou.
+
+Con --prescreen también se evalúan los modos de cribado de frames: qué
+fracción de imágenes dejan pasar al detector (fallback) y en qué fracción
+de las imágenes con rostros según la verdad dirían "vacío" (missed).
+El modo motion no aplica a imágenes sueltas.
+"""
+import sys
+import os
+import json
+import time
+import argparse
+from pathlib import Path
+
+import cv2
+import numpy as np
+
+# Configurar encoding UTF-8 para Windows
+if sys.platform == 'win32':
+    import io
+    sys.stdout = io.TextIOWrapper(sys.stdout.buffer, encoding='utf-8')
+    sys.stderr = io.TextIOWrapper(sys.stderr.buffer, encoding='utf-8')
+
+# Obtener el directorio raíz del proyecto (facefind_back/)
+BACKEND_ROOT = Path(__file__).parent.parent
+
+# Agregar el directorio raíz al path para importar módulos
+sys.path.insert(0, str(BACKEND_ROOT))
+
+from models.detectores import DETECTORES_VALIDOS, DetectorNoDisponible, crear_detector
+from models.cribado_frames import CribadoFrames
+
+EXTENSIONES = (".jpg", ".jpeg", ".png", ".bmp")
+
+
+def iou(a, b) -> float:
+    """IoU entre dos cajas (top, right, bottom, left)"""
+    top, bottom = max(a[0], b[0]), min(a[2], b[2])
+    left, right = max(a[3], b[3]), min(a[1], b[1])
+    inter = max(0, bottom - top) * max(0, right - left)
+    area_a = (a[2] - a[0]) * (a[1] - a[3])
+    area_b = (b[2] - b[0]) * (b[1] - b[3])
+    union = area_a + area_b - inter
+    return inter / union if union > 0 else 0.0
+
+
+def encontrados(verdad, detectadas, umbral) -> int:
+    """Cajas verdaderas cubiertas por alguna detección (cada detección cuenta una vez)"""
+    libres = list(detectadas)
+    total = 0
+    for caja in verdad:
+        mejor = max(libres, key=lambda d: iou(caja, d), default=None)
+        if mejor is not None and iou(caja, mejor) >= umbral:
+            libres.remove(mejor)
+            total += 1
+    return total
+
+
+def cargar_imagenes(carpeta: Path, max_side: int):
+    imagenes = {}
+    for path in sorted(carpeta.iterdir()):
+        if path.suffix.lower() not in EXTENSIONES:
+            continue
+        frame = cv2.imread(str(path))
+        if frame is None:
+            continue
+        escala = max_side / max(frame.shape[:2])
+        if escala < 1:
+            frame = cv2.resize(frame, (0, 0), fx=escala, fy=escala)
+        imagenes[path.name] = (cv2.cvtColor(frame, cv2.COLOR_BGR2RGB), escala if escala < 1 else 1.0)
+    return imagenes
+
+
+def medir(detector, imagenes):
+    """Detecta en todas las imágenes → ({nombre: cajas}, [ms por imagen])"""
+    cajas, tiempos = {}, []
+    for nombre, (rgb, _) in imagenes.items():
+        inicio = time.perf_counter()
+        cajas[nombre] = [tuple(int(v) for v in c) for c in detector.detectar(rgb)]
+        tiempos.append((time.perf_counter() - inicio) * 1000)
+    return cajas, tiempos
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de detectores de rostros")
+    parser.add_argument("carpeta", help="Carpeta con imágenes de prueba")
+    parser.add_argument("--backends", default=",".join(DETECTORES_VALIDOS),
+                        help="Backends a comparar (separados por coma)")
+    parser.add_argument("--annotations", help="JSON con las cajas verdaderas por imagen")
+    parser.add_argument("--reference", default="cnn",
+                        help="Backend usado como verdad si no hay anotaciones")
+    parser.add_argument("--iou", type=float, default=0.3, help="IoU mínima para contar un acierto")
+    parser.add_argument("--max-side", type=int, default=1280, help="Lado máximo de las imágenes")
+    parser.add_argument("--prescreen", help="Modos de cribado a evaluar (p.ej. haar,skin)")
+    parser.add_argument("--json", help="Guardar el resultado en este archivo")
+    args = parser.parse_args()
+
+    # Los modelos (p.ej. models_data/ del DNN) se resuelven desde la raíz del backend
+    carpeta = Path(args.carpeta).absolute()
+    os.chdir(BACKEND_ROOT)
+
+    imagenes = cargar_imagenes(carpeta, args.max_side)
+    if not imagenes:
+        print(f"❌ No hay imágenes en {carpeta}")
+        sys.exit(1)
+    print(f"🖼️  {len(imagenes)} imágenes (lado máximo {args.max_side}px)")
+
+    if args.annotations:
+        with open(args.annotations, "r", encoding="utf-8") as f:
+            anotaciones = json.load(f)
+        # Las anotaciones están en la resolución original
+        verdad = {
+            nombre: [tuple(int(v * imagenes[nombre][1]) for v in caja) for caja in anotaciones.get(nombre, [])]
+            for nombre in imagenes
+        }
+        origen_verdad = "anotaciones"
+    else:
+        print(f"📐 Sin anotaciones: se usa '{args.reference}' como referencia")
+        verdad, _ = medir(crear_detector(args.reference), imagenes)
+        origen_verdad = args.reference
+    total_verdad = sum(len(c) for c in verdad.values())
+
+    resultados = []
+    for nombre in [b.strip() for b in args.backends.split(",") if b.strip()]:
+        try:
+            detector = crear_detector(nombre)
+        except (ValueError, DetectorNoDisponible, cv2.error) as e:
+            print(f"⚠️  {nombre}: no disponible ({e})")
+            continue
+
+        cajas, tiempos = medir(detector, imagenes)
+        aciertos = sum(encontrados(verdad[img], cajas[img], args.iou) for img in imagenes)
+        resultados.append({
+            "backend": nombre,
+            "ms_media": round(float(np.mean(tiempos)), 2),
+            "ms_p95": round(float(np.percentile(tiempos, 95)), 2),
+            "rostros": sum(len(c) for c in cajas.values()),
+            "recall": round(aciertos / total_verdad, 4) if total_verdad else None
+        })
+
+    print("\n" + "-" * 64)
+    print(f"{'backend':<8} {'ms/img':>9} {'p95 ms':>9} {'rostros':>8} {'recall':>8}")
+    for r in resultados:
+        recall = f"{r['recall']:.2%}" if r["recall"] is not None else "-"
+        print(f"{r['backend']:<8} {r['ms_media']:>9} {r['ms_p95']:>9} {r['rostros']:>8} {recall:>8}")
+    print("-" * 64)
+    print(f"Verdad: {origen_verdad} ({total_verdad} rostros), IoU >= {args.iou}")
+
+    cribados = []
+    if args.prescreen:
+        cribado = CribadoFrames()
+        con_rostros = [img for img in imagenes if verdad[img]]
+        for modo in [m.strip() for m in args.prescreen.split(",") if m.strip()]:
+            try:
+                cribado.validar(modo)
+            except ValueError as e:
+                print(f"⚠️  cribado {modo}: no disponible ({e})")
+                continue
+            tiempos, pasan = [], set()
+            for img, (rgb, _) in imagenes.items():
+                bgr = cv2.cvtColor(rgb, cv2.COLOR_RGB2BGR)
+                inicio = time.perf_counter()
+                if cribado.hay_candidatos(bgr, modo, clave=img):
+                    pasan.add(img)
+                tiempos.append((time.perf_counter() - inicio) * 1000)
+            perdidas = [img for img in con_rostros if img not in pasan]
+            cribados.append({
+                "prescreen": modo,
+                "ms_media": round(float(np.mean(tiempos)), 2),
+                "fallback_rate": round(len(pasan) / len(imagenes), 4),
+                "missed_rate": round(len(perdidas) / len(con_rostros), 4) if con_rostros else None
+            })
+
+        print(f"\n{'cribado':<14} {'ms/img':>9} {'fallback':>9} {'missed':>8}")
+        for c in cribados:
+            missed = f"{c['missed_rate']:.2%}" if c["missed_rate"] is not None else "-"
+            print(f"{c['prescreen']:<14} {c['ms_media']:>9} {c['fallback_rate']:>9.2%} {missed:>8}")
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump({"imagenes": len(imagenes), "verdad": origen_verdad,
+                       "rostros_verdad": total_verdad, "resultados": resultados,
+                       "cribados": cribados}, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
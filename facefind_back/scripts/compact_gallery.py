@@ -0,0 +1,71 @@
+"""
+Script para compactar embeddings casi duplicados de cada caso
+Uso:
+    python scripts/compact_gallery.py [--radius 0.3] [--dry-run]
+
+Carga la galería desde Supabase, agrupa los embeddings de cada caso por
+distancia y conserva prototipos que cubren a los originales dentro del
+radio. Verifica con leave-one-out que ninguna decisión top-1 por caso cambia
+y reporta el factor de reducción. El detalle (qué originales cubre cada
+prototipo) se guarda en gallery_compaction.json.
+"""
+import sys
+import os
+import argparse
+from pathlib import Path
+
+# Configurar encoding UTF-8 para Windows
+if sys.platform == 'win32':
+    import io
+    sys.stdout = io.TextIOWrapper(sys.stdout.buffer, encoding='utf-8')
+    sys.stderr = io.TextIOWrapper(sys.stderr.buffer, encoding='utf-8')
+
+# Obtener el directorio raíz del proyecto (facefind_back/)
+BACKEND_ROOT = Path(__file__).parent.parent
+
+# Agregar el directorio raíz al path para importar módulos
+sys.path.insert(0, str(BACKEND_ROOT))
+
+from config import Config
+from models.procesador_facefind import ProcesadorFaceFind
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compactación de embeddings por caso")
+    parser.add_argument("--radius", type=float, default=Config.GALLERY_COMPACTION_RADIUS,
+                        help="Distancia máxima entre prototipo y original")
+    parser.add_argument("--dry-run", action="store_true",
+                        help="Solo reportar, sin guardar gallery_compaction.json")
+    args = parser.parse_args()
+
+    # El reporte vive en la raíz del backend
+    os.chdir(BACKEND_ROOT)
+
+    print("📥 Cargando galería desde Supabase...")
+    procesador = ProcesadorFaceFind(tolerance=0.55, max_faces=3, enable_parallel=False)
+
+    print(f"🗜️ Compactando con radio {args.radius} (tolerancia {procesador.tolerance})...")
+    resultado = procesador.compact_gallery(args.radius, guardar_reporte=not args.dry_run)
+    verificacion = resultado["verificacion"]
+
+    print("\n" + "-" * 50)
+    print(f"📊 Casos: {resultado.get('casos', 0)}")
+    print(f"📦 Embeddings: {resultado['original']} → {resultado['compactada']}")
+    print(f"📉 Factor de reducción: x{resultado['shrink_factor']}")
+    if verificacion:
+        print(f"🔎 Verificación top-1: {verificacion['consultas']} consultas, "
+              f"{verificacion['decisiones_cambiadas']} cambios "
+              f"({'✅ OK' if verificacion['ok'] else '❌ FALLÓ'})")
+        if verificacion["casos_revertidos"]:
+            print(f"↩️  Casos sin compactar para preservar decisiones: {verificacion['casos_revertidos']}")
+    print(f"⏱️  {resultado['duracion_ms']} ms")
+    if not args.dry_run:
+        print("💾 Detalle guardado en gallery_compaction.json")
+    print("-" * 50)
+
+    if verificacion and not verificacion["ok"]:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
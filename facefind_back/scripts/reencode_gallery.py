@@ -0,0 +1,103 @@
+"""
+Script para regenerar los encodings de toda la galería de fotos de referencia
+Uso:
+    python scripts/reencode_gallery.py run [--detector hog+cnn] [--max-lado 1024]
+                                           [--upsample 1] [--jitters 1]
+                                           [--page-size 100] [--batch-size 50]
+                                           [--workers 8] [--no-publish]
+    python scripts/reencode_gallery.py status   # Ver progreso / checkpoint
+
+Si se interrumpe, volver a ejecutar 'run' con la misma configuración reanuda
+desde el último checkpoint (reencode_checkpoint.json).
+"""
+import sys
+import os
+import argparse
+from pathlib import Path
+
+# Configurar encoding UTF-8 para Windows
+if sys.platform == 'win32':
+    import io
+    sys.stdout = io.TextIOWrapper(sys.stdout.buffer, encoding='utf-8')
+    sys.stderr = io.TextIOWrapper(sys.stderr.buffer, encoding='utf-8')
+
+# Obtener el directorio raíz del proyecto (facefind_back/)
+BACKEND_ROOT = Path(__file__).parent.parent
+
+# Agregar el directorio raíz al path para importar módulos
+sys.path.insert(0, str(BACKEND_ROOT))
+
+from models.generador_encodings import GeneradorEncodings
+from services.reencode_service import ReencodeJob, estado_reencode
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Re-encoding masivo de la galería")
+    parser.add_argument("command", choices=["run", "status"])
+    parser.add_argument("--detector", choices=list(GeneradorEncodings.DETECTORES_VALIDOS))
+    parser.add_argument("--max-lado", type=int)
+    parser.add_argument("--upsample", type=int)
+    parser.add_argument("--jitters", type=int)
+    parser.add_argument("--page-size", type=int, default=100)
+    parser.add_argument("--batch-size", type=int, default=50)
+    parser.add_argument("--workers", type=int, default=8, help="Descargas HTTP simultáneas")
+    parser.add_argument("--no-publish", action="store_true",
+                        help="No publicar la nueva versión al terminar")
+    args = parser.parse_args()
+
+    # Checkpoint y versión de galería viven en la raíz del backend
+    os.chdir(BACKEND_ROOT)
+
+    if args.command == "status":
+        result = estado_reencode()
+        status = result.get("status")
+        if not status:
+            print("ℹ️ No hay ningún re-encoding registrado")
+        else:
+            print(f"🆔 Job: {status['job_id']}  (completado: {'✅' if status.get('completed') else '❌'})")
+            print(f"⚙️  Configuración: {status['settings']}")
+            print(f"📊 Procesadas: {status['processed']}  Codificadas: {status['encoded']}  Fallos: {status['failed']}")
+            print(f"⚡ Velocidad: {status.get('photos_per_second', 0)} fotos/s")
+            print(f"📌 Último foto_id: {status['last_foto_id']}")
+        version = result.get("gallery_version")
+        if version:
+            print(f"🚀 Versión publicada: {version['version']} ({version['published_at']})")
+        return
+
+    generador = GeneradorEncodings(
+        detector=args.detector,
+        max_lado=args.max_lado,
+        upsample=args.upsample,
+        num_jitters=args.jitters
+    )
+    job = ReencodeJob(
+        page_size=args.page_size,
+        batch_size=args.batch_size,
+        download_workers=args.workers,
+        generador=generador
+    )
+
+    print("🧠 Iniciando re-encoding de la galería...")
+    try:
+        estado = job.run(publicar=not args.no_publish)
+    except KeyboardInterrupt:
+        print("\n⏸️ Interrumpido. Ejecuta de nuevo 'run' para reanudar desde el checkpoint.")
+        sys.exit(130)
+
+    print("\n" + "-" * 50)
+    print(f"📊 Procesadas: {estado['processed']}  Codificadas: {estado['encoded']}  Fallos: {estado['failed']}")
+    print(f"⚡ Velocidad: {estado.get('photos_per_second', 0)} fotos/s en {estado['elapsed_s']}s")
+    for fallo in estado["failures"][:10]:
+        print(f"   ❌ foto_id={fallo['foto_id']}: {fallo['error']}")
+    if estado.get("error"):
+        print(f"⚠️ Error: {estado['error']} (ejecuta de nuevo 'run' para reanudar)")
+    if estado.get("gallery_version"):
+        print(f"🚀 Galería publicada: versión {estado['gallery_version']['version']}")
+    print("-" * 50)
+
+    if estado["failed"] or estado.get("error"):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
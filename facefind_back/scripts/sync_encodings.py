@@ -1,13 +1,23 @@
 """
 Script de utilidad para sincronizar encodings con Supabase Storage
 Uso:
-    python scripts/sync_encodings.py upload    # Subir encodings locales a la nube
-    python scripts/sync_encodings.py download  # Descargar encodings de la nube
+    python scripts/sync_encodings.py upload    # Subir segmentos locales que faltan en la nube
+    python scripts/sync_encodings.py download  # Descargar segmentos que faltan localmente
+    python scripts/sync_encodings.py sync      # Ambos sentidos
     python scripts/sync_encodings.py status    # Ver estado de encodings
+
+Opciones:
+    --workers N        Segmentos transferidos en paralelo (default: ENCODINGS_SYNC_WORKERS)
+    --export-pickle    Tras descargar, escribir también encodings.pickle (formato legado)
+    --refresh          En 'status', volver a leer el manifiesto remoto
+
+Solo se transfieren los segmentos cuyo hash no está en el otro lado, así que
+un nodo nuevo puede traer la galería completa en paralelo y luego mantenerse
+al día descargando únicamente lo agregado.
 """
 import sys
 import os
-import pickle
+import argparse
 from pathlib import Path
 
 # Configurar encoding UTF-8 para Windows
@@ -24,123 +34,112 @@ ENCODINGS_PATH = BACKEND_ROOT / "encodings.pickle"
 sys.path.insert(0, str(BACKEND_ROOT))
 
 from services.encodings_storage import (
-    upload_encodings_to_cloud, 
+    upload_encodings_to_cloud,
     download_encodings_from_cloud,
+    sync_encodings,
     get_encodings_status
 )
+from services.encodings_store import get_encodings_store
+
+
+def _print_transfer(result: dict, verbo: str):
+    """Muestra el resultado de una transferencia delta"""
+    if result.get("error"):
+        print(f"❌ Error: {result['error']}")
+        return
+    segmentos = result.get(f"{verbo}_segments", 0)
+    size_kb = result.get(f"{verbo}_bytes", 0) / 1024
+    print(f"   Segmentos transferidos: {segmentos} ({size_kb:.2f} KB)")
+    if "skipped_segments" in result:
+        print(f"   Ya en la nube: {result['skipped_segments']}")
+    if "up_to_date_segments" in result:
+        print(f"   Ya locales: {result['up_to_date_segments']}")
+    if result.get("version") is not None:
+        print(f"   Versión del manifiesto: {result['version']}")
+    for conflicto in result.get("conflicts", []):
+        print(f"   ⚠️ Conflicto (no publicado): {conflicto}")
+    for error in result.get("errors", []):
+        print(f"   ❌ {error['file']}: {error['error']}")
+
 
 def main():
-    if len(sys.argv) < 2:
-        print("❌ Uso: python scripts/sync_encodings.py [upload|download|status]")
-        print("\nComandos disponibles:")
-        print("  upload   - Subir encodings.pickle a Supabase Storage")
-        print("  download - Descargar encodings.pickle desde Supabase Storage")
-        print("  status   - Ver estado de encodings (local y nube)")
-        print(f"\n📂 Archivo: {ENCODINGS_PATH}")
-        sys.exit(1)
-    
-    command = sys.argv[1].lower()
-    
-    if command == "upload":
-        print("📤 Subiendo encodings a Supabase Storage...")
-        print(f"📂 Desde: {ENCODINGS_PATH}")
-        
-        # Verificar que el archivo existe antes de intentar subir
-        if not ENCODINGS_PATH.exists():
-            print(f"❌ Error: El archivo {ENCODINGS_PATH} no existe")
-            print(f"💡 Genera los encodings primero o verifica la ruta")
+    parser = argparse.ArgumentParser(description="Sincronización delta de encodings")
+    parser.add_argument("command", choices=["upload", "download", "sync", "status"])
+    parser.add_argument("--workers", type=int, help="Segmentos transferidos en paralelo")
+    parser.add_argument("--export-pickle", action="store_true",
+                        help="Tras descargar, escribir encodings.pickle")
+    parser.add_argument("--refresh", action="store_true",
+                        help="En 'status', volver a leer el manifiesto remoto")
+    args = parser.parse_args()
+
+    # El almacén local vive en la raíz del backend
+    os.chdir(BACKEND_ROOT)
+    if args.workers:
+        get_encodings_store().transfer_workers = args.workers
+
+    if args.command == "upload":
+        print("📤 Subiendo segmentos nuevos a Supabase Storage...")
+        result = upload_encodings_to_cloud(str(ENCODINGS_PATH))
+        _print_transfer(result, "uploaded")
+        if not result["success"]:
             sys.exit(1)
-        
-        # Cambiar al directorio raíz para que encodings_storage encuentre el archivo
-        os.chdir(BACKEND_ROOT)
-        result = upload_encodings_to_cloud()
-        
-        if result["success"]:
-            print(f"✅ Subida exitosa")
-            print(f"📁 Archivo: encodings.pickle")
-            print(f"📦 Tamaño: {result['size']} bytes ({result['size']/1024:.2f} KB)")
-        else:
-            print(f"❌ Error: {result['error']}")
-            if 'solution' in result:
-                print(f"💡 Solución: {result['solution']}")
+        print("✅ Nube al día")
+
+    elif args.command == "download":
+        print("📥 Descargando segmentos faltantes desde Supabase Storage...")
+        result = download_encodings_from_cloud(str(ENCODINGS_PATH), export_pickle=args.export_pickle)
+        _print_transfer(result, "downloaded")
+        if not result["success"]:
             sys.exit(1)
-    
-    elif command == "download":
-        print("📥 Descargando encodings desde Supabase Storage...")
-        print(f"📂 Destino: {ENCODINGS_PATH}")
-        
-        # Cambiar al directorio raíz para que encodings_storage guarde en el lugar correcto
-        os.chdir(BACKEND_ROOT)
-        result = download_encodings_from_cloud()
-        
-        if result["success"]:
-            print(f"✅ {result['message']}")
-            print(f"📁 Archivo: {result['file_name']}")
-            print(f"📦 Tamaño: {result['size']} bytes ({result['size']/1024:.2f} KB)")
-            print(f"💾 Guardado en: {ENCODINGS_PATH}")
-            
-            # Leer contenido
-            try:
-                with open(ENCODINGS_PATH, 'rb') as f:
-                    data = pickle.load(f)
-                print(f"📊 Encodings: {len(data.get('encodings', []))}")
-                print(f"👥 Personas: {len(set(data.get('names', [])))}")
-            except Exception as e:
-                print(f"⚠️ Advertencia: No se pudo leer el archivo: {e}")
-        else:
-            print(f"❌ Error: {result['error']}")
+        if "exported_encodings" in result:
+            print(f"💾 {result['exported_encodings']} encodings exportados a {ENCODINGS_PATH}")
+        print("✅ Almacén local al día")
+
+    elif args.command == "sync":
+        print("🔄 Sincronizando encodings (delta)...")
+        result = sync_encodings("both")
+        for op in result["operations"]:
+            print(f"\n▶️ {op['operation']}")
+            _print_transfer(op["result"], "uploaded" if op["operation"] == "upload" else "downloaded")
+        if not result["success"]:
             sys.exit(1)
-    
-    elif command == "status":
+        print("\n✅ Sincronización completa")
+
+    elif args.command == "status":
         print("📊 Estado de encodings:")
         print("-" * 50)
-        
-        # Cambiar al directorio raíz para verificar status correctamente
-        os.chdir(BACKEND_ROOT)
-        status = get_encodings_status()
-        
+
+        status = get_encodings_status(refresh=args.refresh)
+        store = get_encodings_store()
+
         # Local
-        print(f"\n🖥️  Local:")
-        if status['local']['exists']:
-            size_kb = status['local']['size'] / 1024
-            print(f"   Existe: ✅ Sí")
-            print(f"   Ruta: {ENCODINGS_PATH.absolute()}")
-            print(f"   Tamaño: {size_kb:.2f} KB")
-            
-            # Leer contenido
-            try:
-                with open(ENCODINGS_PATH, 'rb') as f:
-                    data = pickle.load(f)
-                encodings_count = len(data.get('encodings', []))
-                unique_names = len(set(data.get('names', [])))
-                print(f"   Encodings: {encodings_count}")
-                print(f"   Personas únicas: {unique_names}")
-            except Exception as e:
-                print(f"   ⚠️ Error leyendo: {e}")
+        local = status["local"]
+        print(f"\n🖥️  Local ({Path(store.root_dir).absolute()}):")
+        if local["exists"]:
+            print(f"   Versión: {local['version']}")
+            print(f"   Segmentos: {local['segments']} (faltan en disco: {local['missing_segments']})")
+            print(f"   Encodings: {local['total_encodings']}")
+            print(f"   Tamaño: {local['size'] / 1024:.2f} KB")
         else:
             print(f"   Existe: ❌ No")
-            print(f"   Ruta esperada: {ENCODINGS_PATH.absolute()}")
-        
+
         # Remoto
-        print(f"\n☁️  Remoto (Supabase):")
-        if 'error' in status['cloud']:
-            print(f"   ❌ Error: {status['cloud']['error']}")
-        elif status['cloud']['exists']:
-            size_kb = status['cloud']['size'] / 1024
-            print(f"   Existe: ✅ Sí")
-            print(f"   Bucket: face-encodings")
-            print(f"   Archivo: encodings.pickle")
-            print(f"   Tamaño: {size_kb:.2f} KB")
+        cloud = status["cloud"]
+        print(f"\n☁️  Remoto (Supabase, manifiesto cacheado):")
+        if cloud["exists"]:
+            print(f"   Versión: {cloud['version']}")
+            print(f"   Segmentos: {cloud['segments']}")
+            print(f"   Encodings: {cloud['total_encodings']}")
+            print(f"   Tamaño: {cloud['size'] / 1024:.2f} KB")
+            print(f"\n🔁 Pendientes de subir: {status['pending_upload']}  "
+                  f"Pendientes de bajar: {status['pending_download']}  "
+                  f"Sincronizado: {'✅' if status['in_sync'] else '❌'}")
         else:
-            print(f"   Existe: ❌ No")
-            print(f"   💡 Usa 'python scripts/sync_encodings.py upload' para subir")
-        
+            print(f"   Sin manifiesto conocido")
+            print(f"   💡 Usa '--refresh' o 'python scripts/sync_encodings.py upload'")
+
         print("\n" + "-" * 50)
-    
-    else:
-        print(f"❌ Comando desconocido: {command}")
-        print("Comandos disponibles: upload, download, status")
-        sys.exit(1)
+
 
 if __name__ == "__main__":
     main()
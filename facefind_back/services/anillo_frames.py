@@ -0,0 +1,263 @@
+"""
+Anillo de frames en memoria compartida entre procesos
+
+Cuando la ingesta y la detección corren en procesos separados, mandar
+cada frame BGR (~6 MB a 1080p) por una multiprocessing.Queue significa
+serializarlo con pickle, copiarlo por un pipe y deserializarlo: a decenas
+de cámaras por varios fps eso domina el costo.
+
+El anillo es un bloque de multiprocessing.shared_memory con un número fijo
+de slots del tamaño de un frame máximo, más una tabla de metadatos
+(camara_id, timestamp, seq y forma del frame) en el mismo bloque:
+
+    - El productor copia el frame una sola vez a un slot libre y lo marca
+      listo. Entre procesos solo viaja el índice del slot.
+    - El consumidor toma el slot listo más viejo y recibe una vista numpy
+      sobre la memoria compartida (sin copias). Al terminar lo libera.
+    - Si el consumidor se atrasa y no quedan slots libres, el productor
+      reutiliza el slot listo más viejo (ese frame se cuenta como
+      sobrescrito). Un slot que se está leyendo nunca se pisa.
+
+Uso típico: la ingesta publica con enviar_a_anillo(anillo) como callback
+de IngestaCamaras y cada proceso de detección hace
+
+    with anillo.tomar() as compartido:
+        motor.process_frame(compartido.frame, compartido.camara_id)
+
+El anillo se puede pasar como argumento a multiprocessing.Process: del
+otro lado se vuelve a adjuntar al mismo bloque por nombre.
+"""
+import multiprocessing
+import os
+import time
+from multiprocessing import shared_memory
+from typing import Callable, Dict, Optional
+
+import numpy as np
+
+# Estados de un slot
+LIBRE = 0
+ESCRIBIENDO = 1
+LISTO = 2
+LEYENDO = 3
+
+METADATOS = np.dtype([
+    ("seq", "i8"), ("estado", "i4"), ("alto", "i4"),
+    ("ancho", "i4"), ("camara_id", "i8"), ("timestamp", "f8")
+])
+CONTADORES = ("seq", "published", "consumed", "overwritten", "no_slot")
+
+
+class FrameCompartido:
+    """
+    Frame tomado del anillo: vista sobre el slot más sus metadatos.
+    La vista solo es válida hasta liberar el slot.
+    """
+
+    def __init__(self, anillo: "AnilloFrames", slot: int, frame: np.ndarray,
+                 camara_id: int, timestamp: float, seq: int):
+        self.anillo = anillo
+        self.slot = slot
+        self.frame = frame
+        self.camara_id = camara_id
+        self.timestamp = timestamp
+        self.seq = seq
+
+    def liberar(self):
+        if self.frame is not None:
+            self.frame = None
+            self.anillo.liberar(self.slot)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.liberar()
+
+
+class AnilloFrames:
+    """
+    Slots de frames de tamaño fijo en memoria compartida
+    """
+
+    def __init__(self, slots: int = 8, alto: int = 1080, ancho: int = 1920,
+                 nombre: Optional[str] = None, contexto=None):
+        """
+        Crea el bloque de memoria compartida.
+
+        Args:
+            slots: Cantidad de frames que pueden estar en tránsito a la vez
+            alto / ancho: Tamaño máximo de frame (BGR, uint8) que entra en un slot
+            nombre: Nombre del bloque (por defecto lo elige el sistema)
+            contexto: Contexto de multiprocessing de los procesos que lo usan
+                      (fork/spawn); por defecto el del sistema
+        """
+        self.slots = max(2, int(slots))
+        self.alto = int(alto)
+        self.ancho = int(ancho)
+        self._condicion = (contexto or multiprocessing.get_context()).Condition()
+        # Con fork el hijo hereda este mismo objeto: solo el proceso creador borra el bloque
+        self._pid_creador = os.getpid()
+        self._shm = shared_memory.SharedMemory(create=True, size=self._tamano(), name=nombre)
+        self._mapear()
+        self._metadatos[:] = 0
+        self._contadores[:] = 0
+
+    # ======================================================
+    # 🧱 Memoria compartida
+    # ======================================================
+    def _tamano(self) -> int:
+        return (METADATOS.itemsize * self.slots + 8 * len(CONTADORES)
+                + self.slots * self.alto * self.ancho * 3)
+
+    def _mapear(self):
+        buffer = self._shm.buf
+        offset = 0
+        self._metadatos = np.ndarray((self.slots,), dtype=METADATOS, buffer=buffer, offset=offset)
+        offset += METADATOS.itemsize * self.slots
+        self._contadores = np.ndarray((len(CONTADORES),), dtype=np.int64, buffer=buffer, offset=offset)
+        offset += 8 * len(CONTADORES)
+        self._frames = np.ndarray((self.slots, self.alto, self.ancho, 3), dtype=np.uint8,
+                                  buffer=buffer, offset=offset)
+
+    @property
+    def nombre(self) -> str:
+        return self._shm.name
+
+    def __getstate__(self):
+        # Al pasar a otro proceso viajan el nombre y la forma, no la memoria
+        return {
+            "nombre": self.nombre, "slots": self.slots, "alto": self.alto,
+            "ancho": self.ancho, "condicion": self._condicion, "pid_creador": self._pid_creador
+        }
+
+    def __setstate__(self, estado):
+        self.slots = estado["slots"]
+        self.alto = estado["alto"]
+        self.ancho = estado["ancho"]
+        self._condicion = estado["condicion"]
+        self._pid_creador = estado["pid_creador"]
+        self._shm = shared_memory.SharedMemory(name=estado["nombre"])
+        self._mapear()
+
+    def cerrar(self):
+        """Suelta el mapeo en este proceso; el creador además borra el bloque"""
+        self._metadatos = self._contadores = self._frames = None
+        self._shm.close()
+        if os.getpid() == self._pid_creador:
+            self._shm.unlink()
+
+    def _contar(self, contador: str, cantidad: int = 1):
+        # Se llama con el lock tomado
+        self._contadores[CONTADORES.index(contador)] += cantidad
+
+    # ======================================================
+    # 📤 Productor
+    # ======================================================
+    def publicar(self, frame: np.ndarray, camara_id: int, timestamp: Optional[float] = None) -> Optional[int]:
+        """
+        Copia el frame a un slot y lo deja listo para los consumidores.
+
+        Returns:
+            seq del frame publicado, o None si todos los slots se están leyendo
+
+        Raises:
+            ValueError: si el frame no es BGR uint8 o no entra en un slot
+        """
+        if frame.dtype != np.uint8 or frame.ndim != 3 or frame.shape[2] != 3:
+            raise ValueError("El anillo solo acepta frames BGR uint8")
+        alto, ancho = frame.shape[:2]
+        if alto > self.alto or ancho > self.ancho:
+            raise ValueError(f"Frame de {ancho}x{alto} no entra en slots de {self.ancho}x{self.alto}")
+
+        with self._condicion:
+            slot = self._elegir_slot()
+            if slot is None:
+                self._contar("no_slot")
+                return None
+            self._metadatos[slot]["estado"] = ESCRIBIENDO
+
+        # La copia (la única del frame) se hace fuera del lock
+        self._frames[slot, :alto, :ancho] = frame
+
+        with self._condicion:
+            self._contar("seq")
+            seq = int(self._contadores[CONTADORES.index("seq")])
+            meta = self._metadatos[slot]
+            meta["seq"] = seq
+            meta["alto"] = alto
+            meta["ancho"] = ancho
+            meta["camara_id"] = int(camara_id)
+            meta["timestamp"] = timestamp if timestamp is not None else time.time()
+            meta["estado"] = LISTO
+            self._contar("published")
+            self._condicion.notify_all()
+        return seq
+
+    def _elegir_slot(self) -> Optional[int]:
+        """Un slot libre o, si no hay, el listo más viejo (se pisa)"""
+        estados = self._metadatos["estado"]
+        libres = np.flatnonzero(estados == LIBRE)
+        if len(libres):
+            return int(libres[0])
+        listos = np.flatnonzero(estados == LISTO)
+        if not len(listos):
+            return None
+        self._contar("overwritten")
+        return int(listos[np.argmin(self._metadatos["seq"][listos])])
+
+    # ======================================================
+    # 📥 Consumidor
+    # ======================================================
+    def tomar(self, timeout: Optional[float] = None) -> Optional[FrameCompartido]:
+        """
+        Toma el frame listo más viejo. Espera hasta timeout si no hay
+        ninguno. Hay que liberarlo al terminar (o usarlo con `with`).
+        """
+        with self._condicion:
+            if not self._condicion.wait_for(lambda: bool((self._metadatos["estado"] == LISTO).any()), timeout):
+                return None
+            listos = np.flatnonzero(self._metadatos["estado"] == LISTO)
+            slot = int(listos[np.argmin(self._metadatos["seq"][listos])])
+            meta = self._metadatos[slot]
+            meta["estado"] = LEYENDO
+            self._contar("consumed")
+            alto, ancho = int(meta["alto"]), int(meta["ancho"])
+            return FrameCompartido(
+                self, slot, self._frames[slot, :alto, :ancho],
+                camara_id=int(meta["camara_id"]), timestamp=float(meta["timestamp"]), seq=int(meta["seq"])
+            )
+
+    def liberar(self, slot: int):
+        """Devuelve el slot al productor"""
+        with self._condicion:
+            self._metadatos[slot]["estado"] = LIBRE
+            self._condicion.notify_all()
+
+    # ======================================================
+    # 📊 Estadísticas
+    # ======================================================
+    def resumen(self) -> Dict:
+        with self._condicion:
+            estados = self._metadatos["estado"].copy()
+            contadores = {c: int(v) for c, v in zip(CONTADORES, self._contadores)}
+        contadores.pop("seq")
+        return {
+            "name": self.nombre,
+            "slots": self.slots,
+            "slot_shape": [self.alto, self.ancho, 3],
+            "ready": int((estados == LISTO).sum()),
+            "reading": int((estados == LEYENDO).sum()),
+            **contadores
+        }
+
+
+def enviar_a_anillo(anillo: AnilloFrames) -> Callable:
+    """
+    Callback procesar(frame, camara) para IngestaCamaras que publica en el
+    anillo en lugar de detectar en el mismo proceso
+    """
+    def procesar(frame, camara):
+        anillo.publicar(frame, camara["id"])
+        return None
+    return procesar
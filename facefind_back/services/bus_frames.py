@@ -0,0 +1,310 @@
+"""
+Bus de frames por cámara
+
+Antes, la misma cámara se decodificaba una vez por consumidor: el stream
+MJPEG abría su captura, la ingesta abría otra con su propio grabber y una
+captura de evidencia hubiera abierto una tercera (una cámara USB ni
+siquiera se puede abrir dos veces).
+
+Ahora cada cámara tiene un solo hilo de captura que publica el último
+frame decodificado en el bus. El codificador del stream, el muestreo de la
+detección y la captura de evidencias se suscriben y reciben el mismo array
+por referencia: la cámara se decodifica una sola vez sin importar cuántos
+consumidores haya.
+
+    - Los frames publicados son de solo lectura: quien necesite dibujar
+      sobre ellos debe hacer su propia copia.
+    - Cada consumidor toma el frame más reciente a su ritmo (si es lento se
+      salta frames, no se le acumulan).
+    - Si la conexión falla o el stream se corta, el hilo reintenta con
+      espera exponencial mientras queden suscriptores.
+    - Con el último suscriptor se detiene el hilo y se libera la cámara.
+"""
+import threading
+import time
+from collections import deque
+from typing import Callable, Dict, Optional, Tuple
+
+import numpy as np
+
+from facefind.camera.concrete_cameras import IPCamera, USBCamera
+
+# Lecturas fallidas seguidas que se consideran stream cortado
+MAX_FALLOS_LECTURA = 5
+
+
+def abrir_camara(camera_data: Dict):
+    """Crea la cámara (sin conectar) a partir de la fila de la tabla Camara"""
+    if camera_data.get("type", "USB") == "USB":
+        # El índice está guardado como string en el campo url ("0", "1", ...)
+        # o puede ser un deviceId del navegador
+        url = str(camera_data.get("url") or "0")
+        if url.isdigit():
+            device_index = int(url)
+        else:
+            print(f"⚠️ URL '{url}' no es un índice numérico, usando 0")
+            device_index = 0
+        print(f"📹 Abriendo cámara USB con índice: {device_index} (desde url='{url}')")
+        return USBCamera(device_index)
+
+    # Sin grabber: el hilo del bus ya lee sin parar y se queda con el último
+    url = camera_data.get("url") or camera_data.get("ip")
+    return IPCamera(url)
+
+
+class BusCamara:
+    """
+    Hilo de captura de una cámara que publica el último frame decodificado
+    """
+
+    def __init__(self, camera_data: Dict, abrir: Callable = abrir_camara,
+                 backoff_inicial_s: float = 1.0, backoff_max_s: float = 60.0,
+                 anterior: Optional["BusCamara"] = None):
+        """
+        Args:
+            camera_data: Fila de la tabla Camara
+            abrir: Fábrica de la cámara
+            backoff_inicial_s / backoff_max_s: Espera entre reconexiones
+            anterior: Bus que se está cerrando para la misma cámara (se
+                      espera a que libere el dispositivo antes de abrirlo)
+        """
+        self.camera_data = camera_data
+        self.camara_id = camera_data.get("id")
+        self.abrir = abrir
+        self.backoff_inicial_s = backoff_inicial_s
+        self.backoff_max_s = backoff_max_s
+        self.anterior = anterior
+
+        self._frame: Optional[np.ndarray] = None
+        self._timestamp: Optional[float] = None
+        self.seq = 0
+        self._suscriptores: Dict[str, int] = {}
+        self._condicion = threading.Condition()
+        self._detener = threading.Event()
+        self._reabrir = threading.Event()
+        self._capturas = deque(maxlen=60)
+        self.activo = True
+        self.estado = "starting"
+        self.stats = {"connects": 0, "reconnects": 0, "frames_decoded": 0}
+        self._hilo = threading.Thread(target=self._capturar, name=f"bus-camara-{self.camara_id}", daemon=True)
+
+    # ======================================================
+    # 👥 Suscriptores
+    # ======================================================
+    @property
+    def suscriptores(self) -> int:
+        with self._condicion:
+            return sum(self._suscriptores.values())
+
+    def agregar_suscriptor(self, consumidor: str):
+        with self._condicion:
+            self._suscriptores[consumidor] = self._suscriptores.get(consumidor, 0) + 1
+
+    def quitar_suscriptor(self, consumidor: str) -> int:
+        """Quita un suscriptor y devuelve los que quedan en la cámara"""
+        with self._condicion:
+            if consumidor in self._suscriptores:
+                self._suscriptores[consumidor] -= 1
+                if self._suscriptores[consumidor] <= 0:
+                    del self._suscriptores[consumidor]
+            return sum(self._suscriptores.values())
+
+    # ======================================================
+    # 🚀 Ciclo de vida
+    # ======================================================
+    def iniciar(self):
+        self._hilo.start()
+
+    def detener(self):
+        self._detener.set()
+
+    def join(self, timeout: Optional[float] = None):
+        self._hilo.join(timeout)
+
+    def actualizar(self, camera_data: Dict):
+        """Si cambió la URL de la cámara, se reabre sin cortar a los suscriptores"""
+        anterior = self.camera_data
+        self.camera_data = camera_data
+        if (anterior.get("url") or anterior.get("ip")) != (camera_data.get("url") or camera_data.get("ip")):
+            self._reabrir.set()
+
+    def _capturar(self):
+        if self.anterior is not None:
+            self.anterior.join(timeout=5)
+            self.anterior = None
+
+        espera = self.backoff_inicial_s
+        try:
+            while not self._detener.is_set():
+                camara = self.abrir(self.camera_data)
+                try:
+                    if camara.connect():
+                        self.estado = "streaming"
+                        self.stats["connects"] += 1
+                        espera = self.backoff_inicial_s
+                        print(f"✅ Bus de frames iniciado para cámara {self.camara_id}")
+                        self._leer(camara)
+                    else:
+                        print(f"❌ No se pudo abrir la cámara {self.camara_id}")
+                except Exception as e:
+                    print(f"❌ Error en el bus de la cámara {self.camara_id}: {str(e)}")
+                finally:
+                    camara.disconnect()
+
+                if self._detener.is_set():
+                    break
+                if self._reabrir.is_set():
+                    self._reabrir.clear()
+                    espera = self.backoff_inicial_s
+                    continue
+                self.estado = "reconnecting"
+                self.stats["reconnects"] += 1
+                print(f"🔁 Cámara {self.camara_id}: reintentando en {espera:.0f}s")
+                self._detener.wait(espera)
+                espera = min(espera * 2, self.backoff_max_s)
+        finally:
+            with self._condicion:
+                self.activo = False
+                self.estado = "stopped"
+                self._condicion.notify_all()
+            print(f"🔒 Cámara {self.camara_id} liberada")
+
+    def _leer(self, camara):
+        """Publica frames hasta que el stream se corte o se pida detener"""
+        fallos = 0
+        while not self._detener.is_set() and not self._reabrir.is_set():
+            frame = camara.get_frame()
+            if frame is None:
+                fallos += 1
+                if fallos >= MAX_FALLOS_LECTURA:
+                    print(f"⚠️  Cámara {self.camara_id}: stream cortado")
+                    return
+                continue
+            fallos = 0
+            self.publicar(frame)
+
+    def publicar(self, frame: np.ndarray):
+        """
+        Deja el frame como el más reciente. No se copia: cada lectura de la
+        cámara entrega un array nuevo, así que quien tenga el anterior lo
+        puede seguir usando.
+        """
+        ahora = time.time()
+        with self._condicion:
+            self._frame = frame
+            self._timestamp = ahora
+            self.seq += 1
+            self.stats["frames_decoded"] += 1
+            self._capturas.append(ahora)
+            self._condicion.notify_all()
+
+    # ======================================================
+    # 📥 Consumo
+    # ======================================================
+    def siguiente(self, ultimo_seq: int, timeout: float = 5.0) -> Tuple[int, Optional[np.ndarray], Optional[float]]:
+        """
+        Espera un frame más nuevo que ultimo_seq y devuelve el más reciente
+        (seq, frame, timestamp). (ultimo_seq, None, None) si no llegó ninguno
+        a tiempo o el bus se detuvo.
+        """
+        with self._condicion:
+            self._condicion.wait_for(lambda: self.seq > ultimo_seq or not self.activo, timeout)
+            if self.seq > ultimo_seq:
+                return self.seq, self._frame, self._timestamp
+            return ultimo_seq, None, None
+
+    def ultimo(self, timeout: float = 5.0) -> Tuple[Optional[np.ndarray], Optional[float]]:
+        """Frame más reciente y su timestamp; solo espera si todavía no llegó ninguno"""
+        _, frame, timestamp = self.siguiente(0, timeout)
+        return frame, timestamp
+
+    # ======================================================
+    # 📊 Estadísticas
+    # ======================================================
+    def fps(self) -> float:
+        """fps de captura de la cámara"""
+        with self._condicion:
+            tiempos = list(self._capturas)
+        if len(tiempos) < 2 or time.time() - tiempos[-1] > 2:
+            return 0.0
+        return round((len(tiempos) - 1) / (tiempos[-1] - tiempos[0]), 2)
+
+    def resumen(self) -> Dict:
+        fps = self.fps()
+        with self._condicion:
+            edad = time.time() - self._timestamp if self._timestamp else None
+            return {
+                "camara_id": self.camara_id,
+                "state": self.estado,
+                "active": self.activo,
+                "subscribers": dict(self._suscriptores),
+                "fps": fps,
+                **self.stats,
+                "frame_age_ms": round(edad * 1000, 1) if edad is not None else None
+            }
+
+
+class BusFrames:
+    """
+    Un BusCamara por cámara con al menos un suscriptor
+    """
+
+    def __init__(self, abrir: Callable = abrir_camara, backoff_max_s: Optional[float] = None):
+        """
+        Args:
+            abrir: Fábrica de la cámara a partir de la fila de la tabla Camara
+            backoff_max_s: Espera máxima entre reconexiones (por defecto de la configuración)
+        """
+        if backoff_max_s is None:
+            from config import Config
+            backoff_max_s = Config.CAMERA_INGESTION_BACKOFF_MAX_S
+        self.abrir = abrir
+        self.backoff_max_s = backoff_max_s
+        self.buses: Dict[int, BusCamara] = {}
+        self._cerrando: Dict[int, BusCamara] = {}
+        self._lock = threading.Lock()
+
+    def suscribir(self, camera_data: Dict, consumidor: str) -> BusCamara:
+        """Registra un consumidor; arranca la captura si es el primero de la cámara"""
+        camara_id = camera_data.get("id")
+        with self._lock:
+            bus = self.buses.get(camara_id)
+            if bus is None or not bus.activo:
+                bus = BusCamara(
+                    camera_data, self.abrir,
+                    backoff_inicial_s=min(1.0, self.backoff_max_s),
+                    backoff_max_s=self.backoff_max_s,
+                    anterior=self._cerrando.pop(camara_id, None)
+                )
+                self.buses[camara_id] = bus
+                bus.iniciar()
+            else:
+                bus.actualizar(camera_data)
+            bus.agregar_suscriptor(consumidor)
+            print(f"🚌 Cámara {camara_id}: {consumidor} suscrito al bus ({bus.suscriptores} en total)")
+            return bus
+
+    def desuscribir(self, bus: BusCamara, consumidor: str):
+        """Quita un consumidor; con el último se detiene la captura"""
+        with self._lock:
+            restantes = bus.quitar_suscriptor(consumidor)
+            if restantes <= 0:
+                bus.detener()
+                if self.buses.get(bus.camara_id) is bus:
+                    del self.buses[bus.camara_id]
+                self._cerrando[bus.camara_id] = bus
+
+    def bus(self, camara_id) -> Optional[BusCamara]:
+        """Bus activo de la cámara, si alguien la está consumiendo"""
+        with self._lock:
+            bus = self.buses.get(camara_id)
+            return bus if bus is not None and bus.activo else None
+
+    def resumen(self) -> Dict:
+        with self._lock:
+            buses = list(self.buses.values())
+        return {"cameras": [b.resumen() for b in buses]}
+
+
+# Instancia compartida por el stream, la ingesta y las evidencias
+bus_frames = BusFrames()
@@ -268,6 +268,11 @@ class CasoService:
                 
                 if hasattr(caso_response, "error") and caso_response.error:
                     raise Exception(f"Error al actualizar caso: {str(caso_response.error)}")
+                
+                # Un cambio de estado saca o devuelve el caso a la galería de detección
+                if "status" in caso_updates:
+                    from api.detection_routes import notificar_cambio_estado_caso
+                    notificar_cambio_estado_caso(caso_id, caso_updates["status"])
             
             # 6. Retornar caso actualizado completo
             print(f"✅ Caso {caso_id} actualizado correctamente")
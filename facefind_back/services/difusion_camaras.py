@@ -0,0 +1,285 @@
+"""
+Difusión compartida de /cameras/<id>/stream
+
+Antes cada cliente del stream abría su propio cv2.VideoCapture y
+codificaba cada frame a JPEG por su cuenta: dos administradores mirando
+la misma cámara duplicaban captura y codificación, y una cámara USB no se
+puede abrir dos veces.
+
+Ahora hay un solo hilo de codificación por cámara, suscrito al bus de
+frames (services/bus_frames.py): la captura la hace el bus y se comparte
+con la ingesta y las evidencias. El último JPEG queda en un buffer
+compartido y cada cliente toma el más reciente a su propio ritmo (si es
+lento se salta frames, no se le acumulan). Cuando se desconecta el último
+cliente, el difusor se baja del bus; si nadie más usa la cámara, el bus
+la libera.
+
+Cada cliente pide un perfil (ancho máximo, fps y calidad JPEG); los
+valores por defecto salen de la resolución y fps guardados de la cámara.
+El frame se reduce y se limita a los fps del perfil antes de codificar, y
+los clientes con el mismo perfil comparten el JPEG.
+"""
+import threading
+import time
+from collections import deque
+from typing import Callable, Dict, NamedTuple, Optional, Tuple
+
+import cv2
+
+from services.bus_frames import BusCamara, BusFrames, abrir_camara, bus_frames
+
+# Nombre del difusor como suscriptor del bus
+CONSUMIDOR = "stream"
+
+
+class PerfilStream(NamedTuple):
+    max_width: int
+    fps: float
+    quality: int
+
+
+def perfil_stream(camera_data: Dict, params=None) -> PerfilStream:
+    """
+    Perfil del stream: parámetros del request (max_width, fps, quality) o
+    los de la cámara (resolution, fps). Ambos quedan acotados por la
+    configuración: el cliente puede pedir menos, nunca más.
+
+    Raises:
+        ValueError: si algún parámetro no es numérico
+    """
+    from config import Config
+    params = params or {}
+
+    ancho_camara = None
+    try:
+        ancho_camara = int(str(camera_data.get("resolution") or "").lower().split("x")[0])
+    except ValueError:
+        pass
+    ancho_max = min(ancho_camara or Config.STREAM_MAX_WIDTH, Config.STREAM_MAX_WIDTH)
+    fps_max = Config.STREAM_MAX_FPS
+    ancho = ancho_max
+    fps = min(float(camera_data.get("fps") or fps_max), fps_max)
+    calidad = Config.STREAM_JPEG_QUALITY
+
+    try:
+        if params.get("max_width"):
+            ancho = min(int(params["max_width"]), ancho_max)
+        if params.get("fps"):
+            fps = min(float(params["fps"]), fps_max)
+        if params.get("quality"):
+            calidad = int(params["quality"])
+    except (TypeError, ValueError):
+        raise ValueError("max_width, fps y quality deben ser numéricos")
+
+    return PerfilStream(
+        max_width=max(160, ancho),
+        fps=max(0.5, fps),
+        quality=min(95, max(20, calidad))
+    )
+
+
+class DifusorCamara:
+    """
+    Hilo que codifica los frames del bus de una cámara y reparte el último JPEG
+    """
+
+    def __init__(self, bus: BusCamara):
+        """
+        Args:
+            bus: Bus de frames de la cámara (la captura es del bus, no del difusor)
+        """
+        self.bus = bus
+        self.camara_id = bus.camara_id
+
+        # Un JPEG por perfil pedido: {perfil: {jpeg, seq, viewers, ultimo, tiempos}}
+        self._variantes: Dict[PerfilStream, Dict] = {}
+        self._condicion = threading.Condition()
+        self._detener = threading.Event()
+        self.activo = True
+        self.frames_encoded = 0
+        self._hilo = threading.Thread(target=self._difundir, name=f"stream-{self.camara_id}", daemon=True)
+
+    @property
+    def viewers(self) -> int:
+        with self._condicion:
+            return sum(v["viewers"] for v in self._variantes.values())
+
+    def agregar_viewer(self, perfil: PerfilStream):
+        with self._condicion:
+            variante = self._variantes.setdefault(perfil, {
+                "jpeg": None, "seq": 0, "viewers": 0, "ultimo": 0.0, "tiempos": deque(maxlen=60)
+            })
+            variante["viewers"] += 1
+
+    def quitar_viewer(self, perfil: PerfilStream) -> int:
+        """Quita un cliente del perfil y devuelve los clientes restantes en la cámara"""
+        with self._condicion:
+            variante = self._variantes.get(perfil)
+            if variante is not None:
+                variante["viewers"] -= 1
+                if variante["viewers"] <= 0:
+                    del self._variantes[perfil]
+            return sum(v["viewers"] for v in self._variantes.values())
+
+    def iniciar(self):
+        self._hilo.start()
+
+    def detener(self):
+        self._detener.set()
+
+    def join(self, timeout: Optional[float] = None):
+        self._hilo.join(timeout)
+
+    def _difundir(self):
+        try:
+            seq = 0
+            while not self._detener.is_set() and self.bus.activo:
+                seq, frame, _ = self.bus.siguiente(seq, timeout=0.5)
+                if frame is not None:
+                    self._codificar(frame)
+        except Exception as e:
+            print(f"❌ Error en stream de cámara {self.camara_id}: {str(e)}")
+        finally:
+            with self._condicion:
+                self.activo = False
+                self._condicion.notify_all()
+
+    def _codificar(self, frame):
+        """
+        Codifica el frame para cada perfil al que le toca según sus fps.
+        Los perfiles con el mismo ancho comparten el frame reducido.
+        """
+        ahora = time.time()
+        with self._condicion:
+            pendientes = [p for p, v in self._variantes.items() if ahora - v["ultimo"] >= 1.0 / p.fps]
+        if not pendientes:
+            return
+
+        alto, ancho = frame.shape[:2]
+        reducidos = {}
+        jpegs = {}
+        for perfil in pendientes:
+            if perfil.max_width not in reducidos:
+                if ancho > perfil.max_width:
+                    escala = perfil.max_width / ancho
+                    reducidos[perfil.max_width] = cv2.resize(
+                        frame, (perfil.max_width, max(1, int(alto * escala))), interpolation=cv2.INTER_AREA
+                    )
+                else:
+                    reducidos[perfil.max_width] = frame
+            ret, buffer = cv2.imencode('.jpg', reducidos[perfil.max_width],
+                                       [cv2.IMWRITE_JPEG_QUALITY, perfil.quality])
+            if ret:
+                jpegs[perfil] = buffer.tobytes()
+
+        with self._condicion:
+            for perfil, jpeg in jpegs.items():
+                variante = self._variantes.get(perfil)
+                if variante is None:
+                    continue
+                variante["jpeg"] = jpeg
+                variante["seq"] += 1
+                variante["ultimo"] = ahora
+                variante["tiempos"].append(ahora)
+                self.frames_encoded += 1
+            self._condicion.notify_all()
+
+    def siguiente(self, perfil: PerfilStream, ultimo_seq: int,
+                  timeout: float = 5.0) -> Tuple[int, Optional[bytes]]:
+        """
+        Espera un JPEG del perfil más nuevo que ultimo_seq y devuelve el más
+        reciente (los intermedios se saltan). (ultimo_seq, None) si no llegó
+        ninguno a tiempo o la difusión terminó.
+        """
+        def hay_nuevo():
+            variante = self._variantes.get(perfil)
+            return variante is not None and variante["seq"] > ultimo_seq
+
+        with self._condicion:
+            self._condicion.wait_for(lambda: hay_nuevo() or not self.activo, timeout)
+            if hay_nuevo():
+                variante = self._variantes[perfil]
+                return variante["seq"], variante["jpeg"]
+            return ultimo_seq, None
+
+    @staticmethod
+    def _fps(tiempos) -> float:
+        tiempos = list(tiempos)
+        if len(tiempos) < 2 or time.time() - tiempos[-1] > 2:
+            return 0.0
+        return round((len(tiempos) - 1) / (tiempos[-1] - tiempos[0]), 2)
+
+    def fps(self) -> float:
+        """fps de captura de la cámara"""
+        return self.bus.fps()
+
+    def resumen(self) -> Dict:
+        bus = self.bus.resumen()
+        with self._condicion:
+            perfiles = [
+                {**perfil._asdict(), "viewers": v["viewers"], "fps_out": self._fps(v["tiempos"])}
+                for perfil, v in self._variantes.items()
+            ]
+            return {
+                "camara_id": self.camara_id,
+                "viewers": sum(p["viewers"] for p in perfiles),
+                "fps": bus["fps"],
+                "frames_captured": bus["frames_decoded"],
+                "frames_encoded": self.frames_encoded,
+                "profiles": perfiles,
+                "active": self.activo
+            }
+
+
+class GestorDifusion:
+    """
+    Un DifusorCamara por cámara con clientes conectados
+    """
+
+    def __init__(self, buses: Optional[BusFrames] = None, abrir: Callable = abrir_camara):
+        """
+        Args:
+            buses: Buses de frames compartidos (si no se pasa, uno propio con `abrir`)
+            abrir: Fábrica de la cámara para el bus propio
+        """
+        self.buses = buses if buses is not None else BusFrames(abrir)
+        self.difusores: Dict[int, DifusorCamara] = {}
+        self._lock = threading.Lock()
+
+    def suscribir(self, camera_data: Dict, perfil: PerfilStream) -> DifusorCamara:
+        """Registra un cliente con su perfil; arranca la captura si es el primero"""
+        camara_id = camera_data.get("id")
+        with self._lock:
+            difusor = self.difusores.get(camara_id)
+            if difusor is not None and not difusor.activo:
+                # El difusor murió con clientes: se baja del bus antes de reemplazarlo
+                self.buses.desuscribir(difusor.bus, CONSUMIDOR)
+                difusor = None
+            if difusor is None:
+                difusor = DifusorCamara(self.buses.suscribir(camera_data, CONSUMIDOR))
+                self.difusores[camara_id] = difusor
+                difusor.iniciar()
+            difusor.agregar_viewer(perfil)
+            print(f"👁️  Cámara {camara_id}: {difusor.viewers} cliente(s) en el stream ({perfil.max_width}px, "
+                  f"{perfil.fps} fps, calidad {perfil.quality})")
+            return difusor
+
+    def desuscribir(self, difusor: DifusorCamara, perfil: PerfilStream):
+        """Quita un cliente; con el último el difusor se baja del bus"""
+        with self._lock:
+            restantes = difusor.quitar_viewer(perfil)
+            print(f"🔌 Cliente desconectado del stream {difusor.camara_id} ({restantes} restantes)")
+            if restantes <= 0:
+                difusor.detener()
+                if self.difusores.get(difusor.camara_id) is difusor:
+                    del self.difusores[difusor.camara_id]
+                self.buses.desuscribir(difusor.bus, CONSUMIDOR)
+
+    def resumen(self) -> Dict:
+        with self._lock:
+            difusores = list(self.difusores.values())
+        return {"cameras": [d.resumen() for d in difusores]}
+
+
+# Instancia compartida por las rutas de cámaras
+difusion_camaras = GestorDifusion(bus_frames)
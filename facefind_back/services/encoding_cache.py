@@ -0,0 +1,208 @@
+"""
+Caché de encodings faciales por contenido
+
+La clave es el SHA-256 de los bytes de la imagen más la configuración del
+detector, así que volver a subir la misma foto (p.ej. /fotos/replace) o
+registrar la misma imagen en otro caso no vuelve a ejecutar detección ni
+encoding. Se persiste localmente en SQLite con desalojo LRU por número de
+entradas.
+
+Además lleva un registro hash → (caso_id, foto_id) de las fotos de
+referencia para marcar fotos duplicadas entre casos distintos.
+"""
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+
+class EncodingCache:
+    """
+    Caché LRU persistente de encodings (SQLite)
+    """
+
+    def __init__(self, path: str = "encoding_cache.sqlite3", max_entries: int = 10000):
+        """
+        Args:
+            path: Archivo SQLite donde se persiste la caché
+            max_entries: Máximo de encodings guardados (se desalojan los menos usados)
+        """
+        self.path = path
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._crear_tablas()
+        self._count = self._conn.execute("SELECT COUNT(*) FROM encodings").fetchone()[0]
+
+    def _crear_tablas(self):
+        with self._lock, self._conn:
+            self._conn.execute("""
+                CREATE TABLE IF NOT EXISTS encodings (
+                    clave TEXT PRIMARY KEY,
+                    image_hash TEXT NOT NULL,
+                    vector BLOB,
+                    reporte TEXT,
+                    last_access REAL NOT NULL
+                )
+            """)
+            self._conn.execute("CREATE INDEX IF NOT EXISTS idx_encodings_lru ON encodings(last_access)")
+            self._conn.execute("""
+                CREATE TABLE IF NOT EXISTS fotos (
+                    foto_id INTEGER PRIMARY KEY,
+                    caso_id INTEGER,
+                    image_hash TEXT NOT NULL,
+                    registrada_at REAL NOT NULL
+                )
+            """)
+            self._conn.execute("CREATE INDEX IF NOT EXISTS idx_fotos_hash ON fotos(image_hash)")
+
+    # ======================================================
+    # 🔑 Claves
+    # ======================================================
+    @staticmethod
+    def hash_bytes(image_bytes: bytes) -> str:
+        """SHA-256 de los bytes de la imagen"""
+        return hashlib.sha256(image_bytes).hexdigest()
+
+    @staticmethod
+    def clave(image_hash: str, settings: Dict) -> str:
+        """Clave de caché: hash de imagen + configuración del detector"""
+        settings_json = json.dumps(settings, sort_keys=True)
+        return hashlib.sha256(f"{image_hash}|{settings_json}".encode("utf-8")).hexdigest()
+
+    # ======================================================
+    # 💾 Encodings
+    # ======================================================
+    def get(self, image_hash: str, settings: Dict) -> Optional[Tuple[Optional[np.ndarray], Dict]]:
+        """
+        Busca un encoding en caché
+
+        Returns:
+            None si no está en caché; si está, (vector o None si la foto no
+            tenía rostro, reporte original)
+        """
+        clave = self.clave(image_hash, settings)
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT vector, reporte FROM encodings WHERE clave = ?", (clave,)
+            ).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+
+            self.hits += 1
+            with self._conn:
+                self._conn.execute(
+                    "UPDATE encodings SET last_access = ? WHERE clave = ?", (time.time(), clave)
+                )
+
+        vector_blob, reporte_json = row
+        vector = np.frombuffer(vector_blob, dtype=np.float64).copy() if vector_blob is not None else None
+        reporte = json.loads(reporte_json) if reporte_json else {}
+        return vector, reporte
+
+    def put(self, image_hash: str, settings: Dict, vector: Optional[np.ndarray], reporte: Dict):
+        """Guarda un encoding (o la ausencia de rostro) y desaloja por LRU si hace falta"""
+        clave = self.clave(image_hash, settings)
+        vector_blob = np.asarray(vector, dtype=np.float64).tobytes() if vector is not None else None
+
+        with self._lock, self._conn:
+            existed = self._conn.execute(
+                "SELECT 1 FROM encodings WHERE clave = ?", (clave,)
+            ).fetchone() is not None
+            self._conn.execute(
+                "INSERT OR REPLACE INTO encodings (clave, image_hash, vector, reporte, last_access) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (clave, image_hash, vector_blob, json.dumps(reporte or {}), time.time())
+            )
+            if not existed:
+                self._count += 1
+
+            exceso = self._count - self.max_entries
+            if exceso > 0:
+                self._conn.execute(
+                    "DELETE FROM encodings WHERE clave IN "
+                    "(SELECT clave FROM encodings ORDER BY last_access ASC LIMIT ?)",
+                    (exceso,)
+                )
+                self._count -= exceso
+
+    # ======================================================
+    # 👥 Registro de fotos y duplicados entre casos
+    # ======================================================
+    def registrar_foto(self, image_hash: str, caso_id: int, foto_id: int) -> List[Dict]:
+        """
+        Registra la foto de referencia y devuelve las fotos idénticas que
+        pertenecen a OTROS casos (vacío si no hay duplicados)
+        """
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO fotos (foto_id, caso_id, image_hash, registrada_at) VALUES (?, ?, ?, ?)",
+                (foto_id, caso_id, image_hash, time.time())
+            )
+            rows = self._conn.execute(
+                "SELECT foto_id, caso_id FROM fotos WHERE image_hash = ? AND caso_id != ?",
+                (image_hash, caso_id)
+            ).fetchall()
+        return [{"foto_id": r[0], "caso_id": r[1]} for r in rows]
+
+    def eliminar_foto(self, foto_id: int):
+        """Quita una foto del registro de duplicados"""
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM fotos WHERE foto_id = ?", (foto_id,))
+
+    def listar_duplicados(self) -> List[Dict]:
+        """Grupos de fotos idénticas registradas en más de un caso"""
+        with self._lock:
+            hashes = self._conn.execute(
+                "SELECT image_hash FROM fotos GROUP BY image_hash HAVING COUNT(DISTINCT caso_id) > 1"
+            ).fetchall()
+            grupos = []
+            for (image_hash,) in hashes:
+                fotos = self._conn.execute(
+                    "SELECT foto_id, caso_id FROM fotos WHERE image_hash = ? ORDER BY caso_id, foto_id",
+                    (image_hash,)
+                ).fetchall()
+                grupos.append({
+                    "image_hash": image_hash,
+                    "casos": sorted({f[1] for f in fotos}),
+                    "fotos": [{"foto_id": f[0], "caso_id": f[1]} for f in fotos]
+                })
+        return grupos
+
+    def stats(self) -> Dict:
+        total = self.hits + self.misses
+        return {
+            "entries": self._count,
+            "max_entries": self.max_entries,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / total, 4) if total else 0.0
+        }
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+# Instancia global (perezosa)
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def obtener_cache_encodings() -> Optional[EncodingCache]:
+    """Devuelve la caché global, o None si está deshabilitada por configuración"""
+    global _cache
+    from config import Config
+    if not Config.ENCODING_CACHE_ENABLED:
+        return None
+    with _cache_lock:
+        if _cache is None:
+            _cache = EncodingCache(Config.ENCODING_CACHE_PATH, Config.ENCODING_CACHE_MAX_ENTRIES)
+        return _cache
@@ -10,6 +10,12 @@ from typing import List, Dict, Tuple
 import pickle
 import os
 
+
+def _generate_encoding_worker(model: str, image_base64: str) -> Dict:
+    """Tarea para el pool de procesos: genera el encoding de una imagen"""
+    return EncodingsGeneratorService(model=model).generate_encoding_from_base64(image_base64)
+
+
 class EncodingsGeneratorService:
     """
     Servicio para generar encodings faciales desde imágenes
@@ -115,9 +121,10 @@ class EncodingsGeneratorService:
             "failed": 0
         }
         
-        for i, img_base64 in enumerate(images_base64):
-            result = self.generate_encoding_from_base64(img_base64)
-            
+        # Procesar todas las imágenes en paralelo (pool de procesos compartido)
+        outcomes = self._generate_in_parallel(images_base64)
+        
+        for i, result in enumerate(outcomes):
             if result["success"]:
                 results["encodings"].append({
                     "index": i,
@@ -138,61 +145,81 @@ class EncodingsGeneratorService:
         
         return results
     
-    def add_encodings_to_system(self, person_name: str, encodings: List, 
-                                encodings_path: str = "encodings.pickle") -> Dict:
+    def _generate_in_parallel(self, images_base64: List[str]) -> List[Dict]:
         """
-        Agrega encodings al sistema
+        Genera encodings de varias imágenes repartiéndolas en el pool de procesos.
+        Si el pool no está disponible, procesa secuencialmente.
         """
+        if len(images_base64) <= 1:
+            return [self.generate_encoding_from_base64(img) for img in images_base64]
+        
+        from models.generador_encodings import obtener_pool_encodings, reiniciar_pool_encodings
         try:
-            # Intentar descargar desde la nube primero
+            pool = obtener_pool_encodings()
+            futures = [pool.submit(_generate_encoding_worker, self.model, img) for img in images_base64]
+        except Exception as e:
+            print(f"⚠️ Pool de encodings no disponible ({e}), procesando secuencialmente")
+            reiniciar_pool_encodings()
+            return [self.generate_encoding_from_base64(img) for img in images_base64]
+        
+        outcomes = []
+        for future, img in zip(futures, images_base64):
             try:
-                from services.encodings_storage import download_encodings_from_cloud
-                result = download_encodings_from_cloud(encodings_path)
-                if result.get("success"):
-                    print(f"✅ Descargado desde nube: {result['size']} bytes")
+                outcomes.append(future.result())
             except Exception as e:
-                print(f"⚠️ No se pudo descargar: {e}")
-            
-            # Cargar archivo local (ya sea descargado o existente)
-            if os.path.exists(encodings_path):
-                with open(encodings_path, 'rb') as f:
-                    data = pickle.load(f)
-                print(f"📂 Encodings existentes: {len(data.get('encodings', []))}")
-            else:
-                data = {'encodings': [], 'names': []}
-                print("📂 Creando archivo nuevo")
+                print(f"⚠️ Falló el proceso hijo ({e}), reintentando en este proceso")
+                outcomes.append(self.generate_encoding_from_base64(img))
+        return outcomes
+    
+    def add_encodings_to_system(self, person_name: str, encodings: List,
+                                encodings_path: str = "encodings.pickle",
+                                caso_id: int = None) -> Dict:
+        """
+        Agrega encodings al sistema como un segmento nuevo del almacén
+        segmentado (solo se escribe y sube lo agregado, no la galería entera)
+        """
+        try:
+            from config import Config
+            from services.encodings_store import get_encodings_store
+            store = get_encodings_store()
             
-            # Agregar nuevos encodings
-            for encoding in encodings:
-                if isinstance(encoding, list):
-                    encoding = np.array(encoding)
-                data['encodings'].append(encoding)
-                data['names'].append(person_name)
+            # Primera vez: importar el encodings.pickle legado como segmento inicial
+            store.migrate_from_pickle(encodings_path)
             
-            # Guardar localmente
-            with open(encodings_path, 'wb') as f:
-                pickle.dump(data, f)
+            vectors = [np.array(enc) if isinstance(enc, list) else enc for enc in encodings]
+            result = store.append(
+                names=[person_name] * len(vectors),
+                encodings=vectors,
+                caso_ids=[caso_id] * len(vectors)
+            )
+            print(f"✅ Segmento {result['segment']['file']} escrito. Total encodings: {result['total_encodings']}")
             
-            print(f"✅ Total encodings: {len(data['encodings'])}")
+            # Unir segmentos pequeños en segundo plano
+            store.compact_in_background(min_segments=Config.ENCODINGS_COMPACT_MIN_SEGMENTS)
             
             return {
                 "success": True,
                 "message": f"Agregados {len(encodings)} encodings",
-                "total_encodings": len(data['encodings'])
+                "total_encodings": result["total_encodings"],
+                "segment": result["segment"]["file"],
+                "store_version": result["version"],
+                "cloud_synced": result["cloud_synced"]
             }
             
         except Exception as e:
             return {"success": False, "error": str(e)}
     
     def process_case_photos(self, person_name: str, photos: Dict[str, str],
-                           encodings_path: str = "encodings.pickle") -> Dict:
+                           encodings_path: str = "encodings.pickle",
+                           caso_id: int = None) -> Dict:
         """
         Procesa las fotos de un caso: genera encodings y los agrega al sistema
         
         Args:
             person_name: Nombre de la persona desaparecida
             photos: Dict con fotos en base64 {'frontal': ..., 'profile1': ..., 'profile2': ...}
-            encodings_path: Ruta al archivo de encodings
+            encodings_path: Ruta al archivo de encodings legado (se migra al almacén segmentado)
+            caso_id: ID del caso al que pertenecen las fotos
         
         Returns:
             Dict con resultado completo del procesamiento
@@ -229,7 +256,7 @@ class EncodingsGeneratorService:
             
             # Agregar al sistema
             print(f"💾 Agregando {len(encodings)} encodings al sistema...")
-            add_result = self.add_encodings_to_system(person_name, encodings, encodings_path)
+            add_result = self.add_encodings_to_system(person_name, encodings, encodings_path, caso_id=caso_id)
             
             if not add_result["success"]:
                 return {
@@ -238,20 +265,11 @@ class EncodingsGeneratorService:
                     "details": add_result
                 }
             
-            # Sincronizar con la nube
-            try:
-                from services.encodings_storage import upload_encodings_to_cloud
-                print(f"☁️ Sincronizando encodings con Supabase Storage...")
-                cloud_result = upload_encodings_to_cloud()
-                cloud_synced = cloud_result.get("success", False)
-                if cloud_synced:
-                    print(f"✅ Encodings sincronizados con la nube")
-                else:
-                    print(f"⚠️ Advertencia: {cloud_result.get('error', 'Error desconocido')}")
-            except Exception as e:
-                print(f"⚠️ No se pudo sincronizar con la nube: {e}")
+            # El segmento ya se subió a Supabase Storage junto con el manifiesto
+            cloud_synced = add_result.get("cloud_synced", False)
+            if not cloud_synced:
+                print(f"⚠️ Segmento guardado solo localmente; se sincronizará en la próxima escritura")
                 print(f"💡 Tip: Crea el bucket 'face-encodings' en Supabase Storage")
-                cloud_synced = False
             
             return {
                 "success": True,
@@ -1,5 +1,9 @@
 """
 Servicio para gestionar encodings en Supabase Storage
+
+La sincronización es incremental: se comparan los manifiestos del almacén
+segmentado (hash, tamaño y versión de cada segmento) y solo se transfieren
+los segmentos que faltan en el otro lado. Ver services/encodings_store.py
 """
 import os
 from supabase import create_client
@@ -11,65 +15,54 @@ supabase_storage = create_client(Config.SUPABASE_URL, Config.SUPABASE_SERVICE_RO
 BUCKET_NAME = "face-encodings"
 FILE_NAME = "encodings.pickle"
 
+def _store():
+    # Import diferido: encodings_store usa el cliente de este módulo
+    from services.encodings_store import get_encodings_store
+    return get_encodings_store()
+
+
 def upload_encodings_to_cloud(local_path: str = "encodings.pickle") -> dict:
     """
-    Sube el archivo de encodings a Supabase Storage
+    Sube a Supabase Storage solo los segmentos locales que faltan en la nube.
+    Si existe un encodings.pickle legado y el almacén está vacío, se migra primero.
     """
     try:
-        if not os.path.exists(local_path):
-            return {"success": False, "error": "Archivo no encontrado"}
-        
-        # Leer archivo
-        with open(local_path, 'rb') as f:
-            file_data = f.read()
-        
-        # Verificar si existe y eliminarlo
-        try:
-            files = supabase_storage.storage.from_(BUCKET_NAME).list()
-            if any(f['name'] == FILE_NAME for f in files):
-                supabase_storage.storage.from_(BUCKET_NAME).remove([FILE_NAME])
-        except:
-            pass
-        
-        # Subir archivo
-        supabase_storage.storage.from_(BUCKET_NAME).upload(
-            FILE_NAME,
-            file_data,
-            file_options={"content-type": "application/octet-stream"}
-        )
-        
-        return {"success": True, "size": len(file_data)}
+        store = _store()
+        store.migrate_from_pickle(local_path)
+        result = store.push()
+        result["size"] = result.get("uploaded_bytes", 0)
+        return result
         
     except Exception as e:
         return {"success": False, "error": str(e)}
 
-def download_encodings_from_cloud(local_path: str = "encodings.pickle") -> dict:
+def download_encodings_from_cloud(local_path: str = "encodings.pickle",
+                                  export_pickle: bool = False) -> dict:
     """
-    Descarga el archivo de encodings desde Supabase Storage
+    Descarga de Supabase Storage solo los segmentos que faltan localmente
+    
+    Args:
+        local_path: Ruta del encodings.pickle legado
+        export_pickle: Si True, además escribe la galería completa en local_path
+                       (para herramientas que aún leen el pickle)
     """
     try:
-        # Descargar archivo
-        data = supabase_storage.storage.from_(BUCKET_NAME).download(FILE_NAME)
+        store = _store()
+        result = store.pull()
+        result["size"] = result.get("downloaded_bytes", 0)
         
-        if not data:
-            return {"success": False, "error": "Archivo no encontrado"}
+        if result["success"] and export_pickle:
+            result["exported_encodings"] = store.export_pickle(local_path)
+            result["local_path"] = local_path
         
-        # Guardar localmente
-        with open(local_path, 'wb') as f:
-            f.write(data)
-        
-        return {
-            "success": True,
-            "size": len(data),
-            "local_path": local_path
-        }
+        return result
         
     except Exception as e:
         return {"success": False, "error": str(e)}
 
 def sync_encodings(direction: str = "both") -> dict:
     """
-    Sincroniza encodings entre local y nube
+    Sincroniza encodings entre local y nube (solo transfiere diferencias)
     
     Args:
         direction: 'upload', 'download', o 'both'
@@ -77,61 +70,21 @@ def sync_encodings(direction: str = "both") -> dict:
     Returns:
         Dict con resultado
     """
-    results = {
-        "success": True,
-        "operations": []
-    }
-    
-    if direction in ["upload", "both"]:
-        upload_result = upload_encodings_to_cloud()
-        results["operations"].append({
-            "operation": "upload",
-            "result": upload_result
-        })
-        if not upload_result["success"]:
-            results["success"] = False
-    
-    if direction in ["download", "both"]:
-        download_result = download_encodings_from_cloud()
-        results["operations"].append({
-            "operation": "download",
-            "result": download_result
-        })
-        if not download_result["success"]:
-            results["success"] = False
-    
-    return results
+    try:
+        return _store().sync(direction)
+    except Exception as e:
+        return {"success": False, "error": str(e), "operations": []}
 
-def get_encodings_status() -> dict:
+def get_encodings_status(refresh: bool = False) -> dict:
     """
     Obtiene el estado de los encodings (local y nube)
     
+    Responde desde el manifiesto remoto cacheado, sin listar el bucket.
+    
+    Args:
+        refresh: Si True, vuelve a leer el manifiesto remoto antes de responder
+    
     Returns:
         Dict con información de estado
     """
-    local_path = "encodings.pickle"
-    
-    status = {
-        "local": {
-            "exists": os.path.exists(local_path),
-            "size": os.path.getsize(local_path) if os.path.exists(local_path) else 0
-        },
-        "cloud": {
-            "exists": False,
-            "size": 0
-        }
-    }
-    
-    try:
-        files = supabase_storage.storage.from_(BUCKET_NAME).list()
-        
-        for file in files:
-            if file['name'] == FILE_NAME:
-                status["cloud"]["exists"] = True
-                status["cloud"]["size"] = file.get('metadata', {}).get('size', 0)
-                break
-                
-    except Exception as e:
-        status["cloud"]["error"] = str(e)
-    
-    return status
+    return _store().status(refresh=refresh)
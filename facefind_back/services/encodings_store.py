@@ -0,0 +1,701 @@
+"""
+Almacén segmentado (append-only) de encodings
+
+Reemplaza el ciclo "descargar encodings.pickle completo → agregar → subir
+todo de nuevo" por:
+- Segmentos inmutables (cada uno un pickle pequeño con el mismo formato
+  {'encodings', 'names', 'caso_ids'}) identificados por su SHA-256
+- Un manifiesto pequeño (manifest.json) con la lista de segmentos vigentes
+
+Agregar un caso escribe UN segmento nuevo y actualiza el manifiesto, así el
+costo de sincronización es proporcional al cambio y no a la galería. Los
+lectores cargan solo los segmentos que aún no tienen. La compactación une
+segmentos pequeños en segundo plano sin invalidar a los lectores: cada
+segmento declara qué segmentos originales cubre (`covers`, por hash).
+
+La sincronización con Supabase Storage compara manifiestos por contenido:
+solo se suben/descargan los segmentos que faltan en el otro lado, en
+paralelo y verificando el checksum de cada uno.
+"""
+import hashlib
+import json
+import os
+import pickle
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, List, Optional, Set, Tuple
+
+import numpy as np
+
+MANIFEST_NAME = "manifest.json"
+REMOTE_MANIFEST_CACHE = "remote_manifest.json"
+SEGMENT_PREFIX = "seg_"
+PUBLISH_MAX_INTENTOS = 3  # reintentos si otro nodo publica mientras se sube
+
+
+def _segment_file(segment_id: int, sha256: str) -> str:
+    return f"{SEGMENT_PREFIX}{segment_id:06d}_{sha256[:16]}.pkl"
+
+
+def _covers(segment: Dict) -> List[str]:
+    """Hashes de los segmentos originales que contiene un segmento"""
+    return segment.get("covers") or [segment["sha256"]]
+
+
+def _empty_manifest() -> Dict:
+    return {"version": 0, "next_id": 1, "segments": [], "updated_at": None}
+
+
+class SupabaseStorageRemote:
+    """
+    Copia remota del almacén en un bucket de Supabase Storage
+    (segmentos y manifiesto bajo un prefijo)
+    """
+
+    def __init__(self, bucket: str = "face-encodings", prefix: str = "store"):
+        self.bucket = bucket
+        self.prefix = prefix
+        self._client = None
+
+    def _storage(self):
+        if self._client is None:
+            from services.encodings_storage import supabase_storage
+            self._client = supabase_storage
+        return self._client.storage.from_(self.bucket)
+
+    def _path(self, name: str) -> str:
+        return f"{self.prefix}/{name}"
+
+    def upload(self, name: str, data: bytes):
+        content_type = "application/json" if name.endswith(".json") else "application/octet-stream"
+        self._storage().upload(
+            self._path(name),
+            data,
+            file_options={"content-type": content_type, "upsert": "true"}
+        )
+
+    def download(self, name: str) -> Optional[bytes]:
+        try:
+            return self._storage().download(self._path(name))
+        except Exception:
+            return None
+
+    def remove(self, names: List[str]):
+        if names:
+            self._storage().remove([self._path(n) for n in names])
+
+
+class SegmentedEncodingStore:
+    """
+    Almacén de encodings en segmentos inmutables + manifiesto
+    """
+
+    def __init__(self,
+                 root_dir: str = "encodings_store",
+                 remote: Optional[SupabaseStorageRemote] = None,
+                 transfer_workers: int = 8):
+        """
+        Args:
+            root_dir: Directorio local con manifest.json y los segmentos
+            remote: Copia remota (None = solo local)
+            transfer_workers: Segmentos transferidos en paralelo al sincronizar
+        """
+        self.root_dir = root_dir
+        self.remote = remote
+        self.transfer_workers = max(1, transfer_workers)
+        self._lock = threading.RLock()
+        self._compaction_thread: Optional[threading.Thread] = None
+        os.makedirs(root_dir, exist_ok=True)
+
+    # ======================================================
+    # 📄 Manifiesto
+    # ======================================================
+    @property
+    def manifest_path(self) -> str:
+        return os.path.join(self.root_dir, MANIFEST_NAME)
+
+    @property
+    def remote_cache_path(self) -> str:
+        return os.path.join(self.root_dir, REMOTE_MANIFEST_CACHE)
+
+    def segment_path(self, segment: Dict) -> str:
+        return os.path.join(self.root_dir, segment["file"])
+
+    def read_manifest(self) -> Dict:
+        """Manifiesto local (vacío si aún no existe)"""
+        if not os.path.exists(self.manifest_path):
+            return _empty_manifest()
+        with open(self.manifest_path, "r", encoding="utf-8") as f:
+            return json.load(f)
+
+    @staticmethod
+    def _write_json(path: str, data: Dict):
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(data, f, indent=2)
+        os.replace(tmp_path, path)
+
+    def _write_manifest(self, manifest: Dict):
+        self._write_json(self.manifest_path, manifest)
+
+    def _cache_remote_manifest(self, manifest: Dict):
+        self._write_json(self.remote_cache_path, {"manifest": manifest, "fetched_at": time.time()})
+
+    def cached_remote_manifest(self) -> Optional[Dict]:
+        """Último manifiesto remoto visto (sin ir a la red), con su `fetched_at`"""
+        if not os.path.exists(self.remote_cache_path):
+            return None
+        with open(self.remote_cache_path, "r", encoding="utf-8") as f:
+            return json.load(f)
+
+    def _publish_manifest(self, manifest: Dict, subir: bool = True) -> bool:
+        """Escribe el manifiesto local y, si hay remoto, lo sube. Retorna si quedó sincronizado"""
+        manifest["updated_at"] = time.time()
+        self._write_manifest(manifest)
+        if not self.remote or not subir:
+            return False
+        subido = self._remote_call(self.remote.upload, MANIFEST_NAME, json.dumps(manifest).encode("utf-8"))
+        if subido:
+            self._cache_remote_manifest(manifest)
+        return subido
+
+    def _fetch_remote_manifest(self) -> Optional[Dict]:
+        if not self.remote:
+            return None
+        try:
+            data = self.remote.download(MANIFEST_NAME)
+        except Exception as e:
+            print(f"⚠️ No se pudo leer el manifiesto remoto: {e}")
+            return None
+        if not data:
+            return None
+        manifest = json.loads(data)
+        self._cache_remote_manifest(manifest)
+        return manifest
+
+    @staticmethod
+    def _pending(local: Dict, remote: Optional[Dict]) -> Tuple[List[Dict], List[Dict]]:
+        """
+        Segmentos locales que el remoto no tiene
+
+        Returns:
+            (pendientes de subir, conflictos). Un conflicto es un segmento
+            local que mezcla datos ya publicados con datos nuevos (compactado
+            sin conexión); no se puede publicar sin duplicar encodings.
+        """
+        if not remote:
+            return list(local["segments"]), []
+
+        remote_covers = set()
+        for segment in remote["segments"]:
+            remote_covers.update(_covers(segment))
+
+        pending, conflicts = [], []
+        for segment in local["segments"]:
+            covers = set(_covers(segment))
+            if covers <= remote_covers:
+                continue  # ya publicado (quizás dentro de un segmento compactado)
+            if covers & remote_covers:
+                conflicts.append(segment)
+            else:
+                pending.append(segment)
+        return pending, conflicts
+
+    def _merge(self, local: Dict, remote: Optional[Dict]) -> Dict:
+        """Segmentos del remoto + segmentos locales aún no publicados"""
+        if not remote:
+            return local
+        pending, _ = self._pending(local, remote)
+        return {
+            "version": max(local.get("version", 0), remote.get("version", 0)),
+            "next_id": max(local.get("next_id", 1), remote.get("next_id", 1)),
+            "segments": list(remote["segments"]) + pending,
+            "updated_at": remote.get("updated_at")
+        }
+
+    @staticmethod
+    def _remote_call(fn, *args) -> bool:
+        try:
+            fn(*args)
+            return True
+        except Exception as e:
+            print(f"⚠️ Error sincronizando con Storage: {e}")
+            return False
+
+    # ======================================================
+    # 📦 Segmentos
+    # ======================================================
+    @staticmethod
+    def _serialize(names: List[str], encodings: List, caso_ids: List) -> bytes:
+        data = {
+            "encodings": [np.asarray(e, dtype=np.float64) for e in encodings],
+            "names": list(names),
+            "caso_ids": list(caso_ids)
+        }
+        return pickle.dumps(data, protocol=pickle.HIGHEST_PROTOCOL)
+
+    def _write_segment(self, manifest: Dict, payload: bytes, count: int,
+                       covers: Optional[List[str]] = None, subir: bool = True) -> Tuple[Dict, bool]:
+        """
+        Escribe un segmento nuevo (local y, si `subir`, remoto)
+
+        Returns:
+            (entrada de manifiesto, si se subió al remoto)
+        """
+        segment_id = manifest["next_id"]
+        manifest["next_id"] += 1
+        sha256 = hashlib.sha256(payload).hexdigest()
+        segment = {
+            "id": segment_id,
+            "file": _segment_file(segment_id, sha256),
+            "count": count,
+            "size": len(payload),
+            "sha256": sha256,
+            "covers": covers or [sha256]
+        }
+        with open(self.segment_path(segment), "wb") as f:
+            f.write(payload)
+        subido = subir and bool(self.remote) and self._remote_call(self.remote.upload, segment["file"], payload)
+        return segment, subido
+
+    def _has_local(self, segment: Dict) -> bool:
+        """El segmento está en disco con el tamaño esperado"""
+        path = self.segment_path(segment)
+        return os.path.exists(path) and os.path.getsize(path) == segment["size"]
+
+    def _download_segment(self, segment: Dict) -> int:
+        """Descarga un segmento verificando su checksum; retorna bytes transferidos"""
+        if not self.remote:
+            raise FileNotFoundError(self.segment_path(segment))
+        payload = self.remote.download(segment["file"])
+        if payload is None:
+            raise FileNotFoundError(f"Segmento remoto {segment['file']} no encontrado")
+        if hashlib.sha256(payload).hexdigest() != segment["sha256"]:
+            raise ValueError(f"Checksum inválido en segmento {segment['file']}")
+
+        path = self.segment_path(segment)
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(payload)
+        os.replace(tmp_path, path)
+        return len(payload)
+
+    def _upload_segment(self, segment: Dict) -> int:
+        """Sube un segmento local verificando antes su checksum; retorna bytes transferidos"""
+        with open(self.segment_path(segment), "rb") as f:
+            payload = f.read()
+        if hashlib.sha256(payload).hexdigest() != segment["sha256"]:
+            raise ValueError(f"Checksum inválido en segmento local {segment['file']}")
+        self.remote.upload(segment["file"], payload)
+        return len(payload)
+
+    def _transfer(self, fn: Callable[[Dict], int], segments: List[Dict]) -> Tuple[int, List[Dict]]:
+        """
+        Transfiere segmentos en paralelo
+
+        Returns:
+            (bytes transferidos, errores [{file, error}])
+        """
+        if not segments:
+            return 0, []
+
+        total_bytes, errors = 0, []
+        with ThreadPoolExecutor(max_workers=min(self.transfer_workers, len(segments))) as pool:
+            futures = {pool.submit(fn, segment): segment for segment in segments}
+            for future, segment in futures.items():
+                try:
+                    total_bytes += future.result()
+                except Exception as e:
+                    errors.append({"file": segment["file"], "error": str(e)})
+        return total_bytes, errors
+
+    def read_segment(self, segment: Dict) -> Dict:
+        """Lee un segmento (lo descarga del remoto si no está local)"""
+        if not self._has_local(segment):
+            self._download_segment(segment)
+
+        with open(self.segment_path(segment), "rb") as f:
+            data = pickle.load(f)
+        data.setdefault("caso_ids", [None] * len(data.get("names", [])))
+        return data
+
+    # ======================================================
+    # ✍️ Escritura
+    # ======================================================
+    def append(self, names: List[str], encodings: List, caso_ids: Optional[List] = None) -> Dict:
+        """
+        Agrega encodings como un segmento nuevo y lo publica junto con los
+        segmentos locales que hubieran quedado sin subir
+
+        Returns:
+            Dict con segmento escrito, versión y total de encodings
+        """
+        if len(names) != len(encodings):
+            raise ValueError("names y encodings deben tener la misma longitud")
+        caso_ids = caso_ids if caso_ids is not None else [None] * len(names)
+
+        with self._lock:
+            remote = self._fetch_remote_manifest()
+            manifest = self._merge(self.read_manifest(), remote)
+            payload = self._serialize(names, encodings, caso_ids)
+            segment, _ = self._write_segment(manifest, payload, len(names), subir=False)
+            manifest["segments"].append(segment)
+            manifest["version"] += 1
+            self._publish_manifest(manifest, subir=False)
+
+            cloud_synced = False
+            if self.remote:
+                cloud_synced = self._push(manifest, remote)["success"]
+
+        return {
+            "success": True,
+            "segment": segment,
+            "version": manifest["version"],
+            "total_encodings": sum(s["count"] for s in manifest["segments"]),
+            "cloud_synced": cloud_synced
+        }
+
+    def migrate_from_pickle(self, pickle_path: str) -> Optional[Dict]:
+        """Importa un encodings.pickle legado como primer segmento si el almacén está vacío"""
+        with self._lock:
+            if self.read_manifest()["segments"] or not os.path.exists(pickle_path):
+                return None
+            with open(pickle_path, "rb") as f:
+                data = pickle.load(f)
+            names = data.get("names", [])
+            if not names:
+                return None
+            print(f"📦 Migrando {len(names)} encodings de {pickle_path} al almacén segmentado")
+            return self.append(names, data.get("encodings", []), data.get("caso_ids"))
+
+    def export_pickle(self, pickle_path: str) -> int:
+        """Escribe la galería completa en el formato encodings.pickle legado"""
+        data = self.load_all()
+        data.pop("covers")
+        tmp_path = f"{pickle_path}.tmp"
+        with open(tmp_path, "wb") as f:
+            pickle.dump(data, f)
+        os.replace(tmp_path, pickle_path)
+        return len(data["names"])
+
+    # ======================================================
+    # 🔄 Sincronización delta con el remoto
+    # ======================================================
+    def _push(self, local: Dict, remote: Optional[Dict]) -> Dict:
+        """Sube los segmentos que faltan en el remoto y publica el manifiesto combinado"""
+        pending, conflicts = self._pending(local, remote)
+        uploaded_bytes, errors = self._transfer(self._upload_segment, pending)
+        result = {
+            "success": not errors,
+            "uploaded_segments": len(pending) - len(errors),
+            "uploaded_bytes": uploaded_bytes,
+            "skipped_segments": len(local["segments"]) - len(pending),
+            "conflicts": [s["file"] for s in conflicts],
+            "errors": errors
+        }
+        if errors:
+            # Sin todos los segmentos arriba no se publica un manifiesto que los referencie
+            return result
+
+        if not pending and remote is not None:
+            result["version"] = remote["version"]
+            return result
+
+        # Storage no tiene escritura condicional: antes de publicar se relee el
+        # manifiesto remoto y, si otro nodo publicó mientras se subía, se
+        # combina con su versión para no pisar sus segmentos
+        for intento in range(1, PUBLISH_MAX_INTENTOS + 1):
+            manifest = self._merge(local, remote)
+            if remote is not None:
+                manifest["version"] = max(local["version"], remote["version"]) + 1
+
+            actual = self._fetch_remote_manifest()
+            if actual is None and remote is not None:
+                result.update(success=False, error="No se pudo releer el manifiesto remoto")
+                return result
+            if actual is None or (remote is not None and actual["version"] == remote["version"]):
+                result["success"] = self._publish_manifest(manifest)
+                result["version"] = manifest["version"]
+                return result
+
+            print(f"🔁 El manifiesto remoto cambió (versión {actual['version']}) antes de publicar, "
+                  f"se combina y reintenta ({intento}/{PUBLISH_MAX_INTENTOS})")
+            remote = actual
+            result["conflicts"] = [s["file"] for s in self._pending(local, remote)[1]]
+
+        result.update(success=False, error="El manifiesto remoto siguió cambiando")
+        return result
+
+    def push(self) -> Dict:
+        """Sube solo los segmentos locales que el remoto no tiene"""
+        if not self.remote:
+            return {"success": False, "error": "Almacén sin remoto configurado"}
+        with self._lock:
+            return self._push(self.read_manifest(), self._fetch_remote_manifest())
+
+    def pull(self) -> Dict:
+        """
+        Descarga solo los segmentos del manifiesto remoto que faltan en disco.
+        Los segmentos locales aún no publicados se conservan.
+        """
+        if not self.remote:
+            return {"success": True, "downloaded_segments": 0, "downloaded_bytes": 0}
+
+        with self._lock:
+            local = self.read_manifest()
+            remote = self._fetch_remote_manifest()
+            if remote is None:
+                return {"success": False, "error": "Manifiesto remoto no disponible",
+                        "downloaded_segments": 0, "downloaded_bytes": 0}
+
+            faltantes = [s for s in remote["segments"] if not self._has_local(s)]
+            downloaded_bytes, errors = self._transfer(self._download_segment, faltantes)
+            pending, conflicts = self._pending(local, remote)
+            result = {
+                "success": not errors,
+                "downloaded_segments": len(faltantes) - len(errors),
+                "downloaded_bytes": downloaded_bytes,
+                "up_to_date_segments": len(remote["segments"]) - len(faltantes),
+                "pending_upload": len(pending),
+                "conflicts": [s["file"] for s in conflicts],
+                "errors": errors,
+                "version": remote["version"]
+            }
+            if errors:
+                return result  # el manifiesto local sigue apuntando a segmentos completos
+
+            manifest = self._merge(local, remote)
+            if manifest["segments"] != local["segments"] or manifest["version"] != local["version"]:
+                self._write_manifest(manifest)
+                self._remove_orphan_files(manifest)
+            return result
+
+    def sync(self, direction: str = "both") -> Dict:
+        """
+        Sincroniza con el remoto
+
+        Args:
+            direction: 'upload', 'download' o 'both'
+        """
+        operations = []
+        if direction in ("upload", "both"):
+            operations.append({"operation": "upload", "result": self.push()})
+        if direction in ("download", "both"):
+            operations.append({"operation": "download", "result": self.pull()})
+        return {
+            "success": all(op["result"].get("success") for op in operations),
+            "operations": operations
+        }
+
+    # ======================================================
+    # 📖 Lectura incremental
+    # ======================================================
+    def sync_manifest(self) -> Dict:
+        """Trae los segmentos nuevos del remoto y retorna el manifiesto local"""
+        self.pull()
+        return self.read_manifest()
+
+    def load_new(self, loaded_covers: Set[str]) -> Tuple[Dict, List[Dict], bool]:
+        """
+        Devuelve los datos de los segmentos que el lector aún no tiene
+
+        Args:
+            loaded_covers: Hashes de segmentos originales que el lector ya cargó
+
+        Returns:
+            (manifiesto, lista de segmentos nuevos leídos, requiere_recarga_total)
+            requiere_recarga_total es True si el lector tiene datos que ya no
+            están en el manifiesto (p.ej. se eliminaron encodings)
+        """
+        manifest = self.sync_manifest()
+        current_covers = set()
+        nuevos = []
+        for segment in manifest["segments"]:
+            covers = set(_covers(segment))
+            current_covers |= covers
+            if covers <= loaded_covers:
+                continue  # ya cargado (quizás bajo segmentos previos a la compactación)
+            if covers & loaded_covers:
+                return manifest, [], True  # solapamiento parcial: recargar todo
+            data = self.read_segment(segment)
+            data["covers"] = sorted(covers)
+            nuevos.append(data)
+
+        requiere_recarga = bool(loaded_covers - current_covers)
+        return manifest, nuevos, requiere_recarga
+
+    def load_all(self) -> Dict:
+        """Carga la galería completa en el formato clásico {'encodings','names','caso_ids'}"""
+        _, segmentos, _ = self.load_new(set())
+        data = {"encodings": [], "names": [], "caso_ids": [], "covers": set()}
+        for seg in segmentos:
+            data["encodings"].extend(seg["encodings"])
+            data["names"].extend(seg["names"])
+            data["caso_ids"].extend(seg["caso_ids"])
+            data["covers"].update(seg["covers"])
+        return data
+
+    # ======================================================
+    # 🗜️ Compactación
+    # ======================================================
+    def compact(self, min_segments: int = 8, max_segment_count: int = 5000) -> Optional[Dict]:
+        """
+        Une los segmentos pequeños en uno solo
+
+        Args:
+            min_segments: Solo compacta si hay al menos esta cantidad de segmentos pequeños
+            max_segment_count: Segmentos con más encodings que esto no se tocan
+                               (también acota el tamaño de cada transferencia)
+
+        Returns:
+            Dict con el resultado o None si no hizo falta compactar
+        """
+        with self._lock:
+            manifest = self.sync_manifest()
+            pequenos = [s for s in manifest["segments"] if s["count"] < max_segment_count]
+            if len(pequenos) < min_segments:
+                return None
+
+            names, encodings, caso_ids, covers = [], [], [], []
+            for segment in pequenos:
+                data = self.read_segment(segment)
+                names.extend(data["names"])
+                encodings.extend(data["encodings"])
+                caso_ids.extend(data["caso_ids"])
+                covers.extend(_covers(segment))
+
+            # Verificar que nadie publicó mientras leíamos
+            remoto = self._fetch_remote_manifest()
+            if remoto and remoto["version"] != manifest["version"]:
+                print("⚠️ Compactación abortada: el manifiesto cambió durante la lectura")
+                return None
+
+            payload = self._serialize(names, encodings, caso_ids)
+            nuevo, subido = self._write_segment(manifest, payload, len(names), covers=sorted(covers))
+            if self.remote and not subido:
+                print("⚠️ Compactación abortada: no se pudo subir el segmento compactado")
+                os.remove(self.segment_path(nuevo))
+                return None
+
+            ids_compactados = {s["id"] for s in pequenos}
+            restantes = [s for s in manifest["segments"] if s["id"] not in ids_compactados]
+
+            # El segmento compactado ocupa la posición del primero que reemplaza
+            # (todos los anteriores a él se conservan)
+            restantes.insert(manifest["segments"].index(pequenos[0]), nuevo)
+            manifest["segments"] = restantes
+            manifest["version"] += 1
+            self._publish_manifest(manifest)
+
+            # Borrar segmentos viejos solo después de publicar el manifiesto
+            viejos = [s["file"] for s in pequenos]
+            for file_name in viejos:
+                path = os.path.join(self.root_dir, file_name)
+                if os.path.exists(path):
+                    os.remove(path)
+            if self.remote:
+                try:
+                    self.remote.remove(viejos)
+                except Exception as e:
+                    print(f"⚠️ No se pudieron borrar segmentos remotos: {e}")
+
+            print(f"🗜️ Compactados {len(pequenos)} segmentos en {nuevo['file']} ({nuevo['count']} encodings)")
+            return {"merged": len(pequenos), "segment": nuevo, "version": manifest["version"]}
+
+    def compact_in_background(self, **kwargs) -> bool:
+        """Lanza la compactación en un hilo si no hay otra en curso"""
+        if self._compaction_thread is not None and self._compaction_thread.is_alive():
+            return False
+
+        def _run():
+            try:
+                self.compact(**kwargs)
+            except Exception as e:
+                print(f"⚠️ Error en compactación: {e}")
+
+        self._compaction_thread = threading.Thread(target=_run, name="encodings-compaction", daemon=True)
+        self._compaction_thread.start()
+        return True
+
+    def _remove_orphan_files(self, manifest: Dict):
+        """Borra segmentos locales que ya no están en el manifiesto"""
+        vigentes = {s["file"] for s in manifest["segments"]}
+        for file_name in os.listdir(self.root_dir):
+            if file_name.startswith(SEGMENT_PREFIX) and file_name not in vigentes:
+                os.remove(os.path.join(self.root_dir, file_name))
+
+    # ======================================================
+    # 📊 Estado
+    # ======================================================
+    def stats(self) -> Dict:
+        manifest = self.read_manifest()
+        return {
+            "version": manifest["version"],
+            "segments": len(manifest["segments"]),
+            "total_encodings": sum(s["count"] for s in manifest["segments"]),
+            "total_bytes": sum(s["size"] for s in manifest["segments"])
+        }
+
+    def status(self, refresh: bool = False) -> Dict:
+        """
+        Estado local vs remoto sin ir a la red: usa el último manifiesto
+        remoto visto (se refresca en cada escritura o sincronización)
+
+        Args:
+            refresh: Si True, vuelve a leer el manifiesto remoto antes
+        """
+        if refresh:
+            self._fetch_remote_manifest()
+        local = self.read_manifest()
+        cache = self.cached_remote_manifest()
+        remote = cache["manifest"] if cache else None
+        pending, conflicts = self._pending(local, remote)
+
+        status = {
+            "local": {
+                "exists": bool(local["segments"]),
+                "version": local["version"],
+                "segments": len(local["segments"]),
+                "missing_segments": sum(1 for s in local["segments"] if not self._has_local(s)),
+                "total_encodings": sum(s["count"] for s in local["segments"]),
+                "size": sum(s["size"] for s in local["segments"])
+            },
+            "cloud": {
+                "exists": remote is not None,
+                "size": 0
+            },
+            "pending_upload": len(pending),
+            "conflicts": len(conflicts)
+        }
+        if remote is not None:
+            local_shas = {s["sha256"] for s in local["segments"]}
+            status["cloud"].update({
+                "version": remote["version"],
+                "segments": len(remote["segments"]),
+                "total_encodings": sum(s["count"] for s in remote["segments"]),
+                "size": sum(s["size"] for s in remote["segments"]),
+                "manifest_fetched_at": cache["fetched_at"]
+            })
+            status["pending_download"] = sum(1 for s in remote["segments"] if s["sha256"] not in local_shas)
+            status["in_sync"] = not pending and not conflicts and status["pending_download"] == 0
+        return status
+
+
+# Instancia global (perezosa)
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_encodings_store() -> SegmentedEncodingStore:
+    """Almacén segmentado compartido, con copia remota en Supabase Storage"""
+    global _store
+    with _store_lock:
+        if _store is None:
+            from config import Config
+            _store = SegmentedEncodingStore(
+                Config.ENCODINGS_STORE_DIR,
+                remote=SupabaseStorageRemote(),
+                transfer_workers=Config.ENCODINGS_SYNC_WORKERS
+            )
+        return _store
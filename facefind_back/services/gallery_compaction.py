@@ -0,0 +1,244 @@
+"""
+Compactación de embeddings casi duplicados por caso
+
+Cada caso acumula varios embeddings muy parecidos (frontal, perfiles,
+reemplazos) y cada uno cuesta tiempo de comparación y memoria. Aquí se
+agrupan los embeddings de cada caso por distancia y se conservan solo
+prototipos (tipo medoide): cada prototipo cubre a los originales que están
+a menos de `radio` de él.
+
+Antes de aceptar el resultado se verifica con leave-one-out que la decisión
+top-1 por caso no cambia: cada embedding original se usa como consulta
+"de otra foto de esa persona" contra la galería completa sin él y contra la
+galería compactada sin él (si era prototipo, su grupo pasa a estar
+representado por el original más cercano que cubría). Los casos
+involucrados en cualquier diferencia se dejan sin compactar, así que la
+verificación final siempre pasa.
+"""
+import json
+import os
+import time
+from typing import Dict, List, Optional
+
+import numpy as np
+
+BLOQUE_CONSULTAS = 1024
+REPORTE_FILE = "gallery_compaction.json"
+
+
+def _distancias(consultas: np.ndarray, galeria: np.ndarray) -> np.ndarray:
+    """Distancias euclidianas (igual que face_recognition.face_distance)"""
+    sq = (np.sum(consultas ** 2, axis=1)[:, None]
+          + np.sum(galeria ** 2, axis=1)[None, :]
+          - 2.0 * consultas @ galeria.T)
+    return np.sqrt(np.maximum(sq, 0.0))
+
+
+def _prototipos_de_caso(vectores: np.ndarray, radio: float) -> List[tuple]:
+    """
+    Cubre los embeddings de un caso con el menor número de prototipos
+    (greedy): en cada paso elige el embedding que cubre más originales aún
+    sin cubrir; los empates se resuelven por menor distancia media (medoide).
+
+    Returns:
+        Lista de (índice del prototipo, [índices cubiertos]) relativos al caso
+    """
+    n = len(vectores)
+    if n == 1:
+        return [(0, [0])]
+
+    dist = _distancias(vectores, vectores)
+    dentro = dist <= radio
+    sin_cubrir = np.ones(n, dtype=bool)
+    prototipos = []
+
+    while sin_cubrir.any():
+        cobertura = (dentro & sin_cubrir[None, :]).sum(axis=1)
+        cobertura[~sin_cubrir] = 0  # el prototipo debe ser uno de los que faltan
+        mejor = cobertura.max()
+        candidatos = np.flatnonzero(cobertura == mejor)
+        if len(candidatos) > 1:
+            medias = [dist[c, dentro[c] & sin_cubrir].mean() for c in candidatos]
+            elegido = int(candidatos[int(np.argmin(medias))])
+        else:
+            elegido = int(candidatos[0])
+
+        cubiertos = np.flatnonzero(dentro[elegido] & sin_cubrir)
+        prototipos.append((elegido, [int(i) for i in cubiertos]))
+        sin_cubrir[cubiertos] = False
+
+    return prototipos
+
+
+def _decisiones(galeria: np.ndarray, galeria_casos: List, consultas: np.ndarray,
+                excluir: np.ndarray, tolerance: float,
+                sustitutos: Optional[np.ndarray] = None) -> List:
+    """
+    Decisión top-1 por consulta: caso del embedding más cercano si está
+    dentro de la tolerancia, o None. `excluir[i]` es la posición en la
+    galería que la consulta i no puede usar (-1 = ninguna). Si
+    `sustitutos[i]` >= 0, esa posición se reemplaza por consultas[sustitutos[i]]
+    en vez de quitarse (otro original del mismo grupo pasa a representarlo).
+    """
+    decisiones = []
+    for inicio in range(0, len(consultas), BLOQUE_CONSULTAS):
+        bloque = slice(inicio, inicio + BLOQUE_CONSULTAS)
+        dist = _distancias(consultas[bloque], galeria)
+        filas = np.arange(dist.shape[0])
+        excl = excluir[bloque]
+        validos = excl >= 0
+        dist[filas[validos], excl[validos]] = np.inf
+
+        if sustitutos is not None:
+            sust = sustitutos[bloque]
+            con_sust = filas[sust >= 0]
+            if len(con_sust):
+                dist[con_sust, excl[con_sust]] = np.linalg.norm(
+                    consultas[bloque][con_sust] - consultas[sust[con_sust]], axis=1
+                )
+
+        mejores = np.argmin(dist, axis=1)
+        for fila, idx in enumerate(mejores):
+            d = dist[fila, idx]
+            decisiones.append(galeria_casos[idx] if np.isfinite(d) and d <= tolerance else None)
+    return decisiones
+
+
+def compactar_galeria(encodings: List[np.ndarray],
+                      caso_ids: List,
+                      radio: float = 0.3,
+                      tolerance: float = 0.55,
+                      verificar: bool = True) -> Dict:
+    """
+    Compacta la galería por caso conservando prototipos
+
+    Args:
+        encodings: Embeddings de la galería
+        caso_ids: Caso de cada embedding (los None no se compactan)
+        radio: Distancia máxima entre un prototipo y los originales que cubre
+        tolerance: Umbral de match usado por el detector (para la verificación)
+        verificar: Ejecutar la verificación leave-one-out de decisiones top-1
+
+    Returns:
+        Dict con:
+            indices: posiciones originales que se conservan (en orden)
+            covers: {posición conservada: [posiciones originales que cubre]}
+            original / compactada / shrink_factor
+            verificacion: consultas evaluadas, cambios, casos revertidos
+    """
+    inicio = time.time()
+    n = len(encodings)
+    if n == 0:
+        return {"indices": [], "covers": {}, "original": 0, "compactada": 0,
+                "shrink_factor": 1.0, "verificacion": None, "radio": radio}
+
+    vectores = np.asarray(encodings, dtype=np.float64)
+
+    # Agrupar posiciones por caso
+    por_caso: Dict = {}
+    for i, caso_id in enumerate(caso_ids):
+        por_caso.setdefault(caso_id, []).append(i)
+
+    covers_por_caso: Dict = {}
+    for caso_id, posiciones in por_caso.items():
+        if caso_id is None:
+            covers_por_caso[caso_id] = {p: [p] for p in posiciones}
+            continue
+        locales = _prototipos_de_caso(vectores[posiciones], radio)
+        covers_por_caso[caso_id] = {
+            posiciones[proto]: [posiciones[c] for c in cubiertos]
+            for proto, cubiertos in locales
+        }
+
+    verificacion = None
+    revertidos = set()
+    if verificar:
+        consultas_idx = np.arange(n)
+        completa = _decisiones(vectores, caso_ids, vectores, consultas_idx, tolerance)
+
+        # Iterar hasta que ninguna decisión cambie (revertir todo = galería original)
+        iteraciones = 0
+        while True:
+            iteraciones += 1
+            conservados = sorted(p for covers in covers_por_caso.values() for p in covers)
+            posicion = {p: k for k, p in enumerate(conservados)}
+            excluir = np.array([posicion.get(i, -1) for i in range(n)])
+
+            # Si la consulta es un prototipo, su grupo queda representado por
+            # el original más cercano que cubría (como si esa foto no existiera)
+            sustitutos = np.full(n, -1)
+            for covers in covers_por_caso.values():
+                for proto, cubiertos in covers.items():
+                    otros = [c for c in cubiertos if c != proto]
+                    if otros:
+                        d = np.linalg.norm(vectores[otros] - vectores[proto], axis=1)
+                        sustitutos[proto] = otros[int(np.argmin(d))]
+
+            compacta = _decisiones(vectores[conservados], [caso_ids[p] for p in conservados],
+                                   vectores, excluir, tolerance, sustitutos)
+
+            cambios = [i for i in range(n) if completa[i] != compacta[i]]
+            if not cambios:
+                break
+
+            afectados = set()
+            for i in cambios:
+                afectados.update(c for c in (caso_ids[i], completa[i], compacta[i]) if c is not None)
+            afectados -= revertidos
+            if not afectados:
+                break  # no queda nada que revertir
+            for caso_id in afectados:
+                covers_por_caso[caso_id] = {p: [p] for p in por_caso[caso_id]}
+            revertidos |= afectados
+
+        verificacion = {
+            "consultas": n,
+            "decisiones_cambiadas": len(cambios),
+            "casos_revertidos": sorted(revertidos, key=str),
+            "iteraciones": iteraciones,
+            "ok": not cambios
+        }
+
+    covers = {}
+    for covers_caso in covers_por_caso.values():
+        covers.update(covers_caso)
+    indices = sorted(covers)
+
+    return {
+        "indices": indices,
+        "covers": {p: sorted(covers[p]) for p in indices},
+        "original": n,
+        "compactada": len(indices),
+        "shrink_factor": round(n / len(indices), 3),
+        "casos": len([c for c in por_caso if c is not None]),
+        "radio": radio,
+        "tolerance": tolerance,
+        "verificacion": verificacion,
+        "duracion_ms": round((time.time() - inicio) * 1000, 2)
+    }
+
+
+def guardar_reporte(resultado: Dict, ids: Optional[List] = None, path: str = REPORTE_FILE) -> Dict:
+    """
+    Guarda el reporte de compactación (qué originales cubre cada prototipo)
+
+    Args:
+        resultado: Retorno de compactar_galeria
+        ids: Identificador de cada posición original (p.ej. Embedding.id);
+             si es None se usan las posiciones
+    """
+    def _id(p):
+        return ids[p] if ids is not None else p
+
+    reporte = {k: v for k, v in resultado.items() if k not in ("indices", "covers")}
+    reporte["generado_at"] = time.time()
+    reporte["prototipos"] = [
+        {"id": _id(p), "cubre": [_id(c) for c in cubiertos]}
+        for p, cubiertos in resultado["covers"].items()
+    ]
+
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(reporte, f, indent=2, default=str)
+    os.replace(tmp_path, path)
+    return reporte
@@ -0,0 +1,182 @@
+"""
+Horario Service - Horarios de alertas por cámara
+Guarda los horarios en la tabla HorarioAlerta y mantiene compilado el
+índice que consulta la detección (models/agenda_alertas.py)
+"""
+from datetime import datetime
+from typing import Dict, List, Optional
+
+from services.supabase_client import supabase
+from models.agenda_alertas import AgendaAlertas, DIAS, HorarioCompilado, fecha_iso
+
+TABLA = "HorarioAlerta"
+
+# Índice compartido por la detección, la ingesta y las rutas de horarios
+agenda_alertas = AgendaAlertas()
+
+
+class HorarioService:
+    """
+    CRUD de horarios; cada cambio recompila la agenda
+    """
+
+    @staticmethod
+    def _a_dict(fila: Dict) -> Dict:
+        """Fila de la tabla → formato del frontend (scheduleService.js)"""
+        return {
+            "id": fila["id"],
+            "name": fila.get("nombre"),
+            "cameraId": fila.get("camara_id"),
+            "days": fila.get("dias") or {},
+            "exceptions": fila.get("excepciones") or [],
+            "criticalOverride": bool(fila.get("critical_override")),
+            "createdAt": fila.get("created_at"),
+            "updatedAt": fila.get("updated_at")
+        }
+
+    @staticmethod
+    def _a_fila(data: Dict) -> Dict:
+        """
+        Formato del frontend → columnas de la tabla (solo las presentes)
+
+        Raises:
+            ValueError: si los días o las excepciones no son válidos
+        """
+        fila = {}
+        if "name" in data:
+            if not str(data["name"] or "").strip():
+                raise ValueError("El nombre del horario es obligatorio")
+            fila["nombre"] = str(data["name"]).strip()
+        if "cameraId" in data:
+            camara_id = data["cameraId"]
+            try:
+                fila["camara_id"] = int(camara_id) if camara_id not in (None, "") else None
+            except (TypeError, ValueError):
+                raise ValueError("cameraId debe ser el ID numérico de una cámara")
+        if "days" in data:
+            dias = data["days"] or {}
+            desconocidos = set(dias) - set(DIAS)
+            if desconocidos:
+                raise ValueError(f"Días desconocidos: {sorted(desconocidos)}")
+            fila["dias"] = {
+                dia: {
+                    "enabled": bool(config.get("enabled")),
+                    "slots": [{"start": s["start"], "end": s["end"]} for s in config.get("slots") or []]
+                }
+                for dia, config in dias.items()
+            }
+        if "exceptions" in data:
+            fila["excepciones"] = [
+                {"date": fecha_iso(e["date"]), "enabled": bool(e.get("enabled")), "reason": e.get("reason") or ""}
+                for e in data["exceptions"] or []
+            ]
+        if "criticalOverride" in data:
+            fila["critical_override"] = bool(data["criticalOverride"])
+
+        # Compilar valida las horas de las franjas
+        HorarioCompilado({"days": fila.get("dias"), "exceptions": fila.get("excepciones")})
+        return fila
+
+    # ======================================================
+    # 📚 Consultas
+    # ======================================================
+    @staticmethod
+    def get_all() -> List[Dict]:
+        response = supabase.table(TABLA).select("*").order("id").execute()
+        return [HorarioService._a_dict(f) for f in response.data or []]
+
+    @staticmethod
+    def get_by_id(horario_id: int) -> Dict:
+        response = supabase.table(TABLA).select("*").eq("id", horario_id).execute()
+        if not response.data:
+            raise ValueError(f"Horario {horario_id} no encontrado")
+        return HorarioService._a_dict(response.data[0])
+
+    # ======================================================
+    # ✏️ Cambios
+    # ======================================================
+    @staticmethod
+    def _validar_unico(camara_id: Optional[int], horario_id: Optional[int] = None):
+        """
+        Un solo horario por cámara y un solo horario global
+
+        Raises:
+            ValueError: si ya hay otro horario para esa cámara (o global)
+        """
+        query = supabase.table(TABLA).select("id")
+        query = query.is_("camara_id", "null") if camara_id is None else query.eq("camara_id", camara_id)
+        if horario_id is not None:
+            query = query.neq("id", horario_id)
+        existentes = query.execute().data or []
+        if existentes:
+            destino = "global" if camara_id is None else f"para la cámara {camara_id}"
+            raise ValueError(f"Ya existe un horario {destino} (horario {existentes[0]['id']})")
+
+    @staticmethod
+    def create(data: Dict) -> Dict:
+        fila = HorarioService._a_fila({"name": "Nuevo Horario", "days": {}, "exceptions": [], **data})
+        HorarioService._validar_unico(fila.get("camara_id"))
+        response = supabase.table(TABLA).insert(fila).execute()
+        HorarioService.recargar_agenda()
+        return HorarioService._a_dict(response.data[0])
+
+    @staticmethod
+    def update(horario_id: int, data: Dict) -> Dict:
+        fila = HorarioService._a_fila(data)
+        if "camara_id" in fila:
+            HorarioService._validar_unico(fila["camara_id"], horario_id)
+        fila["updated_at"] = datetime.now().isoformat()
+        response = supabase.table(TABLA).update(fila).eq("id", horario_id).execute()
+        if not response.data:
+            raise ValueError(f"Horario {horario_id} no encontrado")
+        HorarioService.recargar_agenda()
+        return HorarioService._a_dict(response.data[0])
+
+    @staticmethod
+    def delete(horario_id: int):
+        response = supabase.table(TABLA).delete().eq("id", horario_id).execute()
+        if not response.data:
+            raise ValueError(f"Horario {horario_id} no encontrado")
+        HorarioService.recargar_agenda()
+
+    @staticmethod
+    def add_exception(horario_id: int, excepcion: Dict) -> Dict:
+        """Agrega (o reemplaza, si ya hay una para esa fecha) una excepción"""
+        fecha = fecha_iso(excepcion.get("date"))
+        excepciones = [e for e in HorarioService.get_by_id(horario_id)["exceptions"] if e["date"] != fecha]
+        excepciones.append({**excepcion, "date": fecha})
+        return HorarioService.update(horario_id, {"exceptions": excepciones})
+
+    @staticmethod
+    def remove_exception(horario_id: int, fecha: str) -> Dict:
+        fecha = fecha_iso(fecha)
+        excepciones = [e for e in HorarioService.get_by_id(horario_id)["exceptions"] if e["date"] != fecha]
+        return HorarioService.update(horario_id, {"exceptions": excepciones})
+
+    # ======================================================
+    # 🗓️ Agenda
+    # ======================================================
+    @staticmethod
+    def recargar_agenda() -> AgendaAlertas:
+        """Recompila el índice con los horarios de la tabla"""
+        agenda_alertas.cargar(HorarioService.get_all())
+        return agenda_alertas
+
+    @staticmethod
+    def agenda() -> AgendaAlertas:
+        """
+        La agenda compilada; se carga de la tabla la primera vez. Si la
+        tabla no se puede leer, las cámaras quedan en horario solo hasta el
+        próximo reintento (espera exponencial), no para siempre.
+        """
+        if agenda_alertas.debe_cargar():
+            try:
+                HorarioService.recargar_agenda()
+            except Exception as e:
+                espera = agenda_alertas.registrar_fallo_carga(e)
+                print(f"⚠️  No se pudieron cargar los horarios de alertas: {e} (reintento en {espera:.0f}s)")
+        return agenda_alertas
+
+    @staticmethod
+    def get_camera_mode(camara_id: int, momento: Optional[datetime] = None) -> str:
+        return HorarioService.agenda().modo(camara_id, momento)
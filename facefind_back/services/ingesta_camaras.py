@@ -0,0 +1,256 @@
+"""
+Ingesta de cámaras IP en el servidor
+
+Sin esto, un frame solo llega a la detección si alguien tiene la cámara
+abierta en el navegador, que además lo manda como JPEG en base64. La
+ingesta toma frames de cada cámara IP activa de la tabla Camara a una tasa
+configurada y se los pasa al motor como arrays en memoria.
+
+Los frames salen del bus de frames de cada cámara (services/bus_frames.py):
+si la cámara ya se está mirando en /stream, la ingesta usa la misma
+captura en lugar de abrir otra, y toma siempre el frame más reciente sin
+procesar frames viejos del buffer del decodificador.
+
+Cada cámara tiene su propio hilo de muestreo; las reconexiones con espera
+exponencial (backoff) las hace el bus. Un supervisor vuelve a leer la
+tabla cada cierto tiempo para sumar cámaras nuevas, parar las
+desactivadas y relanzar hilos que hayan muerto.
+
+Fuera del horario de alertas de la cámara (models/agenda_alertas.py) el
+hilo se quita del bus: si nadie más la mira, la cámara no se lee ni se
+decodifica. Cada `revision_s` vuelve a consultar el horario.
+"""
+import threading
+import time
+from typing import Callable, Dict, List, Optional
+
+from services.bus_frames import BusFrames
+
+# Nombre de la ingesta como suscriptor del bus
+CONSUMIDOR = "deteccion"
+
+
+class TrabajadorCamara(threading.Thread):
+    """
+    Hilo que toma frames del bus de una cámara IP y los manda a la detección
+    """
+
+    def __init__(self, camara: Dict, procesar: Callable, buses: BusFrames, fps_muestreo: float = 1.0,
+                 en_horario: Optional[Callable[[Dict], bool]] = None, revision_s: float = 30.0):
+        """
+        Args:
+            camara: Fila de la tabla Camara (dict de CameraService)
+            procesar: procesar(frame, camara) → intervalo sugerido en ms o None
+            buses: Buses de frames de donde se toman los frames
+            fps_muestreo: Frames por segundo que se mandan como máximo a la detección
+            en_horario: en_horario(camara) → False si la cámara está fuera de
+                        horario (por defecto siempre en horario)
+            revision_s: Cada cuánto se vuelve a consultar el horario fuera de horario
+        """
+        super().__init__(name=f"ingesta-camara-{camara.get('id')}", daemon=True)
+        self.camara = camara
+        self.camara_id = camara.get("id")
+        self.url = camara.get("url") or camara.get("ip")
+        self.procesar = procesar
+        self.buses = buses
+        self.intervalo_min_s = 1.0 / fps_muestreo if fps_muestreo > 0 else 1.0
+        self.en_horario = en_horario or (lambda camara: True)
+        self.revision_s = revision_s
+        self._detener = threading.Event()
+        self._bus = None
+
+        self.estado = "starting"
+        self.stats = {
+            "frames_read": 0, "frames_processed": 0, "errors": 0,
+            "last_frame_at": None, "next_interval_ms": None
+        }
+
+    def detener(self):
+        self._detener.set()
+
+    def run(self):
+        try:
+            while not self._detener.is_set():
+                if not self.en_horario(self.camara):
+                    # Fuera de horario: sin suscripción el bus puede cerrar la cámara
+                    self.estado = "off_hours"
+                    self._detener.wait(self.revision_s)
+                    continue
+
+                bus = self._bus = self.buses.suscribir(self.camara, CONSUMIDOR)
+                self.estado = "sampling"
+                try:
+                    fuera_de_horario = self._muestrear(bus)
+                finally:
+                    self.buses.desuscribir(bus, CONSUMIDOR)
+                if not fuera_de_horario:
+                    return
+        finally:
+            self.estado = "stopped"
+
+    def _muestrear(self, bus) -> bool:
+        """
+        Manda a la detección el frame más reciente del bus a la tasa sugerida
+
+        Returns:
+            True si se dejó de muestrear porque la cámara salió de horario
+        """
+        seq = 0
+        proximo = 0.0
+        while not self._detener.is_set():
+            # El bus mantiene fresco el frame mientras se espera la próxima muestra
+            espera = proximo - time.time()
+            if espera > 0 and self._detener.wait(espera):
+                return False
+            if not self.en_horario(self.camara):
+                return True
+
+            seq, frame, _ = bus.siguiente(seq, timeout=1.0)
+            if frame is None:
+                if not bus.activo:
+                    return False
+                continue
+            self.stats["frames_read"] += 1
+            ahora = time.time()
+
+            try:
+                sugerido_ms = self.procesar(frame, self.camara)
+                self.stats["frames_processed"] += 1
+                self.stats["last_frame_at"] = ahora
+            except Exception as e:
+                sugerido_ms = None
+                self.stats["errors"] += 1
+                print(f"❌ Cámara {self.camara_id}: error procesando frame: {e}")
+
+            # La tasa configurada es el máximo; el intervalo sugerido puede alargarla
+            intervalo = max(self.intervalo_min_s, (sugerido_ms or 0) / 1000)
+            self.stats["next_interval_ms"] = int(intervalo * 1000)
+            proximo = ahora + intervalo
+        return False
+
+    def resumen(self) -> Dict:
+        return {
+            "camara_id": self.camara_id,
+            "nombre": self.camara.get("nombre"),
+            "state": self.estado,
+            "alive": self.is_alive(),
+            **self.stats,
+            "bus": self._bus.resumen() if self._bus is not None else None
+        }
+
+
+class IngestaCamaras:
+    """
+    Supervisor de los hilos de ingesta (uno por cámara IP activa)
+    """
+
+    def __init__(self, procesar: Callable, listar_camaras: Optional[Callable] = None,
+                 fps_muestreo: float = 1.0, refresco_s: float = 60.0,
+                 buses: Optional[BusFrames] = None,
+                 en_horario: Optional[Callable[[Dict], bool]] = None):
+        """
+        Args:
+            procesar: procesar(frame, camara) → intervalo sugerido en ms o None
+            listar_camaras: Devuelve las cámaras activas (por defecto de la tabla Camara)
+            fps_muestreo: Frames por segundo por cámara que van a la detección (máximo)
+            refresco_s: Cada cuánto se vuelve a leer la tabla de cámaras
+            buses: Buses de frames (por defecto los compartidos con el stream)
+            en_horario: en_horario(camara) → False si la cámara está fuera de
+                        horario (por defecto siempre en horario)
+        """
+        if listar_camaras is None:
+            from services.camera_service import CameraService
+            listar_camaras = CameraService.get_active_cameras
+        if buses is None:
+            from services.bus_frames import bus_frames
+            buses = bus_frames
+        self.procesar = procesar
+        self.listar_camaras = listar_camaras
+        self.fps_muestreo = fps_muestreo
+        self.refresco_s = refresco_s
+        self.buses = buses
+        self.en_horario = en_horario
+        self.trabajadores: Dict[int, TrabajadorCamara] = {}
+        self._lock = threading.Lock()
+        self._detener = threading.Event()
+        self._supervisor: Optional[threading.Thread] = None
+
+    # ======================================================
+    # 🚀 Ciclo de vida
+    # ======================================================
+    def iniciar(self):
+        if self._supervisor is not None and self._supervisor.is_alive():
+            return
+        self._detener.clear()
+        self._supervisor = threading.Thread(target=self._supervisar, name="ingesta-supervisor", daemon=True)
+        self._supervisor.start()
+        print(f"📡 Ingesta de cámaras iniciada ({self.fps_muestreo} fps por cámara)")
+
+    def detener(self):
+        self._detener.set()
+        with self._lock:
+            for trabajador in self.trabajadores.values():
+                trabajador.detener()
+            self.trabajadores.clear()
+
+    def _supervisar(self):
+        while not self._detener.is_set():
+            try:
+                self.sincronizar()
+            except Exception as e:
+                print(f"⚠️  Ingesta: no se pudo leer la tabla de cámaras: {e}")
+            self._detener.wait(self.refresco_s)
+
+    @staticmethod
+    def _es_ingestable(camara: Dict) -> bool:
+        return camara.get("type") == "IP" and bool(camara.get("url") or camara.get("ip")) and camara.get("activa", True)
+
+    def sincronizar(self) -> Dict:
+        """
+        Ajusta los hilos a las cámaras IP activas: lanza los que faltan,
+        para los de cámaras quitadas o con otra URL y relanza los que murieron
+        """
+        camaras: List[Dict] = [c for c in self.listar_camaras() if self._es_ingestable(c)]
+        por_id = {c["id"]: c for c in camaras}
+        cambios = {"started": [], "stopped": [], "restarted": []}
+
+        with self._lock:
+            for camara_id in list(self.trabajadores):
+                trabajador = self.trabajadores[camara_id]
+                camara = por_id.get(camara_id)
+                if camara is None or (camara.get("url") or camara.get("ip")) != trabajador.url:
+                    trabajador.detener()
+                    del self.trabajadores[camara_id]
+                    cambios["stopped"].append(camara_id)
+                elif not trabajador.is_alive():
+                    del self.trabajadores[camara_id]
+                    cambios["restarted"].append(camara_id)
+
+            for camara_id, camara in por_id.items():
+                if camara_id in self.trabajadores:
+                    continue
+                trabajador = TrabajadorCamara(
+                    camara, self.procesar, self.buses,
+                    fps_muestreo=self.fps_muestreo,
+                    en_horario=self.en_horario
+                )
+                self.trabajadores[camara_id] = trabajador
+                trabajador.start()
+                if camara_id not in cambios["restarted"]:
+                    cambios["started"].append(camara_id)
+
+        if any(cambios.values()):
+            print(f"📡 Ingesta: {cambios}")
+        return cambios
+
+    # ======================================================
+    # 📊 Estadísticas
+    # ======================================================
+    def resumen(self) -> Dict:
+        with self._lock:
+            trabajadores = list(self.trabajadores.values())
+        return {
+            "running": self._supervisor is not None and self._supervisor.is_alive(),
+            "sample_fps": self.fps_muestreo,
+            "cameras": [t.resumen() for t in trabajadores]
+        }
@@ -0,0 +1,367 @@
+"""
+Servicio de re-encoding masivo de la galería de fotos de referencia
+
+Regenera los Embedding de TODAS las filas de FotoReferencia (p.ej. tras
+cambiar el detector o sus parámetros) sin volver a subir fotos:
+- Recorre FotoReferencia por páginas (paginación por id, reanudable)
+- Descarga imágenes con un pool de conexiones HTTP acotado
+- Genera encodings en el pool de procesos compartido
+- Hace upsert por lotes en la tabla de staging EmbeddingReencode
+- Guarda un checkpoint tras cada página para poder reanudar
+- Al terminar publica la nueva versión de la galería de forma atómica
+
+Mientras el job corre, Embedding no cambia: cualquier recarga de la
+galería (p.ej. al subir una foto) ve solo los vectores anteriores. Al
+publicar, la función publicar_reencode (db/reencode_staging.sql) pasa
+todos los vectores nuevos a Embedding en una sola transacción.
+"""
+import json
+import os
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import Dict, List, Optional
+
+import requests
+from requests.adapters import HTTPAdapter
+from supabase import create_client
+
+from config import Config
+from models.encoding import Encoding
+from models.generador_encodings import (
+    GeneradorEncodings,
+    obtener_pool_encodings,
+    codificar_en_proceso
+)
+
+CHECKPOINT_FILE = "reencode_checkpoint.json"
+STAGING_TABLE = "EmbeddingReencode"
+GALLERY_VERSION_FILE = "gallery_version.json"
+MAX_FALLOS_REPORTADOS = 200
+
+
+def _escribir_json_atomico(path: str, data: Dict):
+    """Escribe un JSON de forma atómica (archivo temporal + rename)"""
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(data, f, indent=2)
+    os.replace(tmp_path, path)
+
+
+def leer_version_galeria(path: str = GALLERY_VERSION_FILE) -> Optional[Dict]:
+    """Lee la versión publicada de la galería (o None si nunca se publicó)"""
+    if not os.path.exists(path):
+        return None
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+class ReencodeJob:
+    """
+    Trabajo de re-encoding masivo y reanudable.
+
+    El progreso se guarda en `checkpoint_path`; si el proceso se interrumpe,
+    una nueva ejecución con la misma configuración de detector continúa desde
+    la última página confirmada.
+    """
+
+    def __init__(self,
+                 page_size: int = 100,
+                 batch_size: int = 50,
+                 download_workers: int = 8,
+                 generador: Optional[GeneradorEncodings] = None,
+                 checkpoint_path: str = CHECKPOINT_FILE,
+                 version_path: str = GALLERY_VERSION_FILE):
+        """
+        Args:
+            page_size: Filas de FotoReferencia leídas por página
+            batch_size: Filas de Embedding por upsert
+            download_workers: Conexiones HTTP simultáneas para descargar fotos
+            generador: GeneradorEncodings con la configuración de detector a usar
+            checkpoint_path: Archivo de checkpoint para reanudar
+            version_path: Archivo donde se publica la versión de la galería
+        """
+        self.page_size = page_size
+        self.batch_size = batch_size
+        self.download_workers = download_workers
+        self.generador = generador or GeneradorEncodings()
+        self.checkpoint_path = checkpoint_path
+        self.version_path = version_path
+
+        self.supabase = create_client(
+            Config.SUPABASE_URL,
+            Config.SUPABASE_SERVICE_ROLE_KEY or Config.SUPABASE_KEY
+        )
+
+        # Sesión HTTP con pool de conexiones acotado al número de descargas paralelas
+        self.http = requests.Session()
+        adapter = HTTPAdapter(pool_connections=download_workers, pool_maxsize=download_workers)
+        self.http.mount("http://", adapter)
+        self.http.mount("https://", adapter)
+
+        self._cancelado = threading.Event()
+        self.estado: Dict = {}
+
+    # ======================================================
+    # 📌 Checkpoint
+    # ======================================================
+    def _settings(self) -> Dict:
+        return self.generador.settings()
+
+    def _cargar_checkpoint(self) -> Dict:
+        """Carga el checkpoint si existe y corresponde a la misma configuración"""
+        if os.path.exists(self.checkpoint_path):
+            try:
+                with open(self.checkpoint_path, "r", encoding="utf-8") as f:
+                    checkpoint = json.load(f)
+                if checkpoint.get("settings") == self._settings() and not checkpoint.get("completed"):
+                    print(f"♻️ Reanudando job {checkpoint['job_id']} desde foto_id>{checkpoint['last_foto_id']}")
+                    return checkpoint
+                print("ℹ️ Checkpoint de otra configuración o ya completado, iniciando de cero")
+            except Exception as e:
+                print(f"⚠️ Checkpoint ilegible ({e}), iniciando de cero")
+
+        return {
+            "job_id": uuid.uuid4().hex[:12],
+            "settings": self._settings(),
+            "started_at": datetime.now().isoformat(),
+            "last_foto_id": 0,
+            "processed": 0,
+            "encoded": 0,
+            "failed": 0,
+            "failures": [],
+            "elapsed_s": 0.0,
+            "completed": False
+        }
+
+    def _guardar_checkpoint(self):
+        _escribir_json_atomico(self.checkpoint_path, self.estado)
+
+    # ======================================================
+    # 📥 Lectura y descarga
+    # ======================================================
+    def _leer_pagina(self, after_id: int) -> List[Dict]:
+        """Lee la siguiente página de FotoReferencia (paginación por id)"""
+        response = self.supabase.table("FotoReferencia")\
+            .select("id, caso_id, ruta_archivo")\
+            .gt("id", after_id)\
+            .order("id")\
+            .limit(self.page_size)\
+            .execute()
+        return response.data or []
+
+    def _descargar(self, url: str) -> bytes:
+        response = self.http.get(url, timeout=30)
+        response.raise_for_status()
+        return response.content
+
+    def _registrar_fallo(self, foto_id: int, error: str):
+        self.estado["failed"] += 1
+        if len(self.estado["failures"]) < MAX_FALLOS_REPORTADOS:
+            self.estado["failures"].append({"foto_id": foto_id, "error": error})
+        print(f"   ❌ foto_id={foto_id}: {error}")
+
+    # ======================================================
+    # 🧠 Procesamiento de una página
+    # ======================================================
+    def _procesar_pagina(self, fotos: List[Dict], downloader: ThreadPoolExecutor) -> List[Dict]:
+        """Descarga y codifica una página; devuelve las filas de Embedding a escribir"""
+        pool = obtener_pool_encodings()
+
+        descargas = {foto["id"]: downloader.submit(self._descargar, foto["ruta_archivo"])
+                     for foto in fotos}
+
+        # A medida que llegan las descargas se envían al pool de procesos
+        encodings_futures = {}
+        for foto in fotos:
+            try:
+                image_bytes = descargas[foto["id"]].result()
+                encodings_futures[foto["id"]] = pool.submit(codificar_en_proceso, self.generador, image_bytes)
+            except Exception as e:
+                self._registrar_fallo(foto["id"], f"descarga: {e}")
+
+        filas = []
+        for foto in fotos:
+            future = encodings_futures.get(foto["id"])
+            if future is None:
+                continue
+            try:
+                encoding_array, reporte = future.result()
+            except Exception as e:
+                self._registrar_fallo(foto["id"], f"encoding: {e}")
+                continue
+
+            if encoding_array is None:
+                self._registrar_fallo(foto["id"], reporte.get("error", "no se detectó rostro"))
+                continue
+
+            encoding = Encoding(vector=encoding_array, foto_referencia_id=foto["id"])
+            filas.append({**encoding.to_db_row(), "caso_id": foto.get("caso_id")})
+
+        return filas
+
+    def _upsert_embeddings(self, filas: List[Dict]):
+        """
+        Upsert por lotes en el staging del job (no en Embedding: la galería
+        en vivo no se toca hasta publicar)
+        """
+        job_id = self.estado["job_id"]
+        for i in range(0, len(filas), self.batch_size):
+            lote = [{**fila, "job_id": job_id} for fila in filas[i:i + self.batch_size]]
+            self.supabase.table(STAGING_TABLE)\
+                .upsert(lote, on_conflict="job_id,foto_referencia_id")\
+                .execute()
+
+    def _limpiar_staging_anterior(self):
+        """Borra lo que haya dejado en staging un job de otra configuración"""
+        self.supabase.table(STAGING_TABLE)\
+            .delete()\
+            .neq("job_id", self.estado["job_id"])\
+            .execute()
+
+    # ======================================================
+    # ▶️ Ejecución
+    # ======================================================
+    def cancelar(self):
+        """Solicita detener el job al terminar la página actual (queda reanudable)"""
+        self._cancelado.set()
+
+    def run(self, publicar: bool = True) -> Dict:
+        """
+        Ejecuta (o reanuda) el re-encoding completo
+
+        Args:
+            publicar: Si True, publica la nueva versión de la galería y recarga
+                      el servicio de detección al terminar
+
+        Returns:
+            Dict con el estado final (procesadas, fallos, fotos/s, versión)
+        """
+        self.estado = self._cargar_checkpoint()
+        self.estado["running"] = True
+        self.estado.pop("error", None)
+        elapsed_previo = self.estado.get("elapsed_s", 0.0)
+        inicio = time.time()
+
+        try:
+            self._limpiar_staging_anterior()
+            with ThreadPoolExecutor(max_workers=self.download_workers) as downloader:
+                while not self._cancelado.is_set():
+                    fotos = self._leer_pagina(self.estado["last_foto_id"])
+                    if not fotos:
+                        self.estado["completed"] = True
+                        break
+
+                    filas = self._procesar_pagina(fotos, downloader)
+                    self._upsert_embeddings(filas)
+
+                    # Confirmar la página en el checkpoint
+                    self.estado["last_foto_id"] = fotos[-1]["id"]
+                    self.estado["processed"] += len(fotos)
+                    self.estado["encoded"] += len(filas)
+                    self.estado["elapsed_s"] = round(elapsed_previo + time.time() - inicio, 2)
+                    self.estado["photos_per_second"] = round(
+                        self.estado["processed"] / self.estado["elapsed_s"], 2
+                    ) if self.estado["elapsed_s"] > 0 else 0.0
+                    self._guardar_checkpoint()
+
+                    print(f"📦 Página hasta foto_id={self.estado['last_foto_id']}: "
+                          f"{self.estado['processed']} procesadas, {self.estado['failed']} fallos, "
+                          f"{self.estado['photos_per_second']} fotos/s")
+
+            if self.estado["completed"]:
+                self.estado["finished_at"] = datetime.now().isoformat()
+                if publicar:
+                    self.estado["gallery_version"] = self._publicar_version()
+
+        except Exception as e:
+            # El checkpoint queda en la última página confirmada y el staging
+            # intacto: volver a ejecutar reanuda (y reintenta la publicación)
+            print(f"❌ Re-encoding interrumpido: {e}")
+            self.estado["error"] = str(e)
+            self.estado["completed"] = False
+            self.estado.pop("finished_at", None)
+
+        finally:
+            self.estado["running"] = False
+            self._guardar_checkpoint()
+
+        return self.estado
+
+    def _publicar_version(self) -> Dict:
+        """
+        Publica la nueva versión de la galería.
+
+        Mientras el job corre, Embedding conserva los vectores anteriores
+        (los nuevos están en staging). Aquí publicar_reencode los pasa a
+        Embedding en una sola transacción, se escribe el archivo de versión
+        de forma atómica y se recarga la galería del servicio (el motor, con
+        sus ajustes por cámara y estadísticas, no se reconstruye).
+        """
+        publicados = self.supabase.rpc("publicar_reencode", {"p_job_id": self.estado["job_id"]}).execute()
+        print(f"🔁 {publicados.data} embeddings publicados desde staging")
+
+        anterior = leer_version_galeria(self.version_path) or {}
+        version = {
+            "version": int(anterior.get("version", 0)) + 1,
+            "job_id": self.estado["job_id"],
+            "settings": self.estado["settings"],
+            "encoded": self.estado["encoded"],
+            "failed": self.estado["failed"],
+            "published_at": datetime.now().isoformat()
+        }
+        _escribir_json_atomico(self.version_path, version)
+        print(f"🚀 Galería publicada: versión {version['version']}")
+
+        try:
+            from api.detection_routes import recargar_galeria
+            version["detection_reloaded"] = recargar_galeria()
+        except Exception as e:
+            print(f"⚠️ No se pudo recargar el servicio de detección: {e}")
+            version["detection_reloaded"] = False
+
+        return version
+
+
+# ======================================================
+# 🔁 Ejecución en segundo plano (endpoint de administración)
+# ======================================================
+_job_actual: Optional[ReencodeJob] = None
+_job_thread: Optional[threading.Thread] = None
+_job_lock = threading.Lock()
+
+
+def iniciar_reencode_en_segundo_plano(**kwargs) -> Dict:
+    """Lanza un ReencodeJob en un hilo; solo puede haber uno a la vez"""
+    global _job_actual, _job_thread
+    with _job_lock:
+        if _job_thread is not None and _job_thread.is_alive():
+            return {"success": False, "error": "Ya hay un re-encoding en curso",
+                    "status": _job_actual.estado}
+
+        _job_actual = ReencodeJob(**kwargs)
+        _job_thread = threading.Thread(target=_job_actual.run, name="reencode-job", daemon=True)
+        _job_thread.start()
+        return {"success": True, "message": "Re-encoding iniciado"}
+
+
+def estado_reencode() -> Dict:
+    """Estado del job en curso o, si no hay, del último checkpoint"""
+    if _job_actual is not None and _job_actual.estado:
+        return {"success": True, "status": _job_actual.estado,
+                "gallery_version": leer_version_galeria()}
+
+    checkpoint = None
+    if os.path.exists(CHECKPOINT_FILE):
+        with open(CHECKPOINT_FILE, "r", encoding="utf-8") as f:
+            checkpoint = json.load(f)
+    return {"success": True, "status": checkpoint, "gallery_version": leer_version_galeria()}
+
+
+def cancelar_reencode() -> Dict:
+    if _job_actual is None or _job_thread is None or not _job_thread.is_alive():
+        return {"success": False, "error": "No hay re-encoding en curso"}
+    _job_actual.cancelar()
+    return {"success": True, "message": "Cancelación solicitada; el job podrá reanudarse"}
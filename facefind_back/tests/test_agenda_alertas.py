@@ -0,0 +1,163 @@
+"""
+Pruebas Unitarias para la agenda de horarios de alertas
+Módulo: models/agenda_alertas.py
+
+Descripción:
+Verifica el índice compilado de cada horario (franjas inclusivas, franjas
+que cruzan la medianoche, excepciones por fecha), la elección entre el
+horario de la cámara y el global (uno solo), los modos active /
+critical_only / off_hours, el reintento con espera exponencial si la
+tabla no se pudo leer y el registro compacto de lo ocurrido fuera de
+horario.
+"""
+
+import unittest
+import time
+import sys
+import os
+from datetime import datetime
+
+# Agregar el path del proyecto para importar módulos
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from models.agenda_alertas import (
+    AgendaAlertas, HorarioCompilado, ACTIVO, INACTIVO, SOLO_CRITICAS, minutos
+)
+
+# 2025-12-22 es lunes
+LUNES = datetime(2025, 12, 22)
+
+
+def _dias(**franjas):
+    return {dia: {"enabled": True, "slots": [{"start": s, "end": e} for s, e in slots]}
+            for dia, slots in franjas.items()}
+
+
+def _momento(dias_despues, hora, minuto=0):
+    return LUNES.replace(day=LUNES.day + dias_despues, hour=hora, minute=minuto)
+
+
+class TestHorarioCompilado(unittest.TestCase):
+    """
+    Suite de pruebas unitarias para HorarioCompilado
+    """
+
+    def test_franjas_incluyen_el_minuto_final(self):
+        horario = HorarioCompilado({"days": _dias(monday=[("09:00", "12:00"), ("14:00", "17:59")])})
+        self.assertFalse(horario.en_horario(_momento(0, 8, 59)))
+        self.assertTrue(horario.en_horario(_momento(0, 9, 0)))
+        self.assertTrue(horario.en_horario(_momento(0, 12, 0)))
+        self.assertFalse(horario.en_horario(_momento(0, 12, 1)))
+        self.assertTrue(horario.en_horario(_momento(0, 17, 59)))
+        self.assertFalse(horario.en_horario(_momento(0, 18, 0)))
+        # Martes no está habilitado
+        self.assertFalse(horario.en_horario(_momento(1, 10, 0)))
+
+    def test_solapadas_se_unen(self):
+        horario = HorarioCompilado({"days": _dias(monday=[("09:00", "12:00"), ("11:00", "13:00")])})
+        self.assertEqual(len(horario.inicios), 1)
+        self.assertEqual(horario.fines[0] - horario.inicios[0], 4 * 60 + 1)
+
+    def test_franja_nocturna_y_domingo_a_lunes(self):
+        horario = HorarioCompilado({"days": _dias(monday=[("22:00", "06:00")], sunday=[("23:00", "01:00")])})
+        self.assertTrue(horario.en_horario(_momento(0, 23, 30)))
+        self.assertTrue(horario.en_horario(_momento(1, 5, 59)))
+        self.assertFalse(horario.en_horario(_momento(1, 6, 1)))
+        # Domingo 23:30 y el lunes siguiente a las 00:30
+        self.assertTrue(horario.en_horario(_momento(6, 23, 30)))
+        self.assertTrue(horario.en_horario(_momento(7, 0, 30)))
+
+    def test_excepcion_manda_sobre_el_dia(self):
+        horario = HorarioCompilado({
+            "days": _dias(monday=[("09:00", "17:00")]),
+            "exceptions": [{"date": "2025-12-22", "enabled": False},
+                           {"date": "2025-12-23", "enabled": True}]
+        })
+        self.assertFalse(horario.en_horario(_momento(0, 10)))
+        self.assertTrue(horario.en_horario(_momento(1, 3)))
+
+    def test_hora_invalida(self):
+        with self.assertRaises(ValueError):
+            HorarioCompilado({"days": _dias(monday=[("25:00", "26:00")])})
+        self.assertEqual(minutos("07:45"), 465)
+
+
+class TestAgendaAlertas(unittest.TestCase):
+    """
+    Suite de pruebas unitarias para AgendaAlertas
+    """
+
+    def setUp(self):
+        self.agenda = AgendaAlertas(max_registros=3)
+        self.agenda.cargar([
+            {"id": 1, "cameraId": None, "days": _dias(monday=[("09:00", "17:00")])},
+            {"id": 2, "cameraId": 7, "days": _dias(monday=[("20:00", "22:00")]), "criticalOverride": True},
+        ])
+
+    def test_sin_horarios_siempre_activo(self):
+        agenda = AgendaAlertas()
+        agenda.cargar([])
+        self.assertEqual(agenda.modo(1, _momento(0, 3)), ACTIVO)
+
+    def test_horario_de_camara_o_global(self):
+        # Cámara 3 usa el global; la 7 tiene el suyo (el id puede venir como texto)
+        self.assertEqual(self.agenda.modo(3, _momento(0, 10)), ACTIVO)
+        self.assertEqual(self.agenda.modo(3, _momento(0, 21)), INACTIVO)
+        self.assertEqual(self.agenda.modo("7", _momento(0, 21)), ACTIVO)
+        # Fuera de horario con criticalOverride se sigue detectando
+        self.assertEqual(self.agenda.modo(7, _momento(0, 10)), SOLO_CRITICAS)
+
+        resumen = self.agenda.resumen(_momento(0, 10))
+        self.assertEqual(resumen["global_schedule"], 1)
+        self.assertEqual(resumen["cameras"], {"7": SOLO_CRITICAS})
+
+    def test_un_solo_horario_global(self):
+        agenda = AgendaAlertas()
+        agenda.cargar([
+            {"id": 1, "cameraId": None, "days": _dias(monday=[("09:00", "17:00")])},
+            {"id": 2, "cameraId": None, "days": {}},
+        ])
+        self.assertEqual(agenda.resumen()["global_schedule"], 1)
+        self.assertEqual(agenda.modo(3, _momento(0, 10)), ACTIVO)
+
+    def test_fallo_de_carga_se_reintenta(self):
+        agenda = AgendaAlertas()
+        self.assertTrue(agenda.debe_cargar(ahora=100.0))
+
+        # Sin cargar: todas en horario, pero se vuelve a intentar con espera creciente
+        self.assertEqual(agenda.registrar_fallo_carga(RuntimeError("sin red"), ahora=100.0), 5.0)
+        self.assertFalse(agenda.cargada)
+        self.assertFalse(agenda.debe_cargar(ahora=104.0))
+        self.assertTrue(agenda.debe_cargar(ahora=105.0))
+        self.assertEqual(agenda.registrar_fallo_carga(RuntimeError("sin red"), ahora=105.0), 10.0)
+        self.assertEqual(agenda.resumen()["load_error"], "sin red")
+
+        agenda.cargar([{"id": 1, "cameraId": None, "days": {}}])
+        self.assertFalse(agenda.debe_cargar(ahora=1000.0))
+        self.assertEqual(agenda.modo(3, _momento(0, 10)), INACTIVO)
+        self.assertIsNone(agenda.resumen()["load_error"])
+
+    def test_registro_compacto_acotado_y_filtros(self):
+        for similitud in (0.70, 0.90, 0.75, 0.95):
+            self.agenda.registrar_match(7, 11, similitud)
+        self.agenda.registrar_frame_omitido(3)
+        self.agenda.registrar_frame_omitido(3)
+
+        registros = self.agenda.registros()
+        # Solo los últimos 3, más recientes primero
+        self.assertEqual([r["similarity"] for r in registros], [0.95, 0.75, 0.90])
+        self.assertEqual([r["similarity"] for r in self.agenda.registros(critica=True)], [0.95, 0.90])
+        self.assertEqual(self.agenda.registros(camara_id=3), [])
+        self.assertEqual(registros[0]["alertMessage"], "Match caso #11 (95%)")
+
+        estadisticas = self.agenda.estadisticas()
+        self.assertEqual(estadisticas["byCritical"], {"critical": 2, "normal": 1})
+        self.assertEqual(estadisticas["byCamera"], {"7": 3})
+        self.assertEqual(estadisticas["skippedFramesByCamera"], {"7": 0, "3": 2})
+
+        self.assertEqual(self.agenda.limpiar(time.time() + 1), 3)
+        self.assertEqual(self.agenda.registros(), [])
+
+
+if __name__ == '__main__':
+    unittest.main()
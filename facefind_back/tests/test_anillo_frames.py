@@ -0,0 +1,117 @@
+"""
+Pruebas Unitarias para el anillo de frames en memoria compartida
+Módulo: services/anillo_frames.py
+
+Descripción:
+Verifica que el consumidor recibe una vista sobre la memoria compartida
+con sus metadatos (camara_id, timestamp), que un consumidor atrasado
+hace que se reutilice el slot más viejo sin pisar uno en lectura y que
+los frames pasan entre procesos sin copiarse por la cola.
+"""
+
+import unittest
+import multiprocessing
+import time
+import sys
+import os
+
+import numpy as np
+
+# Agregar el path del proyecto para importar módulos
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from services.anillo_frames import AnilloFrames, enviar_a_anillo
+
+
+def _consumir(anillo, cantidad, resultados):
+    """Proceso de detección de prueba: devuelve (camara_id, suma) de cada frame"""
+    for _ in range(cantidad):
+        with anillo.tomar(timeout=5) as compartido:
+            resultados.put((compartido.camara_id, int(compartido.frame.sum())))
+    anillo.cerrar()
+
+
+class TestAnilloFrames(unittest.TestCase):
+    """
+    Suite de pruebas unitarias para AnilloFrames
+    """
+
+    def setUp(self):
+        self.anillo = AnilloFrames(slots=3, alto=48, ancho=64)
+
+    def tearDown(self):
+        self.anillo.cerrar()
+
+    def test_entrega_vista_con_metadatos(self):
+        frame = np.full((40, 60, 3), 7, dtype=np.uint8)
+        seq = self.anillo.publicar(frame, camara_id=5, timestamp=123.5)
+
+        with self.anillo.tomar(timeout=1) as compartido:
+            self.assertEqual(compartido.seq, seq)
+            self.assertEqual(compartido.camara_id, 5)
+            self.assertEqual(compartido.timestamp, 123.5)
+            self.assertEqual(compartido.frame.shape, (40, 60, 3))
+            self.assertTrue((compartido.frame == 7).all())
+            # Vista sobre el slot, no una copia
+            self.assertFalse(compartido.frame.flags.owndata)
+
+        self.assertIsNone(self.anillo.tomar(timeout=0.05))
+        resumen = self.anillo.resumen()
+        self.assertEqual((resumen["published"], resumen["consumed"]), (1, 1))
+
+    def test_consumidor_atrasado_reutiliza_el_slot_mas_viejo(self):
+        for valor in range(1, 4):
+            self.anillo.publicar(np.full((4, 4, 3), valor, dtype=np.uint8), camara_id=valor)
+
+        en_lectura = self.anillo.tomar()
+        self.assertEqual(en_lectura.camara_id, 1)
+
+        # Sin slots libres: se pisa el listo más viejo (2), nunca el que se lee
+        self.anillo.publicar(np.full((4, 4, 3), 4, dtype=np.uint8), camara_id=4)
+        self.assertTrue((en_lectura.frame == 1).all())
+        self.assertEqual(self.anillo.resumen()["overwritten"], 1)
+
+        siguientes = []
+        for _ in range(2):
+            with self.anillo.tomar(timeout=1) as compartido:
+                siguientes.append(compartido.camara_id)
+        self.assertEqual(siguientes, [3, 4])
+        en_lectura.liberar()
+
+    def test_sin_slots_disponibles_o_frame_grande(self):
+        tomados = []
+        for valor in range(3):
+            self.anillo.publicar(np.zeros((4, 4, 3), dtype=np.uint8), camara_id=valor)
+            tomados.append(self.anillo.tomar())
+        self.assertIsNone(self.anillo.publicar(np.zeros((4, 4, 3), dtype=np.uint8), camara_id=9))
+        self.assertEqual(self.anillo.resumen()["no_slot"], 1)
+        for compartido in tomados:
+            compartido.liberar()
+
+        with self.assertRaises(ValueError):
+            self.anillo.publicar(np.zeros((100, 100, 3), dtype=np.uint8), camara_id=1)
+
+    def test_frames_entre_procesos(self):
+        contexto = multiprocessing.get_context()
+        resultados = contexto.Queue()
+        proceso = contexto.Process(target=_consumir, args=(self.anillo, 5, resultados))
+        proceso.start()
+
+        procesar = enviar_a_anillo(self.anillo)
+        esperados = []
+        for valor in range(5):
+            frame = np.full((48, 64, 3), valor, dtype=np.uint8)
+            # Esperar un slot libre para que no se pise ninguno
+            while self.anillo.resumen()["ready"] >= 2:
+                time.sleep(0.001)
+            procesar(frame, {"id": 10 + valor})
+            esperados.append((10 + valor, int(frame.sum())))
+
+        recibidos = [resultados.get(timeout=10) for _ in range(5)]
+        proceso.join(10)
+        self.assertEqual(proceso.exitcode, 0)
+        self.assertEqual(sorted(recibidos), esperados)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,147 @@
+"""
+Pruebas Unitarias para el bus de frames por cámara
+Módulo: services/bus_frames.py
+
+Descripción:
+Verifica que todos los consumidores de una cámara reciben el mismo frame
+por referencia con una sola decodificación, que un consumidor lento
+recibe el más reciente, que el bus se reconecta con backoff y que se
+detiene y libera la cámara con el último suscriptor.
+"""
+
+import unittest
+import threading
+import time
+import sys
+import os
+
+import numpy as np
+
+# Agregar el path del proyecto para importar módulos
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from services.bus_frames import BusFrames
+
+
+class CamaraFalsa:
+    """
+    Cámara en memoria a ~200 fps: las URL "falla" rechazan las dos primeras
+    conexiones y las URL "corta" dejan de entregar frames tras 3 lecturas
+    """
+    conexiones = {}
+    abiertas = 0
+    lock = threading.Lock()
+
+    def __init__(self, camera_data):
+        self.url = camera_data.get("url")
+        self.leidos = 0
+
+    def connect(self):
+        with CamaraFalsa.lock:
+            CamaraFalsa.conexiones[self.url] = CamaraFalsa.conexiones.get(self.url, 0) + 1
+            if self.url.startswith("falla") and CamaraFalsa.conexiones[self.url] <= 2:
+                return False
+            CamaraFalsa.abiertas += 1
+        return True
+
+    def get_frame(self):
+        time.sleep(0.005)
+        self.leidos += 1
+        if self.url.startswith("corta") and self.leidos > 3:
+            return None
+        return np.full((4, 4, 3), self.leidos % 255, dtype=np.uint8)
+
+    def disconnect(self):
+        with CamaraFalsa.lock:
+            CamaraFalsa.abiertas = max(0, CamaraFalsa.abiertas - 1)
+
+
+def _esperar(condicion, timeout=2.0):
+    limite = time.time() + timeout
+    while time.time() < limite:
+        if condicion():
+            return True
+        time.sleep(0.01)
+    return False
+
+
+class TestBusFrames(unittest.TestCase):
+    """
+    Suite de pruebas unitarias para BusFrames
+    """
+
+    def setUp(self):
+        CamaraFalsa.conexiones = {}
+        CamaraFalsa.abiertas = 0
+        self.buses = BusFrames(abrir=CamaraFalsa, backoff_max_s=0.02)
+
+    def _cerrar(self, bus, *consumidores):
+        for consumidor in consumidores:
+            self.buses.desuscribir(bus, consumidor)
+        bus.join(2)
+
+    def test_consumidores_comparten_frame_por_referencia(self):
+        camara = {"id": 1, "url": "rtsp://a"}
+        bus = self.buses.suscribir(camara, "stream")
+        otro = self.buses.suscribir(camara, "deteccion")
+        self.assertIs(bus, otro)
+
+        seq, frame, timestamp = bus.siguiente(0)
+        _, mismo, _ = otro.siguiente(seq - 1)
+        self.assertIsNotNone(timestamp)
+        # El mismo array, sin copias por consumidor
+        self.assertIs(frame, mismo)
+        self.assertEqual(CamaraFalsa.conexiones["rtsp://a"], 1)
+
+        # Un consumidor lento recibe el más reciente, no el siguiente
+        time.sleep(0.1)
+        nuevo_seq, _, _ = bus.siguiente(seq)
+        self.assertGreater(nuevo_seq, seq + 1)
+
+        resumen = self.buses.resumen()["cameras"][0]
+        self.assertEqual(resumen["subscribers"], {"stream": 1, "deteccion": 1})
+        self.assertGreater(resumen["frames_decoded"], 0)
+        self._cerrar(bus, "stream", "deteccion")
+
+    def test_ultimo_suscriptor_libera_la_camara(self):
+        camara = {"id": 2, "url": "rtsp://b"}
+        bus = self.buses.suscribir(camara, "stream")
+        self.buses.suscribir(camara, "evidencia")
+        self.assertIsNotNone(bus.ultimo()[0])
+
+        self.buses.desuscribir(bus, "evidencia")
+        self.assertIs(self.buses.bus(2), bus)
+
+        self._cerrar(bus, "stream")
+        self.assertFalse(bus.activo)
+        self.assertEqual(CamaraFalsa.abiertas, 0)
+        self.assertIsNone(self.buses.bus(2))
+
+        # Un suscriptor nuevo vuelve a abrir la cámara
+        nuevo = self.buses.suscribir(camara, "stream")
+        self.assertIsNot(nuevo, bus)
+        self.assertIsNotNone(nuevo.ultimo()[0])
+        self._cerrar(nuevo, "stream")
+
+    def test_reconecta_con_backoff(self):
+        bus = self.buses.suscribir({"id": 3, "url": "falla://c"}, "deteccion")
+        self.assertIsNotNone(bus.ultimo(timeout=2.0)[0])
+        self.assertEqual(bus.stats["connects"], 1)
+        self.assertGreaterEqual(bus.stats["reconnects"], 2)
+        self._cerrar(bus, "deteccion")
+
+    def test_stream_cortado_se_reconecta(self):
+        bus = self.buses.suscribir({"id": 4, "url": "corta://d"}, "deteccion")
+        self.assertTrue(_esperar(lambda: bus.stats["connects"] >= 2))
+        self._cerrar(bus, "deteccion")
+
+    def test_cambio_de_url_reabre_la_camara(self):
+        bus = self.buses.suscribir({"id": 5, "url": "rtsp://vieja"}, "stream")
+        bus.ultimo()
+        self.buses.suscribir({"id": 5, "url": "rtsp://nueva"}, "deteccion")
+        self.assertTrue(_esperar(lambda: CamaraFalsa.conexiones.get("rtsp://nueva") == 1))
+        self._cerrar(bus, "stream", "deteccion")
+
+
+if __name__ == '__main__':
+    unittest.main()
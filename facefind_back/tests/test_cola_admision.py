@@ -0,0 +1,122 @@
+"""
+Pruebas Unitarias para la cola de admisión de detección
+Módulo: models/cola_admision.py
+
+Descripción:
+Verifica que la cola limita las detecciones simultáneas, que un frame más
+nuevo de la misma cámara reemplaza al que esperaba, que con la cola llena
+se rechaza con Retry-After, que las esperas largas expiran y que las
+cámaras se atienden según su peso (una cámara insistente no acapara el
+motor).
+"""
+
+import unittest
+import threading
+import time
+import sys
+import os
+
+# Agregar el path del proyecto para importar módulos
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from models.cola_admision import ColaAdmision, ADMITIDO, RECHAZADO, REEMPLAZADO, EXPIRADO
+
+
+class TestColaAdmision(unittest.TestCase):
+    """
+    Suite de pruebas unitarias para ColaAdmision
+    """
+
+    def _esperar_en_hilo(self, cola, clave, turnos, peso=1.0):
+        hilo = threading.Thread(target=lambda: turnos.append(cola.entrar(clave, peso=peso)))
+        hilo.start()
+        # Dar tiempo a que el hilo quede en la cola
+        for _ in range(100):
+            if str(clave) in cola.resumen()["queued_cameras"]:
+                break
+            time.sleep(0.01)
+        return hilo
+
+    def test_admite_hasta_el_limite(self):
+        cola = ColaAdmision(max_concurrentes=2, max_cola=0)
+        primero, segundo = cola.entrar(1), cola.entrar(2)
+        self.assertTrue(primero.admitido and segundo.admitido)
+
+        tercero = cola.entrar(3)
+        self.assertEqual(tercero.estado, RECHAZADO)
+        self.assertGreaterEqual(tercero.retry_after, 1)
+        self.assertEqual(cola.resumen()["rejected_full"], 1)
+
+    def test_frame_nuevo_reemplaza_al_viejo(self):
+        cola = ColaAdmision(max_concurrentes=1, max_cola=4, espera_max_s=5)
+        activo = cola.entrar("a")
+
+        turnos = []
+        viejo = self._esperar_en_hilo(cola, "b", turnos)
+        nuevo = self._esperar_en_hilo(cola, "b", turnos)
+        viejo.join(1)
+        self.assertEqual(turnos[0].estado, REEMPLAZADO)
+        self.assertEqual(cola.resumen()["queue_depth"], 1)
+
+        cola.salir(activo)
+        nuevo.join(1)
+        self.assertEqual(turnos[1].estado, ADMITIDO)
+        resumen = cola.resumen()
+        self.assertEqual(resumen["superseded"], 1)
+        self.assertEqual(resumen["in_flight"], 1)
+        self.assertGreater(resumen["wait_ms_p95"], 0)
+
+    def test_p95_con_pocas_muestras(self):
+        cola = ColaAdmision(max_concurrentes=1, max_cola=2, espera_max_s=1)
+        # Con dos esperas el p95 (nearest-rank) es la mayor, no la menor
+        cola._esperas.extend([1.0, 40.0])
+        self.assertEqual(cola.resumen()["wait_ms_p95"], 40.0)
+
+    def test_espera_larga_expira(self):
+        cola = ColaAdmision(max_concurrentes=1, max_cola=2, espera_max_s=0.05)
+        cola.entrar("a")
+        turno = cola.entrar("b")
+        self.assertEqual(turno.estado, EXPIRADO)
+        self.assertEqual(cola.resumen()["queue_depth"], 0)
+        self.assertEqual(cola.resumen()["expired"], 1)
+
+
+    def test_reparto_justo_ponderado(self):
+        cola = ColaAdmision(max_concurrentes=1, max_cola=4, espera_max_s=5)
+        # Una cámara insistente que ya usó el motor varias veces
+        for _ in range(5):
+            turno = cola.entrar("ruidosa")
+            time.sleep(0.01)
+            cola.salir(turno)
+        activo = cola.entrar("ruidosa")
+
+        turnos = []
+        hilos = [self._esperar_en_hilo(cola, clave, turnos, peso)
+                 for clave, peso in (("ruidosa", 1.0), ("normal", 1.0), ("prioritaria", 3.0))]
+
+        orden = []
+        for _ in range(3):
+            cola.salir(activo)
+            for _ in range(100):
+                admitidos = [t for t in turnos if t.admitido and t not in orden]
+                if admitidos:
+                    break
+                time.sleep(0.01)
+            activo = admitidos[0]
+            orden.append(activo)
+            time.sleep(0.01)
+        cola.salir(activo)
+        for hilo in hilos:
+            hilo.join(1)
+
+        # Aunque llegó última, la de peso 3 pasa primero y la insistente al final
+        self.assertEqual([t.clave for t in orden], ["prioritaria", "normal", "ruidosa"])
+
+        resumen = cola.resumen()["cameras"]
+        self.assertEqual(resumen["prioritaria"]["weight"], 3.0)
+        self.assertEqual(resumen["ruidosa"]["admitted"], 7)
+        self.assertGreater(resumen["ruidosa"]["rate_per_s"], 0)
+        self.assertGreater(resumen["ruidosa"]["lag_ms"], 0)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,77 @@
+"""
+Pruebas Unitarias para el cribado de frames
+Módulo: models/cribado_frames.py
+
+Descripción:
+Verifica que el cribado descarta frames vacíos, deja pasar frames con
+movimiento o color de piel, y que las tasas de descarte y de rostros
+perdidos (auditoría) se calculan por cámara.
+"""
+
+import unittest
+import sys
+import os
+
+import numpy as np
+
+# Agregar el path del proyecto para importar módulos
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from models.cribado_frames import CribadoFrames, parsear_modo
+
+
+def _frame(valor_bgr, alto=240, ancho=320):
+    frame = np.zeros((alto, ancho, 3), dtype=np.uint8)
+    frame[:] = valor_bgr
+    return frame
+
+
+class TestCribadoFrames(unittest.TestCase):
+    """
+    Suite de pruebas unitarias para CribadoFrames
+    """
+
+    def setUp(self):
+        self.cribado = CribadoFrames(lado=80)
+
+    def test_parsear_modo(self):
+        self.assertEqual(parsear_modo("motion+skin"), ("motion", "skin"))
+        self.assertEqual(parsear_modo("off"), ())
+        with self.assertRaises(ValueError):
+            parsear_modo("motion+magia")
+
+    def test_sin_modo_siempre_pasa(self):
+        self.assertTrue(self.cribado.hay_candidatos(_frame((0, 0, 0)), "off"))
+
+    def test_movimiento(self):
+        """El primer frame pasa; uno idéntico no; uno distinto sí"""
+        quieto = _frame((40, 40, 40))
+        self.assertTrue(self.cribado.hay_candidatos(quieto, "motion", clave=1))
+        self.assertFalse(self.cribado.hay_candidatos(quieto.copy(), "motion", clave=1))
+
+        movido = quieto.copy()
+        movido[60:140, 100:200] = 220
+        self.assertTrue(self.cribado.hay_candidatos(movido, "motion", clave=1))
+
+        # Cada cámara tiene su propio frame anterior
+        self.assertTrue(self.cribado.hay_candidatos(quieto, "motion", clave=2))
+
+    def test_piel(self):
+        piel = _frame((120, 150, 200))  # BGR de tono piel
+        self.assertTrue(self.cribado.hay_candidatos(piel, "skin"))
+        self.assertFalse(self.cribado.hay_candidatos(_frame((200, 60, 20)), "skin"))
+
+    def test_estadisticas_por_camara(self):
+        self.cribado.registrar(3, paso=True)
+        self.cribado.registrar(3, paso=False)
+        self.cribado.registrar(3, paso=False, auditado=True, rostros_en_auditoria=1)
+        self.cribado.registrar(3, paso=False, auditado=True, rostros_en_auditoria=0)
+
+        stats = self.cribado.resumen()["3"]
+        self.assertEqual(stats["frames"], 4)
+        self.assertEqual(stats["fallback_rate"], 0.25)
+        self.assertEqual(stats["missed_face_rate"], 0.5)
+
+
+if __name__ == '__main__':
+    unittest.main()
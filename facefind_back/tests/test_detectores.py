@@ -0,0 +1,113 @@
+"""
+Pruebas Unitarias para los backends de detección
+Módulo: models/detectores.py
+
+Descripción:
+Verifica el registro de backends, que las cajas salen en formato
+(top, right, bottom, left) recortadas al frame y que el motor permite
+elegir un backend distinto por cámara (descartando ajustes inválidos de
+Config al arrancar).
+"""
+
+import unittest
+import tempfile
+import pickle
+import sys
+import os
+
+import cv2
+import numpy as np
+
+# Agregar el path del proyecto para importar módulos
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from models.detectores import (
+    DetectorDNN,
+    DetectorNoDisponible,
+    DetectorHaar,
+    _caja_desde_xywh,
+    crear_detector
+)
+from models.motor_deteccion import MotorDeteccion
+from models.fuentes_galeria import FuentePickle
+
+
+class TestDetectores(unittest.TestCase):
+    """
+    Suite de pruebas unitarias para los backends de detección
+    """
+
+    def test_caja_recortada_al_frame(self):
+        """Las cajas que se salen del frame se recortan"""
+        self.assertEqual(_caja_desde_xywh(-5, 10, 50, 40, alto=30, ancho=40), (10, 40, 30, 0))
+
+    def test_backend_desconocido(self):
+        with self.assertRaises(ValueError):
+            crear_detector("yolo")
+
+    def test_dnn_sin_modelo(self):
+        """El modelo DNN se lee de disco; si falta se informa"""
+        with self.assertRaises(DetectorNoDisponible):
+            DetectorDNN("no_existe.caffemodel", "no_existe.prototxt")
+
+    def test_instancia_compartida(self):
+        self.assertIs(crear_detector("hog"), crear_detector("HOG"))
+
+    @unittest.skipUnless(hasattr(cv2, "CascadeClassifier"), "OpenCV sin cascadas Haar")
+    def test_haar_frame_vacio(self):
+        rgb = np.zeros((120, 160, 3), dtype=np.uint8)
+        self.assertEqual(DetectorHaar().detectar(rgb), [])
+
+
+class TestDetectorPorCamara(unittest.TestCase):
+    """
+    Ajustes de detector por cámara en el motor
+    """
+
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        path = os.path.join(self.tmpdir.name, "encodings.pickle")
+        with open(path, "wb") as f:
+            pickle.dump({"encodings": [np.zeros(128)], "names": ["Ana"]}, f)
+        self.motor = MotorDeteccion(FuentePickle(path), max_faces=None, enable_parallel=False, model="hog")
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def test_cambio_de_detector_por_camara(self):
+        ajustes = self.motor.set_camera_settings(7, {"detector": "cnn"})
+        self.assertEqual(ajustes["detector"], "cnn")
+        self.assertEqual(self.motor.ajustes_camara(8)["detector"], "hog")
+        self.assertEqual(self.motor._detector_para(ajustes).nombre, "cnn")
+
+        # null vuelve al valor por defecto
+        self.assertEqual(self.motor.set_camera_settings(7, {"detector": None})["detector"], "hog")
+
+    def test_ajuste_invalido(self):
+        with self.assertRaises(ValueError):
+            self.motor.set_camera_settings(7, {"detector": "yolo"})
+        with self.assertRaises(ValueError):
+            self.motor.set_camera_settings(7, {"brillo": 3})
+        with self.assertRaises(ValueError):
+            self.motor.set_camera_settings(7, {"priority": 0})
+
+    def test_prioridad_por_camara(self):
+        self.assertEqual(self.motor.ajustes_camara(7)["priority"], 1.0)
+        self.assertEqual(self.motor.set_camera_settings(7, {"priority": "2.5"})["priority"], 2.5)
+
+
+    def test_ajustes_de_config_invalidos_se_descartan(self):
+        """Lo inválido de CAMERA_DETECTION_SETTINGS se descarta al arrancar"""
+        ajustes = self.motor._ajustes_de_config({
+            3: {"detector": "yolo", "priority": "2", "latency_budget_ms": -1},
+            4: "haar"
+        })
+        self.assertEqual(ajustes, {"3": {"priority": 2.0}})
+
+    def test_detector_desconocido_usa_hog(self):
+        motor = MotorDeteccion(self.motor.fuente, max_faces=None, enable_parallel=False, model="yolo")
+        self.assertEqual(motor.model, "hog")
+        self.assertEqual(motor.detector.nombre, "hog")
+
+if __name__ == '__main__':
+    unittest.main()
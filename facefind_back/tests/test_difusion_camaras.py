@@ -0,0 +1,146 @@
+"""
+Pruebas Unitarias para la difusión compartida de streams
+Módulo: services/difusion_camaras.py
+
+Descripción:
+Verifica que varios clientes de la misma cámara comparten una sola
+captura y codificación, que cada uno recibe el JPEG más reciente a su
+ritmo, que la captura se detiene con el último cliente y que cada perfil
+(ancho, fps, calidad) se reduce y limita antes de codificar.
+"""
+
+import unittest
+import threading
+import time
+import sys
+import os
+
+import numpy as np
+
+# Agregar el path del proyecto para importar módulos
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import cv2
+
+from services.difusion_camaras import GestorDifusion, PerfilStream, perfil_stream
+
+
+class CamaraFalsa:
+    """Cámara en memoria a ~100 fps que cuenta cuántas veces se abrió"""
+    aperturas = 0
+    abiertas = 0
+    lock = threading.Lock()
+
+    def connect(self):
+        with CamaraFalsa.lock:
+            CamaraFalsa.aperturas += 1
+            CamaraFalsa.abiertas += 1
+        return True
+
+    def get_frame(self):
+        time.sleep(0.01)
+        return np.zeros((240, 320, 3), dtype=np.uint8)
+
+    def disconnect(self):
+        with CamaraFalsa.lock:
+            CamaraFalsa.abiertas -= 1
+
+
+class TestDifusionCamaras(unittest.TestCase):
+    """
+    Suite de pruebas unitarias para GestorDifusion
+    """
+
+    def setUp(self):
+        CamaraFalsa.aperturas = 0
+        CamaraFalsa.abiertas = 0
+        self.gestor = GestorDifusion(abrir=lambda camera_data: CamaraFalsa())
+        self.perfil = PerfilStream(max_width=320, fps=30.0, quality=70)
+
+    def test_clientes_comparten_una_captura(self):
+        camara = {"id": 7, "type": "USB", "url": "0"}
+        uno = self.gestor.suscribir(camara, self.perfil)
+        dos = self.gestor.suscribir(camara, self.perfil)
+        self.assertIs(uno, dos)
+
+        seq, jpeg = uno.siguiente(self.perfil, 0)
+        self.assertTrue(jpeg.startswith(b"\xff\xd8"))
+        # Un cliente lento recibe el más reciente, no el siguiente
+        time.sleep(0.1)
+        nuevo_seq, _ = dos.siguiente(self.perfil, seq)
+        self.assertGreater(nuevo_seq, seq + 1)
+
+        resumen = self.gestor.resumen()["cameras"][0]
+        self.assertEqual(resumen["viewers"], 2)
+        self.assertGreater(resumen["fps"], 0)
+        self.assertEqual(CamaraFalsa.aperturas, 1)
+
+        self.gestor.desuscribir(uno, self.perfil)
+        self.gestor.desuscribir(dos, self.perfil)
+        uno.join(2)
+        uno.bus.join(2)
+
+    def test_ultimo_cliente_detiene_la_captura(self):
+        camara = {"id": 8, "type": "USB", "url": "0"}
+        difusor = self.gestor.suscribir(camara, self.perfil)
+        difusor.siguiente(self.perfil, 0)
+        self.gestor.desuscribir(difusor, self.perfil)
+        difusor.join(2)
+        difusor.bus.join(2)
+
+        self.assertFalse(difusor.activo)
+        self.assertEqual(CamaraFalsa.abiertas, 0)
+        self.assertEqual(self.gestor.resumen()["cameras"], [])
+        self.assertEqual(self.gestor.buses.resumen()["cameras"], [])
+
+        # Un cliente nuevo vuelve a abrir la cámara
+        otro = self.gestor.suscribir(camara, self.perfil)
+        self.assertIsNot(otro, difusor)
+        self.assertIsNotNone(otro.siguiente(self.perfil, 0)[1])
+        self.gestor.desuscribir(otro, self.perfil)
+        otro.join(2)
+        otro.bus.join(2)
+
+    def test_perfiles_reducen_y_limitan_fps(self):
+        camara = {"id": 9, "type": "USB", "url": "0"}
+        chico = PerfilStream(max_width=160, fps=5.0, quality=50)
+        difusor = self.gestor.suscribir(camara, self.perfil)
+        self.gestor.suscribir(camara, chico)
+
+        _, jpeg = difusor.siguiente(chico, 0)
+        imagen = cv2.imdecode(np.frombuffer(jpeg, dtype=np.uint8), cv2.IMREAD_COLOR)
+        self.assertEqual(imagen.shape[:2], (120, 160))
+
+        time.sleep(0.6)
+        resumen = {p["max_width"]: p for p in self.gestor.resumen()["cameras"][0]["profiles"]}
+        self.assertLessEqual(resumen[160]["fps_out"], 5.5)
+        self.assertGreater(resumen[320]["fps_out"], resumen[160]["fps_out"])
+
+        self.gestor.desuscribir(difusor, chico)
+        self.gestor.desuscribir(difusor, self.perfil)
+        difusor.join(2)
+        difusor.bus.join(2)
+
+    def test_perfil_por_defecto_de_la_camara(self):
+        camara = {"id": 1, "resolution": "640x480", "fps": 10}
+        self.assertEqual(perfil_stream(camara), PerfilStream(640, 10.0, 70))
+
+        perfil = perfil_stream(camara, {"max_width": "2000", "fps": "2", "quality": "40"})
+        self.assertEqual(perfil, PerfilStream(640, 2.0, 40))
+
+        with self.assertRaises(ValueError):
+            perfil_stream(camara, {"fps": "rápido"})
+
+    def test_el_cliente_no_supera_los_topes(self):
+        from config import Config
+        # Sin resolución guardada el tope es STREAM_MAX_WIDTH
+        perfil = perfil_stream({"id": 2}, {"max_width": "4000", "fps": "60"})
+        self.assertEqual(perfil.max_width, Config.STREAM_MAX_WIDTH)
+        self.assertEqual(perfil.fps, Config.STREAM_MAX_FPS)
+
+        perfil = perfil_stream({"id": 3, "resolution": "1920x1080"}, {"max_width": "1920"})
+        self.assertEqual(perfil.max_width, min(1920, Config.STREAM_MAX_WIDTH))
+
+
+if __name__ == '__main__':
+    unittest.main()
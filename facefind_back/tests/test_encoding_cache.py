@@ -0,0 +1,111 @@
+"""
+Pruebas Unitarias para EncodingCache
+Módulo: services/encoding_cache.py
+
+Descripción:
+Verifica hits/misses por contenido y configuración, el desalojo LRU y el
+registro de fotos duplicadas entre casos.
+"""
+
+import unittest
+import tempfile
+import sys
+import os
+
+import numpy as np
+
+# Agregar el path del proyecto para importar módulos
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from services.encoding_cache import EncodingCache
+
+
+class TestEncodingCache(unittest.TestCase):
+    """
+    Suite de pruebas unitarias para EncodingCache
+    """
+
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmpdir.name, "cache.sqlite3")
+        self.cache = EncodingCache(self.path, max_entries=3)
+        self.settings = {"detector": "hog+cnn", "max_lado": 1024, "upsample": 1, "num_jitters": 1}
+
+    def tearDown(self):
+        self.cache.close()
+        self.tmpdir.cleanup()
+
+    def test_miss_y_luego_hit(self):
+        """Una imagen no vista es miss; tras guardarla devuelve el mismo vector"""
+        image_hash = EncodingCache.hash_bytes(b"imagen-1")
+        self.assertIsNone(self.cache.get(image_hash, self.settings))
+
+        vector = np.arange(128, dtype=np.float64)
+        self.cache.put(image_hash, self.settings, vector, {"detector_usado": "hog"})
+
+        cached_vector, reporte = self.cache.get(image_hash, self.settings)
+        np.testing.assert_array_equal(cached_vector, vector)
+        self.assertEqual(reporte["detector_usado"], "hog")
+        self.assertEqual(self.cache.stats()["hits"], 1)
+
+    def test_otra_configuracion_es_miss(self):
+        """La configuración del detector forma parte de la clave"""
+        image_hash = EncodingCache.hash_bytes(b"imagen-1")
+        self.cache.put(image_hash, self.settings, np.zeros(128), {})
+
+        otra = {**self.settings, "num_jitters": 5}
+        self.assertIsNone(self.cache.get(image_hash, otra))
+
+    def test_sin_rostro_se_cachea(self):
+        """La ausencia de rostro también se guarda (vector None)"""
+        image_hash = EncodingCache.hash_bytes(b"sin-rostro")
+        self.cache.put(image_hash, self.settings, None, {"rostros_detectados": 0})
+
+        cached = self.cache.get(image_hash, self.settings)
+        self.assertIsNotNone(cached)
+        self.assertIsNone(cached[0])
+
+    def test_desalojo_lru(self):
+        """Al superar max_entries se elimina la entrada menos usada"""
+        hashes = [EncodingCache.hash_bytes(f"img-{i}".encode()) for i in range(4)]
+        for h in hashes[:3]:
+            self.cache.put(h, self.settings, np.zeros(128), {})
+
+        # Usar la primera para que la menos reciente sea la segunda
+        self.cache.get(hashes[0], self.settings)
+        self.cache.put(hashes[3], self.settings, np.zeros(128), {})
+
+        self.assertEqual(self.cache.stats()["entries"], 3)
+        self.assertIsNotNone(self.cache.get(hashes[0], self.settings))
+        self.assertIsNone(self.cache.get(hashes[1], self.settings))
+
+    def test_persistencia(self):
+        """Las entradas sobreviven a reabrir el archivo"""
+        image_hash = EncodingCache.hash_bytes(b"persistente")
+        self.cache.put(image_hash, self.settings, np.ones(128), {})
+        self.cache.close()
+
+        self.cache = EncodingCache(self.path, max_entries=3)
+        self.assertIsNotNone(self.cache.get(image_hash, self.settings))
+
+    def test_duplicados_entre_casos(self):
+        """La misma foto en dos casos distintos se marca como duplicada"""
+        image_hash = EncodingCache.hash_bytes(b"foto-compartida")
+
+        self.assertEqual(self.cache.registrar_foto(image_hash, caso_id=1, foto_id=10), [])
+        # Misma foto en el mismo caso no es duplicado entre casos
+        self.assertEqual(self.cache.registrar_foto(image_hash, caso_id=1, foto_id=11), [])
+
+        otros = self.cache.registrar_foto(image_hash, caso_id=2, foto_id=20)
+        self.assertEqual({o["foto_id"] for o in otros}, {10, 11})
+
+        grupos = self.cache.listar_duplicados()
+        self.assertEqual(len(grupos), 1)
+        self.assertEqual(grupos[0]["casos"], [1, 2])
+
+        self.cache.eliminar_foto(20)
+        self.assertEqual(self.cache.listar_duplicados(), [])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,222 @@
+"""
+Pruebas Unitarias para SegmentedEncodingStore
+Módulo: services/encodings_store.py
+
+Descripción:
+Verifica que agregar encodings escribe solo un segmento nuevo, que los
+lectores incrementales cargan únicamente lo que les falta, que la
+compactación no duplica ni pierde encodings ya cargados y que la
+sincronización con el remoto solo transfiere segmentos faltantes.
+"""
+
+import unittest
+import tempfile
+import pickle
+import sys
+import os
+
+import numpy as np
+
+# Agregar el path del proyecto para importar módulos
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from services.encodings_store import SegmentedEncodingStore
+
+
+class RemotoEnMemoria:
+    """Remoto con la misma interfaz que SupabaseStorageRemote, en memoria"""
+
+    def __init__(self):
+        self.objetos = {}
+        self.subidas = []
+        self.descargas = []
+
+    def upload(self, name, data):
+        self.subidas.append(name)
+        self.objetos[name] = bytes(data)
+
+    def download(self, name):
+        self.descargas.append(name)
+        return self.objetos.get(name)
+
+    def remove(self, names):
+        for name in names:
+            self.objetos.pop(name, None)
+
+
+def _vectores(n, semilla=0):
+    rng = np.random.default_rng(semilla)
+    return [rng.random(128) for _ in range(n)]
+
+
+class TestSegmentedEncodingStore(unittest.TestCase):
+    """
+    Suite de pruebas unitarias para SegmentedEncodingStore (solo local)
+    """
+
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.store = SegmentedEncodingStore(os.path.join(self.tmpdir.name, "store"))
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def test_append_escribe_un_segmento_por_caso(self):
+        """Cada append agrega un segmento y actualiza el total"""
+        self.store.append(["Ana"] * 3, _vectores(3), [1, 1, 1])
+        result = self.store.append(["Luis"] * 2, _vectores(2, 1), [2, 2])
+
+        self.assertEqual(result["total_encodings"], 5)
+        self.assertFalse(result["cloud_synced"])
+        self.assertEqual(len(self.store.read_manifest()["segments"]), 2)
+
+    def test_load_new_solo_trae_segmentos_faltantes(self):
+        """Un lector que ya cargó la galería solo recibe el segmento nuevo"""
+        self.store.append(["Ana"] * 3, _vectores(3), [1, 1, 1])
+        data = self.store.load_all()
+        self.assertEqual(len(data["encodings"]), 3)
+
+        self.store.append(["Luis"] * 2, _vectores(2, 1), [2, 2])
+        _, nuevos, recarga = self.store.load_new(data["covers"])
+
+        self.assertFalse(recarga)
+        self.assertEqual(len(nuevos), 1)
+        self.assertEqual(nuevos[0]["names"], ["Luis", "Luis"])
+        self.assertEqual(nuevos[0]["caso_ids"], [2, 2])
+
+    def test_compactacion_transparente_para_lectores(self):
+        """Tras compactar, un lector al día no recibe datos repetidos"""
+        for i in range(4):
+            self.store.append([f"P{i}"], _vectores(1, i), [i])
+        data = self.store.load_all()
+
+        result = self.store.compact(min_segments=3)
+        self.assertEqual(result["merged"], 4)
+        self.assertEqual(len(self.store.read_manifest()["segments"]), 1)
+
+        _, nuevos, recarga = self.store.load_new(data["covers"])
+        self.assertEqual(nuevos, [])
+        self.assertFalse(recarga)
+
+        completo = self.store.load_all()
+        self.assertEqual(completo["names"], ["P0", "P1", "P2", "P3"])
+        np.testing.assert_allclose(completo["encodings"][2], data["encodings"][2])
+
+    def test_compactacion_no_necesaria(self):
+        """Con pocos segmentos no se compacta"""
+        self.store.append(["Ana"], _vectores(1), [1])
+        self.assertIsNone(self.store.compact(min_segments=3))
+
+    def test_migracion_desde_pickle_legado(self):
+        """El encodings.pickle legado se importa una sola vez"""
+        legado = os.path.join(self.tmpdir.name, "encodings.pickle")
+        with open(legado, "wb") as f:
+            pickle.dump({"encodings": _vectores(2), "names": ["Ana", "Luis"]}, f)
+
+        self.assertIsNotNone(self.store.migrate_from_pickle(legado))
+        self.assertIsNone(self.store.migrate_from_pickle(legado))
+
+        data = self.store.load_all()
+        self.assertEqual(data["names"], ["Ana", "Luis"])
+        self.assertEqual(data["caso_ids"], [None, None])
+
+
+class TestSincronizacionDelta(unittest.TestCase):
+    """
+    Sincronización entre dos nodos a través de un remoto compartido
+    """
+
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.remoto = RemotoEnMemoria()
+        self.nodo_a = SegmentedEncodingStore(os.path.join(self.tmpdir.name, "a"), remote=self.remoto)
+        self.nodo_b = SegmentedEncodingStore(os.path.join(self.tmpdir.name, "b"), remote=self.remoto)
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def _segmentos_subidos(self):
+        return [n for n in self.remoto.subidas if n.startswith("seg_")]
+
+    def test_append_sube_solo_el_segmento_nuevo(self):
+        self.nodo_a.append(["Ana"], _vectores(1), [1])
+        self.remoto.subidas.clear()
+
+        result = self.nodo_a.append(["Luis"], _vectores(1, 1), [2])
+
+        self.assertTrue(result["cloud_synced"])
+        self.assertEqual(self._segmentos_subidos(), [result["segment"]["file"]])
+
+    def test_pull_descarga_solo_faltantes_y_verifica_checksum(self):
+        self.nodo_a.append(["Ana"], _vectores(1), [1])
+        primera = self.nodo_b.pull()
+        self.assertEqual(primera["downloaded_segments"], 1)
+
+        self.nodo_a.append(["Luis"], _vectores(1, 1), [2])
+        segunda = self.nodo_b.pull()
+        self.assertEqual(segunda["downloaded_segments"], 1)
+        self.assertEqual(segunda["up_to_date_segments"], 1)
+        self.assertEqual(self.nodo_b.load_all()["names"], ["Ana", "Luis"])
+
+        # Un objeto corrupto en el remoto no se acepta
+        self.nodo_a.append(["Eva"], _vectores(1, 2), [3])
+        nuevo = self.nodo_a.read_manifest()["segments"][-1]["file"]
+        self.remoto.objetos[nuevo] = b"corrupto"
+        tercera = self.nodo_b.pull()
+        self.assertFalse(tercera["success"])
+        self.assertIn("Checksum", tercera["errors"][0]["error"])
+
+    def test_segmento_local_sin_subir_se_publica_despues(self):
+        """Los segmentos que no se pudieron subir quedan pendientes y no se pierden"""
+        self.nodo_a.append(["Ana"], _vectores(1), [1])
+        remoto = self.nodo_b.remote
+        self.nodo_b.remote = None
+        self.nodo_b.append(["Luis"], _vectores(1, 1), [2])  # solo local
+        self.nodo_b.remote = remoto
+
+        pull = self.nodo_b.pull()
+        self.assertEqual(pull["pending_upload"], 1)
+        self.assertEqual(sorted(self.nodo_b.load_all()["names"]), ["Ana", "Luis"])
+
+        push = self.nodo_b.push()
+        self.assertTrue(push["success"])
+        self.assertEqual(push["uploaded_segments"], 1)
+        self.assertEqual(push["skipped_segments"], 1)
+
+        self.nodo_a.pull()
+        self.assertEqual(sorted(self.nodo_a.load_all()["names"]), ["Ana", "Luis"])
+
+    def test_publicacion_concurrente_no_pisa_segmentos(self):
+        """Si otro nodo publica mientras se sube, el manifiesto combina ambos"""
+        self.nodo_a.append(["Ana"], _vectores(1), [1])
+        subir = self.remoto.upload
+        carrera = []
+
+        def subir_con_carrera(name, data):
+            subir(name, data)
+            if name.startswith("seg_") and not carrera:
+                carrera.append(name)
+                self.nodo_b.append(["Luis"], _vectores(1, 1), [2])
+
+        self.remoto.upload = subir_con_carrera
+        result = self.nodo_a.append(["Eva"], _vectores(1, 2), [3])
+        self.remoto.upload = subir
+
+        self.assertTrue(result["cloud_synced"])
+        self.nodo_b.pull()
+        self.assertEqual(sorted(self.nodo_b.load_all()["names"]), ["Ana", "Eva", "Luis"])
+        self.assertEqual(sorted(self.nodo_a.load_all()["names"]), ["Ana", "Eva", "Luis"])
+
+    def test_status_usa_manifiesto_cacheado(self):
+        self.nodo_a.append(["Ana"], _vectores(1), [1])
+        self.remoto.descargas.clear()
+
+        status = self.nodo_a.status()
+
+        self.assertEqual(self.remoto.descargas, [])
+        self.assertTrue(status["in_sync"])
+        self.assertEqual(status["cloud"]["total_encodings"], 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,147 @@
+"""
+Pruebas Unitarias para el grabber de último frame
+Módulos: facefind/camera/frame_grabber.py, facefind/camera/concrete_cameras.py
+
+Descripción:
+Verifica que el grabber lee en segundo plano, que un consumidor lento
+recibe el frame más reciente (con timestamp) y que los frames que nadie
+pidió se cuentan como descartados, que el stream no se libera mientras el
+hilo sigue dentro de read() y que IPCamera en modo grabber lee un video
+real y se desconecta limpio.
+"""
+
+import unittest
+import tempfile
+import threading
+import time
+import sys
+import os
+
+import cv2
+import numpy as np
+
+# Agregar el path del proyecto para importar módulos
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from facefind.camera.frame_grabber import FrameGrabber
+from facefind.camera.concrete_cameras import IPCamera
+
+
+class StreamFalso:
+    """Imita cv2.VideoCapture: entrega n frames numerados a ~200 fps"""
+
+    def __init__(self, n):
+        self.n = n
+        self.i = 0
+        self.leidos = threading.Event()
+
+    def read(self):
+        time.sleep(0.005)
+        if self.i >= self.n:
+            self.leidos.set()
+            return False, None
+        self.i += 1
+        return True, np.full((2, 2, 3), self.i, dtype=np.uint8)
+
+
+class StreamBloqueado:
+    """read() se queda bloqueado hasta que se suelta; registra los release()"""
+
+    def __init__(self):
+        self.soltar = threading.Event()
+        self.leyendo = threading.Event()
+        self.en_read = False
+        self.releases = []
+
+    def read(self):
+        self.en_read = True
+        self.leyendo.set()
+        self.soltar.wait(5)
+        self.en_read = False
+        return False, None
+
+    def release(self):
+        self.releases.append(self.en_read)
+
+
+class TestFrameGrabber(unittest.TestCase):
+    """
+    Suite de pruebas unitarias para FrameGrabber
+    """
+
+    def test_consumidor_lento_recibe_el_ultimo_frame(self):
+        stream = StreamFalso(20)
+        grabber = FrameGrabber(stream, "falsa")
+        grabber.iniciar()
+
+        primero, ts = grabber.ultimo()
+        self.assertIsNotNone(primero)
+        self.assertIsNotNone(ts)
+
+        stream.leidos.wait(2)
+        time.sleep(0.05)
+        # El stream se cortó: se entrega el último frame pendiente y nada más
+        ultimo, _ = grabber.ultimo(timeout=0.1)
+        self.assertEqual(int(ultimo[0, 0, 0]), 20)
+        self.assertEqual(grabber.ultimo(timeout=0.1), (None, None))
+        self.assertEqual(grabber.frames_read, 20)
+        # Entre el primero y el último nadie pidió frames
+        self.assertGreaterEqual(grabber.dropped_frames, 17)
+        grabber.detener()
+
+    def test_frame_mas_reciente(self):
+        stream = StreamFalso(1000)
+        grabber = FrameGrabber(stream, "falsa")
+        grabber.iniciar()
+        grabber.ultimo()
+        time.sleep(0.1)
+
+        frame, _ = grabber.ultimo()
+        # Lo último leído, no el siguiente frame en cola
+        self.assertGreaterEqual(int(frame[0, 0, 0]), stream.i - 1)
+        self.assertIsNotNone(grabber.stats()["frame_age_ms"])
+        grabber.detener()
+        self.assertFalse(grabber.stats()["active"])
+
+    def test_no_libera_el_stream_durante_read(self):
+        stream = StreamBloqueado()
+        grabber = FrameGrabber(stream, "bloqueada")
+        grabber.iniciar()
+        stream.leyendo.wait(1)
+
+        self.assertFalse(grabber.detener(liberar=True, timeout=0.05))
+        self.assertEqual(stream.releases, [])
+
+        # Al salir de read() el hilo libera el stream una sola vez
+        stream.soltar.set()
+        limite = time.time() + 2
+        while not stream.releases and time.time() < limite:
+            time.sleep(0.01)
+        time.sleep(0.05)
+        self.assertEqual(stream.releases, [False])
+        grabber.detener(liberar=True)
+        self.assertEqual(stream.releases, [False])
+
+    def test_ip_camera_en_modo_grabber(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            path = os.path.join(tmpdir, "video.avi")
+            writer = cv2.VideoWriter(path, cv2.VideoWriter_fourcc(*"MJPG"), 10, (32, 24))
+            if not writer.isOpened():
+                self.skipTest("OpenCV sin soporte para escribir video")
+            for i in range(10):
+                writer.write(np.full((24, 32, 3), i * 20, dtype=np.uint8))
+            writer.release()
+
+            camara = IPCamera(path, grabber=True)
+            self.assertTrue(camara.connect())
+            frame, ts = camara.get_frame_with_timestamp()
+            self.assertEqual(frame.shape, (24, 32, 3))
+            self.assertIsNotNone(ts)
+            self.assertIsNotNone(camara.grabber_stats())
+
+            camara.disconnect()
+            self.assertIsNone(camara.get_frame())
+
+
+if __name__ == '__main__':
+    unittest.main()
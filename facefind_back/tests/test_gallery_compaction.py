@@ -0,0 +1,107 @@
+"""
+Pruebas Unitarias para la compactación de galería
+Módulo: services/gallery_compaction.py
+
+Descripción:
+Verifica que los embeddings casi duplicados de un caso se reducen a
+prototipos que cubren a todos los originales, que la verificación top-1 pasa
+y que los casos cuya compactación cambiaría decisiones se dejan intactos.
+"""
+
+import unittest
+import tempfile
+import json
+import sys
+import os
+
+import numpy as np
+
+# Agregar el path del proyecto para importar módulos
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from services.gallery_compaction import compactar_galeria, guardar_reporte
+
+
+def _caso(centro, n, ruido, rng):
+    return [centro + rng.normal(0, ruido, size=centro.shape) for _ in range(n)]
+
+
+class TestCompactacionGaleria(unittest.TestCase):
+    """
+    Suite de pruebas unitarias para compactar_galeria
+    """
+
+    def setUp(self):
+        self.rng = np.random.default_rng(7)
+        # Centros bien separados (distancia ~1) para 3 casos
+        self.centros = [np.eye(128)[i] * 0.7 for i in range(3)]
+
+    def test_casi_duplicados_se_reducen(self):
+        """5 embeddings casi idénticos por caso → 1 prototipo por caso"""
+        encodings, caso_ids = [], []
+        for caso_id, centro in enumerate(self.centros, start=1):
+            encodings += _caso(centro, 5, 0.002, self.rng)
+            caso_ids += [caso_id] * 5
+
+        resultado = compactar_galeria(encodings, caso_ids, radio=0.2, tolerance=0.55)
+
+        self.assertEqual(resultado["original"], 15)
+        self.assertEqual(resultado["compactada"], 3)
+        self.assertEqual(resultado["shrink_factor"], 5.0)
+        self.assertTrue(resultado["verificacion"]["ok"])
+
+        # Cada original queda cubierto exactamente una vez y por su propio caso
+        cubiertos = sorted(i for c in resultado["covers"].values() for i in c)
+        self.assertEqual(cubiertos, list(range(15)))
+        for proto, cubre in resultado["covers"].items():
+            self.assertTrue(all(caso_ids[i] == caso_ids[proto] for i in cubre))
+
+    def test_originales_lejanos_no_se_fusionan(self):
+        """Embeddings de un caso más separados que el radio se conservan"""
+        encodings = [self.centros[0], self.centros[0] + 0.5 * np.eye(128)[10]]
+        resultado = compactar_galeria(encodings, [1, 1], radio=0.2)
+        self.assertEqual(resultado["compactada"], 2)
+
+    def test_sin_caso_no_se_compacta(self):
+        encodings = _caso(self.centros[0], 3, 0.001, self.rng)
+        resultado = compactar_galeria(encodings, [None] * 3, radio=0.2)
+        self.assertEqual(resultado["compactada"], 3)
+
+    def test_caso_que_cambiaria_decisiones_se_revierte(self):
+        """
+        Dos casos que se tocan: sin el original de borde del caso 1, una
+        consulta del caso 2 cambiaría de top-1, así que no se compactan
+        """
+        base = self.centros[0]
+        eje = np.eye(128)[20]
+        encodings = [base, base + 0.25 * eje, base + 0.5 * eje,   # caso 1 en línea
+                     base + 0.62 * eje, base + 0.9 * eje]         # caso 2 a continuación
+        caso_ids = [1, 1, 1, 2, 2]
+
+        resultado = compactar_galeria(encodings, caso_ids, radio=0.3, tolerance=0.55)
+
+        self.assertTrue(resultado["verificacion"]["ok"])
+        self.assertEqual(resultado["verificacion"]["casos_revertidos"], [1, 2])
+        self.assertEqual(resultado["compactada"], 5)
+
+        # Sin verificación sí se habrían fusionado
+        sin_verificar = compactar_galeria(encodings, caso_ids, radio=0.3, verificar=False)
+        self.assertEqual(sin_verificar["compactada"], 2)
+
+    def test_reporte_con_ids(self):
+        encodings = _caso(self.centros[0], 3, 0.001, self.rng)
+        resultado = compactar_galeria(encodings, [9] * 3, radio=0.2)
+
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "reporte.json")
+            guardar_reporte(resultado, ids=[101, 102, 103], path=path)
+            with open(path, "r", encoding="utf-8") as f:
+                reporte = json.load(f)
+
+        self.assertEqual(len(reporte["prototipos"]), 1)
+        self.assertEqual(sorted(reporte["prototipos"][0]["cubre"]), [101, 102, 103])
+        self.assertEqual(reporte["shrink_factor"], 3.0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,150 @@
+"""
+Pruebas Unitarias para la ingesta de cámaras IP
+Módulo: services/ingesta_camaras.py
+
+Descripción:
+Verifica que cada cámara IP activa tiene su hilo, que los frames llegan a
+la detección como arrays respetando la tasa de muestreo, que la ingesta
+toma los frames del bus compartido (sin abrir la cámara otra vez), que
+fuera de horario deja de leer la cámara y que la sincronización para los
+hilos de cámaras desactivadas.
+"""
+
+import unittest
+import threading
+import time
+import sys
+import os
+
+import numpy as np
+
+# Agregar el path del proyecto para importar módulos
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from services.bus_frames import BusFrames
+from services.ingesta_camaras import IngestaCamaras, TrabajadorCamara
+
+
+class CamaraFalsa:
+    """Cámara en memoria a ~500 fps que cuenta sus conexiones por URL"""
+    conexiones = {}
+
+    def __init__(self, camera_data):
+        self.url = camera_data.get("url")
+
+    def connect(self):
+        CamaraFalsa.conexiones[self.url] = CamaraFalsa.conexiones.get(self.url, 0) + 1
+        return True
+
+    def get_frame(self):
+        time.sleep(0.002)
+        return np.zeros((4, 4, 3), dtype=np.uint8)
+
+    def disconnect(self):
+        pass
+
+
+def _esperar(condicion, timeout=2.0):
+    limite = time.time() + timeout
+    while time.time() < limite:
+        if condicion():
+            return True
+        time.sleep(0.01)
+    return False
+
+
+class TestIngestaCamaras(unittest.TestCase):
+    """
+    Suite de pruebas unitarias para IngestaCamaras
+    """
+
+    def setUp(self):
+        CamaraFalsa.conexiones = {}
+        self.procesados = []
+        self._lock = threading.Lock()
+        self.buses = BusFrames(abrir=CamaraFalsa, backoff_max_s=0.05)
+
+    def _procesar(self, frame, camara):
+        with self._lock:
+            self.procesados.append((camara["id"], frame.shape))
+        return None
+
+    def test_muestrea_a_la_tasa_configurada(self):
+        trabajador = TrabajadorCamara({"id": 1, "url": "rtsp://ok"}, self._procesar,
+                                      self.buses, fps_muestreo=10)
+        trabajador.start()
+        time.sleep(0.35)
+        trabajador.detener()
+        trabajador.join(1)
+
+        self.assertEqual(self.procesados[0], (1, (4, 4, 3)))
+        # ~0.35s a 10 fps
+        self.assertGreaterEqual(len(self.procesados), 2)
+        self.assertLessEqual(len(self.procesados), 5)
+        # Con el trabajador detenido nadie más usa la cámara
+        self.assertEqual(self.buses.resumen()["cameras"], [])
+
+    def test_comparte_el_bus_con_otros_consumidores(self):
+        camara = {"id": 2, "type": "IP", "url": "rtsp://compartida"}
+        bus = self.buses.suscribir(camara, "stream")
+        trabajador = TrabajadorCamara(camara, self._procesar, self.buses, fps_muestreo=50)
+        trabajador.start()
+        try:
+            self.assertTrue(_esperar(lambda: len(self.procesados) >= 3))
+            self.assertEqual(CamaraFalsa.conexiones["rtsp://compartida"], 1)
+            self.assertEqual(trabajador.resumen()["bus"]["subscribers"], {"stream": 1, "deteccion": 1})
+        finally:
+            trabajador.detener()
+            trabajador.join(2)
+            self.buses.desuscribir(bus, "stream")
+            bus.join(2)
+
+    def test_fuera_de_horario_suelta_la_camara(self):
+        horario = {"activo": True}
+        trabajador = TrabajadorCamara({"id": 3, "url": "rtsp://horario"}, self._procesar, self.buses,
+                                      fps_muestreo=50, en_horario=lambda c: horario["activo"],
+                                      revision_s=0.02)
+        trabajador.start()
+        try:
+            self.assertTrue(_esperar(lambda: len(self.procesados) >= 2))
+
+            horario["activo"] = False
+            self.assertTrue(_esperar(lambda: trabajador.estado == "off_hours"))
+            self.assertTrue(_esperar(lambda: self.buses.resumen()["cameras"] == []))
+            procesados = len(self.procesados)
+            time.sleep(0.1)
+            self.assertEqual(len(self.procesados), procesados)
+
+            # De vuelta en horario se vuelve a suscribir
+            horario["activo"] = True
+            self.assertTrue(_esperar(lambda: len(self.procesados) > procesados))
+            self.assertEqual(trabajador.estado, "sampling")
+        finally:
+            trabajador.detener()
+            trabajador.join(2)
+
+    def test_sincronizar_sigue_la_tabla(self):
+        camaras = [
+            {"id": 1, "type": "IP", "url": "rtsp://a", "activa": True},
+            {"id": 2, "type": "USB", "url": "0", "activa": True},
+        ]
+        ingesta = IngestaCamaras(self._procesar, listar_camaras=lambda: list(camaras),
+                                 buses=self.buses)
+        try:
+            self.assertEqual(ingesta.sincronizar()["started"], [1])
+            self.assertEqual(list(ingesta.trabajadores), [1])
+
+            camaras[0] = {**camaras[0], "url": "rtsp://b"}
+            cambios = ingesta.sincronizar()
+            self.assertEqual(cambios["stopped"], [1])
+            self.assertEqual(ingesta.trabajadores[1].url, "rtsp://b")
+
+            camaras.pop(0)
+            self.assertEqual(ingesta.sincronizar()["stopped"], [1])
+            self.assertEqual(ingesta.resumen()["cameras"], [])
+        finally:
+            ingesta.detener()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,67 @@
+"""
+Pruebas Unitarias para el intervalo de captura sugerido
+Módulo: models/intervalo_captura.py
+
+Descripción:
+Verifica que las cámaras con rostros o matches se muestrean más rápido
+que las quietas y que la presión de la cola de admisión alarga el
+intervalo sugerido.
+"""
+
+import unittest
+import sys
+import os
+
+# Agregar el path del proyecto para importar módulos
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from models.intervalo_captura import AsesorIntervalo, presion_cola
+
+
+def _resultado(rostros=0, match=False, candidatos=None):
+    resultado = {
+        "total_faces_detected": rostros,
+        "faces": [{"match_found": match}] * rostros
+    }
+    if candidatos is not None:
+        resultado["prescreen"] = {"candidates": candidatos}
+    return resultado
+
+
+class TestAsesorIntervalo(unittest.TestCase):
+    """
+    Suite de pruebas unitarias para AsesorIntervalo
+    """
+
+    def setUp(self):
+        self.asesor = AsesorIntervalo(minimo_s=1.0, maximo_s=10.0, match_hold_s=30.0)
+
+    def test_camara_quieta_se_muestrea_lento(self):
+        for _ in range(20):
+            self.asesor.registrar(1, _resultado(candidatos=False))
+            self.asesor.registrar(2, _resultado(rostros=1))
+
+        self.assertGreater(self.asesor.recomendar(1), 9000)
+        self.assertLess(self.asesor.recomendar(2), 1500)
+
+    def test_camara_nueva_empieza_rapido(self):
+        self.assertEqual(self.asesor.recomendar(99), 1000)
+
+    def test_match_mantiene_el_minimo(self):
+        self.asesor.registrar(3, _resultado(rostros=1, match=True))
+        for _ in range(20):
+            self.asesor.registrar(3, _resultado())
+        self.assertEqual(self.asesor.recomendar(3), 1000)
+        # Mientras dura el match la cámara pesa más en la cola de detección
+        self.assertEqual(self.asesor.actividad_matches(3), 1.0)
+        self.assertEqual(self.asesor.actividad_matches(99), 0.0)
+
+    def test_presion_de_la_cola_alarga_el_intervalo(self):
+        cola = {"max_concurrent": 2, "max_queue": 4, "in_flight": 2, "queue_depth": 4}
+        self.assertEqual(presion_cola(cola), 1.0)
+        self.assertEqual(presion_cola({**cola, "queue_depth": 0}), 0.0)
+        self.assertEqual(self.asesor.recomendar(99, presion=1.0), 3000)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,360 @@
+"""
+Pruebas Unitarias para el motor de detección y sus fuentes de galería
+Módulos: models/motor_deteccion.py, models/fuentes_galeria.py
+
+Descripción:
+Verifica que el motor carga la misma galería desde cualquier fuente
+(pickle, almacén segmentado, snapshot memory-mapped), que filtra casos no
+accionables cuando la fuente conoce los estados, que las actualizaciones
+incrementales solo agregan lo nuevo y que los puntos de entrada legados
+(facefind/procesador_facefind.py, services/face_detection_service.py)
+conservan su salida de siempre.
+"""
+
+import unittest
+import tempfile
+import pickle
+import sys
+import os
+
+import numpy as np
+
+# Agregar el path del proyecto para importar módulos
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from models.motor_deteccion import MotorDeteccion
+from models.detectores import DetectorRostros
+from models.fuentes_galeria import (
+    FuenteGaleria,
+    FuentePickle,
+    FuenteAlmacenSegmentado,
+    FuenteSnapshotMmap,
+    galeria_vacia
+)
+from services import encodings_store, gallery_compaction
+from services.encodings_store import SegmentedEncodingStore
+from services.face_detection_service import FaceDetectionService
+from facefind.procesador_facefind import ProcesadorFaceFind as ProcesadorLegado
+
+
+def _vectores(n, semilla=0):
+    rng = np.random.default_rng(semilla)
+    return [rng.normal(0, 0.1, size=128) for _ in range(n)]
+
+
+class FuenteEnMemoria(FuenteGaleria):
+    """Fuente con estados de caso, como la de Supabase"""
+    nombre = "memoria"
+
+    def __init__(self, filas):
+        self.filas = filas
+
+    def _galeria(self, filas):
+        galeria = galeria_vacia(con_estados=True)
+        for vector, nombre, caso_id, status in filas:
+            galeria["encodings"].append(vector)
+            galeria["names"].append(nombre)
+            galeria["caso_ids"].append(caso_id)
+            galeria["embedding_ids"].append(None)
+            galeria["statuses"].append(status)
+        return galeria
+
+    def cargar(self):
+        return self._galeria(self.filas)
+
+    def cargar_caso(self, caso_id):
+        return self._galeria([f for f in self.filas if f[2] == caso_id])
+
+
+class DetectorFijo(DetectorRostros):
+    """Backend que siempre devuelve las mismas cajas"""
+    nombre = "hog"
+
+    def __init__(self, cajas):
+        self.cajas = cajas
+
+    def detectar(self, rgb, gray=None, upsample=None):
+        return list(self.cajas)
+
+
+class TestMotorDeteccion(unittest.TestCase):
+    """
+    Suite de pruebas unitarias para MotorDeteccion
+    """
+
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.vectores = _vectores(4)
+        self.pickle_path = os.path.join(self.tmpdir.name, "encodings.pickle")
+        with open(self.pickle_path, "wb") as f:
+            pickle.dump({"encodings": self.vectores, "names": ["Ana", "Ana", "Luis", "Eva"]}, f)
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def _motor(self, fuente):
+        return MotorDeteccion(fuente, tolerance=0.55, max_faces=None, enable_parallel=False)
+
+    def test_mismo_resultado_con_cualquier_fuente(self):
+        """Pickle, almacén segmentado y snapshot dan el mismo match"""
+        store = SegmentedEncodingStore(os.path.join(self.tmpdir.name, "store"))
+        motor_pickle = self._motor(FuentePickle(self.pickle_path))
+        motor_store = self._motor(FuenteAlmacenSegmentado(self.pickle_path, store=store))
+
+        snapshot = os.path.join(self.tmpdir.name, "galeria")
+        motor_pickle.export_snapshot(snapshot)
+        motor_mmap = self._motor(FuenteSnapshotMmap(snapshot))
+
+        consulta = self.vectores[2] + 0.001
+        resultados = [m.compare_with_known_faces(consulta) for m in (motor_pickle, motor_store, motor_mmap)]
+
+        for resultado in resultados:
+            self.assertTrue(resultado["match_found"])
+            self.assertEqual(resultado["best_match_name"], "Luis")
+            self.assertEqual(resultado["all_similarities"], resultados[0]["all_similarities"])
+
+    def test_snapshot_usa_memmap_sin_copiar(self):
+        snapshot = os.path.join(self.tmpdir.name, "galeria")
+        self._motor(FuentePickle(self.pickle_path)).export_snapshot(snapshot)
+
+        motor = self._motor(FuenteSnapshotMmap(snapshot))
+        matriz = motor._matriz_para(motor.known_encodings)
+        self.assertIsInstance(matriz, np.memmap)
+        self.assertEqual(matriz.shape, (4, 128))
+
+    def test_snapshot_publica_matriz_y_metadatos_juntos(self):
+        """Reescribir el snapshot no toca la matriz que otro proceso tiene mapeada"""
+        snapshot = os.path.join(self.tmpdir.name, "galeria")
+        origen = self._motor(FuentePickle(self.pickle_path))
+        origen.export_snapshot(snapshot)
+        motor_viejo = self._motor(FuenteSnapshotMmap(snapshot))
+
+        origen.add_new_face(_vectores(1, semilla=9)[0], "Nuevo")
+        resultado = origen.export_snapshot(snapshot)
+        motor_nuevo = self._motor(FuenteSnapshotMmap(snapshot))
+
+        matrices = [f for f in os.listdir(self.tmpdir.name) if f.endswith(".npy")]
+        self.assertEqual(matrices, [os.path.basename(resultado["matrix"])])
+        self.assertEqual(len(motor_nuevo.known_encodings), 5)
+        self.assertEqual(len(motor_viejo.known_encodings), 4)
+        self.assertTrue(motor_viejo.compare_with_known_faces(self.vectores[2] + 0.001)["match_found"])
+
+    def test_compactacion_no_pisa_cambios_concurrentes(self):
+        """Un rostro agregado mientras se compacta no se pierde"""
+        v = _vectores(2, semilla=3)
+        filas = [(v[0] + 0.001 * i, "Ana", 1, "activo") for i in range(4)] + [(v[1], "Luis", 2, "activo")]
+        motor = self._motor(FuenteEnMemoria(filas))
+        original = gallery_compaction.compactar_galeria
+        llamadas = []
+
+        def compactar_con_alta(*args, **kwargs):
+            resultado = original(*args, **kwargs)
+            if not llamadas:
+                motor.add_new_face(v[1] + 0.3, "Eva")
+            llamadas.append(len(args[0]))
+            return resultado
+
+        gallery_compaction.compactar_galeria = compactar_con_alta
+        try:
+            resultado = motor.compact_gallery(radio=0.3, guardar_reporte=False)
+        finally:
+            gallery_compaction.compactar_galeria = original
+
+        self.assertTrue(resultado["aplicada"])
+        self.assertEqual(llamadas, [5, 6])
+        self.assertIn("Eva", motor.known_names)
+        self.assertEqual(len(motor.known_encodings), 3)
+        self.assertEqual(len(motor.known_names), len(motor.known_embedding_ids))
+
+    def test_filtra_casos_no_accionables(self):
+        """Con estados conocidos solo entran los casos accionables"""
+        v = _vectores(3, 1)
+        fuente = FuenteEnMemoria([(v[0], "Ana", 1, "activo"), (v[1], "Luis", 2, "resuelto"),
+                                  (v[2], "Eva", 3, "pendiente")])
+        motor = self._motor(fuente)
+
+        self.assertEqual(motor.known_caso_ids, [1, 3])
+        self.assertEqual(motor.case_statuses[2], "resuelto")
+
+        # Reabrir el caso lo vuelve a meter sin recargar todo
+        self.assertEqual(motor.on_case_status_changed(2, "activo")["action"], "admitted")
+        self.assertIn(2, motor.known_caso_ids)
+
+    def test_actualizacion_incremental_del_almacen(self):
+        store = SegmentedEncodingStore(os.path.join(self.tmpdir.name, "store"))
+        motor = self._motor(FuenteAlmacenSegmentado(self.pickle_path, store=store))
+        self.assertEqual(len(motor.known_encodings), 4)
+
+        store.append(["Mia"], _vectores(1, 5), [9])
+        resultado = motor.refresh_gallery()
+
+        self.assertFalse(resultado["full_reload"])
+        self.assertEqual(resultado["added"], 1)
+        self.assertEqual(motor.known_names[-1], "Mia")
+
+    def test_frame_sin_rostros(self):
+        motor = self._motor(FuentePickle(self.pickle_path))
+        resultado = motor.process_frame(np.zeros((120, 160, 3), dtype=np.uint8))
+        self.assertEqual(resultado["total_faces_detected"], 0)
+        self.assertEqual(resultado["faces"], [])
+
+    def test_cribado_retorna_antes_del_detector(self):
+        """Con cribado por movimiento, un frame repetido no pasa al detector"""
+        motor = self._motor(FuentePickle(self.pickle_path))
+        motor.prescreen_audit_rate = 0.0
+        motor.set_camera_settings(5, {"prescreen": "motion"})
+        frame = np.full((120, 160, 3), 40, dtype=np.uint8)
+
+        primero = motor.process_frame(frame, camara_id=5)
+        segundo = motor.process_frame(frame, camara_id=5)
+
+        self.assertFalse(primero["prescreen"]["skipped"])
+        self.assertTrue(segundo["prescreen"]["skipped"])
+        self.assertEqual(motor.cribado.resumen()["5"]["fallback_rate"], 0.5)
+
+        # Otra cámara sin cribado no se ve afectada
+        self.assertNotIn("prescreen", motor.process_frame(frame, camara_id=6))
+
+    def test_rechazo_de_rostros_pequenos_y_borrosos(self):
+        """Los rostros pequeños o borrosos se cuentan y no se codifican"""
+        rng = np.random.default_rng(1)
+        frame = np.full((240, 320, 3), 90, dtype=np.uint8)
+        frame[10:110, 10:110] = rng.integers(0, 255, size=(100, 100, 3))   # nítido
+        frame[200:216, 20:36] = rng.integers(0, 255, size=(16, 16, 3))   # pequeño
+        # (130, 290, 230, 190): plano, sin bordes → borroso
+
+        motor = self._motor(FuentePickle(self.pickle_path))
+        motor.min_face_size, motor.min_sharpness = 24, 10.0
+        motor.detector = DetectorFijo([(10, 110, 110, 10), (200, 36, 216, 20), (130, 290, 230, 190)])
+
+        total, rostros, rechazados = motor.detect_faces(frame)
+
+        self.assertEqual(total, 3)
+        self.assertEqual(rechazados, {"too_small": 1, "blurry": 1})
+        self.assertEqual([r["face_id"] for r in rostros], [0])
+        self.assertEqual(len(rostros[0]["encoding"]), 128)
+
+        resultado = motor.process_frame(frame)
+        self.assertEqual(resultado["rejected_faces"], {"too_small": 1, "blurry": 1})
+
+    def test_presupuesto_de_latencia_degrada(self):
+        """Con presupuesto mínimo se degrada y se reporta en el resultado"""
+        rng = np.random.default_rng(2)
+        frame = np.full((240, 320, 3), 90, dtype=np.uint8)
+        frame[10:110, 10:110] = rng.integers(0, 255, size=(100, 100, 3))
+        frame[120:220, 200:300] = rng.integers(0, 255, size=(100, 100, 3))
+
+        motor = self._motor(FuentePickle(self.pickle_path))
+        motor.detector = DetectorFijo([(10, 110, 110, 10), (120, 300, 220, 200)])
+
+        resultado = motor.process_frame(frame, latency_budget_ms=0.001)
+        self.assertIn("max_faces_1", resultado["degradations"])
+        self.assertEqual(resultado["faces_processed"], 1)
+        self.assertEqual(motor.planificador.resumen()["requests"], 1)
+
+        # Sin presupuesto no aparece nada de latencia
+        self.assertNotIn("degradations", motor.process_frame(frame))
+
+    def test_prefiltro_exacto_para_top_matches_mayor_a_3(self):
+        """Con top_matches=5 las 5 coincidencias son las de la búsqueda exhaustiva"""
+        for semilla in range(40):
+            rng = np.random.default_rng(semilla)
+            filas, centros = [], []
+            for caso_id in range(12):
+                centros.append(rng.normal(0, 0.05, size=128))
+                for _ in range(3):
+                    filas.append((centros[-1] + rng.normal(0, 0.005, size=128), f"P{caso_id}", caso_id, "activo"))
+            motor = MotorDeteccion(FuenteEnMemoria(filas), max_faces=None, enable_parallel=False,
+                                   top_matches=5)
+            motor.prefilter_enabled, motor.prefilter_top_m = True, 1
+            # Consulta pegada a un caso: sus 3 embeddings ya llenan un top-3
+            consulta = centros[semilla % 12] + rng.normal(0, 0.005, size=128)
+
+            con_prefiltro = motor.compare_with_known_faces(consulta)
+            motor.prefilter_enabled = False
+            exhaustiva = motor.compare_with_known_faces(consulta)
+
+            self.assertIn("prefilter", con_prefiltro)
+            self.assertEqual(len(exhaustiva["all_similarities"]), 5)
+            self.assertEqual(con_prefiltro["all_similarities"], exhaustiva["all_similarities"], semilla)
+
+    def test_recargar_galeria_conserva_ajustes_y_estadisticas(self):
+        motor = self._motor(FuentePickle(self.pickle_path))
+        motor.set_camera_settings(5, {"prescreen": "motion", "priority": 3})
+        motor.process_frame(np.zeros((120, 160, 3), dtype=np.uint8), camara_id=5)
+        cribado, planificador = motor.cribado, motor.planificador
+
+        with open(self.pickle_path, "wb") as f:
+            pickle.dump({"encodings": _vectores(2, 7), "names": ["Mia", "Leo"]}, f)
+        self.assertEqual(motor.reload_gallery(), 2)
+        self.assertEqual(motor.known_names, ["Mia", "Leo"])
+        self.assertEqual(motor.ajustes_camara(5)["priority"], 3.0)
+        self.assertIs(motor.cribado, cribado)
+        self.assertIs(motor.planificador, planificador)
+
+        # Un motor reconstruido hereda lo cambiado en caliente
+        nuevo = self._motor(FuentePickle(self.pickle_path))
+        nuevo.heredar_estado(motor)
+        self.assertEqual(nuevo.ajustes_camara(5)["prescreen"], "motion")
+        self.assertEqual(nuevo.cribado.resumen(), cribado.resumen())
+
+
+class TestEntradasLegadas(unittest.TestCase):
+    """
+    Suite de pruebas para los envoltorios legados sobre MotorDeteccion
+    """
+
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.pickle_path = os.path.join(self.tmpdir.name, "encodings.pickle")
+        with open(self.pickle_path, "wb") as f:
+            pickle.dump({"encodings": _vectores(6, 3), "names": ["Ana", "Luis", "Eva", "Mia", "Leo", "Sol"]}, f)
+
+        # Frame con un rostro nítido, uno pequeño y uno plano (borroso)
+        rng = np.random.default_rng(4)
+        self.frame = np.full((240, 320, 3), 90, dtype=np.uint8)
+        self.frame[10:110, 10:110] = rng.integers(0, 255, size=(100, 100, 3))
+        self.frame[200:216, 20:36] = rng.integers(0, 255, size=(16, 16, 3))
+        self.cajas = [(200, 36, 216, 20), (10, 110, 110, 10), (130, 290, 230, 190)]
+
+        # Almacén segmentado temporal para FaceDetectionService
+        self._store_anterior = encodings_store._store
+        encodings_store._store = SegmentedEncodingStore(os.path.join(self.tmpdir.name, "store"))
+
+    def tearDown(self):
+        encodings_store._store = self._store_anterior
+        self.tmpdir.cleanup()
+
+    def test_procesador_legado_sin_filtro_ni_deduplicacion(self):
+        procesador = ProcesadorLegado(tolerance=0.6, encodings_path=self.pickle_path)
+        procesador.detector = DetectorFijo(self.cajas)
+
+        resultado = procesador.process_frame(self.frame)
+
+        # Todos los rostros, en orden de detección, aunque se parezcan a la misma persona
+        self.assertEqual([f["face_id"] for f in resultado["faces"]], [0, 1, 2])
+        for rostro in resultado["faces"]:
+            self.assertEqual(len(rostro["all_similarities"]), 3)
+            self.assertIn(rostro["best_match_name"], ["Ana", "Luis", "Eva", "Mia", "Leo", "Sol"])
+
+    def test_servicio_legado_top5_desconocido_y_resultado_seguro(self):
+        servicio = FaceDetectionService(self.pickle_path, tolerance=0.0)
+        # El servicio detecta sobre el frame reducido 4x
+        servicio.detection_scale = 1
+        servicio.detector = DetectorFijo(self.cajas)
+
+        resultado = servicio.process_frame(self.frame)
+        self.assertEqual(len(resultado["faces"]), 3)
+        for rostro in resultado["faces"]:
+            self.assertFalse(rostro["match_found"])
+            self.assertEqual(rostro["best_match_name"], "Desconocido")
+            self.assertEqual(len(rostro["all_similarities"]), 5)
+
+        servicio.detector = None
+        resultado = servicio.process_frame(self.frame)
+        self.assertEqual((resultado["faces_detected"], resultado["faces"]), (0, []))
+        self.assertIn("error", resultado)
+
+
+if __name__ == '__main__':
+    unittest.main()
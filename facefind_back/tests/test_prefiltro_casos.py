@@ -0,0 +1,80 @@
+"""
+Pruebas Unitarias para el prefiltro por caso
+Módulo: models/prefiltro_casos.py
+
+Descripción:
+Verifica que el prefiltro de centroides devuelve el mismo mejor match y el
+mismo top-3 que la comparación contra toda la galería, evaluando menos
+embeddings.
+"""
+
+import unittest
+import sys
+import os
+
+import numpy as np
+import face_recognition
+
+# Agregar el path del proyecto para importar módulos
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from models.prefiltro_casos import PrefiltroCasos
+
+
+def _galeria(num_casos, por_caso, rng):
+    encodings, caso_ids = [], []
+    for caso_id in range(num_casos):
+        centro = rng.normal(0, 0.1, size=128)
+        for _ in range(por_caso):
+            encodings.append(centro + rng.normal(0, 0.02, size=128))
+            caso_ids.append(caso_id)
+    return encodings, caso_ids
+
+
+def _top3(indices, distancias):
+    pares = sorted(zip(indices, distancias), key=lambda x: x[0])
+    return [int(i) for i, _ in sorted(pares, key=lambda x: round(float(x[1]), 4))[:3]]
+
+
+class TestPrefiltroCasos(unittest.TestCase):
+    """
+    Suite de pruebas unitarias para PrefiltroCasos
+    """
+
+    def setUp(self):
+        self.rng = np.random.default_rng(3)
+        self.encodings, self.caso_ids = _galeria(40, 6, self.rng)
+        self.prefiltro = PrefiltroCasos(self.encodings, self.caso_ids)
+
+    def test_mismo_resultado_que_busqueda_completa(self):
+        """Para consultas cercanas a casos y aleatorias el top-3 no cambia"""
+        consultas = [self.encodings[i] + self.rng.normal(0, 0.02, size=128) for i in range(0, 240, 7)]
+        consultas += [self.rng.normal(0, 0.1, size=128) for _ in range(10)]
+
+        for consulta in consultas:
+            completas = face_recognition.face_distance(self.encodings, consulta)
+            indices, distancias, _ = self.prefiltro.buscar(consulta, top_m=5)
+
+            self.assertEqual(int(indices[np.argmin(distancias)]), int(np.argmin(completas)))
+            self.assertEqual(_top3(indices, distancias), _top3(range(len(completas)), completas))
+
+    def test_reduce_comparaciones(self):
+        """Con casos separados solo se comparan los casos preseleccionados"""
+        consulta = self.encodings[12] + self.rng.normal(0, 0.01, size=128)
+        _, _, info = self.prefiltro.buscar(consulta, top_m=5)
+
+        self.assertEqual(info["cases_total"], 40)
+        self.assertEqual(info["embeddings_total"], 240)
+        self.assertLess(info["embeddings_compared"], 240)
+        self.assertGreater(info["pruned_fraction"], 0.5)
+
+    def test_pocos_embeddings_evalua_todo(self):
+        """Si no hay k resultados en la preselección se evalúan todos los casos"""
+        prefiltro = PrefiltroCasos(self.encodings[:12], self.caso_ids[:12])
+        indices, _, info = prefiltro.buscar(self.encodings[0], top_m=1, k=20)
+        self.assertEqual(info["cases_evaluated"], 2)
+        self.assertEqual(list(indices), list(range(12)))
+
+
+if __name__ == '__main__':
+    unittest.main()
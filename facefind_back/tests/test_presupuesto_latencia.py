@@ -0,0 +1,75 @@
+"""
+Pruebas Unitarias para la planificación por presupuesto de latencia
+Módulo: models/presupuesto_latencia.py
+
+Descripción:
+Verifica que con presupuesto holgado no se degrada nada, que con
+presupuesto ajustado las degradaciones se aplican en orden (upsample,
+escala, rostros, calidad) y que los costos se ajustan con las mediciones.
+"""
+
+import unittest
+import sys
+import os
+
+# Agregar el path del proyecto para importar módulos
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from models.presupuesto_latencia import PlanificadorLatencia
+
+
+class TestPlanificadorLatencia(unittest.TestCase):
+    """
+    Suite de pruebas unitarias para PlanificadorLatencia
+    """
+
+    def setUp(self):
+        self.planificador = PlanificadorLatencia()
+
+    def test_presupuesto_holgado_sin_degradar(self):
+        plan = self.planificador.planificar(5000, 0, 0.3, "hog", 1, 3)
+        self.assertEqual(plan["degradations"], [])
+        self.assertEqual(plan["upsample"], 1)
+        self.assertEqual(plan["scale_extra"], 1)
+
+    def test_primero_se_quita_el_upsample(self):
+        # hog/up1 ≈ 180ms sobre 0.3MPx, hog/up0 ≈ 45ms
+        plan = self.planificador.planificar(100, 0, 0.3, "hog", 1, 3)
+        self.assertEqual(plan["degradations"], ["skip_upsample"])
+        self.assertEqual(plan["upsample"], 0)
+
+    def test_degradaciones_en_orden(self):
+        plan = self.planificador.planificar(5, 0, 2.0, "hog", 1, 3)
+        self.assertEqual(plan["degradations"],
+                         ["skip_upsample", "downscale_x4", "max_faces_1", "skip_quality"])
+        self.assertEqual(plan["max_faces"], 1)
+        self.assertTrue(plan["skip_quality"])
+
+    def test_tiempo_gastado_cuenta(self):
+        plan = self.planificador.planificar(300, 250, 0.3, "hog", 1, 3)
+        self.assertIn("skip_upsample", plan["degradations"])
+
+    def test_dnn_no_se_reduce(self):
+        plan = self.planificador.planificar(1, 0, 2.0, "dnn", 0, 3)
+        self.assertNotIn("skip_upsample", plan["degradations"])
+        self.assertFalse(any(d.startswith("downscale") for d in plan["degradations"]))
+        self.assertEqual(plan["scale_extra"], 1)
+
+    def test_rostros_que_caben(self):
+        self.assertEqual(self.planificador.rostros_que_caben(65), 3)
+        self.assertEqual(self.planificador.rostros_que_caben(0), 1)
+
+    def test_mediciones_ajustan_costos(self):
+        antes = self.planificador.ms_por_mpx[("hog", 0)]
+        self.planificador.registrar_deteccion("hog", 0, 1.0, antes * 2, 2)
+        self.assertGreater(self.planificador.ms_por_mpx[("hog", 0)], antes)
+
+        self.planificador.registrar_request(degradado=True, a_tiempo=False)
+        resumen = self.planificador.resumen()
+        self.assertEqual(resumen["requests"], 1)
+        self.assertEqual(resumen["deadline_missed"], 1)
+        self.assertIn("hog/up0", resumen["ms_per_mpx"])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -20,25 +20,25 @@ const OffHoursLogs = () => {
     loadStats();
   }, [filters]);
 
-  const loadLogs = () => {
+  const loadLogs = async () => {
     const filterObj = {};
     if (filters.cameraId) filterObj.cameraId = filters.cameraId;
     if (filters.startDate) filterObj.startDate = filters.startDate;
     if (filters.endDate) filterObj.endDate = filters.endDate;
     if (filters.isCritical !== '') filterObj.isCritical = filters.isCritical === 'true';
 
-    const allLogs = getOffHoursLogs(filterObj);
+    const allLogs = await getOffHoursLogs(filterObj);
     setLogs(allLogs);
   };
 
-  const loadStats = () => {
-    const statistics = getLogsStatistics();
+  const loadStats = async () => {
+    const statistics = await getLogsStatistics();
     setStats(statistics);
   };
 
-  const handleClearOldLogs = () => {
+  const handleClearOldLogs = async () => {
     if (window.confirm('¿Eliminar logs mayores a 30 días?')) {
-      const result = clearOldLogs(30);
+      const result = await clearOldLogs(30);
       if (result.success) {
         alert(`Se eliminaron ${result.removedCount} logs`);
         loadLogs();
@@ -1,6 +1,7 @@
 import React, { useState, useRef, useEffect } from 'react';
 import '../../styles/camera/CameraCard.css';
 import { detectFaces } from '../../services/detectionService';
+import { getStreamUrl } from '../../services/cameraService';
 
 interface Camera {
     id?: number;
@@ -293,7 +294,7 @@ const CameraCard: React.FC<CameraCardProps> = ({ camera, onEdit, onDelete, onTog
                         {camera.activa ? (
                             <div className="video-wrapper">
                                 <img 
-                                    src={`http://localhost:5000/cameras/${camera.id}/stream`}
+                                    src={getStreamUrl(camera.id, { maxWidth: 640, fps: 10 })}
                                     alt={`Stream de ${camera.nombre}`}
                                     className="camera-stream"
                                     crossOrigin="anonymous"
@@ -66,6 +66,10 @@ const CameraViewer: React.FC<CameraViewerProps> = ({
     // Estados para reconocimiento en tiempo real
     const [isRealTimeActive, setIsRealTimeActive] = useState<boolean>(false);
     const [intervalSeconds, setIntervalSeconds] = useState<number>(3);
+    // Intervalo adaptativo: el backend sugiere cuándo mandar el próximo frame
+    const [adaptiveInterval, setAdaptiveInterval] = useState<boolean>(true);
+    const [suggestedMs, setSuggestedMs] = useState<number | null>(null);
+    const realTimeActiveRef = useRef<boolean>(false);
 
     // Parsear dimensiones una sola vez
     const [videoWidth, videoHeight] = React.useMemo(() => {
@@ -196,8 +200,9 @@ const CameraViewer: React.FC<CameraViewerProps> = ({
             console.log('🧹 Limpiando recursos de cámara...');
             
             // Detener reconocimiento en tiempo real si está activo
+            realTimeActiveRef.current = false;
             if (intervalRef.current) {
-                clearInterval(intervalRef.current);
+                clearTimeout(intervalRef.current);
                 intervalRef.current = null;
             }
             
@@ -256,7 +261,8 @@ const CameraViewer: React.FC<CameraViewerProps> = ({
         };
     }, [cameraSettings, videoWidth, videoHeight, useMjpeg]);
 
-    const captureAndRecognize = async () => {
+    // Devuelve el intervalo sugerido por el backend para el próximo frame (ms)
+    const captureAndRecognize = async (): Promise<number | null> => {
         // Fuente de video puede ser video o img
         const videoSource = useMjpeg ? imgRef.current : videoRef.current;
         
@@ -266,7 +272,7 @@ const CameraViewer: React.FC<CameraViewerProps> = ({
                 hasCanvas: !!canvasRef.current,
                 isProcessing
             });
-            return;
+            return null;
         }
 
         // Validar que la imagen/video tenga dimensiones válidas
@@ -274,7 +280,7 @@ const CameraViewer: React.FC<CameraViewerProps> = ({
             if (imgRef.current.naturalWidth === 0 || imgRef.current.naturalHeight === 0) {
                 console.error('❌ Imagen MJPEG no cargada completamente');
                 alert('La imagen de la cámara no está lista. Espera un momento e intenta de nuevo.');
-                return;
+                return null;
             }
             console.log('📸 Capturando desde MJPEG:', {
                 width: imgRef.current.naturalWidth,
@@ -284,7 +290,7 @@ const CameraViewer: React.FC<CameraViewerProps> = ({
             if (videoRef.current.readyState < 2) { // HAVE_CURRENT_DATA
                 console.error('❌ Video no está listo');
                 alert('El video no está listo. Espera un momento e intenta de nuevo.');
-                return;
+                return null;
             }
             console.log('📸 Capturando desde video:', {
                 readyState: videoRef.current.readyState,
@@ -297,7 +303,7 @@ const CameraViewer: React.FC<CameraViewerProps> = ({
         const context = canvasRef.current.getContext('2d');
         if (!context) {
             setIsProcessing(false);
-            return;
+            return null;
         }
 
         try {
@@ -313,6 +319,8 @@ const CameraViewer: React.FC<CameraViewerProps> = ({
                 cameraId: cameraId,
                 ubicacion: ubicacion
             });
+            const nextCaptureMs: number | null = result.data?.next_capture_ms ?? null;
+            setSuggestedMs(nextCaptureMs);
 
             if (result.success && result.data.faces.length > 0) {
                 const faces: FaceResult[] = result.data.faces;
@@ -343,11 +351,14 @@ const CameraViewer: React.FC<CameraViewerProps> = ({
                 setRecognizedName("Desconocido");
                 clearBoundingBoxes();
             }
-        } catch (error) {
+            return nextCaptureMs;
+        } catch (error: any) {
             console.error('Error en reconocimiento:', error);
             setRecognitionResult(null);
             setRecognizedName("Desconocido");
             clearBoundingBoxes();
+            // Servidor saturado (429/503): esperar lo que indica Retry-After
+            return error?.nextCaptureMs ?? null;
         } finally {
             setIsProcessing(false);
         }
@@ -390,26 +401,33 @@ const CameraViewer: React.FC<CameraViewerProps> = ({
     }, []);
 
     // Funciones para reconocimiento en tiempo real
+    // El próximo frame se programa cuando termina el anterior: con intervalo
+    // adaptativo se usa el sugerido por el backend, si no el elegido
+    const runRealTimeCapture = async () => {
+        const nextCaptureMs = await captureAndRecognize();
+        if (!realTimeActiveRef.current) return;
+
+        const delay = adaptiveInterval && nextCaptureMs ? nextCaptureMs : intervalSeconds * 1000;
+        intervalRef.current = window.setTimeout(runRealTimeCapture, delay);
+    };
+
     const startRealTimeRecognition = () => {
         if (intervalRef.current) {
-            clearInterval(intervalRef.current);
+            clearTimeout(intervalRef.current);
         }
 
         setIsRealTimeActive(true);
+        realTimeActiveRef.current = true;
         
         // Ejecutar inmediatamente la primera vez
-        captureAndRecognize();
-        
-        // Configurar intervalo
-        intervalRef.current = window.setInterval(() => {
-            captureAndRecognize();
-        }, intervalSeconds * 1000);
+        runRealTimeCapture();
     };
 
     const stopRealTimeRecognition = () => {
         console.log('⏹ Deteniendo reconocimiento en tiempo real');
+        realTimeActiveRef.current = false;
         if (intervalRef.current) {
-            clearInterval(intervalRef.current);
+            clearTimeout(intervalRef.current);
             intervalRef.current = null;
         }
         setIsRealTimeActive(false);
@@ -420,8 +438,9 @@ const CameraViewer: React.FC<CameraViewerProps> = ({
     // Limpiar intervalo al desmontar componente
     useEffect(() => {
         return () => {
+            realTimeActiveRef.current = false;
             if (intervalRef.current) {
-                clearInterval(intervalRef.current);
+                clearTimeout(intervalRef.current);
                 intervalRef.current = null;
             }
         };
@@ -444,6 +463,9 @@ const CameraViewer: React.FC<CameraViewerProps> = ({
                     <p>Modo: {useMjpeg ? 'MJPEG (img tag)' : 'Stream de video'}</p>
                 )}
                 {isProcessing && <p>⏳ Procesando...</p>}
+                {isRealTimeActive && adaptiveInterval && suggestedMs !== null && (
+                    <p>Próxima captura en {(suggestedMs / 1000).toFixed(1)} s (sugerido por el servidor)</p>
+                )}
             </div>
 
             <div className="camera-container" style={{ position: 'relative', width: videoWidth, height: videoHeight }}>
@@ -507,6 +529,17 @@ const CameraViewer: React.FC<CameraViewerProps> = ({
                         style={{ width: '60px', marginLeft: '10px', marginRight: '10px' }}
                     />
                     
+                    <label htmlFor="adaptive-interval" style={{ marginRight: '10px' }}>
+                        <input
+                            id="adaptive-interval"
+                            type="checkbox"
+                            checked={adaptiveInterval}
+                            onChange={(e) => setAdaptiveInterval(e.target.checked)}
+                            disabled={isRealTimeActive}
+                        />
+                        Adaptativo
+                    </label>
+                    
                     <button
                         onClick={isRealTimeActive ? stopRealTimeRecognition : startRealTimeRecognition}
                         disabled={!isConnected}
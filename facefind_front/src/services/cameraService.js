@@ -243,7 +243,15 @@ export const detectUSBCameras = async () => {
 
 /**
  * Obtiene la URL del stream de video de una cámara
+ * @param {number} cameraId - ID de la cámara
+ * @param {object} options - Límites opcionales (maxWidth, fps, quality); sin ellos
+ *                           el backend usa la resolución y fps de la cámara
  */
-export const getStreamUrl = (cameraId) => {
-    return `${API_URL}/cameras/${cameraId}/stream`;
+export const getStreamUrl = (cameraId, options = {}) => {
+    const params = new URLSearchParams();
+    if (options.maxWidth) params.set('max_width', options.maxWidth);
+    if (options.fps) params.set('fps', options.fps);
+    if (options.quality) params.set('quality', options.quality);
+    const query = params.toString();
+    return `${API_URL}/cameras/${cameraId}/stream${query ? `?${query}` : ''}`;
 };
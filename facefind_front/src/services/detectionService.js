@@ -44,12 +44,17 @@ export const detectFaces = async (imageBase64, options = {}) => {
         const data = await response.json();
 
         if (!response.ok) {
-            throw new Error(data.error || 'Error en detección de rostros');
+            const error = new Error(data.error || 'Error en detección de rostros');
+            // Servidor saturado (429/503): cuándo conviene mandar el próximo frame
+            error.status = response.status;
+            error.nextCaptureMs = data.next_capture_ms ?? null;
+            throw error;
         }
 
         console.log('✅ Detección completada:', {
             rostros: data.data?.faces_detected || 0,
-            timestamp: data.data?.timestamp
+            timestamp: data.data?.timestamp,
+            proximaCapturaMs: data.data?.next_capture_ms
         });
 
         return data;
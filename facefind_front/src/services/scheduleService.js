@@ -1,81 +1,67 @@
 /**
- * Servicio Mock para gestión de horarios de alertas
- * Simula operaciones de backend almacenando datos en localStorage
+ * Schedule Service - Servicio para gestión de horarios de alertas
+ * Los horarios viven en el backend (tabla HorarioAlerta): la detección los
+ * consulta para no procesar cámaras fuera de horario.
  */
 
-const STORAGE_KEY = 'alert_schedules';
-const LOGS_KEY = 'alert_logs_off_hours';
+const API_URL = 'http://localhost:5000';
 
-// Horario por defecto: 24/7
-const DEFAULT_SCHEDULE = {
-  id: 'default',
-  name: 'Horario por Defecto',
-  cameraId: null, // null significa global
-  days: {
-    monday: { enabled: true, slots: [{ start: '00:00', end: '23:59' }] },
-    tuesday: { enabled: true, slots: [{ start: '00:00', end: '23:59' }] },
-    wednesday: { enabled: true, slots: [{ start: '00:00', end: '23:59' }] },
-    thursday: { enabled: true, slots: [{ start: '00:00', end: '23:59' }] },
-    friday: { enabled: true, slots: [{ start: '00:00', end: '23:59' }] },
-    saturday: { enabled: true, slots: [{ start: '00:00', end: '23:59' }] },
-    sunday: { enabled: true, slots: [{ start: '00:00', end: '23:59' }] }
-  },
-  exceptions: [],
-  criticalOverride: false, // Si es true, las alertas críticas ignoran el horario
-  createdAt: new Date().toISOString(),
-  updatedAt: new Date().toISOString()
+const request = async (path, options = {}, errorMessage = 'Error en horarios') => {
+  const response = await fetch(`${API_URL}/schedules${path}`, {
+    headers: {
+      'Content-Type': 'application/json',
+    },
+    ...options,
+  });
+
+  const data = await response.json();
+
+  if (!response.ok) {
+    throw new Error(data.error || errorMessage);
+  }
+
+  return data;
 };
 
 /**
  * Obtener todos los horarios configurados
  */
-export const getSchedules = () => {
+export const getSchedules = async () => {
   try {
-    const data = localStorage.getItem(STORAGE_KEY);
-    if (!data) {
-      // Inicializar con horario por defecto
-      const defaultSchedules = [DEFAULT_SCHEDULE];
-      localStorage.setItem(STORAGE_KEY, JSON.stringify(defaultSchedules));
-      return defaultSchedules;
-    }
-    return JSON.parse(data);
+    const data = await request('/', { method: 'GET' }, 'Error al obtener horarios');
+    return data.data;
   } catch (error) {
     console.error('Error al obtener horarios:', error);
-    return [DEFAULT_SCHEDULE];
+    return [];
   }
 };
 
 /**
  * Obtener horario por ID
  */
-export const getScheduleById = (scheduleId) => {
-  const schedules = getSchedules();
+export const getScheduleById = async (scheduleId) => {
+  const schedules = await getSchedules();
   return schedules.find(s => s.id === scheduleId);
 };
 
 /**
- * Obtener horario por cámara
+ * Obtener horario por cámara (o el global si la cámara no tiene uno propio)
  */
-export const getScheduleByCamera = (cameraId) => {
-  const schedules = getSchedules();
+export const getScheduleByCamera = async (cameraId) => {
+  const schedules = await getSchedules();
   return schedules.find(s => s.cameraId === cameraId) || schedules.find(s => s.cameraId === null);
 };
 
 /**
  * Crear nuevo horario
  */
-export const createSchedule = (scheduleData) => {
+export const createSchedule = async (scheduleData) => {
   try {
-    const schedules = getSchedules();
-    const newSchedule = {
-      ...scheduleData,
-      id: `schedule_${Date.now()}`,
-      createdAt: new Date().toISOString(),
-      updatedAt: new Date().toISOString()
-    };
-    schedules.push(newSchedule);
-    localStorage.setItem(STORAGE_KEY, JSON.stringify(schedules));
-    return { success: true, schedule: newSchedule };
+    const data = await request('/', {
+      method: 'POST',
+      body: JSON.stringify(scheduleData),
+    }, 'Error al crear horario');
+    return { success: true, schedule: data.data };
   } catch (error) {
     console.error('Error al crear horario:', error);
     return { success: false, error: error.message };
@@ -85,23 +71,14 @@ export const createSchedule = (scheduleData) => {
 /**
  * Actualizar horario existente
  */
-export const updateSchedule = (scheduleId, scheduleData) => {
+export const updateSchedule = async (scheduleId, scheduleData) => {
   try {
-    const schedules = getSchedules();
-    const index = schedules.findIndex(s => s.id === scheduleId);
-    
-    if (index === -1) {
-      return { success: false, error: 'Horario no encontrado' };
-    }
-    
-    schedules[index] = {
-      ...schedules[index],
-      ...scheduleData,
-      updatedAt: new Date().toISOString()
-    };
-    
-    localStorage.setItem(STORAGE_KEY, JSON.stringify(schedules));
-    return { success: true, schedule: schedules[index] };
+    const { id, createdAt, updatedAt, ...fields } = scheduleData;
+    const data = await request(`/${scheduleId}`, {
+      method: 'PUT',
+      body: JSON.stringify(fields),
+    }, 'Error al actualizar horario');
+    return { success: true, schedule: data.data };
   } catch (error) {
     console.error('Error al actualizar horario:', error);
     return { success: false, error: error.message };
@@ -111,16 +88,9 @@ export const updateSchedule = (scheduleId, scheduleData) => {
 /**
  * Eliminar horario
  */
-export const deleteSchedule = (scheduleId) => {
+export const deleteSchedule = async (scheduleId) => {
   try {
-    const schedules = getSchedules();
-    const filtered = schedules.filter(s => s.id !== scheduleId);
-    
-    if (filtered.length === schedules.length) {
-      return { success: false, error: 'Horario no encontrado' };
-    }
-    
-    localStorage.setItem(STORAGE_KEY, JSON.stringify(filtered));
+    await request(`/${scheduleId}`, { method: 'DELETE' }, 'Error al eliminar horario');
     return { success: true };
   } catch (error) {
     console.error('Error al eliminar horario:', error);
@@ -129,165 +99,71 @@ export const deleteSchedule = (scheduleId) => {
 };
 
 /**
- * Verificar si la hora actual está dentro del horario permitido
+ * Estado actual de una cámara según su horario
+ * mode: 'active' | 'critical_only' | 'off_hours'
  */
-export const isWithinSchedule = (scheduleId, dateTime = new Date(), isCritical = false) => {
-  const schedule = getScheduleById(scheduleId);
-  
-  if (!schedule) {
-    return true; // Si no hay horario, permitir
-  }
-  
-  // Si es crítico y el override está activo, permitir
-  if (isCritical && schedule.criticalOverride) {
-    return true;
-  }
-  
-  const dayNames = ['sunday', 'monday', 'tuesday', 'wednesday', 'thursday', 'friday', 'saturday'];
-  const dayName = dayNames[dateTime.getDay()];
-  const daySchedule = schedule.days[dayName];
-  
-  if (!daySchedule || !daySchedule.enabled) {
-    return false;
-  }
-  
-  const currentTime = dateTime.getHours() * 60 + dateTime.getMinutes();
-  
-  // Verificar si está en alguna franja horaria
-  const isInSlot = daySchedule.slots.some(slot => {
-    const [startHour, startMin] = slot.start.split(':').map(Number);
-    const [endHour, endMin] = slot.end.split(':').map(Number);
-    const startTime = startHour * 60 + startMin;
-    const endTime = endHour * 60 + endMin;
-    
-    return currentTime >= startTime && currentTime <= endTime;
-  });
-  
-  if (isInSlot) {
-    return true;
-  }
-  
-  // Verificar excepciones
-  const dateStr = dateTime.toISOString().split('T')[0];
-  const exception = schedule.exceptions.find(ex => ex.date === dateStr);
-  
-  if (exception) {
-    return exception.enabled;
-  }
-  
-  return false;
+export const getCameraScheduleStatus = async (cameraId) => {
+  const data = await request(`/cameras/${cameraId}/status`, { method: 'GET' }, 'Error al consultar horario');
+  return data.data;
 };
 
 /**
- * Agregar excepción a un horario
+ * Verificar si la cámara está en horario ahora (lo decide el backend)
  */
-export const addException = (scheduleId, exceptionData) => {
+export const isWithinSchedule = async (cameraId, isCritical = false) => {
   try {
-    const schedules = getSchedules();
-    const schedule = schedules.find(s => s.id === scheduleId);
-    
-    if (!schedule) {
-      return { success: false, error: 'Horario no encontrado' };
-    }
-    
-    if (!schedule.exceptions) {
-      schedule.exceptions = [];
-    }
-    
-    // Verificar si ya existe una excepción para esa fecha
-    const existingIndex = schedule.exceptions.findIndex(ex => ex.date === exceptionData.date);
-    
-    if (existingIndex !== -1) {
-      schedule.exceptions[existingIndex] = exceptionData;
-    } else {
-      schedule.exceptions.push(exceptionData);
-    }
-    
-    schedule.updatedAt = new Date().toISOString();
-    localStorage.setItem(STORAGE_KEY, JSON.stringify(schedules));
-    
-    return { success: true, schedule };
+    const status = await getCameraScheduleStatus(cameraId);
+    return status.mode === 'active' || (isCritical && status.mode === 'critical_only');
   } catch (error) {
-    console.error('Error al agregar excepción:', error);
-    return { success: false, error: error.message };
+    console.error('Error al verificar horario:', error);
+    return true; // Si no se puede consultar, permitir
   }
 };
 
 /**
- * Eliminar excepción
+ * Agregar excepción a un horario (reemplaza la de la misma fecha)
  */
-export const removeException = (scheduleId, date) => {
+export const addException = async (scheduleId, exceptionData) => {
   try {
-    const schedules = getSchedules();
-    const schedule = schedules.find(s => s.id === scheduleId);
-    
-    if (!schedule) {
-      return { success: false, error: 'Horario no encontrado' };
-    }
-    
-    schedule.exceptions = schedule.exceptions.filter(ex => ex.date !== date);
-    schedule.updatedAt = new Date().toISOString();
-    
-    localStorage.setItem(STORAGE_KEY, JSON.stringify(schedules));
-    return { success: true, schedule };
+    const data = await request(`/${scheduleId}/exceptions`, {
+      method: 'POST',
+      body: JSON.stringify(exceptionData),
+    }, 'Error al agregar excepción');
+    return { success: true, schedule: data.data };
   } catch (error) {
-    console.error('Error al eliminar excepción:', error);
+    console.error('Error al agregar excepción:', error);
     return { success: false, error: error.message };
   }
 };
 
 /**
- * Registrar log de alerta fuera de horario
+ * Eliminar excepción
  */
-export const logOffHoursAlert = (logData) => {
+export const removeException = async (scheduleId, date) => {
   try {
-    const logs = getOffHoursLogs();
-    const newLog = {
-      ...logData,
-      id: `log_${Date.now()}`,
-      timestamp: new Date().toISOString()
-    };
-    logs.unshift(newLog); // Agregar al inicio
-    
-    // Mantener solo los últimos 1000 logs
-    if (logs.length > 1000) {
-      logs.splice(1000);
-    }
-    
-    localStorage.setItem(LOGS_KEY, JSON.stringify(logs));
-    return { success: true, log: newLog };
+    const data = await request(`/${scheduleId}/exceptions/${date}`, {
+      method: 'DELETE',
+    }, 'Error al eliminar excepción');
+    return { success: true, schedule: data.data };
   } catch (error) {
-    console.error('Error al registrar log:', error);
+    console.error('Error al eliminar excepción:', error);
     return { success: false, error: error.message };
   }
 };
 
 /**
- * Obtener logs de alertas fuera de horario
+ * Obtener logs de alertas fuera de horario (los registra la detección)
  */
-export const getOffHoursLogs = (filters = {}) => {
+export const getOffHoursLogs = async (filters = {}) => {
   try {
-    const data = localStorage.getItem(LOGS_KEY);
-    let logs = data ? JSON.parse(data) : [];
-    
-    // Aplicar filtros
-    if (filters.cameraId) {
-      logs = logs.filter(log => log.cameraId === filters.cameraId);
-    }
-    
-    if (filters.startDate) {
-      logs = logs.filter(log => new Date(log.timestamp) >= new Date(filters.startDate));
-    }
-    
-    if (filters.endDate) {
-      logs = logs.filter(log => new Date(log.timestamp) <= new Date(filters.endDate));
-    }
-    
-    if (filters.isCritical !== undefined) {
-      logs = logs.filter(log => log.isCritical === filters.isCritical);
-    }
-    
-    return logs;
+    const params = new URLSearchParams();
+    if (filters.cameraId) params.append('cameraId', filters.cameraId);
+    if (filters.startDate) params.append('startDate', filters.startDate);
+    if (filters.endDate) params.append('endDate', filters.endDate);
+    if (filters.isCritical !== undefined) params.append('isCritical', filters.isCritical);
+
+    const data = await request(`/off-hours-logs?${params.toString()}`, { method: 'GET' }, 'Error al obtener logs');
+    return data.data;
   } catch (error) {
     console.error('Error al obtener logs:', error);
     return [];
@@ -297,16 +173,10 @@ export const getOffHoursLogs = (filters = {}) => {
 /**
  * Limpiar logs antiguos
  */
-export const clearOldLogs = (daysToKeep = 30) => {
+export const clearOldLogs = async (daysToKeep = 30) => {
   try {
-    const logs = getOffHoursLogs();
-    const cutoffDate = new Date();
-    cutoffDate.setDate(cutoffDate.getDate() - daysToKeep);
-    
-    const filtered = logs.filter(log => new Date(log.timestamp) >= cutoffDate);
-    localStorage.setItem(LOGS_KEY, JSON.stringify(filtered));
-    
-    return { success: true, removedCount: logs.length - filtered.length };
+    const data = await request(`/off-hours-logs?days=${daysToKeep}`, { method: 'DELETE' }, 'Error al limpiar logs');
+    return { success: true, removedCount: data.removedCount };
   } catch (error) {
     console.error('Error al limpiar logs:', error);
     return { success: false, error: error.message };
@@ -316,42 +186,10 @@ export const clearOldLogs = (daysToKeep = 30) => {
 /**
  * Obtener estadísticas de logs
  */
-export const getLogsStatistics = () => {
+export const getLogsStatistics = async () => {
   try {
-    const logs = getOffHoursLogs();
-    
-    const stats = {
-      total: logs.length,
-      byCritical: {
-        critical: logs.filter(l => l.isCritical).length,
-        normal: logs.filter(l => !l.isCritical).length
-      },
-      byCamera: {},
-      last24Hours: 0,
-      last7Days: 0,
-      last30Days: 0
-    };
-    
-    const now = new Date();
-    const day24Ago = new Date(now - 24 * 60 * 60 * 1000);
-    const days7Ago = new Date(now - 7 * 24 * 60 * 60 * 1000);
-    const days30Ago = new Date(now - 30 * 24 * 60 * 60 * 1000);
-    
-    logs.forEach(log => {
-      // Por cámara
-      if (!stats.byCamera[log.cameraId]) {
-        stats.byCamera[log.cameraId] = 0;
-      }
-      stats.byCamera[log.cameraId]++;
-      
-      // Por tiempo
-      const logDate = new Date(log.timestamp);
-      if (logDate >= day24Ago) stats.last24Hours++;
-      if (logDate >= days7Ago) stats.last7Days++;
-      if (logDate >= days30Ago) stats.last30Days++;
-    });
-    
-    return stats;
+    const data = await request('/off-hours-logs/stats', { method: 'GET' }, 'Error al obtener estadísticas');
+    return data.data;
   } catch (error) {
     console.error('Error al obtener estadísticas:', error);
     return null;
@@ -365,10 +203,10 @@ export default {
   createSchedule,
   updateSchedule,
   deleteSchedule,
+  getCameraScheduleStatus,
   isWithinSchedule,
   addException,
   removeException,
-  logOffHoursAlert,
   getOffHoursLogs,
   clearOldLogs,
   getLogsStatistics
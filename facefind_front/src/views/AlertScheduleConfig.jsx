@@ -47,20 +47,16 @@ const AlertScheduleConfig = () => {
   const loadData = async () => {
     try {
       // Cargar horarios
-      const loadedSchedules = getSchedules();
+      const loadedSchedules = await getSchedules();
       setSchedules(loadedSchedules);
       
       if (loadedSchedules.length > 0) {
         setSelectedScheduleId(loadedSchedules[0].id);
       }
 
-      // Cargar cámaras (simulado)
-      const mockCameras = [
-        { id: 'cam1', nombre: 'Cámara Entrada Principal', ubicacion: 'Entrada' },
-        { id: 'cam2', nombre: 'Cámara Estacionamiento', ubicacion: 'Exterior' },
-        { id: 'cam3', nombre: 'Cámara Recepción', ubicacion: 'Interior' }
-      ];
-      setCameras(mockCameras);
+      // Cargar cámaras
+      const response = await getAllCameras();
+      setCameras(response.data || []);
     } catch (error) {
       console.error('Error al cargar datos:', error);
       showMessage('Error al cargar datos', 'error');
@@ -72,10 +68,19 @@ const AlertScheduleConfig = () => {
     setTimeout(() => setMessage(null), 3000);
   };
 
-  const handleCreateNewSchedule = () => {
+  const handleCreateNewSchedule = async () => {
+    // Solo puede haber un horario global: si ya existe, el nuevo va a la
+    // primera cámara que todavía no tiene horario propio
+    const hasGlobal = schedules.some(s => s.cameraId === null);
+    const freeCamera = cameras.find(c => !schedules.some(s => s.cameraId === c.id));
+    if (hasGlobal && !freeCamera) {
+      showMessage('Todas las cámaras ya tienen horario', 'error');
+      return;
+    }
+
     const newSchedule = {
       name: 'Nuevo Horario',
-      cameraId: null,
+      cameraId: hasGlobal ? freeCamera.id : null,
       days: {
         monday: { enabled: true, slots: [{ start: '09:00', end: '17:00' }] },
         tuesday: { enabled: true, slots: [{ start: '09:00', end: '17:00' }] },
@@ -89,34 +94,32 @@ const AlertScheduleConfig = () => {
       criticalOverride: true
     };
 
-    const result = createSchedule(newSchedule);
+    const result = await createSchedule(newSchedule);
     if (result.success) {
       setSchedules([...schedules, result.schedule]);
       setSelectedScheduleId(result.schedule.id);
       showMessage('Horario creado exitosamente');
     } else {
-      showMessage('Error al crear horario', 'error');
+      showMessage(result.error || 'Error al crear horario', 'error');
     }
   };
 
-  const handleSaveSchedule = () => {
+  const handleSaveSchedule = async () => {
     if (!currentSchedule) return;
 
     setIsSaving(true);
-    const result = updateSchedule(currentSchedule.id, currentSchedule);
-    
-    setTimeout(() => {
-      setIsSaving(false);
-      if (result.success) {
-        const updatedSchedules = schedules.map(s => 
-          s.id === currentSchedule.id ? result.schedule : s
-        );
-        setSchedules(updatedSchedules);
-        showMessage('Horario guardado exitosamente');
-      } else {
-        showMessage('Error al guardar horario', 'error');
-      }
-    }, 500);
+    const result = await updateSchedule(currentSchedule.id, currentSchedule);
+    setIsSaving(false);
+
+    if (result.success) {
+      const updatedSchedules = schedules.map(s => 
+        s.id === currentSchedule.id ? result.schedule : s
+      );
+      setSchedules(updatedSchedules);
+      showMessage('Horario guardado exitosamente');
+    } else {
+      showMessage(result.error || 'Error al guardar horario', 'error');
+    }
   };
 
   const handleDayUpdate = (dayName, daySchedule) => {
@@ -129,8 +132,8 @@ const AlertScheduleConfig = () => {
     });
   };
 
-  const handleAddException = (exceptionData) => {
-    const result = addException(currentSchedule.id, exceptionData);
+  const handleAddException = async (exceptionData) => {
+    const result = await addException(currentSchedule.id, exceptionData);
     if (result.success) {
       setCurrentSchedule(result.schedule);
       const updatedSchedules = schedules.map(s => 
@@ -143,8 +146,8 @@ const AlertScheduleConfig = () => {
     }
   };
 
-  const handleRemoveException = (date) => {
-    const result = removeException(currentSchedule.id, date);
+  const handleRemoveException = async (date) => {
+    const result = await removeException(currentSchedule.id, date);
     if (result.success) {
       setCurrentSchedule(result.schedule);
       const updatedSchedules = schedules.map(s => 
@@ -167,7 +170,7 @@ const AlertScheduleConfig = () => {
   const handleCameraChange = (cameraId) => {
     setCurrentSchedule({
       ...currentSchedule,
-      cameraId: cameraId || null
+      cameraId: cameraId ? Number(cameraId) : null
     });
   };
 